@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 
 from pathlib import Path
 import os
+import json
 from datetime import timedelta
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -59,6 +60,7 @@ MIDDLEWARE = [
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "simple_history.middleware.HistoryRequestMiddleware",
+    "warehousing.slow_queries.SlowQueryMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -98,6 +100,22 @@ DATABASES = {
     }
 }
 
+# Slow-query capture (warehousing.slow_queries). Statements slower than this are
+# fingerprinted into warehousing.SlowQuery with an EXPLAIN plan; 0 disables capture.
+SLOW_QUERY_THRESHOLD_MS = int(os.environ.get("SLOW_QUERY_THRESHOLD_MS", "0"))
+
+# Cold-storage root for archive_ledger (Parquet or gzip NDJSON files)
+LEDGER_ARCHIVE_DIR = Path(os.environ.get("LEDGER_ARCHIVE_DIR", BASE_DIR / "archive" / "ledger"))
+
+# Change feed (ledger/changes) and reorder cursor: rows younger than this are held back, on top
+# of rows committed after the oldest running transaction (services.settled_ledger_rows).
+LEDGER_FEED_SETTLE_SECONDS = int(os.environ.get("LEDGER_FEED_SETTLE_SECONDS", "5"))
+
+# Outbox delivery targets for outbox_dispatch (in-process handlers register in code).
+# OUTBOX_WEBHOOKS: JSON list of {"url": ..., "topics": ["ledger.*"], "secret": ...}
+OUTBOX_WEBHOOKS = json.loads(os.environ.get("OUTBOX_WEBHOOKS", "[]"))
+OUTBOX_FILE_SINK = os.environ.get("OUTBOX_FILE_SINK") or None
+
 # Django REST Framework
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
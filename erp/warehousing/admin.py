@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Warehouse, Location, StockLedger, AdjustmentRequest
+from .models import Warehouse, Location, StockLedger, StockLedgerArchive, LedgerCode, LedgerMemo, PostingBatch, AdjustmentRequest, SlowQuery, LedgerDailyRollup, ItemVelocity, StockAgingLayer, StockBalance, ItemAvailability, StockReservation, ReorderSetting, Alert, LedgerCursor, LedgerView, OutboxEvent, GoodsReceipt, GoodsReceiptLine, PickList, PickListLine, CycleCount, CycleCountLine, TransferOrder, TransferOrderLine, TransferReceipt, InTransitBalance, StockLot, LotBalance, SerialUnit, SerialMovement
 
 
 @admin.register(Warehouse)
@@ -11,7 +11,7 @@ class WarehouseAdmin(admin.ModelAdmin):
 
 @admin.register(Location)
 class LocationAdmin(admin.ModelAdmin):
-    list_display = ("warehouse", "type", "subtype", "display_name", "code", "system_managed", "status", "updated_at")
+    list_display = ("warehouse", "type", "subtype", "display_name", "code", "pick_sequence", "capacity", "system_managed", "status", "updated_at")
     search_fields = ("display_name", "code")
     list_filter = ("type", "status", "system_managed")
 
@@ -22,6 +22,46 @@ class StockLedgerAdmin(admin.ModelAdmin):
     search_fields = ("item__sku", "item__name", "memo", "ref_id")
     list_filter = ("movement_type", "warehouse")
     date_hierarchy = "ts"
+    raw_id_fields = ("batch",)
+
+    # Append-only: rows are posted by the services, never edited here
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(PostingBatch)
+class PostingBatchAdmin(admin.ModelAdmin):
+    list_display = ("id", "created_at", "user", "rows", "ref_model", "ref_id", "source", "remote_addr")
+    search_fields = ("ref_id", "ref_model", "source", "user__username")
+    list_filter = ("ref_model",)
+    date_hierarchy = "created_at"
+
+
+@admin.register(LedgerCode)
+class LedgerCodeAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "value")
+    search_fields = ("value",)
+    list_filter = ("kind",)
+
+
+@admin.register(LedgerMemo)
+class LedgerMemoAdmin(admin.ModelAdmin):
+    list_display = ("id", "text")
+    search_fields = ("text",)
+
+
+@admin.register(StockLedgerArchive)
+class StockLedgerArchiveAdmin(admin.ModelAdmin):
+    list_display = ("archive", "ledger_id", "ts", "warehouse_id", "location_id", "item_id", "qty_delta", "movement_type")
+    search_fields = ("archive", "ref_id", "memo")
+    list_filter = ("archive", "movement_type")
+    date_hierarchy = "ts"
 
 
 @admin.register(AdjustmentRequest)
@@ -29,3 +69,227 @@ class AdjustmentRequestAdmin(admin.ModelAdmin):
     list_display = ("number", "warehouse", "type", "item", "qty", "status", "requested_by", "requested_at")
     search_fields = ("number", "item__sku", "item__name")
     list_filter = ("type", "status", "warehouse")
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ("fingerprint", "caller", "calls", "max_ms", "total_ms", "last_seen")
+    search_fields = ("normalized_sql", "caller", "context")
+    readonly_fields = ("fingerprint", "normalized_sql", "sample_sql", "sample_params", "caller", "context", "calls", "last_ms", "max_ms", "total_ms", "explain_plan", "first_seen", "last_seen")
+    ordering = ("-total_ms",)
+
+
+@admin.register(LedgerDailyRollup)
+class LedgerDailyRollupAdmin(admin.ModelAdmin):
+    list_display = ("day", "warehouse", "movement_type", "location_subtype", "entries", "qty_in", "qty_out")
+    list_filter = ("warehouse", "movement_type", "location_subtype")
+    date_hierarchy = "day"
+
+
+@admin.register(ItemVelocity)
+class ItemVelocityAdmin(admin.ModelAdmin):
+    list_display = ("warehouse", "item", "rank", "abc_class", "xyz_class", "outbound_qty", "avg_daily_qty", "days_of_cover", "computed_at")
+    search_fields = ("item__sku", "item__name")
+    list_filter = ("warehouse", "abc_class", "xyz_class")
+
+
+@admin.register(StockAgingLayer)
+class StockAgingLayerAdmin(admin.ModelAdmin):
+    list_display = ("warehouse", "item", "received_at", "qty_received", "qty_remaining", "source_ledger_id")
+    search_fields = ("item__sku", "item__name")
+    list_filter = ("warehouse",)
+    date_hierarchy = "received_at"
+
+
+@admin.register(StockBalance)
+class StockBalanceAdmin(admin.ModelAdmin):
+    list_display = ("warehouse", "location", "item", "qty", "reserved", "updated_at")
+    search_fields = ("item__sku", "item__name", "location__code")
+    list_filter = ("warehouse",)
+
+
+@admin.register(ItemAvailability)
+class ItemAvailabilityAdmin(admin.ModelAdmin):
+    list_display = ("item", "warehouse", "physical", "reserved", "pending", "damage", "lost", "other", "updated_at")
+    search_fields = ("item__sku", "item__name")
+    list_filter = ("warehouse",)
+
+
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ("id", "warehouse", "item", "location", "qty", "status", "expires_at", "ref_model", "ref_id", "created_at")
+    search_fields = ("ref_id", "item__sku")
+    list_filter = ("status", "warehouse")
+    raw_id_fields = ("item", "location")
+    readonly_fields = ("status", "closed_at")
+
+
+@admin.register(ReorderSetting)
+class ReorderSettingAdmin(admin.ModelAdmin):
+    list_display = ("warehouse", "item", "reorder_point", "max_qty", "active", "updated_at")
+    search_fields = ("item__sku", "item__name")
+    list_filter = ("warehouse", "active")
+    raw_id_fields = ("item",)
+
+
+@admin.register(Alert)
+class AlertAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "status", "warehouse", "item", "available", "reorder_point", "suggested_qty", "opened_at", "resolved_at")
+    search_fields = ("item__sku", "item__name")
+    list_filter = ("status", "kind", "warehouse")
+
+
+@admin.register(LedgerCursor)
+class LedgerCursorAdmin(admin.ModelAdmin):
+    list_display = ("name", "last_id", "updated_at")
+
+
+@admin.register(LedgerView)
+class LedgerViewAdmin(admin.ModelAdmin):
+    list_display = ("ledger_id", "ts", "warehouse", "location_code", "item_sku", "qty_delta", "qty_after", "movement_type", "ref_model", "ref_id", "username")
+    search_fields = ("item_sku", "item_name", "ref_id", "memo")
+    list_filter = ("warehouse", "movement_type")
+    date_hierarchy = "ts"
+
+
+class GoodsReceiptLineInline(admin.TabularInline):
+    model = GoodsReceiptLine
+    extra = 0
+    raw_id_fields = ("item",)
+    readonly_fields = ("line_no", "item", "qty")
+    can_delete = False
+
+
+@admin.register(GoodsReceipt)
+class GoodsReceiptAdmin(admin.ModelAdmin):
+    list_display = ("number", "warehouse", "reference", "line_count", "total_qty", "created_by", "created_at")
+    search_fields = ("number", "reference", "idempotency_key")
+    list_filter = ("warehouse",)
+    date_hierarchy = "created_at"
+    readonly_fields = ("number", "warehouse", "idempotency_key", "line_count", "total_qty", "created_by", "created_at")
+    inlines = [GoodsReceiptLineInline]
+
+    # Receipts are posted through services_grn so the ledger write happens with them
+    def has_add_permission(self, request):
+        return False
+
+
+class PickListLineInline(admin.TabularInline):
+    model = PickListLine
+    extra = 0
+    readonly_fields = ("seq", "location", "item", "qty", "picked_qty")
+    can_delete = False
+
+
+@admin.register(PickList)
+class PickListAdmin(admin.ModelAdmin):
+    list_display = ("number", "warehouse", "status", "ref_model", "ref_id", "created_by", "created_at", "confirmed_at")
+    search_fields = ("number", "ref_id")
+    list_filter = ("status", "warehouse")
+    readonly_fields = ("number", "warehouse", "status", "short", "created_by", "created_at", "confirmed_by", "confirmed_at")
+    inlines = [PickListLineInline]
+
+    # Generated and confirmed through services_pick so reservations and postings stay in step
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(CycleCount)
+class CycleCountAdmin(admin.ModelAdmin):
+    list_display = ("number", "warehouse", "status", "created_by", "created_at", "posted_by", "posted_at")
+    search_fields = ("number", "memo")
+    list_filter = ("status", "warehouse")
+    readonly_fields = ("number", "warehouse", "status", "locations", "created_by", "created_at", "posted_by", "posted_at")
+
+    # Counts are started and posted through services_count
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(CycleCountLine)
+class CycleCountLineAdmin(admin.ModelAdmin):
+    list_display = ("count", "location", "item", "expected", "counted", "variance")
+    search_fields = ("count__number", "item__sku", "location__code")
+    raw_id_fields = ("count", "location", "item")
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ("id", "topic", "warehouse", "aggregate_type", "aggregate_id", "created_at", "attempts", "delivered_at")
+    search_fields = ("topic", "aggregate_id", "last_error")
+    list_filter = ("topic", "warehouse")
+    readonly_fields = ("topic", "warehouse", "aggregate_type", "aggregate_id", "payload", "created_at", "attempts", "delivered_at", "last_error")
+
+
+class TransferOrderLineInline(admin.TabularInline):
+    model = TransferOrderLine
+    extra = 0
+    raw_id_fields = ("item",)
+    readonly_fields = ("line_no", "item", "qty_shipped", "qty_received")
+    can_delete = False
+
+
+class TransferReceiptInline(admin.TabularInline):
+    model = TransferReceipt
+    extra = 0
+    readonly_fields = ("idempotency_key", "line_count", "total_qty", "created_by", "created_at")
+    can_delete = False
+
+
+@admin.register(TransferOrder)
+class TransferOrderAdmin(admin.ModelAdmin):
+    list_display = ("number", "source_warehouse", "dest_warehouse", "status", "line_count", "total_qty", "created_at", "received_at")
+    search_fields = ("number", "reference", "idempotency_key")
+    list_filter = ("status", "source_warehouse", "dest_warehouse")
+    date_hierarchy = "created_at"
+    readonly_fields = ("number", "source_warehouse", "dest_warehouse", "from_location", "status", "idempotency_key", "line_count", "total_qty", "created_by", "created_at", "received_at")
+    inlines = [TransferOrderLineInline, TransferReceiptInline]
+
+    # Both legs are posted through services_transfer so ledger and in-transit balances stay in step
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(InTransitBalance)
+class InTransitBalanceAdmin(admin.ModelAdmin):
+    list_display = ("source_warehouse", "dest_warehouse", "item", "qty", "updated_at")
+    list_filter = ("source_warehouse", "dest_warehouse")
+    search_fields = ("item__sku",)
+    raw_id_fields = ("item",)
+
+
+@admin.register(StockLot)
+class StockLotAdmin(admin.ModelAdmin):
+    list_display = ("lot_number", "item", "expiry_date", "created_at")
+    search_fields = ("lot_number", "item__sku")
+    date_hierarchy = "expiry_date"
+    raw_id_fields = ("item",)
+
+
+@admin.register(LotBalance)
+class LotBalanceAdmin(admin.ModelAdmin):
+    list_display = ("warehouse", "location", "item", "lot", "expiry_date", "qty", "updated_at")
+    list_filter = ("warehouse",)
+    search_fields = ("item__sku", "lot__lot_number", "location__code")
+    raw_id_fields = ("location", "item", "lot")
+
+
+class SerialMovementInline(admin.TabularInline):
+    model = SerialMovement
+    extra = 0
+    readonly_fields = ("ts", "movement_type", "from_location", "to_location", "ref_model", "ref_id", "batch", "user")
+    can_delete = False
+
+
+@admin.register(SerialUnit)
+class SerialUnitAdmin(admin.ModelAdmin):
+    list_display = ("serial", "item", "warehouse", "location", "status", "lot", "updated_at")
+    list_filter = ("status", "warehouse")
+    search_fields = ("serial", "item__sku")
+    raw_id_fields = ("item", "location", "lot")
+    readonly_fields = ("warehouse", "location", "status", "created_at", "updated_at")
+    inlines = [SerialMovementInline]
+
+    # Units are created by receipts and moved by services_serials, together with their ledger rows
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,278 @@
+"""Compact column types for StockLedger.
+
+CodeField and MemoField keep a string attribute on the model but store the id of that string
+in a lookup table (LedgerCode per ``kind`` / LedgerMemo); "" is stored as 0 without a table
+row. New strings are interned when a row is saved, lookups (exact / in) resolve the string
+without creating it and never match when it is unknown. MilliQuantityField keeps a Decimal
+with three places on the model and stores integer milli-units (1.5 -> 1500), so SUM() runs on
+bigints; aggregates over it come back as Decimal again.
+
+Value -> id mappings are cached per process only once the transaction that read them has
+committed (a rolled-back insert must not leave a cached id behind); id -> value mappings are
+cached immediately since ids are never reused.
+"""
+import hashlib
+import threading
+from contextlib import ExitStack, contextmanager
+from decimal import ROUND_HALF_UP, Decimal
+
+from django import forms
+from django.apps import apps
+from django.core.management.color import no_style
+from django.db import IntegrityError, connections, models, router, transaction
+from django.db.models import Lookup
+from django.utils.functional import cached_property
+
+MILLI = Decimal("1000")
+PLACES = Decimal("0.001")
+
+
+def memo_digest(text: str) -> str:
+    # Same as md5(text) in PostgreSQL, which migration 0018 used to seed the table.
+    return hashlib.md5(text.encode("utf-8"), usedforsecurity=False).hexdigest()
+
+
+class Interner:
+    """Process-wide value <-> id cache for one lookup table (and kind)."""
+
+    _registry: dict[tuple, "Interner"] = {}
+    _registry_lock = threading.Lock()
+    MAX_CACHED = 50_000
+
+    def __init__(self, model_name: str, kind: str | None = None):
+        self.model_name = model_name
+        self.kind = kind
+        self._ids: dict[str, int] = {}
+        self._values: dict[int, str] = {}
+        self._local = threading.local()
+
+    @classmethod
+    def get(cls, model_name: str, kind: str | None = None) -> "Interner":
+        key = (model_name, kind)
+        with cls._registry_lock:
+            if key not in cls._registry:
+                cls._registry[key] = cls(model_name, kind)
+            return cls._registry[key]
+
+    @property
+    def model(self):
+        return apps.get_model("warehousing", self.model_name)
+
+    def _fetch(self, values) -> dict[str, int]:
+        if self.kind is not None:
+            # Code tables are tiny: load the whole kind at once.
+            return dict(self.model.objects.filter(kind=self.kind).values_list("value", "id"))
+        by_digest = {memo_digest(v): v for v in values}
+        return {by_digest[d]: i for d, i in self.model.objects.filter(digest__in=by_digest).values_list("digest", "id")}
+
+    def _create(self, values):
+        # Conflicts on the natural key only (a concurrent insert of the same string); any other
+        # violation, e.g. of the primary key, must not pass silently as "already there".
+        unique = ["kind", "value"] if self.kind is not None else ["digest"]
+
+        def insert():
+            if self.kind is not None:
+                objs = [self.model(kind=self.kind, value=v) for v in values]
+            else:
+                objs = [self.model(digest=memo_digest(v), text=v) for v in values]
+            with transaction.atomic():
+                self.model.objects.bulk_create(objs, update_conflicts=True, unique_fields=unique, update_fields=unique[-1:])
+
+        try:
+            insert()
+        except IntegrityError:
+            # The id sequence is behind the table (restored dump, reset_sequences in tests): move
+            # it past the existing rows once and retry.
+            connection = connections[router.db_for_write(self.model)]
+            statements = connection.ops.sequence_reset_sql(no_style(), [self.model])
+            if not statements:
+                raise
+            with connection.cursor() as cur:
+                for sql in statements:
+                    cur.execute(sql)
+            insert()
+
+    def _remember(self, found: dict[str, int]):
+        if len(self._values) > self.MAX_CACHED:
+            self._values.clear()
+            self._ids.clear()
+        self._values.update({i: v for v, i in found.items()})
+
+        def commit():
+            self._ids.update(found)
+
+        transaction.on_commit(commit, robust=True)
+
+    def ids(self, values, *, create: bool = False) -> dict[str, int]:
+        values = {v for v in values if v}
+        pending = getattr(self._local, "pending", None) or {}
+        out = {v: self._ids.get(v) or pending.get(v) for v in values}
+        missing = {v for v, i in out.items() if i is None}
+        if missing:
+            found = self._fetch(missing)
+            if create and not missing <= found.keys():
+                self._create(missing - found.keys())
+                found = self._fetch(missing)
+                if not missing <= found.keys():
+                    raise ValueError(f"Could not intern {self.kind or self.model_name} values {sorted(missing - found.keys())[:5]}")
+            self._remember(found)
+            out.update({v: found.get(v) for v in missing})
+        return out
+
+    def value(self, code: int) -> str:
+        if not code:
+            return ""
+        if code not in self._values:
+            if self.kind is not None:
+                rows = self.model.objects.filter(kind=self.kind).values_list("id", "value")
+            else:
+                rows = self.model.objects.filter(id=code).values_list("id", "text")
+            self._values.update(rows)
+            if code not in self._values:
+                raise ValueError(f"Unknown {self.kind or self.model_name} id {code}")
+        return self._values[code]
+
+    @contextmanager
+    def batch(self, values):
+        """Intern ``values`` once and serve them from memory until the block ends."""
+        previous = getattr(self._local, "pending", None)
+        self._local.pending = {**(previous or {}), **self.ids(values, create=True)}
+        try:
+            yield
+        finally:
+            self._local.pending = previous
+
+
+class InternedFieldMixin:
+    empty_strings_allowed = True  # an unset value defaults to "" (stored as 0)
+
+    def from_db_value(self, value, expression, connection):
+        return None if value is None else self.interner.value(value)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, str):
+            return value
+        return self.interner.value(int(value))
+
+    def get_prep_value(self, value):
+        # Lookups: resolve without interning; an unknown string matches nothing.
+        if value is None or isinstance(value, int):
+            return value
+        value = str(value)
+        if not value:
+            return 0
+        return self.interner.ids([value]).get(value) or -1
+
+    def get_db_prep_save(self, value, connection):
+        if value is not None and not isinstance(value, int):
+            value = str(value)
+            value = self.interner.ids([value], create=True)[value] if value else 0
+        return super().get_db_prep_save(value, connection)
+
+    @cached_property
+    def validators(self):
+        # The integer range validators of the storage type do not apply to the string value.
+        return [*self.default_validators, *self._validators]
+
+    def formfield(self, **kwargs):
+        return models.Field.formfield(self, **{"form_class": forms.CharField, **kwargs})
+
+
+class CodeField(InternedFieldMixin, models.SmallIntegerField):
+    """Short, low-cardinality string (movement type, ref model) stored as a LedgerCode id."""
+
+    def __init__(self, *args, kind: str, **kwargs):
+        self.kind = kind
+        super().__init__(*args, **kwargs)
+
+    @property
+    def interner(self) -> Interner:
+        return Interner.get("LedgerCode", self.kind)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs["kind"] = self.kind
+        return name, path, args, kwargs
+
+
+class MemoField(InternedFieldMixin, models.IntegerField):
+    """Free-text memo interned in LedgerMemo; repeated memos share one row."""
+
+    @property
+    def interner(self) -> Interner:
+        return Interner.get("LedgerMemo")
+
+
+class _InternedTextLookup(Lookup):
+    """Text search on an interned column: match the ids of lookup rows whose text matches."""
+    prepare_rhs = False
+    text_lookup = ""
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        field = self.lhs.output_field
+        table = field.interner.model.objects.all()
+        if getattr(field, "kind", None) is not None:
+            table = table.filter(kind=field.kind).filter(**{f"value__{self.text_lookup}": self.rhs})
+        else:
+            table = table.filter(**{f"text__{self.text_lookup}": self.rhs})
+        sub_sql, sub_params = table.values("id").query.get_compiler(connection=connection).as_sql()
+        return f"{lhs} IN ({sub_sql})", (*lhs_params, *sub_params)
+
+
+@CodeField.register_lookup
+@MemoField.register_lookup
+class InternedIContains(_InternedTextLookup):
+    lookup_name = "icontains"
+    text_lookup = "icontains"
+
+
+@CodeField.register_lookup
+@MemoField.register_lookup
+class InternedIStartsWith(_InternedTextLookup):
+    lookup_name = "istartswith"
+    text_lookup = "istartswith"
+
+
+@contextmanager
+def interned(objs, model=None):
+    """Intern every CodeField / MemoField value of ``objs`` with one lookup per field for the
+    duration of a bulk write (bulk_create would otherwise resolve them row by row)."""
+    objs = list(objs)
+    model = model or (type(objs[0]) if objs else None)
+    with ExitStack() as stack:
+        if model is not None:
+            for f in model._meta.concrete_fields:
+                if isinstance(f, InternedFieldMixin):
+                    stack.enter_context(f.interner.batch({str(getattr(o, f.attname) or "") for o in objs}))
+        yield
+
+
+class MilliQuantityField(models.BigIntegerField):
+    """Quantity with three decimal places stored as integer milli-units."""
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return None
+        return (Decimal(str(value)) / MILLI).quantize(PLACES)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, Decimal):
+            return value
+        try:
+            return Decimal(str(value))
+        except ArithmeticError:
+            raise ValueError(f"Invalid quantity {value!r}")
+
+    def get_prep_value(self, value):
+        value = models.Field.get_prep_value(self, value)
+        if value is None:
+            return None
+        return int((Decimal(str(value)) * MILLI).to_integral_value(rounding=ROUND_HALF_UP))
+
+    @cached_property
+    def validators(self):
+        return [*self.default_validators, *self._validators]
+
+    def formfield(self, **kwargs):
+        return models.Field.formfield(self, **{"form_class": forms.DecimalField, "decimal_places": 3, **kwargs})
@@ -0,0 +1,87 @@
+"""Append-only StockLedger and per-batch posting context.
+
+Ledger rows are only ever inserted. On PostgreSQL a row trigger (migration 0019) rejects
+UPDATE and DELETE on warehousing_stockledger and its partitions; in Python the model and its
+queryset refuse the same operations, so mistakes surface on every backend. Sanctioned
+maintenance (archiving, moving rows out of the default partition) runs inside
+ledger_maintenance(), which sets the transaction-local setting the trigger checks.
+
+Instead of a simple_history copy of every row, each posting writes one PostingBatch with the
+user and the request (or management command) it came from; rows point at it via ``batch``.
+"""
+import sys
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.db import connection, models, transaction
+from simple_history.models import HistoricalRecords
+
+MAINTENANCE_SETTING = "warehousing.ledger_maintenance"
+
+_state = threading.local()
+
+
+class LedgerAppendOnlyError(RuntimeError):
+    pass
+
+
+def maintenance_active() -> bool:
+    return getattr(_state, "depth", 0) > 0
+
+
+def check_writable(action: str):
+    if not maintenance_active():
+        raise LedgerAppendOnlyError(f"StockLedger is append-only: {action} is not allowed outside ledger_maintenance()")
+
+
+@contextmanager
+def ledger_maintenance():
+    """Allow UPDATE/DELETE of ledger rows for the duration of the block (one transaction)."""
+    with transaction.atomic():
+        _set_db_flag("on")
+        _state.depth = getattr(_state, "depth", 0) + 1
+        try:
+            yield
+        finally:
+            _state.depth -= 1
+            if not _state.depth:
+                _set_db_flag("off")
+
+
+def _set_db_flag(value: str):
+    if connection.vendor == "postgresql" and not connection.needs_rollback:
+        with connection.cursor() as cur:
+            cur.execute("SELECT set_config(%s, %s, true)", [MAINTENANCE_SETTING, value])
+
+
+class LedgerQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        check_writable("update()")
+        return super().update(**kwargs)
+
+    update.queryset_only = True
+
+    def delete(self):
+        check_writable("delete()")
+        return super().delete()
+
+    delete.queryset_only = True
+
+
+def request_context() -> dict:
+    """Where the current posting comes from: the HTTP request seen by simple_history's
+    HistoryRequestMiddleware, else the management command being run."""
+    request = getattr(HistoricalRecords.context, "request", None)
+    if request is not None:
+        user = getattr(request, "user", None)
+        return {
+            "user": user if getattr(user, "is_authenticated", False) else None,
+            "source": f"{request.method} {request.path}"[:200],
+            "remote_addr": request.META.get("REMOTE_ADDR") or None,
+            "user_agent": request.META.get("HTTP_USER_AGENT", "")[:255],
+        }
+    argv = sys.argv or [""]
+    if Path(argv[0]).name == "manage.py" and len(argv) > 1:
+        return {"user": None, "source": f"manage.py {argv[1]}"[:200], "remote_addr": None, "user_agent": ""}
+    return {"user": None, "source": "", "remote_addr": None, "user_agent": ""}
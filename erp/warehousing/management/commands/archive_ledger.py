@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from warehousing.services_archive import archive_ledger
+
+
+class Command(BaseCommand):
+    help = (
+        "Archive StockLedger rows older than --before into compressed files "
+        "and replace them with one OPENING_BALANCE row per (warehouse, location, item)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', required=True, help='Archive rows with ts before this local date (YYYY-MM-DD)')
+        parser.add_argument('--out-dir', default=None, help='Archive root directory (default settings.LEDGER_ARCHIVE_DIR or <BASE_DIR>/archive/ledger)')
+        parser.add_argument('--format', choices=['auto', 'parquet', 'ndjson'], default='auto', help='Parquet needs pyarrow; auto falls back to gzip NDJSON')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the rows that would be archived')
+
+    def handle(self, *args, **opts):
+        before = parse_date(opts['before'] or '')
+        if before is None:
+            raise CommandError("--before must be YYYY-MM-DD")
+        try:
+            res = archive_ledger(before=before, out_dir=opts['out_dir'], fmt=opts['format'], dry_run=opts['dry_run'])
+        except (ValueError, RuntimeError) as e:
+            raise CommandError(str(e))
+        if opts['dry_run'] or not res.get('path'):
+            self.stdout.write(f"{res['rows']} ledger rows before {res['cutoff']} (format={res['format']}); nothing written")
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {res['rows']} rows to {res['path']}; "
+            f"{res['opening_rows']} opening-balance rows posted"
+        ))
+        self.stdout.write("Tip: months that are now empty can be dropped with manage_ledger_partitions --detach-before YYYY-MM --drop")
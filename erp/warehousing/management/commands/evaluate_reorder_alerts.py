@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from warehousing.services_reorder import evaluate_all, evaluate_reorder
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-check reorder points for the (warehouse, item) pairs touched by ledger rows since the last run "
+        "and open/resolve stock alerts. Run every minute or so from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--full', action='store_true', help='Also check every active setting and open alert')
+
+    def handle(self, *args, **opts):
+        if opts['full']:
+            res = evaluate_all()
+            self.stdout.write(f"Full pass: checked {res['checked']}, opened {res['opened']}, updated {res['updated']}, resolved {res['resolved']}")
+        res = evaluate_reorder(batch_size=max(opts['batch_size'], 1))
+        self.stdout.write(
+            f"{res['rows']} ledger rows up to id {res['cursor']}: checked {res['checked']}, "
+            f"opened {res['opened']}, updated {res['updated']}, resolved {res['resolved']}"
+        )
+        self.stdout.write(self.style.SUCCESS("Reorder alerts evaluated"))
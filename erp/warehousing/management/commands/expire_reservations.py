@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from warehousing.services_reservation import expire_reservations, recount_reserved
+
+
+class Command(BaseCommand):
+    help = "Expire ACTIVE stock reservations past their expires_at (batched, safe to run alongside order capture)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--recount', action='store_true', help='Afterwards recompute reserved totals from active reservations')
+
+    def handle(self, *args, **opts):
+        expired = expire_reservations(batch_size=max(opts['batch_size'], 1))
+        self.stdout.write(f"Expired {expired} reservation(s)")
+        if opts['recount']:
+            recount_reserved()
+            self.stdout.write("Reserved totals recounted")
+        self.stdout.write(self.style.SUCCESS("Done"))
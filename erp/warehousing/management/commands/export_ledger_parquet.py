@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from warehousing.models import Warehouse
+from warehousing.services_export import export_dataset, CHUNK
+
+
+class Command(BaseCommand):
+    help = "Export StockLedger joined with item/location/warehouse as a Parquet dataset partitioned by warehouse and month."
+
+    def add_arguments(self, parser):
+        parser.add_argument('out_dir', help='Target directory (warehouse=<code>/month=YYYY-MM/part-0.parquet is created below it)')
+        parser.add_argument('--warehouse', action='append', default=[], help='Warehouse code (repeatable); default all')
+        parser.add_argument('--date-from', default=None, help='Include rows from this local date (YYYY-MM-DD)')
+        parser.add_argument('--date-to', default=None, help='Include rows up to and including this local date (YYYY-MM-DD)')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK, help=f'Rows per server-side fetch / record batch (default {CHUNK})')
+
+    def handle(self, *args, **opts):
+        date_from = parse_date(opts['date_from']) if opts['date_from'] else None
+        date_to = parse_date(opts['date_to']) if opts['date_to'] else None
+        if (opts['date_from'] and not date_from) or (opts['date_to'] and not date_to):
+            raise CommandError("Dates must be YYYY-MM-DD")
+        wh_ids = None
+        if opts['warehouse']:
+            whs = list(Warehouse.objects.filter(code__in=opts['warehouse']).values_list('id', flat=True))
+            if len(whs) != len(set(opts['warehouse'])):
+                raise CommandError("Unknown warehouse code(s)")
+            wh_ids = whs
+        try:
+            written = export_dataset(opts['out_dir'], warehouse_ids=wh_ids, date_from=date_from, date_to=date_to, chunk_size=max(opts['chunk_size'], 1))
+        except RuntimeError as e:
+            raise CommandError(str(e))
+        for w in written:
+            self.stdout.write(f"{w['warehouse']} {w['month']}: {w['rows']} rows -> {w['path']}")
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(written)} file(s), {sum(w['rows'] for w in written)} rows"))
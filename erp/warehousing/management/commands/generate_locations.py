@@ -0,0 +1,45 @@
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from warehousing.models import Warehouse
+from warehousing.services_locations import generate_locations
+
+
+class Command(BaseCommand):
+    help = (
+        "Create PHYSICAL locations in bulk from a code pattern, e.g. 'A{01-20}-R{01-10}-B{01-05}' "
+        "(numeric ranges keep the start's zero padding; {A-D} and {1,3,7} also work)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('warehouse_code', help='Warehouse code')
+        parser.add_argument('pattern', help='Location code pattern')
+        parser.add_argument('--capacity', default=None, help='Capacity (units) for every new location')
+        parser.add_argument('--sequence', action='store_true', help='Give new locations pick_sequence values in pattern order')
+        parser.add_argument('--skip-existing', action='store_true', help='Skip codes that already exist instead of failing')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be created')
+
+    def handle(self, warehouse_code, pattern, **opts):
+        try:
+            wh = Warehouse.objects.get(code=warehouse_code)
+        except Warehouse.DoesNotExist:
+            raise CommandError(f"Warehouse '{warehouse_code}' not found")
+        capacity = None
+        if opts['capacity'] is not None:
+            try:
+                capacity = Decimal(opts['capacity'])
+            except InvalidOperation:
+                raise CommandError("--capacity must be a number")
+        try:
+            res = generate_locations(
+                wh, pattern, capacity=capacity, sequence=opts['sequence'],
+                skip_existing=opts['skip_existing'], dry_run=opts['dry_run'],
+            )
+        except ValidationError as e:
+            raise CommandError("; ".join(e.messages))
+        self.stdout.write(f"{wh.code}: {res['requested']} codes ({res['first']} .. {res['last']}), {res['existing']} existing")
+        if opts['dry_run']:
+            self.stdout.write(self.style.WARNING("Dry run; nothing created"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Created {res['created']} locations"))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+from warehousing.services_archive import import_archive
+
+
+class Command(BaseCommand):
+    help = "Load an archive produced by archive_ledger into StockLedgerArchive for querying (does not affect on-hand)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Archive directory or its stockledger.parquet / stockledger.ndjson.gz file')
+        parser.add_argument('--replace', action='store_true', help='Reload even if this archive was imported before')
+
+    def handle(self, *args, **opts):
+        try:
+            res = import_archive(opts['path'], replace=opts['replace'])
+        except (FileNotFoundError, RuntimeError) as e:
+            raise CommandError(str(e))
+        if res['skipped']:
+            self.stdout.write(self.style.WARNING(f"Archive {res['archive']} already imported (use --replace to reload)"))
+            return
+        self.stdout.write(self.style.SUCCESS(f"Imported {res['imported']} rows from archive {res['archive']}"))
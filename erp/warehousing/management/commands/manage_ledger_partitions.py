@@ -0,0 +1,65 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from warehousing import partitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Maintain monthly StockLedger partitions: pre-create upcoming months and optionally detach old ones. "
+        "Detached months no longer count towards ledger sums - only detach months already rolled into opening balances."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months-ahead', type=int, default=3, help='Ensure partitions exist for this many future months (default 3)')
+        parser.add_argument('--detach-before', default=None, help='Detach monthly partitions that end on or before YYYY-MM (plus the legacy heap with --include-legacy)')
+        parser.add_argument('--include-legacy', action='store_true', help='Also detach the pre-partitioning legacy heap when detaching')
+        parser.add_argument('--drop', action='store_true', help='Drop detached partitions instead of keeping them as standalone tables')
+        parser.add_argument('--dry-run', action='store_true', help='Only print what would be done')
+        parser.add_argument('--list', action='store_true', help='List attached partitions and exit')
+
+    def handle(self, *args, **opts):
+        if not partitions.is_partitioned():
+            raise CommandError("StockLedger is not partitioned on this database (PostgreSQL + migration 0010 required)")
+        if opts['list']:
+            for p in partitions.list_partitions():
+                self.stdout.write(f"{p['name']}: {p['bound']} (~{p['approx_rows']} rows)")
+            return
+
+        this_month = partitions.month_start(timezone.now().date())
+        for n in range(max(opts['months_ahead'], 0) + 1):
+            month = partitions.add_months(this_month, n)
+            if opts['dry_run']:
+                self.stdout.write(f"would ensure {partitions.partition_name(month)}")
+                continue
+            created = partitions.ensure_month_partition(month)
+            if created:
+                self.stdout.write(self.style.SUCCESS(f"created {partitions.partition_name(month)}"))
+
+        if opts['detach_before']:
+            try:
+                y, m = (int(x) for x in opts['detach_before'].split('-')[:2])
+                cutoff = date(y, m, 1)
+            except Exception:
+                raise CommandError("--detach-before must be YYYY-MM")
+            if cutoff > this_month:
+                raise CommandError("Refusing to detach the current or future months")
+            targets = []
+            for p in partitions.list_partitions():
+                name = p['name']
+                if name == partitions.LEGACY:
+                    if opts['include_legacy']:
+                        targets.append(name)
+                    continue
+                suffix = name.rsplit('_p', 1)[-1]
+                if len(suffix) == 6 and suffix.isdigit():
+                    month = date(int(suffix[:4]), int(suffix[4:]), 1)
+                    if partitions.add_months(month, 1) <= cutoff:
+                        targets.append(name)
+            for name in targets:
+                if opts['dry_run']:
+                    self.stdout.write(f"would detach {name}{' and drop' if opts['drop'] else ''}")
+                    continue
+                partitions.detach_partition(name, drop=opts['drop'])
+                self.stdout.write(self.style.WARNING(f"detached {name}{' (dropped)' if opts['drop'] else ''}"))
+        self.stdout.write(self.style.SUCCESS("Partition maintenance complete"))
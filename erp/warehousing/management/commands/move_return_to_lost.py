@@ -1,7 +1,6 @@
 from decimal import Decimal
 from django.core.management.base import BaseCommand, CommandError
 from django.db.models import Sum
-from django.db import transaction
 from django.utils import timezone
 from warehousing.models import (
     Warehouse,
@@ -11,6 +10,7 @@ from warehousing.models import (
     VirtualSubtype,
     MovementType,
 )
+from warehousing.services import post_entries
 
 class Command(BaseCommand):
     help = "Move all on-hand stock (per item) from RETURN virtual bin to LOST virtual bin for a warehouse."
@@ -65,28 +65,30 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING(f"Batch ref '{ref}' already posted. Aborting."))
             return
 
-        with transaction.atomic():
-            for item_id, qty in moves:
-                StockLedger.objects.create(
-                    warehouse=wh,
-                    location=return_bin,
-                    item_id=item_id,
-                    qty_delta=-qty,
-                    movement_type=MovementType.PUTAWAY_LOST,
-                    ref_model="RETURN_TO_LOST",
-                    ref_id=batch_ref,
-                    memo="Return→Lost consolidation",
-                )
-                StockLedger.objects.create(
-                    warehouse=wh,
-                    location=lost_bin,
-                    item_id=item_id,
-                    qty_delta=qty,
-                    movement_type=MovementType.PUTAWAY_LOST,
-                    ref_model="RETURN_TO_LOST",
-                    ref_id=batch_ref,
-                    memo="Return→Lost consolidation",
-                )
+        # One post_entries() batch: lot-tracked rows are split per lot (services_lots.assign_lots)
+        entries = []
+        for item_id, qty in moves:
+            entries.append(StockLedger(
+                warehouse=wh,
+                location=return_bin,
+                item_id=item_id,
+                qty_delta=-qty,
+                movement_type=MovementType.PUTAWAY_LOST,
+                ref_model="RETURN_TO_LOST",
+                ref_id=batch_ref,
+                memo="Return→Lost consolidation",
+            ))
+            entries.append(StockLedger(
+                warehouse=wh,
+                location=lost_bin,
+                item_id=item_id,
+                qty_delta=qty,
+                movement_type=MovementType.PUTAWAY_LOST,
+                ref_model="RETURN_TO_LOST",
+                ref_id=batch_ref,
+                memo="Return→Lost consolidation",
+            ))
+        post_entries(entries)
 
         self.stdout.write(self.style.SUCCESS("Return bin emptied into Lost bin."))
         self.stdout.write(f"Batch ref: {batch_ref}")
\ No newline at end of file
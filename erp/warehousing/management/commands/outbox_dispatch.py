@@ -0,0 +1,36 @@
+import time
+from django.core.management.base import BaseCommand
+from warehousing.outbox import dispatch_batch, purge_delivered
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver pending OutboxEvent rows to registered handlers, OUTBOX_WEBHOOKS and OUTBOX_FILE_SINK. "
+        "Safe to run several dispatchers at once (rows are claimed with SKIP LOCKED)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help='Events claimed per transaction (default 200)')
+        parser.add_argument('--once', action='store_true', help='Drain what is due now and exit instead of polling')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to sleep when idle (default 1)')
+        parser.add_argument('--purge-days', type=int, default=None, help='Delete events delivered more than N days ago and exit')
+
+    def handle(self, *args, **opts):
+        if opts['purge_days'] is not None:
+            n = purge_delivered(max(opts['purge_days'], 0))
+            self.stdout.write(self.style.SUCCESS(f"Purged {n} delivered event(s)"))
+            return
+        batch = max(opts['batch_size'], 1)
+        delivered = failed = 0
+        try:
+            while True:
+                res = dispatch_batch(batch)
+                delivered += res['delivered']
+                failed += res['failed']
+                if res['claimed'] == 0 or res['failed']:
+                    if opts['once']:
+                        break
+                    time.sleep(opts['interval'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"Delivered {delivered} event(s), {failed} failed attempt(s)"))
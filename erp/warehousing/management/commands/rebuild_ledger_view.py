@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from warehousing.models import Warehouse
+from warehousing.services_ledger_view import rebuild_ledger_view
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the movements grid projection (LedgerView) from the ledger. "
+        "Posting keeps it current; use this after restoring data or to repair drift."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--warehouse', action='append', default=[], help='Warehouse code (repeatable); default all')
+
+    def handle(self, *args, **opts):
+        whs = Warehouse.objects.all().order_by('code')
+        if opts['warehouse']:
+            whs = whs.filter(code__in=opts['warehouse'])
+            if whs.count() != len(set(opts['warehouse'])):
+                raise CommandError("Unknown warehouse code(s)")
+        for wh in whs:
+            rows = rebuild_ledger_view(wh.id)
+            self.stdout.write(f"{wh.code}: {rows} rows")
+        self.stdout.write(self.style.SUCCESS("Ledger view rebuilt"))
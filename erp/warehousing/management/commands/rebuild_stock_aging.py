@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from warehousing.models import Warehouse
+from warehousing.services_aging import rebuild_aging
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild FIFO stock-aging layers from the ledger (current on-hand attributed to the most recent inflows). "
+        "Run once after deploying stock aging; afterwards layers are maintained at posting time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--warehouse', action='append', default=[], help='Warehouse code (repeatable); default all')
+
+    def handle(self, *args, **opts):
+        whs = Warehouse.objects.all().order_by('code')
+        if opts['warehouse']:
+            whs = whs.filter(code__in=opts['warehouse'])
+            if whs.count() != len(set(opts['warehouse'])):
+                raise CommandError("Unknown warehouse code(s)")
+        for wh in whs:
+            res = rebuild_aging(wh.id)
+            self.stdout.write(f"{wh.code}: {res['items']} items, {res['layers']} layers")
+        self.stdout.write(self.style.SUCCESS("Stock aging rebuilt"))
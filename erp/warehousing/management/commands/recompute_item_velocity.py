@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from warehousing.models import Warehouse
+from warehousing.services_velocity import compute_item_velocity, DEFAULT_DAYS
+
+
+class Command(BaseCommand):
+    help = "Recompute ItemVelocity (outbound velocity, ABC/XYZ class, days of cover) per warehouse."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--warehouse', action='append', default=[], help='Warehouse code (repeatable); default all')
+        parser.add_argument('--days', type=int, default=DEFAULT_DAYS, help=f'Trailing window in days (default {DEFAULT_DAYS})')
+        parser.add_argument('--end', default=None, help='Last local day of the window (YYYY-MM-DD, default today)')
+
+    def handle(self, *args, **opts):
+        end = parse_date(opts['end']) if opts['end'] else None
+        if opts['end'] and not end:
+            raise CommandError("--end must be YYYY-MM-DD")
+        whs = Warehouse.objects.all().order_by('code')
+        if opts['warehouse']:
+            whs = whs.filter(code__in=opts['warehouse'])
+            if whs.count() != len(set(opts['warehouse'])):
+                raise CommandError("Unknown warehouse code(s)")
+        for wh in whs:
+            try:
+                res = compute_item_velocity(wh.id, days=opts['days'], end=end)
+            except RuntimeError as e:
+                raise CommandError(str(e))
+            classes = ' '.join(f"{k}={v}" for k, v in res['classes'].items())
+            self.stdout.write(f"{wh.code} {res['period_start']}..{res['period_end']}: {res['items']} items {classes}")
+        self.stdout.write(self.style.SUCCESS("Velocity recompute complete"))
@@ -0,0 +1,52 @@
+import json
+import sys
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from warehousing.models import Warehouse
+from warehousing.services_balance import rebuild_stock_balance
+from warehousing.services_reconcile import run_reconcile, summarize
+
+
+class Command(BaseCommand):
+    help = (
+        "Check stock invariants per warehouse in parallel (balance vs ledger, negative PHYSICAL stock, "
+        "*_PENDING bins vs open adjustments, PUTAWAY pairing) and write a JSON discrepancy report."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--warehouse', action='append', default=[], help='Warehouse code (repeatable); default all')
+        parser.add_argument('--workers', type=int, default=4, help='Worker processes (default 4; 1 runs serially)')
+        parser.add_argument('--output', default=None, help='Write the JSON report to this file (default stdout)')
+        parser.add_argument('--fix-balances', action='store_true', help='Recompute StockBalance rows reported as mismatched')
+        parser.add_argument('--fail-on-issues', action='store_true', help='Exit with status 1 when any discrepancy is found')
+
+    def handle(self, *args, **opts):
+        whs = Warehouse.objects.all().order_by('code')
+        if opts['warehouse']:
+            whs = whs.filter(code__in=opts['warehouse'])
+            if whs.count() != len(set(opts['warehouse'])):
+                raise CommandError("Unknown warehouse code(s)")
+        ids = list(whs.values_list('id', flat=True))
+        results = run_reconcile(ids, workers=max(opts['workers'], 1))
+        report = summarize(results)
+
+        if opts['fix_balances']:
+            fixed = 0
+            for r in results:
+                keys = [(m['location'], m['item']) for m in r.get('balance_mismatch') or []]
+                if keys:
+                    rebuild_stock_balance(r['warehouse'], keys)
+                    fixed += len(keys)
+            report['balances_fixed'] = fixed
+
+        payload = json.dumps(report, indent=2, default=str)
+        if opts['output']:
+            Path(opts['output']).write_text(payload)
+            self.stdout.write(f"Report written to {opts['output']}")
+        else:
+            self.stdout.write(payload)
+        counts = ' '.join(f"{k}={v}" for k, v in report['counts'].items())
+        style = self.style.SUCCESS if not report['warehouses_with_issues'] else self.style.WARNING
+        self.stderr.write(style(f"{report['warehouses']} warehouse(s), {report['warehouses_with_issues']} with issues: {counts}"))
+        if opts['fail_on_issues'] and report['warehouses_with_issues']:
+            sys.exit(1)
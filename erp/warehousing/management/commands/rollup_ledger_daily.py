@@ -0,0 +1,63 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from warehousing.models import StockLedger, Warehouse
+from warehousing.services_rollup import rebuild_daily_rollup
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute LedgerDailyRollup from StockLedger for a range of local days. "
+        "Idempotent: each day is deleted and re-aggregated, so it can be re-run after backfills. "
+        "Days before the latest ledger archive cutoff are kept as they are."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', default=None, help='First local day to rebuild (YYYY-MM-DD)')
+        parser.add_argument('--until', default=None, help='Last local day to rebuild (YYYY-MM-DD, default today)')
+        parser.add_argument('--days', type=int, default=None, help='Rebuild the last N days (including today)')
+        parser.add_argument('--all', action='store_true', help='Rebuild from the first ledger row')
+        parser.add_argument('--warehouse', action='append', default=[], help='Warehouse code (repeatable); default all')
+        parser.add_argument('--chunk-days', type=int, default=31, help='Days rebuilt per transaction (default 31)')
+
+    def handle(self, *args, **opts):
+        today = timezone.localdate()
+        until = parse_date(opts['until']) if opts['until'] else today
+        if opts['until'] and not until:
+            raise CommandError("--until must be YYYY-MM-DD")
+        if opts['since']:
+            since = parse_date(opts['since'])
+            if not since:
+                raise CommandError("--since must be YYYY-MM-DD")
+        elif opts['days']:
+            since = until - timedelta(days=max(opts['days'], 1) - 1)
+        elif opts['all']:
+            first = StockLedger.objects.aggregate(lo=Min('ts'))['lo']
+            if not first:
+                self.stdout.write("Ledger is empty")
+                return
+            since = timezone.localtime(first).date()
+        else:
+            raise CommandError("Pass --since, --days or --all")
+        if since > until:
+            raise CommandError("--since must not be after --until")
+
+        wh_ids = None
+        if opts['warehouse']:
+            wh_ids = list(Warehouse.objects.filter(code__in=opts['warehouse']).values_list('id', flat=True))
+            if len(wh_ids) != len(set(opts['warehouse'])):
+                raise CommandError("Unknown warehouse code(s)")
+
+        step = timedelta(days=max(opts['chunk_days'], 1))
+        lo = since
+        created = 0
+        while lo <= until:
+            hi = min(lo + step - timedelta(days=1), until)
+            res = rebuild_daily_rollup(date_from=lo, date_to=hi, warehouse_ids=wh_ids)
+            created += res['created']
+            kept = f" (archived days before {res['kept_before']} kept)" if res['kept_before'] else ""
+            self.stdout.write(f"{lo}..{hi}: {res['created']} rollup rows{kept}")
+            lo = hi + timedelta(days=1)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {since}..{until}: {created} rollup rows"))
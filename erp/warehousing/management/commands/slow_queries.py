@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from warehousing.models import SlowQuery
+
+
+class Command(BaseCommand):
+    help = "List captured slow queries (worst total time first), optionally with their EXPLAIN plans."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20, help='Max fingerprints to show (default 20)')
+        parser.add_argument('--caller', default=None, help='Only callers containing this text (e.g. views_putaway)')
+        parser.add_argument('--plans', action='store_true', help='Print the captured EXPLAIN plan for each entry')
+        parser.add_argument('--reset', action='store_true', help='Delete all captured entries and exit')
+
+    def handle(self, *args, **opts):
+        if opts['reset']:
+            deleted, _ = SlowQuery.objects.all().delete()
+            self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} slow query entries"))
+            return
+        qs = SlowQuery.objects.all().order_by('-total_ms')
+        if opts['caller']:
+            qs = qs.filter(caller__icontains=opts['caller'])
+        rows = list(qs[:opts['limit']])
+        if not rows:
+            self.stdout.write(self.style.WARNING('No slow queries captured (is SLOW_QUERY_THRESHOLD_MS set?).'))
+            return
+        for sq in rows:
+            avg = sq.total_ms / sq.calls if sq.calls else 0
+            self.stdout.write(
+                f"- {sq.fingerprint[:12]} calls={sq.calls} avg={avg:.1f}ms max={sq.max_ms:.1f}ms total={sq.total_ms:.0f}ms caller={sq.caller or '?'}"
+            )
+            self.stdout.write(f"    {sq.normalized_sql[:300]}")
+            if opts['plans'] and sq.explain_plan:
+                for line in sq.explain_plan.splitlines():
+                    self.stdout.write(f"      {line}")
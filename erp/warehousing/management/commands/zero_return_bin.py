@@ -1,7 +1,6 @@
 from decimal import Decimal
 from django.core.management.base import BaseCommand, CommandError
 from django.db.models import Sum
-from django.db import transaction
 from django.utils import timezone
 from warehousing.models import (
     Warehouse,
@@ -11,6 +10,7 @@ from warehousing.models import (
     VirtualSubtype,
     MovementType,
 )
+from warehousing.services import post_entries
 
 class Command(BaseCommand):
     help = "Zero out RETURN virtual bin for a warehouse by offsetting with LOST bin (per item)."\
@@ -84,16 +84,18 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING(f"Batch ref '{ref}' already posted. Aborting."))
             return
 
-        with transaction.atomic():
-            for item_id, from_loc, to_loc, qty in adjustments:
-                # Out from source
-                StockLedger.objects.create(
-                    warehouse=wh, location=from_loc, item_id=item_id, qty_delta=-qty,
-                    movement_type=MovementType.PUTAWAY_LOST, ref_model='ZERO_RETURN', ref_id=batch_ref,
-                    memo='Zero RETURN (out)')
-                # In to destination
-                StockLedger.objects.create(
-                    warehouse=wh, location=to_loc, item_id=item_id, qty_delta=qty,
-                    movement_type=MovementType.PUTAWAY_LOST, ref_model='ZERO_RETURN', ref_id=batch_ref,
-                    memo='Zero RETURN (in)')
+        # One post_entries() batch: lot-tracked rows are split per lot (services_lots.assign_lots)
+        entries = []
+        for item_id, from_loc, to_loc, qty in adjustments:
+            # Out from source
+            entries.append(StockLedger(
+                warehouse=wh, location=from_loc, item_id=item_id, qty_delta=-qty,
+                movement_type=MovementType.PUTAWAY_LOST, ref_model='ZERO_RETURN', ref_id=batch_ref,
+                memo='Zero RETURN (out)'))
+            # In to destination
+            entries.append(StockLedger(
+                warehouse=wh, location=to_loc, item_id=item_id, qty_delta=qty,
+                movement_type=MovementType.PUTAWAY_LOST, ref_model='ZERO_RETURN', ref_id=batch_ref,
+                memo='Zero RETURN (in)'))
+        post_entries(entries)
         self.stdout.write(self.style.SUCCESS(f"RETURN bin zeroed. Batch ref: {batch_ref}"))
\ No newline at end of file
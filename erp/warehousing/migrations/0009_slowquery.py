@@ -0,0 +1,38 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("warehousing", "0008_putawaybatch"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SlowQuery",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("fingerprint", models.CharField(max_length=40, unique=True)),
+                ("normalized_sql", models.TextField()),
+                ("sample_sql", models.TextField(blank=True)),
+                ("sample_params", models.TextField(blank=True)),
+                ("caller", models.CharField(blank=True, help_text="First project frame (view/service function) that issued the query", max_length=255)),
+                ("context", models.CharField(blank=True, help_text="Request method/path or command that was running", max_length=255)),
+                ("calls", models.PositiveIntegerField(default=1)),
+                ("last_ms", models.FloatField(default=0)),
+                ("max_ms", models.FloatField(default=0)),
+                ("total_ms", models.FloatField(default=0)),
+                ("explain_plan", models.TextField(blank=True)),
+                ("first_seen", models.DateTimeField(auto_now_add=True)),
+                ("last_seen", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                "verbose_name": "Slow Query",
+                "verbose_name_plural": "Slow Queries",
+                "indexes": [
+                    models.Index(fields=["-total_ms"], name="wh_slowquery_total_idx"),
+                    models.Index(fields=["last_seen"], name="wh_slowquery_last_seen_idx"),
+                ],
+            },
+        ),
+    ]
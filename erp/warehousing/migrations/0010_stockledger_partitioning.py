@@ -0,0 +1,123 @@
+"""Convert warehousing_stockledger into a monthly RANGE (ts) partitioned table.
+
+The existing heap is not copied: it is renamed to warehousing_stockledger_legacy and
+attached as the partition covering everything before the current month, so the
+migration cost is one validation scan plus building the (id, ts) unique index on it.
+Tip for large tables: build that index beforehand with
+    CREATE UNIQUE INDEX CONCURRENTLY warehousing_stockledger_id_ts_pre ON warehousing_stockledger (id, ts);
+and it will be promoted to the legacy partition's primary key instead of being built
+inside the migration.
+
+Model state is untouched; on non-PostgreSQL backends this migration is a no-op.
+"""
+from datetime import date, datetime, time, timezone as dt_timezone
+
+from django.db import migrations
+
+PARENT = "warehousing_stockledger"
+LEGACY = f"{PARENT}_legacy"
+MONTHS_AHEAD = 3
+
+
+def _month(d, n=0):
+    y, m = divmod(d.month - 1 + n, 12)
+    return date(d.year + y, m + 1, 1)
+
+
+def _bound(d):
+    return datetime.combine(d, time.min, tzinfo=dt_timezone.utc).isoformat()
+
+
+def partition_ledger(apps, schema_editor):
+    conn = schema_editor.connection
+    if conn.vendor != "postgresql":
+        return
+    with conn.cursor() as cur:
+        cur.execute("SELECT relkind FROM pg_class WHERE relname = %s", [PARENT])
+        row = cur.fetchone()
+        if not row or row[0] == "p":
+            return
+        cutover = _month(datetime.now(dt_timezone.utc).date())
+
+        cur.execute(f"LOCK TABLE {PARENT} IN ACCESS EXCLUSIVE MODE")
+        # Remember index definitions so the parent gets the same (Django-known) names.
+        cur.execute(
+            """
+            SELECT i.relname, pg_get_indexdef(i.oid)
+            FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid
+            WHERE x.indrelid = %s::regclass AND NOT x.indisprimary AND i.relname <> %s
+            """,
+            [PARENT, f"{PARENT}_id_ts_pre"],
+        )
+        indexes = cur.fetchall()
+        cur.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+            [PARENT],
+        )
+        foreign_keys = cur.fetchall()
+
+        cur.execute(f"ALTER TABLE {PARENT} RENAME TO {LEGACY}")
+        cur.execute(
+            "SELECT i.relname FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid WHERE x.indrelid = %s::regclass",
+            [LEGACY],
+        )
+        for (name,) in cur.fetchall():
+            cur.execute(f'ALTER INDEX "{name}" RENAME TO "{name[:52]}_legacy"')
+
+        # Identity columns cannot be shared with an attached partition; switch to an owned sequence.
+        # Django 4.1+ creates ids as identity columns (DROP DEFAULT is rejected on those), older
+        # tables as serial columns with a nextval() default.
+        cur.execute(f"ALTER TABLE {LEGACY} ALTER COLUMN id DROP IDENTITY IF EXISTS")
+        cur.execute(
+            "SELECT column_default FROM information_schema.columns WHERE table_name = %s AND column_name = 'id'",
+            [LEGACY],
+        )
+        if (cur.fetchone() or [None])[0] is not None:
+            cur.execute(f"ALTER TABLE {LEGACY} ALTER COLUMN id DROP DEFAULT")
+        cur.execute(f"CREATE SEQUENCE IF NOT EXISTS {PARENT}_id_seq")
+        cur.execute(f"SELECT setval('{PARENT}_id_seq', COALESCE((SELECT MAX(id) FROM {LEGACY}), 0) + 1, false)")
+
+        cur.execute(
+            f"CREATE TABLE {PARENT} (LIKE {LEGACY} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) PARTITION BY RANGE (ts)"
+        )
+        cur.execute(f"ALTER TABLE {PARENT} ALTER COLUMN id SET DEFAULT nextval('{PARENT}_id_seq')")
+        cur.execute(f"ALTER SEQUENCE {PARENT}_id_seq OWNED BY {PARENT}.id")
+        cur.execute(f"ALTER TABLE {PARENT} ADD CONSTRAINT {PARENT}_pkey PRIMARY KEY (id, ts)")
+        for name, definition in foreign_keys:
+            cur.execute(f'ALTER TABLE {PARENT} ADD CONSTRAINT "{name}" {definition}')
+        for _name, definition in indexes:
+            # Captured before the rename, so the definition already targets the new parent.
+            cur.execute(definition)
+
+        # The attached heap must carry the parent's (id, ts) key instead of its own id-only key.
+        cur.execute("SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p'", [LEGACY])
+        for (pk_name,) in cur.fetchall():
+            cur.execute(f'ALTER TABLE {LEGACY} DROP CONSTRAINT "{pk_name}"')
+        cur.execute("SELECT 1 FROM pg_class WHERE relname = %s", [f"{PARENT}_id_ts_pre_legacy"])
+        if cur.fetchone():
+            cur.execute(f"ALTER TABLE {LEGACY} ADD CONSTRAINT {LEGACY}_pkey PRIMARY KEY USING INDEX {PARENT}_id_ts_pre_legacy")
+        else:
+            cur.execute(f"ALTER TABLE {LEGACY} ADD CONSTRAINT {LEGACY}_pkey PRIMARY KEY (id, ts)")
+
+        cur.execute(
+            f"ALTER TABLE {PARENT} ATTACH PARTITION {LEGACY} FOR VALUES FROM (MINVALUE) TO (%s)", [_bound(cutover)]
+        )
+        for n in range(MONTHS_AHEAD + 1):
+            lo, hi = _month(cutover, n), _month(cutover, n + 1)
+            cur.execute(
+                f"CREATE TABLE {PARENT}_p{lo.year:04d}{lo.month:02d} PARTITION OF {PARENT} FOR VALUES FROM (%s) TO (%s)",
+                [_bound(lo), _bound(hi)],
+            )
+        cur.execute(f"CREATE TABLE {PARENT}_pdefault PARTITION OF {PARENT} DEFAULT")
+
+
+class Migration(migrations.Migration):
+    atomic = True
+
+    dependencies = [
+        ("warehousing", "0009_slowquery"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_ledger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,69 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+MOVEMENT_TYPE_CHOICES = [
+    ("ADJ_REQ_DAMAGE", "Adj Req Damage"),
+    ("ADJ_REQ_LOST", "Adj Req Lost"),
+    ("ADJ_REQ_EXCESS", "Adj Req Excess"),
+    ("ADJ_APPROVE_DAMAGE", "Adj Approve Damage"),
+    ("ADJ_DECLINE_DAMAGE", "Adj Decline Damage"),
+    ("ADJ_APPROVE_LOST", "Adj Approve Lost"),
+    ("ADJ_DECLINE_LOST", "Adj Decline Lost"),
+    ("ADJ_APPROVE_EXCESS", "Adj Approve Excess"),
+    ("ADJ_DECLINE_EXCESS", "Adj Decline Excess"),
+    ("PUTAWAY", "Putaway"),
+    ("PUTAWAY_LOST", "Putaway Lost"),
+    ("TRANSFER", "Transfer"),
+    ("ADJ_DELETE_REQUEST", "Adj Delete Request"),
+    ("INTERNAL_TRANSFER", "Internal Transfer"),
+    ("OPENING_BALANCE", "Opening Balance"),
+]
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("catalog", "0004_historicalitem_item"),
+        ("warehousing", "0010_stockledger_partitioning"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="historicalstockledger",
+            name="movement_type",
+            field=models.CharField(choices=MOVEMENT_TYPE_CHOICES, max_length=32),
+        ),
+        migrations.AlterField(
+            model_name="stockledger",
+            name="movement_type",
+            field=models.CharField(choices=MOVEMENT_TYPE_CHOICES, max_length=32),
+        ),
+        migrations.CreateModel(
+            name="StockLedgerArchive",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("archive", models.CharField(db_index=True, max_length=50)),
+                ("ledger_id", models.BigIntegerField()),
+                ("ts", models.DateTimeField()),
+                ("qty_delta", models.DecimalField(decimal_places=3, max_digits=12)),
+                ("movement_type", models.CharField(max_length=32)),
+                ("ref_model", models.CharField(blank=True, max_length=50)),
+                ("ref_id", models.CharField(blank=True, max_length=50)),
+                ("memo", models.TextField(blank=True)),
+                ("item", models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name="+", to="catalog.item")),
+                ("location", models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name="+", to="warehousing.location")),
+                ("user", models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name="+", to=settings.AUTH_USER_MODEL)),
+                ("warehouse", models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name="+", to="warehousing.warehouse")),
+            ],
+            options={
+                "verbose_name": "Archived Stock Ledger Entry",
+                "verbose_name_plural": "Archived Stock Ledger",
+                "indexes": [
+                    models.Index(fields=["warehouse", "item", "ts"], name="wh_ledgerarch_wh_item_ts_idx"),
+                    models.Index(fields=["ledger_id"], name="wh_ledgerarch_ledger_id_idx"),
+                ],
+            },
+        ),
+    ]
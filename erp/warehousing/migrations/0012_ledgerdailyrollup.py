@@ -0,0 +1,51 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+MOVEMENT_TYPE_CHOICES = [
+    ("ADJ_REQ_DAMAGE", "Adj Req Damage"),
+    ("ADJ_REQ_LOST", "Adj Req Lost"),
+    ("ADJ_REQ_EXCESS", "Adj Req Excess"),
+    ("ADJ_APPROVE_DAMAGE", "Adj Approve Damage"),
+    ("ADJ_DECLINE_DAMAGE", "Adj Decline Damage"),
+    ("ADJ_APPROVE_LOST", "Adj Approve Lost"),
+    ("ADJ_DECLINE_LOST", "Adj Decline Lost"),
+    ("ADJ_APPROVE_EXCESS", "Adj Approve Excess"),
+    ("ADJ_DECLINE_EXCESS", "Adj Decline Excess"),
+    ("PUTAWAY", "Putaway"),
+    ("PUTAWAY_LOST", "Putaway Lost"),
+    ("TRANSFER", "Transfer"),
+    ("ADJ_DELETE_REQUEST", "Adj Delete Request"),
+    ("INTERNAL_TRANSFER", "Internal Transfer"),
+    ("OPENING_BALANCE", "Opening Balance"),
+]
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("warehousing", "0011_stockledgerarchive_opening_balance"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LedgerDailyRollup",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("day", models.DateField()),
+                ("movement_type", models.CharField(choices=MOVEMENT_TYPE_CHOICES, max_length=32)),
+                ("location_subtype", models.CharField(blank=True, default="", max_length=20)),
+                ("entries", models.PositiveIntegerField(default=0)),
+                ("qty_in", models.DecimalField(decimal_places=3, default=0, max_digits=16)),
+                ("qty_out", models.DecimalField(decimal_places=3, default=0, max_digits=16)),
+                ("warehouse", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to="warehousing.warehouse")),
+            ],
+            options={
+                "verbose_name": "Ledger Daily Rollup",
+                "verbose_name_plural": "Ledger Daily Rollups",
+                "indexes": [models.Index(fields=["day"], name="wh_rollup_day_idx")],
+                "constraints": [
+                    models.UniqueConstraint(fields=("warehouse", "day", "movement_type", "location_subtype"), name="uq_ledger_rollup_key"),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("catalog", "0004_historicalitem_item"),
+        ("warehousing", "0012_ledgerdailyrollup"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ItemVelocity",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("period_start", models.DateField()),
+                ("period_end", models.DateField()),
+                ("outbound_qty", models.DecimalField(decimal_places=3, default=0, max_digits=16)),
+                ("outbound_lines", models.PositiveIntegerField(default=0)),
+                ("active_days", models.PositiveIntegerField(default=0, help_text="Days in the window with any outbound movement")),
+                ("avg_daily_qty", models.FloatField(default=0)),
+                ("std_daily_qty", models.FloatField(default=0)),
+                ("cv", models.FloatField(blank=True, help_text="Coefficient of variation of daily demand", null=True)),
+                ("abc_class", models.CharField(max_length=1)),
+                ("xyz_class", models.CharField(max_length=1)),
+                ("rank", models.PositiveIntegerField(help_text="1 = highest outbound quantity in the warehouse")),
+                ("on_hand", models.DecimalField(decimal_places=3, default=0, max_digits=16)),
+                ("days_of_cover", models.FloatField(blank=True, help_text="on_hand / avg_daily_qty; empty when there is no demand", null=True)),
+                ("computed_at", models.DateTimeField(auto_now=True)),
+                ("item", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to="catalog.item")),
+                ("warehouse", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to="warehousing.warehouse")),
+            ],
+            options={
+                "verbose_name": "Item Velocity",
+                "verbose_name_plural": "Item Velocity",
+                "indexes": [
+                    models.Index(fields=["warehouse", "abc_class", "xyz_class"], name="wh_velocity_class_idx"),
+                    models.Index(fields=["warehouse", "rank"], name="wh_velocity_rank_idx"),
+                ],
+                "constraints": [
+                    models.UniqueConstraint(fields=("warehouse", "item"), name="uq_item_velocity_wh_item"),
+                ],
+            },
+        ),
+    ]
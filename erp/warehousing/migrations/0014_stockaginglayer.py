@@ -0,0 +1,32 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("catalog", "0004_historicalitem_item"),
+        ("warehousing", "0013_itemvelocity"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StockAgingLayer",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("received_at", models.DateTimeField()),
+                ("qty_received", models.DecimalField(decimal_places=3, max_digits=16)),
+                ("qty_remaining", models.DecimalField(decimal_places=3, max_digits=16)),
+                ("source_ledger_id", models.BigIntegerField(blank=True, help_text="First inbound StockLedger row of the batch that opened the layer", null=True)),
+                ("item", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to="catalog.item")),
+                ("warehouse", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to="warehousing.warehouse")),
+            ],
+            options={
+                "verbose_name": "Stock Aging Layer",
+                "verbose_name_plural": "Stock Aging Layers",
+                "indexes": [
+                    models.Index(fields=["warehouse", "item", "received_at"], name="wh_aging_wh_item_rcv_idx"),
+                    models.Index(fields=["warehouse", "received_at"], name="wh_aging_wh_rcv_idx"),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_balances(apps, schema_editor):
+    with schema_editor.connection.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO warehousing_stockbalance (warehouse_id, location_id, item_id, qty, updated_at)
+            SELECT warehouse_id, location_id, item_id, SUM(qty_delta), CURRENT_TIMESTAMP
+            FROM warehousing_stockledger
+            GROUP BY warehouse_id, location_id, item_id
+            """
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("catalog", "0004_historicalitem_item"),
+        ("warehousing", "0014_stockaginglayer"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StockBalance",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("qty", models.DecimalField(decimal_places=3, default=0, max_digits=16)),
+                ("updated_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("item", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to="catalog.item")),
+                ("location", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to="warehousing.location")),
+                ("warehouse", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to="warehousing.warehouse")),
+            ],
+            options={
+                "verbose_name": "Stock Balance",
+                "verbose_name_plural": "Stock Balances",
+                "indexes": [models.Index(fields=["warehouse", "item"], name="wh_balance_wh_item_idx")],
+                "constraints": [models.UniqueConstraint(fields=("location", "item"), name="uq_stock_balance_loc_item")],
+            },
+        ),
+        migrations.RunPython(backfill_balances, migrations.RunPython.noop),
+    ]
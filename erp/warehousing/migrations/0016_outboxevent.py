@@ -0,0 +1,37 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("warehousing", "0015_stockbalance"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutboxEvent",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("topic", models.CharField(max_length=64)),
+                ("aggregate_type", models.CharField(blank=True, max_length=50)),
+                ("aggregate_id", models.CharField(blank=True, max_length=64)),
+                ("payload", models.JSONField(default=dict)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("available_at", models.DateTimeField(default=django.utils.timezone.now, help_text="Not delivered before this time (retry backoff)")),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                ("delivered_at", models.DateTimeField(blank=True, null=True)),
+                ("last_error", models.TextField(blank=True)),
+                ("warehouse", models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name="+", to="warehousing.warehouse")),
+            ],
+            options={
+                "verbose_name": "Outbox Event",
+                "verbose_name_plural": "Outbox",
+                "indexes": [
+                    models.Index(condition=models.Q(("delivered_at__isnull", True)), fields=["id"], name="wh_outbox_pending_idx"),
+                    models.Index(fields=["topic", "created_at"], name="wh_outbox_topic_idx"),
+                    models.Index(fields=["aggregate_type", "aggregate_id"], name="wh_outbox_aggregate_idx"),
+                ],
+            },
+        ),
+    ]
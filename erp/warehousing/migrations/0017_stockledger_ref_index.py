@@ -0,0 +1,14 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("warehousing", "0016_outboxevent"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="stockledger",
+            index=models.Index(fields=["ref_id", "ref_model"], name="wh_ledger_ref_idx"),
+        ),
+    ]
@@ -0,0 +1,167 @@
+"""Store StockLedger.movement_type / ref_model as LedgerCode ids, memo as a LedgerMemo id and
+qty_delta as integer milli-units (see warehousing/fields.py).
+
+On PostgreSQL each table is rewritten once by a single ALTER TABLE (partitions included);
+USING cannot contain subqueries, so the string -> id lookups go through temporary functions.
+Other backends only hold development data: values are converted row by row, then the
+columns are altered normally. Not reversible.
+"""
+from django.db import migrations, models
+
+import warehousing.fields
+
+MOVEMENT_TYPES = [
+    "ADJ_REQ_DAMAGE", "ADJ_REQ_LOST", "ADJ_REQ_EXCESS", "ADJ_APPROVE_DAMAGE", "ADJ_DECLINE_DAMAGE",
+    "ADJ_APPROVE_LOST", "ADJ_DECLINE_LOST", "ADJ_APPROVE_EXCESS", "ADJ_DECLINE_EXCESS", "PUTAWAY",
+    "PUTAWAY_LOST", "TRANSFER", "ADJ_DELETE_REQUEST", "INTERNAL_TRANSFER", "OPENING_BALANCE",
+]
+TABLES = {"warehousing_stockledger": "id", "warehousing_historicalstockledger": "history_id"}
+MOVEMENT_TYPE_CHOICES = [("ADJ_REQ_DAMAGE", "Adj Req Damage"), ("ADJ_REQ_LOST", "Adj Req Lost"), ("ADJ_REQ_EXCESS", "Adj Req Excess"), ("ADJ_APPROVE_DAMAGE", "Adj Approve Damage"), ("ADJ_DECLINE_DAMAGE", "Adj Decline Damage"), ("ADJ_APPROVE_LOST", "Adj Approve Lost"), ("ADJ_DECLINE_LOST", "Adj Decline Lost"), ("ADJ_APPROVE_EXCESS", "Adj Approve Excess"), ("ADJ_DECLINE_EXCESS", "Adj Decline Excess"), ("PUTAWAY", "Putaway"), ("PUTAWAY_LOST", "Putaway Lost"), ("TRANSFER", "Transfer"), ("ADJ_DELETE_REQUEST", "Adj Delete Request"), ("INTERNAL_TRANSFER", "Internal Transfer"), ("OPENING_BALANCE", "Opening Balance")]
+
+
+def new_fields():
+    return {
+        "qty_delta": warehousing.fields.MilliQuantityField(),
+        "movement_type": warehousing.fields.CodeField(choices=MOVEMENT_TYPE_CHOICES, kind="movement_type"),
+        "ref_model": warehousing.fields.CodeField(blank=True, kind="ref_model"),
+        "memo": warehousing.fields.MemoField(blank=True),
+    }
+
+
+def seed_lookups(cur):
+    # Known movement types first so their codes are stable across installations.
+    for mt in MOVEMENT_TYPES:
+        cur.execute(
+            "INSERT INTO warehousing_ledgercode (kind, value) SELECT 'movement_type', %s "
+            "WHERE NOT EXISTS (SELECT 1 FROM warehousing_ledgercode WHERE kind = 'movement_type' AND value = %s)",
+            [mt, mt],
+        )
+    for kind in ("movement_type", "ref_model"):
+        for table in TABLES:
+            cur.execute(
+                f"INSERT INTO warehousing_ledgercode (kind, value) SELECT DISTINCT %s, {kind} FROM {table} t "
+                f"WHERE {kind} <> '' AND NOT EXISTS (SELECT 1 FROM warehousing_ledgercode c WHERE c.kind = %s AND c.value = t.{kind})",
+                [kind, kind],
+            )
+
+
+def encode_postgresql(cur):
+    seed_lookups(cur)
+    for table in TABLES:
+        cur.execute(
+            f"INSERT INTO warehousing_ledgermemo (digest, text) SELECT DISTINCT md5(memo), memo FROM {table} "
+            "WHERE memo <> '' ON CONFLICT (digest) DO NOTHING"
+        )
+    cur.execute(
+        """
+        CREATE FUNCTION pg_temp.wh_ledger_code(k text, v text) RETURNS smallint LANGUAGE sql STABLE AS $$
+            SELECT CASE WHEN v = '' THEN 0::smallint
+                        ELSE (SELECT id FROM warehousing_ledgercode WHERE kind = k AND value = v) END
+        $$
+        """
+    )
+    cur.execute(
+        """
+        CREATE FUNCTION pg_temp.wh_ledger_memo(t text) RETURNS integer LANGUAGE sql STABLE AS $$
+            SELECT CASE WHEN t = '' THEN 0
+                        ELSE (SELECT id FROM warehousing_ledgermemo WHERE digest = md5(t)) END
+        $$
+        """
+    )
+    for table in TABLES:
+        cur.execute(
+            f"""
+            ALTER TABLE {table}
+                ALTER COLUMN qty_delta TYPE bigint USING round(qty_delta * 1000)::bigint,
+                ALTER COLUMN movement_type TYPE smallint USING pg_temp.wh_ledger_code('movement_type', movement_type),
+                ALTER COLUMN ref_model TYPE smallint USING pg_temp.wh_ledger_code('ref_model', ref_model),
+                ALTER COLUMN memo TYPE integer USING pg_temp.wh_ledger_memo(memo)
+            """
+        )
+    cur.execute("DROP FUNCTION pg_temp.wh_ledger_code(text, text)")
+    cur.execute("DROP FUNCTION pg_temp.wh_ledger_memo(text)")
+
+
+def encode_generic(cur):
+    # Values are rewritten in place as integers (by primary key, so a string can never be
+    # confused with a code); AlterFieldExceptPostgreSQL then changes the column types.
+    seed_lookups(cur)
+    cur.execute("SELECT kind, value, id FROM warehousing_ledgercode")
+    codes = {(k, v): i for k, v, i in cur.fetchall()}
+    memo_ids = {}
+    for table, pk in TABLES.items():
+        cur.execute(f"SELECT {pk}, qty_delta, movement_type, ref_model, memo FROM {table}")
+        rows = cur.fetchall()
+        for *_, memo in rows:
+            if memo and memo not in memo_ids:
+                cur.execute("INSERT INTO warehousing_ledgermemo (digest, text) VALUES (%s, %s)", [warehousing.fields.memo_digest(memo), memo])
+                memo_ids[memo] = cur.lastrowid
+        cur.executemany(
+            f"UPDATE {table} SET qty_delta = %s, movement_type = %s, ref_model = %s, memo = %s WHERE {pk} = %s",
+            [
+                (
+                    warehousing.fields.MilliQuantityField().get_prep_value(qty),
+                    codes.get(("movement_type", mt), 0),
+                    codes.get(("ref_model", ref), 0),
+                    memo_ids.get(memo, 0),
+                    key,
+                )
+                for key, qty, mt, ref, memo in rows
+            ],
+        )
+
+
+def encode_ledger(apps, schema_editor):
+    with schema_editor.connection.cursor() as cur:
+        if schema_editor.connection.vendor == "postgresql":
+            encode_postgresql(cur)
+        else:
+            encode_generic(cur)
+
+
+class AlterFieldExceptPostgreSQL(migrations.AlterField):
+    """encode_postgresql() already changed the column types."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != "postgresql":
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("warehousing", "0017_stockledger_ref_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LedgerCode",
+            fields=[
+                ("id", models.SmallAutoField(primary_key=True, serialize=False)),
+                ("kind", models.CharField(max_length=20)),
+                ("value", models.CharField(max_length=50)),
+            ],
+            options={
+                "verbose_name": "Ledger Code",
+                "verbose_name_plural": "Ledger Codes",
+                "constraints": [models.UniqueConstraint(fields=("kind", "value"), name="uq_ledger_code_kind_value")],
+            },
+        ),
+        migrations.CreateModel(
+            name="LedgerMemo",
+            fields=[
+                ("id", models.AutoField(primary_key=True, serialize=False)),
+                ("digest", models.CharField(max_length=32, unique=True)),
+                ("text", models.TextField()),
+            ],
+            options={
+                "verbose_name": "Ledger Memo",
+                "verbose_name_plural": "Ledger Memos",
+            },
+        ),
+        migrations.RunPython(encode_ledger),
+        *[
+            AlterFieldExceptPostgreSQL(model_name=model_name, name=name, field=field)
+            for model_name in ("stockledger", "historicalstockledger")
+            for name, field in new_fields().items()
+        ],
+    ]
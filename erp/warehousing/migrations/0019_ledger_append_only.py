@@ -0,0 +1,84 @@
+"""Replace simple_history on StockLedger with one PostingBatch per posting and make the
+ledger append-only.
+
+HistoricalStockLedger is dropped (archive it first with archive_ledger if the copies are still
+needed). On PostgreSQL a BEFORE UPDATE OR DELETE row trigger on the partitioned parent - cloned
+onto every partition - rejects changes unless the transaction set
+warehousing.ledger_maintenance = 'on' (see warehousing.ledger_audit.ledger_maintenance).
+"""
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+CREATE_TRIGGER = """
+CREATE OR REPLACE FUNCTION warehousing_stockledger_append_only() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF coalesce(current_setting('warehousing.ledger_maintenance', true), '') = 'on' THEN
+        IF TG_OP = 'DELETE' THEN
+            RETURN OLD;
+        END IF;
+        RETURN NEW;
+    END IF;
+    RAISE EXCEPTION 'warehousing_stockledger is append-only: % of row % rejected', TG_OP, OLD.id
+        USING ERRCODE = 'integrity_constraint_violation',
+              HINT = 'Post a correcting entry, or run maintenance inside ledger_maintenance().';
+END
+$$;
+CREATE TRIGGER stockledger_append_only
+    BEFORE UPDATE OR DELETE ON warehousing_stockledger
+    FOR EACH ROW EXECUTE FUNCTION warehousing_stockledger_append_only();
+"""
+DROP_TRIGGER = """
+DROP TRIGGER IF EXISTS stockledger_append_only ON warehousing_stockledger;
+DROP FUNCTION IF EXISTS warehousing_stockledger_append_only();
+"""
+
+
+def create_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        # No params: the plpgsql RAISE placeholders (%) must reach the server verbatim
+        schema_editor.execute(CREATE_TRIGGER, params=None)
+
+
+def drop_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(DROP_TRIGGER, params=None)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("warehousing", "0018_ledger_compact_encoding"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PostingBatch",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("created_at", models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ("rows", models.PositiveIntegerField(default=0)),
+                ("ref_model", models.CharField(blank=True, max_length=50)),
+                ("ref_id", models.CharField(blank=True, max_length=50)),
+                ("source", models.CharField(blank=True, max_length=200)),
+                ("remote_addr", models.GenericIPAddressField(blank=True, null=True)),
+                ("user_agent", models.CharField(blank=True, max_length=255)),
+                ("user", models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name="+", to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                "verbose_name": "Posting Batch",
+                "verbose_name_plural": "Posting Batches",
+                "indexes": [models.Index(fields=["ref_model", "ref_id"], name="wh_postbatch_ref_idx")],
+            },
+        ),
+        migrations.AddField(
+            model_name="stockledger",
+            name="batch",
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name="+", to="warehousing.postingbatch"),
+        ),
+        migrations.DeleteModel(
+            name="HistoricalStockLedger",
+        ),
+        migrations.RunPython(create_trigger, drop_trigger),
+    ]
@@ -0,0 +1,77 @@
+"""Denormalized StockLedger projection for the movements grid, backfilled with running
+on-hand totals per (location, item)."""
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_ledger_view(apps, schema_editor):
+    user_table = apps.get_model(settings.AUTH_USER_MODEL)._meta.db_table
+    with schema_editor.connection.cursor() as cur:
+        cur.execute(
+            f"""
+            INSERT INTO warehousing_ledgerview (
+                ledger_id, ts, warehouse_id, location_id, item_id, user_id,
+                qty_delta, qty_before, qty_after, movement_type, ref_model, ref_id, memo,
+                location_code, location_name, location_subtype, item_sku, item_name, item_image, username
+            )
+            SELECT l.id, l.ts, l.warehouse_id, l.location_id, l.item_id, l.user_id,
+                   l.qty_delta / 1000.0,
+                   (SUM(l.qty_delta) OVER w - l.qty_delta) / 1000.0,
+                   SUM(l.qty_delta) OVER w / 1000.0,
+                   COALESCE(mt.value, ''), COALESCE(rm.value, ''), l.ref_id, COALESCE(m.text, ''),
+                   loc.code, loc.display_name, COALESCE(loc.subtype, ''),
+                   i.sku, i.name, COALESCE(i.image, ''), COALESCE(u.username, '')
+            FROM warehousing_stockledger l
+            JOIN warehousing_location loc ON loc.id = l.location_id
+            JOIN catalog_item i ON i.id = l.item_id
+            LEFT JOIN {user_table} u ON u.id = l.user_id
+            LEFT JOIN warehousing_ledgercode mt ON mt.id = l.movement_type
+            LEFT JOIN warehousing_ledgercode rm ON rm.id = l.ref_model
+            LEFT JOIN warehousing_ledgermemo m ON m.id = l.memo
+            WINDOW w AS (PARTITION BY l.location_id, l.item_id ORDER BY l.ts, l.id ROWS UNBOUNDED PRECEDING)
+            """
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("catalog", "0004_historicalitem_item"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("warehousing", "0019_ledger_append_only"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LedgerView",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("ledger_id", models.BigIntegerField(unique=True)),
+                ("ts", models.DateTimeField()),
+                ("qty_delta", models.DecimalField(decimal_places=3, max_digits=12)),
+                ("qty_before", models.DecimalField(decimal_places=3, max_digits=16)),
+                ("qty_after", models.DecimalField(decimal_places=3, max_digits=16)),
+                ("movement_type", models.CharField(max_length=32)),
+                ("ref_model", models.CharField(blank=True, max_length=50)),
+                ("ref_id", models.CharField(blank=True, max_length=50)),
+                ("memo", models.TextField(blank=True)),
+                ("location_code", models.CharField(blank=True, max_length=32)),
+                ("location_name", models.CharField(blank=True, max_length=120)),
+                ("location_subtype", models.CharField(blank=True, max_length=20)),
+                ("item_sku", models.CharField(blank=True, max_length=10)),
+                ("item_name", models.CharField(blank=True, max_length=200)),
+                ("item_image", models.CharField(blank=True, max_length=255)),
+                ("username", models.CharField(blank=True, max_length=150)),
+                ("item", models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name="+", to="catalog.item")),
+                ("location", models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name="+", to="warehousing.location")),
+                ("user", models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name="+", to=settings.AUTH_USER_MODEL)),
+                ("warehouse", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to="warehousing.warehouse")),
+            ],
+            options={
+                "verbose_name": "Ledger View Row",
+                "verbose_name_plural": "Ledger View",
+                "indexes": [models.Index(fields=["warehouse", "-ts", "-ledger_id"], name="wh_ledgerview_wh_ts_idx")],
+            },
+        ),
+        migrations.RunPython(backfill_ledger_view, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_availability(apps, schema_editor):
+    with schema_editor.connection.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO warehousing_itemavailability (item_id, warehouse_id, physical, pending, damage, lost, other, updated_at)
+            SELECT l.item_id, l.warehouse_id,
+                   SUM(CASE WHEN b.bucket = 'physical' THEN l.qty_delta ELSE 0 END) / 1000.0,
+                   SUM(CASE WHEN b.bucket = 'pending' THEN l.qty_delta ELSE 0 END) / 1000.0,
+                   SUM(CASE WHEN b.bucket = 'damage' THEN l.qty_delta ELSE 0 END) / 1000.0,
+                   SUM(CASE WHEN b.bucket = 'lost' THEN l.qty_delta ELSE 0 END) / 1000.0,
+                   SUM(CASE WHEN b.bucket = 'other' THEN l.qty_delta ELSE 0 END) / 1000.0,
+                   CURRENT_TIMESTAMP
+            FROM warehousing_stockledger l
+            JOIN (
+                SELECT id, CASE
+                    WHEN type = 'PHYSICAL' THEN 'physical'
+                    WHEN subtype IN ('LOST_PENDING', 'EXCESS_PENDING', 'DAMAGE_PENDING') THEN 'pending'
+                    WHEN subtype = 'DAMAGE' THEN 'damage'
+                    WHEN subtype = 'LOST' THEN 'lost'
+                    ELSE 'other'
+                END AS bucket
+                FROM warehousing_location
+            ) b ON b.id = l.location_id
+            GROUP BY l.item_id, l.warehouse_id
+            """
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("catalog", "0004_historicalitem_item"),
+        ("warehousing", "0020_ledgerview"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ItemAvailability",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("physical", models.DecimalField(decimal_places=3, default=0, max_digits=16)),
+                ("pending", models.DecimalField(decimal_places=3, default=0, max_digits=16)),
+                ("damage", models.DecimalField(decimal_places=3, default=0, max_digits=16)),
+                ("lost", models.DecimalField(decimal_places=3, default=0, max_digits=16)),
+                ("other", models.DecimalField(decimal_places=3, default=0, max_digits=16)),
+                ("updated_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("item", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to="catalog.item")),
+                ("warehouse", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to="warehousing.warehouse")),
+            ],
+            options={
+                "verbose_name": "Item Availability",
+                "verbose_name_plural": "Item Availability",
+                "constraints": [models.UniqueConstraint(fields=("item", "warehouse"), name="uq_item_availability_item_wh")],
+            },
+        ),
+        migrations.RunPython(backfill_availability, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("catalog", "0004_historicalitem_item"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("warehousing", "0021_itemavailability"),
+    ]
+
+    operations = [
+        # db_default: the rollups are upserted with raw SQL that does not name this column
+        migrations.AddField(
+            model_name="itemavailability",
+            name="reserved",
+            field=models.DecimalField(db_default=0, decimal_places=3, default=0, max_digits=16),
+        ),
+        migrations.AddField(
+            model_name="stockbalance",
+            name="reserved",
+            field=models.DecimalField(db_default=0, decimal_places=3, default=0, max_digits=16),
+        ),
+        migrations.CreateModel(
+            name="StockReservation",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("qty", models.DecimalField(decimal_places=3, max_digits=12)),
+                ("status", models.CharField(choices=[("ACTIVE", "Active"), ("CONSUMED", "Consumed"), ("RELEASED", "Released"), ("EXPIRED", "Expired")], default="ACTIVE", max_length=10)),
+                ("expires_at", models.DateTimeField(blank=True, help_text="Empty = held until released", null=True)),
+                ("ref_model", models.CharField(blank=True, max_length=50)),
+                ("ref_id", models.CharField(blank=True, max_length=50)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("closed_at", models.DateTimeField(blank=True, null=True)),
+                ("created_by", models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name="+", to=settings.AUTH_USER_MODEL)),
+                ("item", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to="catalog.item")),
+                ("location", models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name="+", to="warehousing.location")),
+                ("warehouse", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="reservations", to="warehousing.warehouse")),
+            ],
+            options={
+                "verbose_name": "Stock Reservation",
+                "verbose_name_plural": "Stock Reservations",
+                "indexes": [
+                    models.Index(fields=["status", "expires_at"], name="wh_resv_status_exp_idx"),
+                    models.Index(fields=["warehouse", "item", "status"], name="wh_resv_wh_item_idx"),
+                    models.Index(fields=["ref_model", "ref_id"], name="wh_resv_ref_idx"),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,69 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("catalog", "0004_historicalitem_item"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("warehousing", "0022_stockreservation"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReorderSetting",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("reorder_point", models.DecimalField(decimal_places=3, help_text="Alert when available stock is at or below this", max_digits=12)),
+                ("max_qty", models.DecimalField(blank=True, decimal_places=3, help_text="Order-up-to level used for the suggested quantity", max_digits=12, null=True)),
+                ("active", models.BooleanField(default=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("item", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to="catalog.item")),
+                ("updated_by", models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name="+", to=settings.AUTH_USER_MODEL)),
+                ("warehouse", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="reorder_settings", to="warehousing.warehouse")),
+            ],
+            options={
+                "verbose_name": "Reorder Setting",
+                "verbose_name_plural": "Reorder Settings",
+                "constraints": [models.UniqueConstraint(fields=("warehouse", "item"), name="uq_reorder_setting_wh_item")],
+            },
+        ),
+        migrations.CreateModel(
+            name="Alert",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("kind", models.CharField(choices=[("LOW_STOCK", "Low stock"), ("OUT_OF_STOCK", "Out of stock")], max_length=20)),
+                ("status", models.CharField(choices=[("OPEN", "Open"), ("RESOLVED", "Resolved")], default="OPEN", max_length=10)),
+                ("available", models.DecimalField(decimal_places=3, max_digits=16)),
+                ("reorder_point", models.DecimalField(decimal_places=3, max_digits=12)),
+                ("suggested_qty", models.DecimalField(blank=True, decimal_places=3, max_digits=16, null=True)),
+                ("ledger_id", models.BigIntegerField(blank=True, help_text="Latest ledger row that led to this evaluation", null=True)),
+                ("opened_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("updated_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("resolved_at", models.DateTimeField(blank=True, null=True)),
+                ("item", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to="catalog.item")),
+                ("warehouse", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="alerts", to="warehousing.warehouse")),
+            ],
+            options={
+                "verbose_name": "Alert",
+                "verbose_name_plural": "Alerts",
+                "indexes": [models.Index(fields=["status", "warehouse", "kind"], name="wh_alert_status_idx")],
+                "constraints": [models.UniqueConstraint(condition=models.Q(("status", "OPEN")), fields=("warehouse", "item"), name="uq_alert_open_wh_item")],
+            },
+        ),
+        migrations.CreateModel(
+            name="LedgerCursor",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("name", models.CharField(max_length=50, unique=True)),
+                ("last_id", models.BigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Ledger Cursor",
+                "verbose_name_plural": "Ledger Cursors",
+            },
+        ),
+    ]
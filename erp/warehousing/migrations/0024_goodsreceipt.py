@@ -0,0 +1,70 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+import warehousing.fields
+
+MOVEMENT_TYPE_CHOICES = [("ADJ_REQ_DAMAGE", "Adj Req Damage"), ("ADJ_REQ_LOST", "Adj Req Lost"), ("ADJ_REQ_EXCESS", "Adj Req Excess"), ("ADJ_APPROVE_DAMAGE", "Adj Approve Damage"), ("ADJ_DECLINE_DAMAGE", "Adj Decline Damage"), ("ADJ_APPROVE_LOST", "Adj Approve Lost"), ("ADJ_DECLINE_LOST", "Adj Decline Lost"), ("ADJ_APPROVE_EXCESS", "Adj Approve Excess"), ("ADJ_DECLINE_EXCESS", "Adj Decline Excess"), ("PUTAWAY", "Putaway"), ("PUTAWAY_LOST", "Putaway Lost"), ("TRANSFER", "Transfer"), ("ADJ_DELETE_REQUEST", "Adj Delete Request"), ("INTERNAL_TRANSFER", "Internal Transfer"), ("OPENING_BALANCE", "Opening Balance"), ("RECEIPT", "Receipt")]
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("catalog", "0004_historicalitem_item"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("warehousing", "0023_reorder_alerts"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GoodsReceipt",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("number", models.CharField(editable=False, max_length=20, unique=True)),
+                ("reference", models.CharField(blank=True, help_text="Supplier document, PO or container number", max_length=100)),
+                ("memo", models.TextField(blank=True)),
+                ("idempotency_key", models.CharField(blank=True, max_length=64)),
+                ("line_count", models.PositiveIntegerField(default=0)),
+                ("total_qty", models.DecimalField(decimal_places=3, default=0, max_digits=16)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("created_by", models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name="+", to=settings.AUTH_USER_MODEL)),
+                ("warehouse", models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name="goods_receipts", to="warehousing.warehouse")),
+            ],
+            options={
+                "verbose_name": "Goods Receipt",
+                "verbose_name_plural": "Goods Receipts",
+                "indexes": [
+                    models.Index(fields=["warehouse", "created_at"], name="wh_grn_wh_created_idx"),
+                    models.Index(fields=["reference"], name="wh_grn_reference_idx"),
+                ],
+                "constraints": [
+                    models.UniqueConstraint(condition=models.Q(("idempotency_key", ""), _negated=True), fields=("warehouse", "idempotency_key"), name="uq_grn_idempotency_per_wh"),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="GoodsReceiptLine",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("line_no", models.PositiveIntegerField()),
+                ("qty", models.DecimalField(decimal_places=3, max_digits=12)),
+                ("item", models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name="+", to="catalog.item")),
+                ("receipt", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="lines", to="warehousing.goodsreceipt")),
+            ],
+            options={
+                "verbose_name": "Goods Receipt Line",
+                "verbose_name_plural": "Goods Receipt Lines",
+                "constraints": [models.UniqueConstraint(fields=("receipt", "line_no"), name="uq_grn_line_no")],
+            },
+        ),
+        # New RECEIPT choice only; no schema change
+        migrations.AlterField(
+            model_name="stockledger",
+            name="movement_type",
+            field=warehousing.fields.CodeField(choices=MOVEMENT_TYPE_CHOICES, kind="movement_type"),
+        ),
+        migrations.AlterField(
+            model_name="ledgerdailyrollup",
+            name="movement_type",
+            field=models.CharField(choices=MOVEMENT_TYPE_CHOICES, max_length=32),
+        ),
+    ]
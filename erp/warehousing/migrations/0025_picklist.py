@@ -0,0 +1,80 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+import warehousing.fields
+
+MOVEMENT_TYPE_CHOICES = [("ADJ_REQ_DAMAGE", "Adj Req Damage"), ("ADJ_REQ_LOST", "Adj Req Lost"), ("ADJ_REQ_EXCESS", "Adj Req Excess"), ("ADJ_APPROVE_DAMAGE", "Adj Approve Damage"), ("ADJ_DECLINE_DAMAGE", "Adj Decline Damage"), ("ADJ_APPROVE_LOST", "Adj Approve Lost"), ("ADJ_DECLINE_LOST", "Adj Decline Lost"), ("ADJ_APPROVE_EXCESS", "Adj Approve Excess"), ("ADJ_DECLINE_EXCESS", "Adj Decline Excess"), ("PUTAWAY", "Putaway"), ("PUTAWAY_LOST", "Putaway Lost"), ("TRANSFER", "Transfer"), ("ADJ_DELETE_REQUEST", "Adj Delete Request"), ("INTERNAL_TRANSFER", "Internal Transfer"), ("OPENING_BALANCE", "Opening Balance"), ("RECEIPT", "Receipt"), ("PICK", "Pick")]
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("catalog", "0004_historicalitem_item"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("warehousing", "0024_goodsreceipt"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="location",
+            name="pick_sequence",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="historicallocation",
+            name="pick_sequence",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name="PickList",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("number", models.CharField(editable=False, max_length=20, unique=True)),
+                ("status", models.CharField(choices=[("OPEN", "Open"), ("CONFIRMED", "Confirmed"), ("CANCELLED", "Cancelled")], default="OPEN", max_length=10)),
+                ("ref_model", models.CharField(blank=True, help_text="Document the list was generated for, e.g. SO", max_length=50)),
+                ("ref_id", models.CharField(blank=True, max_length=50)),
+                ("short", models.JSONField(blank=True, default=list, help_text="Demand that could not be allocated")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("confirmed_at", models.DateTimeField(blank=True, null=True)),
+                ("confirmed_by", models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name="+", to=settings.AUTH_USER_MODEL)),
+                ("created_by", models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name="+", to=settings.AUTH_USER_MODEL)),
+                ("warehouse", models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name="pick_lists", to="warehousing.warehouse")),
+            ],
+            options={
+                "verbose_name": "Pick List",
+                "verbose_name_plural": "Pick Lists",
+                "indexes": [
+                    models.Index(fields=["warehouse", "status"], name="wh_picklist_wh_status_idx"),
+                    models.Index(fields=["ref_model", "ref_id"], name="wh_picklist_ref_idx"),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="PickListLine",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("seq", models.PositiveIntegerField(help_text="Stop order on the pick walk")),
+                ("qty", models.DecimalField(decimal_places=3, max_digits=12)),
+                ("picked_qty", models.DecimalField(blank=True, decimal_places=3, max_digits=12, null=True)),
+                ("item", models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name="+", to="catalog.item")),
+                ("location", models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name="+", to="warehousing.location")),
+                ("pick_list", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="lines", to="warehousing.picklist")),
+            ],
+            options={
+                "verbose_name": "Pick List Line",
+                "verbose_name_plural": "Pick List Lines",
+                "constraints": [models.UniqueConstraint(fields=("pick_list", "seq"), name="uq_picklist_line_seq")],
+            },
+        ),
+        # New PICK choice only; no schema change
+        migrations.AlterField(
+            model_name="stockledger",
+            name="movement_type",
+            field=warehousing.fields.CodeField(choices=MOVEMENT_TYPE_CHOICES, kind="movement_type"),
+        ),
+        migrations.AlterField(
+            model_name="ledgerdailyrollup",
+            name="movement_type",
+            field=models.CharField(choices=MOVEMENT_TYPE_CHOICES, max_length=32),
+        ),
+    ]
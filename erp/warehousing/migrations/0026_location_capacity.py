@@ -0,0 +1,24 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("warehousing", "0025_picklist"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="location",
+            name="capacity",
+            field=models.DecimalField(blank=True, decimal_places=3, max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name="historicallocation",
+            name="capacity",
+            field=models.DecimalField(blank=True, decimal_places=3, max_digits=12, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="stockbalance",
+            index=models.Index(condition=models.Q(("qty__gt", 0)), fields=["warehouse", "item", "location"], name="wh_balance_in_stock_idx"),
+        ),
+    ]
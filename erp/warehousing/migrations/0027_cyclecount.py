@@ -0,0 +1,66 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+import warehousing.fields
+
+MOVEMENT_TYPE_CHOICES = [("ADJ_REQ_DAMAGE", "Adj Req Damage"), ("ADJ_REQ_LOST", "Adj Req Lost"), ("ADJ_REQ_EXCESS", "Adj Req Excess"), ("ADJ_APPROVE_DAMAGE", "Adj Approve Damage"), ("ADJ_DECLINE_DAMAGE", "Adj Decline Damage"), ("ADJ_APPROVE_LOST", "Adj Approve Lost"), ("ADJ_DECLINE_LOST", "Adj Decline Lost"), ("ADJ_APPROVE_EXCESS", "Adj Approve Excess"), ("ADJ_DECLINE_EXCESS", "Adj Decline Excess"), ("PUTAWAY", "Putaway"), ("PUTAWAY_LOST", "Putaway Lost"), ("TRANSFER", "Transfer"), ("ADJ_DELETE_REQUEST", "Adj Delete Request"), ("INTERNAL_TRANSFER", "Internal Transfer"), ("OPENING_BALANCE", "Opening Balance"), ("RECEIPT", "Receipt"), ("PICK", "Pick"), ("CYCLE_COUNT", "Cycle Count")]
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("catalog", "0004_historicalitem_item"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("warehousing", "0026_location_capacity"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CycleCount",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("number", models.CharField(editable=False, max_length=20, unique=True)),
+                ("status", models.CharField(choices=[("OPEN", "Open"), ("POSTED", "Posted"), ("CANCELLED", "Cancelled")], default="OPEN", max_length=10)),
+                ("memo", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("posted_at", models.DateTimeField(blank=True, null=True)),
+                ("created_by", models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name="+", to=settings.AUTH_USER_MODEL)),
+                ("locations", models.ManyToManyField(help_text="Locations in scope of the count", related_name="+", to="warehousing.location")),
+                ("posted_by", models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name="+", to=settings.AUTH_USER_MODEL)),
+                ("warehouse", models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name="cycle_counts", to="warehousing.warehouse")),
+            ],
+            options={
+                "verbose_name": "Cycle Count",
+                "verbose_name_plural": "Cycle Counts",
+                "indexes": [models.Index(fields=["warehouse", "status"], name="wh_cyclecount_wh_status_idx")],
+            },
+        ),
+        migrations.CreateModel(
+            name="CycleCountLine",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("expected", models.DecimalField(decimal_places=3, default=0, max_digits=16)),
+                ("counted", models.DecimalField(blank=True, decimal_places=3, max_digits=16, null=True)),
+                ("variance", models.DecimalField(blank=True, decimal_places=3, help_text="counted - expected, set when posted", max_digits=16, null=True)),
+                ("count", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="lines", to="warehousing.cyclecount")),
+                ("item", models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name="+", to="catalog.item")),
+                ("location", models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name="+", to="warehousing.location")),
+            ],
+            options={
+                "verbose_name": "Cycle Count Line",
+                "verbose_name_plural": "Cycle Count Lines",
+                "constraints": [models.UniqueConstraint(fields=("count", "location", "item"), name="uq_cyclecount_line")],
+            },
+        ),
+        # New CYCLE_COUNT choice only; no schema change
+        migrations.AlterField(
+            model_name="stockledger",
+            name="movement_type",
+            field=warehousing.fields.CodeField(choices=MOVEMENT_TYPE_CHOICES, kind="movement_type"),
+        ),
+        migrations.AlterField(
+            model_name="ledgerdailyrollup",
+            name="movement_type",
+            field=models.CharField(choices=MOVEMENT_TYPE_CHOICES, max_length=32),
+        ),
+    ]
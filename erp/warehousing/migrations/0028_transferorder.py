@@ -0,0 +1,139 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+import warehousing.fields
+
+MOVEMENT_TYPE_CHOICES = [("ADJ_REQ_DAMAGE", "Adj Req Damage"), ("ADJ_REQ_LOST", "Adj Req Lost"), ("ADJ_REQ_EXCESS", "Adj Req Excess"), ("ADJ_APPROVE_DAMAGE", "Adj Approve Damage"), ("ADJ_DECLINE_DAMAGE", "Adj Decline Damage"), ("ADJ_APPROVE_LOST", "Adj Approve Lost"), ("ADJ_DECLINE_LOST", "Adj Decline Lost"), ("ADJ_APPROVE_EXCESS", "Adj Approve Excess"), ("ADJ_DECLINE_EXCESS", "Adj Decline Excess"), ("PUTAWAY", "Putaway"), ("PUTAWAY_LOST", "Putaway Lost"), ("TRANSFER", "Transfer"), ("ADJ_DELETE_REQUEST", "Adj Delete Request"), ("INTERNAL_TRANSFER", "Internal Transfer"), ("OPENING_BALANCE", "Opening Balance"), ("RECEIPT", "Receipt"), ("PICK", "Pick"), ("CYCLE_COUNT", "Cycle Count"), ("TRANSFER_OUT", "Transfer Out"), ("TRANSFER_IN", "Transfer In")]
+
+SUBTYPE_CHOICES = [("STORAGE", "STORAGE"), ("RECEIVE", "RECEIVE"), ("DISPATCH", "DISPATCH"), ("RETURN", "RETURN"), ("QC", "QC"), ("HOLD", "HOLD"), ("DAMAGE", "DAMAGE"), ("LOST", "LOST"), ("EXCESS", "EXCESS"), ("LOST_PENDING", "LOST_PENDING"), ("EXCESS_PENDING", "EXCESS_PENDING"), ("DAMAGE_PENDING", "DAMAGE_PENDING"), ("IN_TRANSIT", "IN_TRANSIT")]
+
+
+def add_in_transit_bins(apps, schema_editor):
+    Warehouse = apps.get_model("warehousing", "Warehouse")
+    Location = apps.get_model("warehousing", "Location")
+    have = set(Location.objects.filter(type="VIRTUAL", subtype="IN_TRANSIT").values_list("warehouse_id", flat=True))
+    Location.objects.bulk_create([
+        Location(warehouse_id=wh_id, type="VIRTUAL", subtype="IN_TRANSIT", display_name="In Transit", system_managed=True, status="ACTIVE")
+        for wh_id in Warehouse.objects.exclude(id__in=have).values_list("id", flat=True)
+    ])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("catalog", "0004_historicalitem_item"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("warehousing", "0027_cyclecount"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="location",
+            name="subtype",
+            field=models.CharField(blank=True, choices=SUBTYPE_CHOICES, max_length=20, null=True),
+        ),
+        migrations.AlterField(
+            model_name="historicallocation",
+            name="subtype",
+            field=models.CharField(blank=True, choices=SUBTYPE_CHOICES, max_length=20, null=True),
+        ),
+        migrations.CreateModel(
+            name="TransferOrder",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("number", models.CharField(editable=False, max_length=20, unique=True)),
+                ("status", models.CharField(choices=[("IN_TRANSIT", "In Transit"), ("RECEIVED", "Received")], default="IN_TRANSIT", max_length=12)),
+                ("reference", models.CharField(blank=True, help_text="Carrier, waybill or vehicle number", max_length=100)),
+                ("memo", models.TextField(blank=True)),
+                ("idempotency_key", models.CharField(blank=True, max_length=64)),
+                ("line_count", models.PositiveIntegerField(default=0)),
+                ("total_qty", models.DecimalField(decimal_places=3, default=0, max_digits=16)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("received_at", models.DateTimeField(blank=True, null=True)),
+                ("created_by", models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name="+", to=settings.AUTH_USER_MODEL)),
+                ("dest_warehouse", models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name="transfers_in", to="warehousing.warehouse")),
+                ("from_location", models.ForeignKey(help_text="Where the stock left the source warehouse", on_delete=django.db.models.deletion.PROTECT, related_name="+", to="warehousing.location")),
+                ("source_warehouse", models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name="transfers_out", to="warehousing.warehouse")),
+            ],
+            options={
+                "verbose_name": "Transfer Order",
+                "verbose_name_plural": "Transfer Orders",
+                "indexes": [
+                    models.Index(fields=["source_warehouse", "dest_warehouse", "status"], name="wh_transfer_pair_status_idx"),
+                    models.Index(fields=["dest_warehouse", "status"], name="wh_transfer_dest_status_idx"),
+                ],
+                "constraints": [
+                    models.UniqueConstraint(condition=models.Q(("idempotency_key", ""), _negated=True), fields=("source_warehouse", "idempotency_key"), name="uq_transfer_idempotency_per_wh"),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="TransferOrderLine",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("line_no", models.PositiveIntegerField()),
+                ("qty_shipped", models.DecimalField(decimal_places=3, max_digits=12)),
+                ("qty_received", models.DecimalField(decimal_places=3, default=0, max_digits=12)),
+                ("item", models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name="+", to="catalog.item")),
+                ("transfer", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="lines", to="warehousing.transferorder")),
+            ],
+            options={
+                "verbose_name": "Transfer Order Line",
+                "verbose_name_plural": "Transfer Order Lines",
+                "constraints": [
+                    models.UniqueConstraint(fields=("transfer", "line_no"), name="uq_transfer_line_no"),
+                    models.UniqueConstraint(fields=("transfer", "item"), name="uq_transfer_line_item"),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="TransferReceipt",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("idempotency_key", models.CharField(blank=True, max_length=64)),
+                ("line_count", models.PositiveIntegerField(default=0)),
+                ("total_qty", models.DecimalField(decimal_places=3, default=0, max_digits=16)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("created_by", models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name="+", to=settings.AUTH_USER_MODEL)),
+                ("transfer", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="receipts", to="warehousing.transferorder")),
+            ],
+            options={
+                "verbose_name": "Transfer Receipt",
+                "verbose_name_plural": "Transfer Receipts",
+                "constraints": [
+                    models.UniqueConstraint(condition=models.Q(("idempotency_key", ""), _negated=True), fields=("transfer", "idempotency_key"), name="uq_transfer_receipt_idempotency"),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="InTransitBalance",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("qty", models.DecimalField(decimal_places=3, default=0, max_digits=16)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("dest_warehouse", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to="warehousing.warehouse")),
+                ("item", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to="catalog.item")),
+                ("source_warehouse", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to="warehousing.warehouse")),
+            ],
+            options={
+                "verbose_name": "In-Transit Balance",
+                "verbose_name_plural": "In-Transit Balances",
+                "indexes": [models.Index(fields=["dest_warehouse", "item"], name="wh_in_transit_dest_item_idx")],
+                "constraints": [
+                    models.UniqueConstraint(fields=("source_warehouse", "dest_warehouse", "item"), name="uq_in_transit_pair_item"),
+                ],
+            },
+        ),
+        # New TRANSFER_OUT / TRANSFER_IN choices only; no schema change
+        migrations.AlterField(
+            model_name="stockledger",
+            name="movement_type",
+            field=warehousing.fields.CodeField(choices=MOVEMENT_TYPE_CHOICES, kind="movement_type"),
+        ),
+        migrations.AlterField(
+            model_name="ledgerdailyrollup",
+            name="movement_type",
+            field=models.CharField(choices=MOVEMENT_TYPE_CHOICES, max_length=32),
+        ),
+        migrations.RunPython(add_in_transit_bins, migrations.RunPython.noop),
+    ]
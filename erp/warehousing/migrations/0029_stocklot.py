@@ -0,0 +1,74 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("catalog", "0004_historicalitem_item"),
+        ("warehousing", "0028_transferorder"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StockLot",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("lot_number", models.CharField(max_length=64)),
+                ("expiry_date", models.DateField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("item", models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name="+", to="catalog.item")),
+            ],
+            options={
+                "verbose_name": "Stock Lot",
+                "verbose_name_plural": "Stock Lots",
+                "constraints": [models.UniqueConstraint(fields=("item", "lot_number"), name="uq_stock_lot_item_number")],
+            },
+        ),
+        migrations.CreateModel(
+            name="LotBalance",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("expiry_date", models.DateField(blank=True, null=True)),
+                ("qty", models.DecimalField(decimal_places=3, default=0, max_digits=16)),
+                ("updated_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("item", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to="catalog.item")),
+                ("location", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to="warehousing.location")),
+                ("lot", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="balances", to="warehousing.stocklot")),
+                ("warehouse", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to="warehousing.warehouse")),
+            ],
+            options={
+                "verbose_name": "Lot Balance",
+                "verbose_name_plural": "Lot Balances",
+                "indexes": [
+                    models.Index(condition=models.Q(("qty__gt", 0)), fields=["warehouse", "item", "expiry_date"], name="wh_lotbal_fefo_idx"),
+                    models.Index(condition=models.Q(("qty__gt", 0)), fields=["warehouse", "expiry_date"], name="wh_lotbal_expiry_idx"),
+                ],
+                "constraints": [models.UniqueConstraint(fields=("location", "item", "lot"), name="uq_lot_balance_loc_item_lot")],
+            },
+        ),
+        migrations.AddField(
+            model_name="stockledger",
+            name="lot",
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name="+", to="warehousing.stocklot"),
+        ),
+        migrations.AddIndex(
+            model_name="stockledger",
+            index=models.Index(condition=models.Q(("lot__isnull", False)), fields=["lot", "ts"], name="wh_ledger_lot_idx"),
+        ),
+        migrations.AddField(
+            model_name="stockledgerarchive",
+            name="lot",
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name="+", to="warehousing.stocklot"),
+        ),
+        migrations.AddField(
+            model_name="goodsreceiptline",
+            name="lot",
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name="+", to="warehousing.stocklot"),
+        ),
+        migrations.AddField(
+            model_name="picklistline",
+            name="lot",
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name="+", to="warehousing.stocklot"),
+        ),
+    ]
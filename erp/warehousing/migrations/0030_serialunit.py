@@ -0,0 +1,89 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+MOVEMENT_TYPE_CHOICES = [
+    ("ADJ_REQ_DAMAGE", "Adj Req Damage"),
+    ("ADJ_REQ_LOST", "Adj Req Lost"),
+    ("ADJ_REQ_EXCESS", "Adj Req Excess"),
+    ("ADJ_APPROVE_DAMAGE", "Adj Approve Damage"),
+    ("ADJ_DECLINE_DAMAGE", "Adj Decline Damage"),
+    ("ADJ_APPROVE_LOST", "Adj Approve Lost"),
+    ("ADJ_DECLINE_LOST", "Adj Decline Lost"),
+    ("ADJ_APPROVE_EXCESS", "Adj Approve Excess"),
+    ("ADJ_DECLINE_EXCESS", "Adj Decline Excess"),
+    ("PUTAWAY", "Putaway"),
+    ("PUTAWAY_LOST", "Putaway Lost"),
+    ("TRANSFER", "Transfer"),
+    ("ADJ_DELETE_REQUEST", "Adj Delete Request"),
+    ("INTERNAL_TRANSFER", "Internal Transfer"),
+    ("OPENING_BALANCE", "Opening Balance"),
+    ("RECEIPT", "Receipt"),
+    ("PICK", "Pick"),
+    ("CYCLE_COUNT", "Cycle Count"),
+    ("TRANSFER_OUT", "Transfer Out"),
+    ("TRANSFER_IN", "Transfer In"),
+]
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("catalog", "0004_historicalitem_item"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("warehousing", "0029_stocklot"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SerialUnit",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("serial", models.CharField(max_length=100)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("IN_STOCK", "In Stock"), ("DISPATCHED", "Dispatched"), ("IN_TRANSIT", "In Transit"), ("DAMAGED", "Damaged"), ("LOST", "Lost")],
+                        default="IN_STOCK",
+                        max_length=12,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("item", models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name="+", to="catalog.item")),
+                ("location", models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name="+", to="warehousing.location")),
+                ("lot", models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name="+", to="warehousing.stocklot")),
+                ("warehouse", models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name="+", to="warehousing.warehouse")),
+            ],
+            options={
+                "verbose_name": "Serial Unit",
+                "verbose_name_plural": "Serial Units",
+                "indexes": [
+                    models.Index(fields=["serial"], name="wh_serial_serial_idx"),
+                    models.Index(fields=["warehouse", "location", "item"], name="wh_serial_wh_loc_item_idx"),
+                ],
+                "constraints": [models.UniqueConstraint(fields=("item", "serial"), name="uq_serial_unit_item_serial")],
+            },
+        ),
+        migrations.CreateModel(
+            name="SerialMovement",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("ts", models.DateTimeField(default=django.utils.timezone.now)),
+                ("movement_type", models.CharField(choices=MOVEMENT_TYPE_CHOICES, max_length=32)),
+                ("ref_model", models.CharField(blank=True, max_length=50)),
+                ("ref_id", models.CharField(blank=True, max_length=50)),
+                ("batch", models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name="+", to="warehousing.postingbatch")),
+                ("from_location", models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name="+", to="warehousing.location")),
+                ("to_location", models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name="+", to="warehousing.location")),
+                ("unit", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="movements", to="warehousing.serialunit")),
+                ("user", models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name="+", to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                "verbose_name": "Serial Movement",
+                "verbose_name_plural": "Serial Movements",
+                "indexes": [models.Index(fields=["unit", "ts"], name="wh_serialmove_unit_ts_idx")],
+            },
+        ),
+    ]
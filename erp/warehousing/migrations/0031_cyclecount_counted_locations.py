@@ -0,0 +1,17 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("warehousing", "0030_serialunit"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cyclecount",
+            name="counted_locations",
+            field=models.ManyToManyField(
+                blank=True, help_text="Locations scanned so far; only these are written off when posted", related_name="+", to="warehousing.location"
+            ),
+        ),
+    ]
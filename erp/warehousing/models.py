@@ -1,11 +1,14 @@
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.db.models import Q
 from django.utils import timezone
 from simple_history.models import HistoricalRecords
 
+from .fields import CodeField, MemoField, MilliQuantityField
+from .ledger_audit import LedgerQuerySet, check_writable, request_context
+
 
 class WarehouseStatus(models.TextChoices):
     ACTIVE = "ACTIVE", "ACTIVE"
@@ -29,6 +32,7 @@ class VirtualSubtype(models.TextChoices):
     LOST_PENDING = "LOST_PENDING", "LOST_PENDING"
     EXCESS_PENDING = "EXCESS_PENDING", "EXCESS_PENDING"
     DAMAGE_PENDING = "DAMAGE_PENDING", "DAMAGE_PENDING"
+    IN_TRANSIT = "IN_TRANSIT", "IN_TRANSIT"
 
 
 class PhysicalSubtype(models.TextChoices):
@@ -98,6 +102,10 @@ class Location(models.Model):
     )
     display_name = models.CharField(max_length=120, blank=True)
     code = models.CharField(max_length=32, blank=True)
+    # Walking order for pick lists; locations without one follow, by code in natural order
+    pick_sequence = models.PositiveIntegerField(null=True, blank=True)
+    # Units the location holds, for putaway suggestions; empty means unlimited
+    capacity = models.DecimalField(max_digits=12, decimal_places=3, null=True, blank=True)
     system_managed = models.BooleanField(default=False)
     status = models.CharField(max_length=10, choices=WarehouseStatus.choices, default=WarehouseStatus.ACTIVE)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -183,20 +191,125 @@ class MovementType(models.TextChoices):
     ADJ_DELETE_REQUEST = "ADJ_DELETE_REQUEST", "Adj Delete Request"
     # New: Internal movement between physical locations
     INTERNAL_TRANSFER = "INTERNAL_TRANSFER", "Internal Transfer"
+    # New: Carried-forward balance replacing rows moved to cold storage by archive_ledger
+    OPENING_BALANCE = "OPENING_BALANCE", "Opening Balance"
+    # New: Goods received into the RECEIVE bin (GoodsReceipt)
+    RECEIPT = "RECEIPT", "Receipt"
+    # New: Picked stock moved from its location to the DISPATCH bin (PickList)
+    PICK = "PICK", "Pick"
+    # New: Variance between counted and expected stock posted by a CycleCount
+    CYCLE_COUNT = "CYCLE_COUNT", "Cycle Count"
+    # New: Inter-warehouse TransferOrder legs (source -> its IN_TRANSIT bin, IN_TRANSIT -> destination RECEIVE)
+    TRANSFER_OUT = "TRANSFER_OUT", "Transfer Out"
+    TRANSFER_IN = "TRANSFER_IN", "Transfer In"
+
+
+class LedgerCode(models.Model):
+    """Integer codes for the repeated StockLedger strings (movement_type, ref_model); see fields.CodeField.
+    Rows are only ever added, so a code keeps its meaning for SQL readers joining on it."""
+    id = models.SmallAutoField(primary_key=True)
+    kind = models.CharField(max_length=20)
+    value = models.CharField(max_length=50)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "value"], name="uq_ledger_code_kind_value"),
+        ]
+        verbose_name = "Ledger Code"
+        verbose_name_plural = "Ledger Codes"
+
+    def __str__(self):
+        return f"{self.kind}:{self.value}={self.id}"
+
+
+class LedgerMemo(models.Model):
+    """Interned StockLedger memo texts; see fields.MemoField."""
+    id = models.AutoField(primary_key=True)
+    digest = models.CharField(max_length=32, unique=True)  # md5 of text
+    text = models.TextField()
+
+    class Meta:
+        verbose_name = "Ledger Memo"
+        verbose_name_plural = "Ledger Memos"
+
+    def __str__(self):
+        return self.text[:80]
+
+
+class PostingBatch(models.Model):
+    """One posting of StockLedger rows: who posted it and from which request or command.
+    Written once per batch instead of a simple_history copy of every ledger row."""
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    rows = models.PositiveIntegerField(default=0)
+    ref_model = models.CharField(max_length=50, blank=True)
+    ref_id = models.CharField(max_length=50, blank=True)
+    source = models.CharField(max_length=200, blank=True)  # "POST /api/..." or "manage.py <command>"
+    remote_addr = models.GenericIPAddressField(null=True, blank=True)
+    user_agent = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["ref_model", "ref_id"], name="wh_postbatch_ref_idx"),
+        ]
+        verbose_name = "Posting Batch"
+        verbose_name_plural = "Posting Batches"
+
+    def __str__(self):
+        return f"#{self.pk} {self.rows} rows {self.ref_model}:{self.ref_id}"
+
+    @classmethod
+    def open(cls, *, user=None, rows: int = 0, ref_model: str = "", ref_id: str = "") -> "PostingBatch":
+        ctx = request_context()
+        return cls.objects.create(
+            user=user or ctx["user"],
+            rows=rows,
+            ref_model=(ref_model or "")[:50],
+            ref_id=(ref_id or "")[:50],
+            source=ctx["source"],
+            remote_addr=ctx["remote_addr"],
+            user_agent=ctx["user_agent"],
+        )
+
+
+class StockLot(models.Model):
+    """Lot (batch) of an item, with its expiry date. Ledger rows may name the lot they move;
+    LotBalance keeps the on-hand per lot (services_lots)."""
+    item = models.ForeignKey("catalog.Item", on_delete=models.PROTECT, related_name="+")
+    lot_number = models.CharField(max_length=64)
+    expiry_date = models.DateField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["item", "lot_number"], name="uq_stock_lot_item_number"),
+        ]
+        verbose_name = "Stock Lot"
+        verbose_name_plural = "Stock Lots"
+
+    def __str__(self):
+        return f"{self.lot_number} (exp {self.expiry_date or '-'})"
 
 
 class StockLedger(models.Model):
+    """Append-only: rows are never updated or deleted (see ledger_audit)."""
     ts = models.DateTimeField(auto_now_add=True, db_index=True)
     warehouse = models.ForeignKey("Warehouse", on_delete=models.PROTECT, related_name="+")
     location = models.ForeignKey("Location", on_delete=models.PROTECT, related_name="+")
     item = models.ForeignKey("catalog.Item", on_delete=models.PROTECT, related_name="+")
-    qty_delta = models.DecimalField(max_digits=12, decimal_places=3)  # +in, -out
-    movement_type = models.CharField(max_length=32, choices=MovementType.choices)
-    ref_model = models.CharField(max_length=50, blank=True)
+    # Stored compactly (integer milli-units / LedgerCode / LedgerMemo ids) but read and
+    # written as Decimal and strings; see fields.py.
+    qty_delta = MilliQuantityField()  # +in, -out
+    movement_type = CodeField(kind="movement_type", choices=MovementType.choices)
+    ref_model = CodeField(kind="ref_model", blank=True)
     ref_id = models.CharField(max_length=50, blank=True)
-    memo = models.TextField(blank=True)
+    memo = MemoField(blank=True)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
-    history = HistoricalRecords()
+    batch = models.ForeignKey(PostingBatch, on_delete=models.PROTECT, null=True, blank=True, related_name="+")
+    # Optional lot dimension; post_entries() fills it FEFO on outgoing rows of lot-tracked stock
+    lot = models.ForeignKey(StockLot, on_delete=models.PROTECT, null=True, blank=True, db_index=False, related_name="+")
+
+    objects = LedgerQuerySet.as_manager()
 
     class Meta:
         indexes = [
@@ -204,6 +317,10 @@ class StockLedger(models.Model):
             models.Index(fields=["warehouse", "location"]),
             models.Index(fields=["movement_type", "ts"]),
             models.Index(fields=["warehouse", "ref_model", "ref_id"]),
+            # Document drill-down by reference alone (ledger/by-ref), across warehouses
+            models.Index(fields=["ref_id", "ref_model"], name="wh_ledger_ref_idx"),
+            # Lot trace (recalls); most rows carry no lot
+            models.Index(fields=["lot", "ts"], condition=Q(lot__isnull=False), name="wh_ledger_lot_idx"),
         ]
         verbose_name = "Stock Ledger Entry"
         verbose_name_plural = "Stock Ledger"
@@ -211,6 +328,372 @@ class StockLedger(models.Model):
     def __str__(self):
         return f"{self.ts} {self.item_id} @ {self.location_id} {self.qty_delta}"
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            check_writable("save() of an existing row")
+        elif self.batch_id is None:
+            # Rows created one by one (commands, tests) get a batch of their own
+            with transaction.atomic():
+                self.batch = PostingBatch.open(user=self.user, rows=1, ref_model=self.ref_model, ref_id=self.ref_id)
+                return super().save(*args, **kwargs)
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        check_writable("delete()")
+        return super().delete(*args, **kwargs)
+
+
+class StockLedgerArchive(models.Model):
+    """Ledger rows re-imported from a cold-storage archive (see import_ledger_archive).
+    Read-only mirror of StockLedger; never counted towards on-hand."""
+    archive = models.CharField(max_length=50, db_index=True)
+    ledger_id = models.BigIntegerField()
+    ts = models.DateTimeField()
+    warehouse = models.ForeignKey("Warehouse", on_delete=models.DO_NOTHING, db_constraint=False, related_name="+")
+    location = models.ForeignKey("Location", on_delete=models.DO_NOTHING, db_constraint=False, related_name="+")
+    item = models.ForeignKey("catalog.Item", on_delete=models.DO_NOTHING, db_constraint=False, related_name="+")
+    qty_delta = models.DecimalField(max_digits=12, decimal_places=3)
+    movement_type = models.CharField(max_length=32)
+    ref_model = models.CharField(max_length=50, blank=True)
+    ref_id = models.CharField(max_length=50, blank=True)
+    memo = models.TextField(blank=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True, related_name="+")
+    lot = models.ForeignKey(StockLot, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True, related_name="+")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["warehouse", "item", "ts"], name="wh_ledgerarch_wh_item_ts_idx"),
+            models.Index(fields=["ledger_id"], name="wh_ledgerarch_ledger_id_idx"),
+        ]
+        verbose_name = "Archived Stock Ledger Entry"
+        verbose_name_plural = "Archived Stock Ledger"
+
+    def __str__(self):
+        return f"{self.archive}:{self.ledger_id}"
+
+
+class StockBalance(models.Model):
+    """Current on-hand per (location, item): the running sum of StockLedger.qty_delta.
+    Updated in the posting transaction from ledger_posted (services_balance); the ledger stays
+    the source of truth and reconcile_stock verifies the two agree."""
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name="+")
+    location = models.ForeignKey(Location, on_delete=models.CASCADE, related_name="+")
+    item = models.ForeignKey("catalog.Item", on_delete=models.CASCADE, related_name="+")
+    qty = models.DecimalField(max_digits=16, decimal_places=3, default=0)
+    # Active StockReservations held against this location (services_reservation)
+    reserved = models.DecimalField(max_digits=16, decimal_places=3, default=0, db_default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["location", "item"], name="uq_stock_balance_loc_item"),
+        ]
+        indexes = [
+            models.Index(fields=["warehouse", "item"], name="wh_balance_wh_item_idx"),
+            # item -> locations holding it, for putaway suggestions
+            models.Index(fields=["warehouse", "item", "location"], condition=Q(qty__gt=0), name="wh_balance_in_stock_idx"),
+        ]
+        verbose_name = "Stock Balance"
+        verbose_name_plural = "Stock Balances"
+
+    def __str__(self):
+        return f"{self.location_id}:{self.item_id} {self.qty}"
+
+
+class LotBalance(models.Model):
+    """On-hand per (location, item, lot), for ledger rows that carry a lot. Updated in the
+    posting transaction from ledger_posted (services_lots). expiry_date is copied from the lot
+    so FEFO and near-expiry reads are single index scans."""
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name="+")
+    location = models.ForeignKey(Location, on_delete=models.CASCADE, related_name="+")
+    item = models.ForeignKey("catalog.Item", on_delete=models.CASCADE, related_name="+")
+    lot = models.ForeignKey(StockLot, on_delete=models.CASCADE, related_name="balances")
+    expiry_date = models.DateField(null=True, blank=True)
+    qty = models.DecimalField(max_digits=16, decimal_places=3, default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["location", "item", "lot"], name="uq_lot_balance_loc_item_lot"),
+        ]
+        indexes = [
+            # FEFO: an item's lots in expiry order
+            models.Index(fields=["warehouse", "item", "expiry_date"], condition=Q(qty__gt=0), name="wh_lotbal_fefo_idx"),
+            # Near-expiry report
+            models.Index(fields=["warehouse", "expiry_date"], condition=Q(qty__gt=0), name="wh_lotbal_expiry_idx"),
+        ]
+        verbose_name = "Lot Balance"
+        verbose_name_plural = "Lot Balances"
+
+    def __str__(self):
+        return f"{self.location_id}:{self.item_id} lot {self.lot_id} = {self.qty}"
+
+
+class ItemAvailability(models.Model):
+    """On-hand of an item in one warehouse split by location bucket: physical locations,
+    *_PENDING bins, DAMAGE, LOST and every other virtual bin. Updated from ledger_posted
+    (services_availability) so "how many do we have anywhere" reads a few rows per item."""
+    item = models.ForeignKey("catalog.Item", on_delete=models.CASCADE, related_name="+")
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name="+")
+    physical = models.DecimalField(max_digits=16, decimal_places=3, default=0)
+    pending = models.DecimalField(max_digits=16, decimal_places=3, default=0)
+    damage = models.DecimalField(max_digits=16, decimal_places=3, default=0)
+    lost = models.DecimalField(max_digits=16, decimal_places=3, default=0)
+    other = models.DecimalField(max_digits=16, decimal_places=3, default=0)
+    # Active StockReservations of the item in the warehouse, with or without a location
+    reserved = models.DecimalField(max_digits=16, decimal_places=3, default=0, db_default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["item", "warehouse"], name="uq_item_availability_item_wh"),
+        ]
+        verbose_name = "Item Availability"
+        verbose_name_plural = "Item Availability"
+
+    def __str__(self):
+        return f"{self.item_id}@{self.warehouse_id} {self.physical}"
+
+
+class ReservationStatus(models.TextChoices):
+    ACTIVE = "ACTIVE", "Active"
+    CONSUMED = "CONSUMED", "Consumed"
+    RELEASED = "RELEASED", "Released"
+    EXPIRED = "EXPIRED", "Expired"
+
+
+class StockReservation(models.Model):
+    """A hold on stock of an item in a warehouse (optionally at one location) until it is
+    consumed, released or expires. Only ACTIVE reservations count; their totals are kept on
+    ItemAvailability.reserved and StockBalance.reserved by services_reservation."""
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name="reservations")
+    item = models.ForeignKey("catalog.Item", on_delete=models.CASCADE, related_name="+")
+    location = models.ForeignKey(Location, on_delete=models.CASCADE, null=True, blank=True, related_name="+")
+    qty = models.DecimalField(max_digits=12, decimal_places=3)
+    status = models.CharField(max_length=10, choices=ReservationStatus.choices, default=ReservationStatus.ACTIVE)
+    expires_at = models.DateTimeField(null=True, blank=True, help_text="Empty = held until released")
+    ref_model = models.CharField(max_length=50, blank=True)
+    ref_id = models.CharField(max_length=50, blank=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    created_at = models.DateTimeField(auto_now_add=True)
+    closed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "expires_at"], name="wh_resv_status_exp_idx"),
+            models.Index(fields=["warehouse", "item", "status"], name="wh_resv_wh_item_idx"),
+            models.Index(fields=["ref_model", "ref_id"], name="wh_resv_ref_idx"),
+        ]
+        verbose_name = "Stock Reservation"
+        verbose_name_plural = "Stock Reservations"
+
+    def __str__(self):
+        return f"#{self.pk} {self.item_id}@{self.warehouse_id} {self.qty} {self.status}"
+
+
+class ReorderSetting(models.Model):
+    """Reorder point (min) and optional order-up-to level (max) of an item in a warehouse,
+    checked against available stock (physical on-hand minus reservations)."""
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name="reorder_settings")
+    item = models.ForeignKey("catalog.Item", on_delete=models.CASCADE, related_name="+")
+    reorder_point = models.DecimalField(max_digits=12, decimal_places=3, help_text="Alert when available stock is at or below this")
+    max_qty = models.DecimalField(max_digits=12, decimal_places=3, null=True, blank=True, help_text="Order-up-to level used for the suggested quantity")
+    active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    updated_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["warehouse", "item"], name="uq_reorder_setting_wh_item"),
+        ]
+        verbose_name = "Reorder Setting"
+        verbose_name_plural = "Reorder Settings"
+
+    def clean(self):
+        if self.reorder_point is not None and self.reorder_point < 0:
+            raise ValidationError({"reorder_point": "Reorder point cannot be negative"})
+        if self.max_qty is not None and self.reorder_point is not None and self.max_qty < self.reorder_point:
+            raise ValidationError({"max_qty": "Max must not be below the reorder point"})
+
+    def __str__(self):
+        return f"{self.warehouse_id}:{self.item_id} <= {self.reorder_point}"
+
+
+class AlertKind(models.TextChoices):
+    LOW_STOCK = "LOW_STOCK", "Low stock"
+    OUT_OF_STOCK = "OUT_OF_STOCK", "Out of stock"
+
+
+class AlertStatus(models.TextChoices):
+    OPEN = "OPEN", "Open"
+    RESOLVED = "RESOLVED", "Resolved"
+
+
+class Alert(models.Model):
+    """Stock alert raised by the reorder evaluator (services_reorder). At most one OPEN alert
+    per (warehouse, item); it is updated while the breach lasts and resolved once stock is back
+    above the reorder point."""
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name="alerts")
+    item = models.ForeignKey("catalog.Item", on_delete=models.CASCADE, related_name="+")
+    kind = models.CharField(max_length=20, choices=AlertKind.choices)
+    status = models.CharField(max_length=10, choices=AlertStatus.choices, default=AlertStatus.OPEN)
+    available = models.DecimalField(max_digits=16, decimal_places=3)
+    reorder_point = models.DecimalField(max_digits=12, decimal_places=3)
+    suggested_qty = models.DecimalField(max_digits=16, decimal_places=3, null=True, blank=True)
+    ledger_id = models.BigIntegerField(null=True, blank=True, help_text="Latest ledger row that led to this evaluation")
+    opened_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(default=timezone.now)
+    resolved_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["warehouse", "item"], condition=Q(status="OPEN"), name="uq_alert_open_wh_item"),
+        ]
+        indexes = [
+            models.Index(fields=["status", "warehouse", "kind"], name="wh_alert_status_idx"),
+        ]
+        verbose_name = "Alert"
+        verbose_name_plural = "Alerts"
+
+    def __str__(self):
+        return f"{self.kind} {self.warehouse_id}:{self.item_id} ({self.status})"
+
+
+class LedgerCursor(models.Model):
+    """Last StockLedger id processed by a background consumer of the ledger (e.g. "reorder")."""
+    name = models.CharField(max_length=50, unique=True)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Ledger Cursor"
+        verbose_name_plural = "Ledger Cursors"
+
+    def __str__(self):
+        return f"{self.name}@{self.last_id}"
+
+
+class LedgerView(models.Model):
+    """Read model of StockLedger for the movements grid: one row per ledger row with the item,
+    location and user attributes copied in and the location's on-hand after the movement.
+    Written in the posting transaction from ledger_posted and refreshed when an item, location
+    or user is renamed (services_ledger_view); rebuild_ledger_view recomputes it."""
+    ledger_id = models.BigIntegerField(unique=True)
+    ts = models.DateTimeField()
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name="+")
+    location = models.ForeignKey(Location, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+")
+    item = models.ForeignKey("catalog.Item", on_delete=models.DO_NOTHING, db_constraint=False, related_name="+")
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True, related_name="+")
+    qty_delta = models.DecimalField(max_digits=12, decimal_places=3)
+    qty_before = models.DecimalField(max_digits=16, decimal_places=3)
+    qty_after = models.DecimalField(max_digits=16, decimal_places=3)
+    movement_type = models.CharField(max_length=32)
+    ref_model = models.CharField(max_length=50, blank=True)
+    ref_id = models.CharField(max_length=50, blank=True)
+    memo = models.TextField(blank=True)
+    location_code = models.CharField(max_length=32, blank=True)
+    location_name = models.CharField(max_length=120, blank=True)
+    location_subtype = models.CharField(max_length=20, blank=True)
+    item_sku = models.CharField(max_length=10, blank=True)
+    item_name = models.CharField(max_length=200, blank=True)
+    item_image = models.CharField(max_length=255, blank=True)  # storage path, as Item.image.name
+    username = models.CharField(max_length=150, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["warehouse", "-ts", "-ledger_id"], name="wh_ledgerview_wh_ts_idx"),
+        ]
+        verbose_name = "Ledger View Row"
+        verbose_name_plural = "Ledger View"
+
+    def __str__(self):
+        return f"{self.ledger_id} {self.item_sku} @ {self.location_code or self.location_id} {self.qty_delta}"
+
+
+class LedgerDailyRollup(models.Model):
+    """Per (warehouse, local day, movement_type, location subtype) movement counts and quantities.
+    Maintained incrementally from ledger_posted (services_rollup); rollup_ledger_daily rebuilds
+    any range from StockLedger. location_subtype is "" for locations without a subtype."""
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name="+")
+    day = models.DateField()
+    movement_type = models.CharField(max_length=32, choices=MovementType.choices)
+    location_subtype = models.CharField(max_length=20, blank=True, default="")
+    entries = models.PositiveIntegerField(default=0)
+    qty_in = models.DecimalField(max_digits=16, decimal_places=3, default=0)
+    qty_out = models.DecimalField(max_digits=16, decimal_places=3, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["warehouse", "day", "movement_type", "location_subtype"], name="uq_ledger_rollup_key"),
+        ]
+        indexes = [
+            models.Index(fields=["day"], name="wh_rollup_day_idx"),
+        ]
+        verbose_name = "Ledger Daily Rollup"
+        verbose_name_plural = "Ledger Daily Rollups"
+
+    def __str__(self):
+        return f"{self.warehouse_id} {self.day} {self.movement_type}/{self.location_subtype or '-'} x{self.entries}"
+
+
+class ItemVelocity(models.Model):
+    """Outbound velocity and ABC/XYZ class of an item in one warehouse over a trailing window.
+    Rebuilt per warehouse by services_velocity.compute_item_velocity (recompute_item_velocity)."""
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name="+")
+    item = models.ForeignKey("catalog.Item", on_delete=models.CASCADE, related_name="+")
+    period_start = models.DateField()
+    period_end = models.DateField()
+    outbound_qty = models.DecimalField(max_digits=16, decimal_places=3, default=0)
+    outbound_lines = models.PositiveIntegerField(default=0)
+    active_days = models.PositiveIntegerField(default=0, help_text="Days in the window with any outbound movement")
+    avg_daily_qty = models.FloatField(default=0)
+    std_daily_qty = models.FloatField(default=0)
+    cv = models.FloatField(null=True, blank=True, help_text="Coefficient of variation of daily demand")
+    abc_class = models.CharField(max_length=1)
+    xyz_class = models.CharField(max_length=1)
+    rank = models.PositiveIntegerField(help_text="1 = highest outbound quantity in the warehouse")
+    on_hand = models.DecimalField(max_digits=16, decimal_places=3, default=0)
+    days_of_cover = models.FloatField(null=True, blank=True, help_text="on_hand / avg_daily_qty; empty when there is no demand")
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["warehouse", "item"], name="uq_item_velocity_wh_item"),
+        ]
+        indexes = [
+            models.Index(fields=["warehouse", "abc_class", "xyz_class"], name="wh_velocity_class_idx"),
+            models.Index(fields=["warehouse", "rank"], name="wh_velocity_rank_idx"),
+        ]
+        verbose_name = "Item Velocity"
+        verbose_name_plural = "Item Velocity"
+
+    def __str__(self):
+        return f"{self.warehouse_id}:{self.item_id} {self.abc_class}{self.xyz_class}"
+
+
+class StockAgingLayer(models.Model):
+    """FIFO receipt layer of a warehouse's stock of one item (services_aging).
+    Net inflows of a posting batch open a layer dated at the posting; net outflows consume the
+    oldest layers first and exhausted layers are deleted. Outflows with no stock left to consume
+    open a negative layer that the next inflow fills before a new layer is opened."""
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name="+")
+    item = models.ForeignKey("catalog.Item", on_delete=models.CASCADE, related_name="+")
+    received_at = models.DateTimeField()
+    qty_received = models.DecimalField(max_digits=16, decimal_places=3)
+    qty_remaining = models.DecimalField(max_digits=16, decimal_places=3)
+    source_ledger_id = models.BigIntegerField(null=True, blank=True, help_text="First inbound StockLedger row of the batch that opened the layer")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["warehouse", "item", "received_at"], name="wh_aging_wh_item_rcv_idx"),
+            models.Index(fields=["warehouse", "received_at"], name="wh_aging_wh_rcv_idx"),
+        ]
+        verbose_name = "Stock Aging Layer"
+        verbose_name_plural = "Stock Aging Layers"
+
+    def __str__(self):
+        return f"{self.warehouse_id}:{self.item_id} {self.qty_remaining}@{self.received_at:%Y-%m-%d}"
+
 
 # New: Adjustment workflow
 class AdjustmentType(models.TextChoices):
@@ -278,6 +761,364 @@ class AdjustmentRequest(models.Model):
         return self.number or f"AR? ({self.type})"
 
 
+NUMBER_ATTEMPTS = 5
+
+
+def save_numbered(obj, prefix: str, save, *args, **kwargs):
+    """Save a document numbered ``<prefix><seq>`` (GRN-2026-0001) after the last one with that
+    prefix. Two concurrent saves read the same last number; the one that loses the unique index
+    on number retries with a later sequence instead of failing, up to NUMBER_ATTEMPTS times."""
+    if obj.number:
+        return save(*args, **kwargs)
+    model = type(obj)
+    floor = 1
+    for attempt in range(NUMBER_ATTEMPTS):
+        last = model.objects.filter(number__startswith=prefix).order_by("-id").first()
+        seq = 1
+        if last:
+            try:
+                seq = int((last.number or "").split("-")[-1]) + 1
+            except Exception:
+                seq = 1
+        seq = max(seq, floor)
+        obj.number = f"{prefix}{seq:04d}"
+        try:
+            with transaction.atomic():
+                return save(*args, **kwargs)
+        except IntegrityError:
+            taken = model.objects.filter(number=obj.number).exists()
+            obj.number = ""
+            if not taken or attempt == NUMBER_ATTEMPTS - 1:
+                raise
+            floor = seq + 1
+
+
+class GoodsReceipt(models.Model):
+    """Goods receipt note (GRN): stock received into the warehouse's RECEIVE bin, posted with
+    one bulk ledger write (services_grn). idempotency_key makes a resubmitted document a no-op."""
+    number = models.CharField(max_length=20, unique=True, editable=False)
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.PROTECT, related_name="goods_receipts")
+    reference = models.CharField(max_length=100, blank=True, help_text="Supplier document, PO or container number")
+    memo = models.TextField(blank=True)
+    idempotency_key = models.CharField(max_length=64, blank=True)
+    line_count = models.PositiveIntegerField(default=0)
+    total_qty = models.DecimalField(max_digits=16, decimal_places=3, default=0)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["warehouse", "idempotency_key"], condition=~Q(idempotency_key=""), name="uq_grn_idempotency_per_wh"),
+        ]
+        indexes = [
+            models.Index(fields=["warehouse", "created_at"], name="wh_grn_wh_created_idx"),
+            models.Index(fields=["reference"], name="wh_grn_reference_idx"),
+        ]
+        verbose_name = "Goods Receipt"
+        verbose_name_plural = "Goods Receipts"
+
+    def save(self, *args, **kwargs):
+        save_numbered(self, f"GRN-{timezone.now().year}-", super().save, *args, **kwargs)
+
+    def __str__(self):
+        return self.number or "GRN?"
+
+
+class GoodsReceiptLine(models.Model):
+    receipt = models.ForeignKey(GoodsReceipt, on_delete=models.CASCADE, related_name="lines")
+    line_no = models.PositiveIntegerField()
+    item = models.ForeignKey("catalog.Item", on_delete=models.PROTECT, related_name="+")
+    lot = models.ForeignKey(StockLot, on_delete=models.PROTECT, null=True, blank=True, related_name="+")
+    qty = models.DecimalField(max_digits=12, decimal_places=3)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["receipt", "line_no"], name="uq_grn_line_no"),
+        ]
+        verbose_name = "Goods Receipt Line"
+        verbose_name_plural = "Goods Receipt Lines"
+
+    def __str__(self):
+        return f"{self.receipt_id}#{self.line_no} {self.item_id} x{self.qty}"
+
+
+class PickListStatus(models.TextChoices):
+    OPEN = "OPEN", "Open"
+    CONFIRMED = "CONFIRMED", "Confirmed"
+    CANCELLED = "CANCELLED", "Cancelled"
+
+
+class PickList(models.Model):
+    """Outbound pick list: demand allocated to PHYSICAL locations, held with StockReservations
+    (ref_model "PICK", ref_id = number) and listed in walking order. Confirming moves the picked
+    quantities to the DISPATCH bin (services_pick)."""
+    number = models.CharField(max_length=20, unique=True, editable=False)
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.PROTECT, related_name="pick_lists")
+    status = models.CharField(max_length=10, choices=PickListStatus.choices, default=PickListStatus.OPEN)
+    ref_model = models.CharField(max_length=50, blank=True, help_text="Document the list was generated for, e.g. SO")
+    ref_id = models.CharField(max_length=50, blank=True)
+    short = models.JSONField(default=list, blank=True, help_text="Demand that could not be allocated")
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    created_at = models.DateTimeField(auto_now_add=True)
+    confirmed_by = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    confirmed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["warehouse", "status"], name="wh_picklist_wh_status_idx"),
+            models.Index(fields=["ref_model", "ref_id"], name="wh_picklist_ref_idx"),
+        ]
+        verbose_name = "Pick List"
+        verbose_name_plural = "Pick Lists"
+
+    def save(self, *args, **kwargs):
+        save_numbered(self, f"PL-{timezone.now().year}-", super().save, *args, **kwargs)
+
+    def __str__(self):
+        return self.number or "PL?"
+
+
+class PickListLine(models.Model):
+    pick_list = models.ForeignKey(PickList, on_delete=models.CASCADE, related_name="lines")
+    seq = models.PositiveIntegerField(help_text="Stop order on the pick walk")
+    location = models.ForeignKey(Location, on_delete=models.PROTECT, related_name="+")
+    item = models.ForeignKey("catalog.Item", on_delete=models.PROTECT, related_name="+")
+    lot = models.ForeignKey(StockLot, on_delete=models.PROTECT, null=True, blank=True, related_name="+")
+    qty = models.DecimalField(max_digits=12, decimal_places=3)
+    picked_qty = models.DecimalField(max_digits=12, decimal_places=3, null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["pick_list", "seq"], name="uq_picklist_line_seq"),
+        ]
+        verbose_name = "Pick List Line"
+        verbose_name_plural = "Pick List Lines"
+
+    def __str__(self):
+        return f"{self.pick_list_id}#{self.seq} {self.item_id} x{self.qty}"
+
+
+class CycleCountStatus(models.TextChoices):
+    OPEN = "OPEN", "Open"
+    POSTED = "POSTED", "Posted"
+    CANCELLED = "CANCELLED", "Cancelled"
+
+
+class CycleCount(models.Model):
+    """Stock-take session over a set of PHYSICAL locations. Expected quantities are
+    snapshotted from StockBalance when it starts and again when a location is first scanned,
+    scans accumulate on the lines, and posting writes the variances of the counted locations
+    with one bulk ledger write (services_count)."""
+    number = models.CharField(max_length=20, unique=True, editable=False)
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.PROTECT, related_name="cycle_counts")
+    status = models.CharField(max_length=10, choices=CycleCountStatus.choices, default=CycleCountStatus.OPEN)
+    locations = models.ManyToManyField(Location, related_name="+", help_text="Locations in scope of the count")
+    counted_locations = models.ManyToManyField(
+        Location, related_name="+", blank=True, help_text="Locations scanned so far; only these are written off when posted"
+    )
+    memo = models.TextField(blank=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    created_at = models.DateTimeField(auto_now_add=True)
+    posted_by = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    posted_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["warehouse", "status"], name="wh_cyclecount_wh_status_idx"),
+        ]
+        verbose_name = "Cycle Count"
+        verbose_name_plural = "Cycle Counts"
+
+    def save(self, *args, **kwargs):
+        save_numbered(self, f"CC-{timezone.now().year}-", super().save, *args, **kwargs)
+
+    def __str__(self):
+        return self.number or "CC?"
+
+
+class CycleCountLine(models.Model):
+    count = models.ForeignKey(CycleCount, on_delete=models.CASCADE, related_name="lines")
+    location = models.ForeignKey(Location, on_delete=models.PROTECT, related_name="+")
+    item = models.ForeignKey("catalog.Item", on_delete=models.PROTECT, related_name="+")
+    expected = models.DecimalField(max_digits=16, decimal_places=3, default=0)
+    # None until scanned; at a counted location a line never scanned counts as zero
+    counted = models.DecimalField(max_digits=16, decimal_places=3, null=True, blank=True)
+    variance = models.DecimalField(max_digits=16, decimal_places=3, null=True, blank=True, help_text="counted - expected, set when posted")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["count", "location", "item"], name="uq_cyclecount_line"),
+        ]
+        verbose_name = "Cycle Count Line"
+        verbose_name_plural = "Cycle Count Lines"
+
+    def __str__(self):
+        return f"{self.count_id} {self.location_id}:{self.item_id} {self.expected} -> {self.counted}"
+
+
+class TransferStatus(models.TextChoices):
+    IN_TRANSIT = "IN_TRANSIT", "In Transit"
+    RECEIVED = "RECEIVED", "Received"
+
+
+class TransferOrder(models.Model):
+    """Stock sent from one warehouse to another. Dispatching moves it from a source location
+    into the source warehouse's IN_TRANSIT bin; receipts (TransferReceipt, possibly several)
+    move it from there into the destination's RECEIVE bin. Each leg is one bulk ledger write
+    (services_transfer); InTransitBalance keeps the open quantity per warehouse pair."""
+    number = models.CharField(max_length=20, unique=True, editable=False)
+    source_warehouse = models.ForeignKey(Warehouse, on_delete=models.PROTECT, related_name="transfers_out")
+    dest_warehouse = models.ForeignKey(Warehouse, on_delete=models.PROTECT, related_name="transfers_in")
+    from_location = models.ForeignKey(Location, on_delete=models.PROTECT, related_name="+", help_text="Where the stock left the source warehouse")
+    status = models.CharField(max_length=12, choices=TransferStatus.choices, default=TransferStatus.IN_TRANSIT)
+    reference = models.CharField(max_length=100, blank=True, help_text="Carrier, waybill or vehicle number")
+    memo = models.TextField(blank=True)
+    idempotency_key = models.CharField(max_length=64, blank=True)
+    line_count = models.PositiveIntegerField(default=0)
+    total_qty = models.DecimalField(max_digits=16, decimal_places=3, default=0)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    created_at = models.DateTimeField(auto_now_add=True)
+    received_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["source_warehouse", "idempotency_key"], condition=~Q(idempotency_key=""), name="uq_transfer_idempotency_per_wh"),
+        ]
+        indexes = [
+            models.Index(fields=["source_warehouse", "dest_warehouse", "status"], name="wh_transfer_pair_status_idx"),
+            models.Index(fields=["dest_warehouse", "status"], name="wh_transfer_dest_status_idx"),
+        ]
+        verbose_name = "Transfer Order"
+        verbose_name_plural = "Transfer Orders"
+
+    def save(self, *args, **kwargs):
+        save_numbered(self, f"TO-{timezone.now().year}-", super().save, *args, **kwargs)
+
+    def __str__(self):
+        return self.number or "TO?"
+
+
+class TransferOrderLine(models.Model):
+    transfer = models.ForeignKey(TransferOrder, on_delete=models.CASCADE, related_name="lines")
+    line_no = models.PositiveIntegerField()
+    item = models.ForeignKey("catalog.Item", on_delete=models.PROTECT, related_name="+")
+    qty_shipped = models.DecimalField(max_digits=12, decimal_places=3)
+    qty_received = models.DecimalField(max_digits=12, decimal_places=3, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["transfer", "line_no"], name="uq_transfer_line_no"),
+            models.UniqueConstraint(fields=["transfer", "item"], name="uq_transfer_line_item"),
+        ]
+        verbose_name = "Transfer Order Line"
+        verbose_name_plural = "Transfer Order Lines"
+
+    def __str__(self):
+        return f"{self.transfer_id}#{self.line_no} {self.item_id} {self.qty_received}/{self.qty_shipped}"
+
+
+class TransferReceipt(models.Model):
+    """One receipt against a TransferOrder; idempotency_key makes a resubmitted receipt a no-op."""
+    transfer = models.ForeignKey(TransferOrder, on_delete=models.CASCADE, related_name="receipts")
+    idempotency_key = models.CharField(max_length=64, blank=True)
+    line_count = models.PositiveIntegerField(default=0)
+    total_qty = models.DecimalField(max_digits=16, decimal_places=3, default=0)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["transfer", "idempotency_key"], condition=~Q(idempotency_key=""), name="uq_transfer_receipt_idempotency"),
+        ]
+        verbose_name = "Transfer Receipt"
+        verbose_name_plural = "Transfer Receipts"
+
+    def __str__(self):
+        return f"{self.transfer_id} receipt #{self.pk}"
+
+
+class InTransitBalance(models.Model):
+    """Quantity dispatched from source_warehouse to dest_warehouse and not yet received, per
+    item. Kept current by services_transfer in the same transaction as each leg."""
+    source_warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name="+")
+    dest_warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name="+")
+    item = models.ForeignKey("catalog.Item", on_delete=models.CASCADE, related_name="+")
+    qty = models.DecimalField(max_digits=16, decimal_places=3, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["source_warehouse", "dest_warehouse", "item"], name="uq_in_transit_pair_item"),
+        ]
+        indexes = [
+            models.Index(fields=["dest_warehouse", "item"], name="wh_in_transit_dest_item_idx"),
+        ]
+        verbose_name = "In-Transit Balance"
+        verbose_name_plural = "In-Transit Balances"
+
+    def __str__(self):
+        return f"{self.source_warehouse_id}->{self.dest_warehouse_id} {self.item_id}: {self.qty}"
+
+
+class SerialStatus(models.TextChoices):
+    IN_STOCK = "IN_STOCK", "In Stock"
+    DISPATCHED = "DISPATCHED", "Dispatched"
+    IN_TRANSIT = "IN_TRANSIT", "In Transit"
+    DAMAGED = "DAMAGED", "Damaged"
+    LOST = "LOST", "Lost"
+
+
+class SerialUnit(models.Model):
+    """One serialized unit of an item and where it is now. Moved in bulk by services_serials,
+    which posts the matching ledger rows and appends a SerialMovement per unit."""
+    item = models.ForeignKey("catalog.Item", on_delete=models.PROTECT, related_name="+")
+    serial = models.CharField(max_length=100)
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.PROTECT, related_name="+")
+    location = models.ForeignKey(Location, on_delete=models.PROTECT, related_name="+")
+    status = models.CharField(max_length=12, choices=SerialStatus.choices, default=SerialStatus.IN_STOCK)
+    lot = models.ForeignKey(StockLot, on_delete=models.PROTECT, null=True, blank=True, related_name="+")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["item", "serial"], name="uq_serial_unit_item_serial"),
+        ]
+        indexes = [
+            # Scans carry the serial alone
+            models.Index(fields=["serial"], name="wh_serial_serial_idx"),
+            models.Index(fields=["warehouse", "location", "item"], name="wh_serial_wh_loc_item_idx"),
+        ]
+        verbose_name = "Serial Unit"
+        verbose_name_plural = "Serial Units"
+
+    def __str__(self):
+        return f"{self.serial} ({self.item_id})"
+
+
+class SerialMovement(models.Model):
+    """Append-only history of a SerialUnit: one row per unit per move."""
+    unit = models.ForeignKey(SerialUnit, on_delete=models.CASCADE, related_name="movements")
+    ts = models.DateTimeField(default=timezone.now)
+    from_location = models.ForeignKey(Location, on_delete=models.PROTECT, null=True, blank=True, related_name="+")
+    to_location = models.ForeignKey(Location, on_delete=models.PROTECT, related_name="+")
+    movement_type = models.CharField(max_length=32, choices=MovementType.choices)
+    ref_model = models.CharField(max_length=50, blank=True)
+    ref_id = models.CharField(max_length=50, blank=True)
+    batch = models.ForeignKey(PostingBatch, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["unit", "ts"], name="wh_serialmove_unit_ts_idx"),
+        ]
+        verbose_name = "Serial Movement"
+        verbose_name_plural = "Serial Movements"
+
+    def __str__(self):
+        return f"{self.unit_id} {self.from_location_id} -> {self.to_location_id}"
+
+
 class PutawayBatch(models.Model):
     warehouse = models.ForeignKey(Warehouse, on_delete=models.PROTECT, related_name="putaway_batches")
     ref_id = models.CharField(max_length=50)
@@ -298,3 +1139,59 @@ class PutawayBatch(models.Model):
 
     def __str__(self):
         return f"{self.warehouse_id}:{self.ref_id}"  # concise
+
+
+class SlowQuery(models.Model):
+    """One row per normalized SQL statement that exceeded SLOW_QUERY_THRESHOLD_MS.
+    Repeat sightings bump the counters instead of inserting new rows."""
+    fingerprint = models.CharField(max_length=40, unique=True)
+    normalized_sql = models.TextField()
+    sample_sql = models.TextField(blank=True)
+    sample_params = models.TextField(blank=True)
+    caller = models.CharField(max_length=255, blank=True, help_text="First project frame (view/service function) that issued the query")
+    context = models.CharField(max_length=255, blank=True, help_text="Request method/path or command that was running")
+    calls = models.PositiveIntegerField(default=1)
+    last_ms = models.FloatField(default=0)
+    max_ms = models.FloatField(default=0)
+    total_ms = models.FloatField(default=0)
+    explain_plan = models.TextField(blank=True)
+    first_seen = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-total_ms"], name="wh_slowquery_total_idx"),
+            models.Index(fields=["last_seen"], name="wh_slowquery_last_seen_idx"),
+        ]
+        verbose_name = "Slow Query"
+        verbose_name_plural = "Slow Queries"
+
+    def __str__(self):
+        return f"{self.fingerprint[:10]} x{self.calls} max={self.max_ms:.0f}ms"
+
+
+class OutboxEvent(models.Model):
+    """Transactional outbox: written in the same transaction as the change it describes and
+    delivered afterwards by outbox_dispatch (at least once, in id order per batch)."""
+    topic = models.CharField(max_length=64)
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    aggregate_type = models.CharField(max_length=50, blank=True)
+    aggregate_id = models.CharField(max_length=64, blank=True)
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    available_at = models.DateTimeField(default=timezone.now, help_text="Not delivered before this time (retry backoff)")
+    attempts = models.PositiveIntegerField(default=0)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["id"], name="wh_outbox_pending_idx", condition=Q(delivered_at__isnull=True)),
+            models.Index(fields=["topic", "created_at"], name="wh_outbox_topic_idx"),
+            models.Index(fields=["aggregate_type", "aggregate_id"], name="wh_outbox_aggregate_idx"),
+        ]
+        verbose_name = "Outbox Event"
+        verbose_name_plural = "Outbox"
+
+    def __str__(self):
+        return f"#{self.id} {self.topic} {self.aggregate_type}:{self.aggregate_id}"
@@ -0,0 +1,172 @@
+"""Transactional outbox for stock events.
+
+emit() inserts an OutboxEvent inside the caller's transaction, so an event exists if and
+only if the change it describes committed. outbox_dispatch later claims undelivered events
+with SELECT .. FOR UPDATE SKIP LOCKED (several dispatchers can run side by side), hands each
+batch to every sink and marks it delivered; a failing sink leaves the whole batch for a
+retry with backoff, so delivery is at-least-once and consumers must be idempotent (use the
+event id).
+
+Sinks:
+  * in-process handlers registered with register_handler("ledger.*", fn) - fn(events)
+  * webhooks from settings.OUTBOX_WEBHOOKS = [{"url": ..., "topics": ["ledger.*"], "secret": ...}]
+  * an NDJSON file from settings.OUTBOX_FILE_SINK
+"""
+import fnmatch
+import hashlib
+import hmac
+import json
+import logging
+import urllib.request
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+LEDGER_ROWS_INLINE = 500  # larger postings carry an id range instead of every row
+MAX_BACKOFF_SECONDS = 3600
+
+_handlers: list[tuple[str, object]] = []
+
+
+def register_handler(pattern: str, handler):
+    """Deliver events whose topic matches ``pattern`` (fnmatch) to ``handler(events)``."""
+    _handlers.append((pattern, handler))
+
+
+def emit(topic: str, payload: dict, *, warehouse_id: int | None = None, aggregate_type: str = "", aggregate_id="") -> OutboxEvent:
+    return OutboxEvent.objects.create(
+        topic=topic,
+        warehouse_id=warehouse_id,
+        aggregate_type=aggregate_type,
+        aggregate_id=str(aggregate_id or "")[:64],
+        payload=json.loads(json.dumps(payload, cls=DjangoJSONEncoder)),
+    )
+
+
+def emit_ledger_posted(rows):
+    """One ledger.posted event per warehouse for a posted batch."""
+    by_wh: dict[int, list] = {}
+    for r in rows:
+        by_wh.setdefault(r.warehouse_id, []).append(r)
+    for wh_id, wh_rows in by_wh.items():
+        ids = [r.pk for r in wh_rows]
+        payload = {
+            "count": len(wh_rows),
+            "min_id": min(ids),
+            "max_id": max(ids),
+            "ref_model": wh_rows[0].ref_model,
+            "ref_id": wh_rows[0].ref_id,
+            "movement_types": sorted({r.movement_type for r in wh_rows}),
+        }
+        if len(wh_rows) <= LEDGER_ROWS_INLINE:
+            payload["rows"] = [
+                {
+                    "id": r.pk,
+                    "ts": r.ts,
+                    "location": r.location_id,
+                    "item": r.item_id,
+                    "qty_delta": r.qty_delta,
+                    "movement_type": r.movement_type,
+                    "ref_model": r.ref_model,
+                    "ref_id": r.ref_id,
+                }
+                for r in wh_rows
+            ]
+        emit("ledger.posted", payload, warehouse_id=wh_id, aggregate_type=wh_rows[0].ref_model or "StockLedger", aggregate_id=wh_rows[0].ref_id or ids[0])
+
+
+def serialize_event(ev: OutboxEvent) -> dict:
+    return {
+        "id": ev.id,
+        "topic": ev.topic,
+        "warehouse": ev.warehouse_id,
+        "aggregate_type": ev.aggregate_type,
+        "aggregate_id": ev.aggregate_id,
+        "created_at": ev.created_at.isoformat(),
+        "payload": ev.payload,
+    }
+
+
+def _matches(topic: str, patterns) -> bool:
+    return any(fnmatch.fnmatchcase(topic, p) for p in (patterns or ["*"]))
+
+
+def _post_webhook(hook: dict, events: list[dict]):
+    body = json.dumps({"events": events}, cls=DjangoJSONEncoder).encode()
+    headers = {"Content-Type": "application/json"}
+    if hook.get("secret"):
+        headers["X-Outbox-Signature"] = "sha256=" + hmac.new(hook["secret"].encode(), body, hashlib.sha256).hexdigest()
+    req = urllib.request.Request(hook["url"], data=body, headers=headers, method="POST")
+    with urllib.request.urlopen(req, timeout=hook.get("timeout", 10)) as resp:
+        if resp.status >= 300:
+            raise RuntimeError(f"webhook {hook['url']} returned {resp.status}")
+
+
+def _write_file(path: str, events: list[dict]):
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    with p.open("a", encoding="utf-8") as fh:
+        for e in events:
+            fh.write(json.dumps(e, cls=DjangoJSONEncoder, separators=(",", ":")))
+            fh.write("\n")
+
+
+def deliver(events: list[OutboxEvent]):
+    """Send one batch to every sink; raises on the first failure."""
+    payloads = [serialize_event(e) for e in events]
+    for pattern, handler in list(_handlers):
+        matched = [ev for ev in events if fnmatch.fnmatchcase(ev.topic, pattern)]
+        if matched:
+            handler(matched)
+    for hook in getattr(settings, "OUTBOX_WEBHOOKS", None) or []:
+        matched = [p for p in payloads if _matches(p["topic"], hook.get("topics"))]
+        if matched:
+            _post_webhook(hook, matched)
+    file_sink = getattr(settings, "OUTBOX_FILE_SINK", None)
+    if file_sink:
+        _write_file(file_sink, payloads)
+
+
+def dispatch_batch(batch_size: int = 200) -> dict:
+    """Claim and deliver one batch of due events. Returns counts for logging."""
+    now = timezone.now()
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True)
+            .filter(delivered_at__isnull=True, available_at__lte=now)
+            .order_by("id")[:batch_size]
+        )
+        if not events:
+            return {"claimed": 0, "delivered": 0, "failed": 0}
+        ids = [e.id for e in events]
+        try:
+            # Own savepoint: a handler's database error must not abort the claim transaction,
+            # or the backoff below could not be written
+            with transaction.atomic():
+                deliver(events)
+        except Exception as e:
+            attempts = max(e_.attempts for e_ in events) + 1
+            delay = min(2 ** attempts, MAX_BACKOFF_SECONDS)
+            for ev in events:
+                ev.attempts += 1
+                ev.available_at = now + timedelta(seconds=delay)
+                ev.last_error = f"{type(e).__name__}: {e}"[:2000]
+            OutboxEvent.objects.bulk_update(events, ["attempts", "available_at", "last_error"])
+            logger.warning("outbox delivery failed for %s events (ids %s..%s): %s", len(ids), ids[0], ids[-1], e)
+            return {"claimed": len(ids), "delivered": 0, "failed": len(ids)}
+        OutboxEvent.objects.filter(id__in=ids).update(delivered_at=timezone.now(), last_error="")
+        return {"claimed": len(ids), "delivered": len(ids), "failed": 0}
+
+
+def purge_delivered(older_than_days: int) -> int:
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    deleted, _ = OutboxEvent.objects.filter(delivered_at__lt=cutoff).delete()
+    return deleted
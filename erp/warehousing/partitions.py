@@ -0,0 +1,99 @@
+"""Monthly range partitions of StockLedger on ``ts`` (PostgreSQL only).
+
+Migration 0010 turns warehousing_stockledger into a partitioned parent with the
+pre-existing heap attached as the ``_legacy`` partition; new rows land in one
+partition per calendar month (``warehousing_stockledger_pYYYYMM``) and anything
+outside the prepared range falls into ``_pdefault`` until manage_ledger_partitions
+moves it. The Django model is unaware of all this - only the primary key becomes
+(id, ts) at the database level.
+"""
+from datetime import date, datetime, time, timezone as dt_timezone
+
+from django.db import connection, transaction
+
+from .ledger_audit import ledger_maintenance
+
+PARENT = "warehousing_stockledger"
+LEGACY = f"{PARENT}_legacy"
+DEFAULT = f"{PARENT}_pdefault"
+
+
+def month_start(d: date) -> date:
+    return date(d.year, d.month, 1)
+
+
+def add_months(d: date, n: int) -> date:
+    y, m = divmod(d.month - 1 + n, 12)
+    return date(d.year + y, m + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT}_p{month.year:04d}{month.month:02d}"
+
+
+def _bound(d: date) -> str:
+    return datetime.combine(d, time.min, tzinfo=dt_timezone.utc).isoformat()
+
+
+def is_partitioned() -> bool:
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cur:
+        cur.execute("SELECT relkind FROM pg_class WHERE relname = %s", [PARENT])
+        row = cur.fetchone()
+    return bool(row and row[0] == "p")
+
+
+def list_partitions() -> list[dict]:
+    """Attached partitions with their bound expression and approximate row counts."""
+    with connection.cursor() as cur:
+        cur.execute(
+            """
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples::bigint
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = %s::regclass
+            ORDER BY c.relname
+            """,
+            [PARENT],
+        )
+        return [{"name": r[0], "bound": r[1], "approx_rows": max(int(r[2] or 0), 0)} for r in cur.fetchall()]
+
+
+def ensure_month_partition(month: date) -> bool:
+    """Create the partition for ``month`` if missing. Returns True when created.
+    Rows that already landed in the default partition for that month are moved into it."""
+    month = month_start(month)
+    name = partition_name(month)
+    lo, hi = _bound(month), _bound(add_months(month, 1))
+    # Moving stray rows deletes them from the default partition; the append-only trigger allows
+    # that only in maintenance mode.
+    with ledger_maintenance(), connection.cursor() as cur:
+        cur.execute("SELECT 1 FROM pg_class WHERE relname = %s", [name])
+        if cur.fetchone():
+            return False
+        cur.execute("SELECT 1 FROM pg_class WHERE relname = %s", [DEFAULT])
+        has_default = cur.fetchone() is not None
+        stray = False
+        if has_default:
+            cur.execute(f"SELECT EXISTS (SELECT 1 FROM {DEFAULT} WHERE ts >= %s AND ts < %s)", [lo, hi])
+            stray = bool(cur.fetchone()[0])
+        if not stray:
+            cur.execute(f"CREATE TABLE {name} PARTITION OF {PARENT} FOR VALUES FROM (%s) TO (%s)", [lo, hi])
+            return True
+        # A default partition may not keep rows that belong to a new partition's range:
+        # build the month standalone, move the stray rows, then attach it.
+        cur.execute(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        cur.execute(f"INSERT INTO {name} SELECT * FROM {DEFAULT} WHERE ts >= %s AND ts < %s", [lo, hi])
+        cur.execute(f"DELETE FROM {DEFAULT} WHERE ts >= %s AND ts < %s", [lo, hi])
+        cur.execute(f"ALTER TABLE {PARENT} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)", [lo, hi])
+        return True
+
+
+def detach_partition(name: str, *, drop: bool = False):
+    """Detach a month (or the legacy heap) from the ledger. The detached table keeps its rows
+    as a standalone table unless ``drop`` is set."""
+    with transaction.atomic(), connection.cursor() as cur:
+        cur.execute(f"ALTER TABLE {PARENT} DETACH PARTITION {name}")
+        if drop:
+            cur.execute(f"DROP TABLE {name}")
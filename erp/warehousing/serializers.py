@@ -1,5 +1,7 @@
+from django.conf import settings
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.utils.encoding import filepath_to_uri
 from .models import (
     Warehouse,
     Location,
@@ -9,6 +11,7 @@ from .models import (
     WarehouseStatus,
     StockLedger,
     AdjustmentRequest,
+    ItemVelocity,
 )
 
 User = get_user_model()
@@ -76,6 +79,8 @@ class LocationSerializer(serializers.ModelSerializer):
             "display_name",
             "type",
             "subtype",
+            "pick_sequence",
+            "capacity",
             "system_managed",
             "status",
             "created_at",
@@ -86,6 +91,15 @@ class LocationSerializer(serializers.ModelSerializer):
         read_only_fields = ["system_managed", "created_at", "updated_at", "created_by", "updated_by"]
 
 
+class LocationGenerateSerializer(serializers.Serializer):
+    warehouse = serializers.PrimaryKeyRelatedField(queryset=Warehouse.objects.all())
+    pattern = serializers.CharField(max_length=200)
+    capacity = serializers.DecimalField(max_digits=12, decimal_places=3, min_value=0, required=False, allow_null=True)
+    sequence = serializers.BooleanField(default=False)
+    skip_existing = serializers.BooleanField(default=False)
+    dry_run = serializers.BooleanField(default=False)
+
+
 class LocationHistorySerializer(serializers.ModelSerializer):
     history_user = serializers.SerializerMethodField()
 
@@ -142,6 +156,10 @@ class WarehouseHistorySerializer(serializers.ModelSerializer):
 
 # Movement log list serializer
 class StockLedgerListSerializer(serializers.ModelSerializer):
+    # Stored as milli-units / interned ids (warehousing.fields); exposed as before
+    qty_delta = serializers.DecimalField(max_digits=12, decimal_places=3, read_only=True)
+    ref_model = serializers.CharField(read_only=True)
+    memo = serializers.CharField(read_only=True)
     item_sku = serializers.CharField(source="item.sku", read_only=True)
     item_name = serializers.CharField(source="item.name", read_only=True)
     user = UsernameField()
@@ -194,6 +212,48 @@ class StockLedgerListSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
+# Movements grid: LedgerView rows read with .values(LEDGER_VIEW_VALUES) and turned into the
+# StockLedgerListSerializer shape without instantiating models or per-row serializer fields.
+LEDGER_VIEW_VALUES = [
+    "ledger_id", "ts", "warehouse_id", "location_id", "location_name", "location_code", "location_subtype",
+    "item_id", "item_sku", "item_name", "item_image", "qty_delta", "movement_type", "ref_model", "ref_id",
+    "memo", "username", "qty_before", "qty_after",
+]
+_ts_field = serializers.DateTimeField()
+_qty_field = serializers.DecimalField(max_digits=12, decimal_places=3)
+
+
+def ledger_view_rows(rows, request=None) -> list[dict]:
+    media_url = getattr(settings, "MEDIA_URL", "/media/")
+    if request is not None:
+        media_url = request.build_absolute_uri(media_url)
+    ts, qty = _ts_field.to_representation, _qty_field.to_representation
+    return [
+        {
+            "id": r["ledger_id"],
+            "ts": ts(r["ts"]),
+            "warehouse": r["warehouse_id"],
+            "location": r["location_id"],
+            "location_name": r["location_name"],
+            "location_code": r["location_code"],
+            "location_subtype": r["location_subtype"] or None,
+            "item": r["item_id"],
+            "item_sku": r["item_sku"],
+            "item_name": r["item_name"],
+            "item_image_url": f"{media_url}{filepath_to_uri(r['item_image'])}" if r["item_image"] else "",
+            "qty_delta": qty(r["qty_delta"]),
+            "movement_type": r["movement_type"],
+            "ref_model": r["ref_model"],
+            "ref_id": r["ref_id"],
+            "memo": r["memo"],
+            "user": r["username"] or None,
+            "location_qty_before": qty(r["qty_before"]),
+            "location_qty_after": qty(r["qty_after"]),
+        }
+        for r in rows
+    ]
+
+
 class AdjustmentRequestSerializer(serializers.ModelSerializer):
     requested_by = UsernameField()
     approved_by = UsernameField()
@@ -261,3 +321,31 @@ class AdjustmentRequestSerializer(serializers.ModelSerializer):
         return v
 
 # No serializer changes required; StockLedgerListSerializer already includes movement_type and user.
+
+
+class ItemVelocitySerializer(serializers.ModelSerializer):
+    item_sku = serializers.CharField(source="item.sku", read_only=True)
+    item_name = serializers.CharField(source="item.name", read_only=True)
+
+    class Meta:
+        model = ItemVelocity
+        fields = [
+            "item",
+            "item_sku",
+            "item_name",
+            "period_start",
+            "period_end",
+            "outbound_qty",
+            "outbound_lines",
+            "active_days",
+            "avg_daily_qty",
+            "std_daily_qty",
+            "cv",
+            "abc_class",
+            "xyz_class",
+            "rank",
+            "on_hand",
+            "days_of_cover",
+            "computed_at",
+        ]
+        read_only_fields = fields
@@ -0,0 +1,51 @@
+from rest_framework import serializers
+
+from .models import CycleCount, CycleCountLine
+
+MAX_SCANS = 20000
+
+
+class CycleCountCreateSerializer(serializers.Serializer):
+    warehouse = serializers.IntegerField()
+    locations = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    memo = serializers.CharField(required=False, allow_blank=True, default="")
+
+
+class CountScansSerializer(serializers.Serializer):
+    # Scans ({location, item | sku, qty}) are resolved in bulk by record_counts()
+    scans = serializers.ListField(child=serializers.DictField(), allow_empty=False, max_length=MAX_SCANS)
+    replace = serializers.BooleanField(required=False, default=False)
+
+
+class CycleCountLineSerializer(serializers.ModelSerializer):
+    location_code = serializers.CharField(source="location.code", read_only=True)
+    item_sku = serializers.CharField(source="item.sku", read_only=True)
+
+    class Meta:
+        model = CycleCountLine
+        fields = ["id", "location", "location_code", "item", "item_sku", "expected", "counted", "variance"]
+        read_only_fields = fields
+
+
+class CycleCountSerializer(serializers.ModelSerializer):
+    created_by = serializers.CharField(source="created_by.username", read_only=True, default=None)
+    posted_by = serializers.CharField(source="posted_by.username", read_only=True, default=None)
+    line_count = serializers.IntegerField(read_only=True, default=None)
+    counted_lines = serializers.IntegerField(read_only=True, default=None)
+
+    class Meta:
+        model = CycleCount
+        fields = [
+            "id",
+            "number",
+            "warehouse",
+            "status",
+            "memo",
+            "line_count",
+            "counted_lines",
+            "created_by",
+            "created_at",
+            "posted_by",
+            "posted_at",
+        ]
+        read_only_fields = fields
@@ -0,0 +1,55 @@
+from rest_framework import serializers
+
+from .models import GoodsReceipt, GoodsReceiptLine
+from .services_grn import MAX_LINES
+
+
+class GoodsReceiptPayloadSerializer(serializers.Serializer):
+    # Lines are checked by receive_goods() in bulk (one Item query); a nested serializer per
+    # line would cost more than the posting itself on a 5,000-line receipt.
+    reference = serializers.CharField(max_length=100, required=False, allow_blank=True, default="")
+    memo = serializers.CharField(required=False, allow_blank=True, default="")
+    idempotency_key = serializers.CharField(max_length=64, required=False, allow_blank=True, default="")
+    lines = serializers.ListField(child=serializers.DictField(), allow_empty=False, max_length=MAX_LINES)
+
+
+class GoodsReceiptLineSerializer(serializers.ModelSerializer):
+    item_sku = serializers.CharField(source="item.sku", read_only=True)
+    item_name = serializers.CharField(source="item.name", read_only=True)
+    lot_number = serializers.CharField(source="lot.lot_number", read_only=True, default=None)
+    expiry_date = serializers.DateField(source="lot.expiry_date", read_only=True, default=None)
+
+    class Meta:
+        model = GoodsReceiptLine
+        fields = ["line_no", "item", "item_sku", "item_name", "lot", "lot_number", "expiry_date", "qty"]
+        read_only_fields = fields
+
+
+class GoodsReceiptSerializer(serializers.ModelSerializer):
+    warehouse_code = serializers.CharField(source="warehouse.code", read_only=True)
+    created_by = serializers.CharField(source="created_by.username", read_only=True, default=None)
+
+    class Meta:
+        model = GoodsReceipt
+        fields = [
+            "id",
+            "number",
+            "warehouse",
+            "warehouse_code",
+            "reference",
+            "memo",
+            "idempotency_key",
+            "line_count",
+            "total_qty",
+            "created_by",
+            "created_at",
+        ]
+        read_only_fields = fields
+
+
+class GoodsReceiptDetailSerializer(GoodsReceiptSerializer):
+    lines = GoodsReceiptLineSerializer(many=True, read_only=True)
+
+    class Meta(GoodsReceiptSerializer.Meta):
+        fields = GoodsReceiptSerializer.Meta.fields + ["lines"]
+        read_only_fields = fields
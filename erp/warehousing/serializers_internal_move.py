@@ -15,6 +15,7 @@ class InternalMoveLineSerializer(serializers.Serializer):
     source_location = serializers.IntegerField()
     target_location = serializers.IntegerField()
     qty = serializers.DecimalField(max_digits=12, decimal_places=3)
+    serials = serializers.ListField(child=serializers.CharField(max_length=100), required=False, max_length=20000)
 
     def validate_qty(self, v):
         if v is None or Decimal(v) <= 0:
@@ -36,6 +37,7 @@ class FromStockRowSerializer(serializers.Serializer):
 class RowLineSerializer(serializers.Serializer):
     item = serializers.IntegerField()
     qty = serializers.DecimalField(max_digits=12, decimal_places=3)
+    serials = serializers.ListField(child=serializers.CharField(max_length=100), required=False, max_length=20000)
 
 class RowMovePayloadSerializer(serializers.Serializer):
     from_location = serializers.IntegerField()
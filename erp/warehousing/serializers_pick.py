@@ -0,0 +1,65 @@
+from rest_framework import serializers
+
+from .models import PickList, PickListLine
+from .services_grn import MAX_LINES
+
+
+class PickListPayloadSerializer(serializers.Serializer):
+    # Lines ({item | sku, qty}) are checked in bulk by generate_pick_list()
+    warehouse = serializers.IntegerField()
+    ref_model = serializers.CharField(max_length=50, required=False, allow_blank=True, default="")
+    ref_id = serializers.CharField(max_length=50, required=False, allow_blank=True, default="")
+    allow_partial = serializers.BooleanField(required=False, default=False)
+    lines = serializers.ListField(child=serializers.DictField(), allow_empty=False, max_length=MAX_LINES)
+
+
+class PickedLineSerializer(serializers.Serializer):
+    line = serializers.IntegerField()
+    qty = serializers.DecimalField(max_digits=12, decimal_places=3, min_value=0)
+
+
+class PickConfirmSerializer(serializers.Serializer):
+    picked = PickedLineSerializer(many=True, required=False, default=list)
+
+
+class PickListLineSerializer(serializers.ModelSerializer):
+    location_code = serializers.CharField(source="location.code", read_only=True)
+    item_sku = serializers.CharField(source="item.sku", read_only=True)
+    item_name = serializers.CharField(source="item.name", read_only=True)
+    lot_number = serializers.CharField(source="lot.lot_number", read_only=True, default=None)
+    expiry_date = serializers.DateField(source="lot.expiry_date", read_only=True, default=None)
+
+    class Meta:
+        model = PickListLine
+        fields = ["id", "seq", "location", "location_code", "item", "item_sku", "item_name", "lot", "lot_number", "expiry_date", "qty", "picked_qty"]
+        read_only_fields = fields
+
+
+class PickListSerializer(serializers.ModelSerializer):
+    created_by = serializers.CharField(source="created_by.username", read_only=True, default=None)
+    confirmed_by = serializers.CharField(source="confirmed_by.username", read_only=True, default=None)
+
+    class Meta:
+        model = PickList
+        fields = [
+            "id",
+            "number",
+            "warehouse",
+            "status",
+            "ref_model",
+            "ref_id",
+            "short",
+            "created_by",
+            "created_at",
+            "confirmed_by",
+            "confirmed_at",
+        ]
+        read_only_fields = fields
+
+
+class PickListDetailSerializer(PickListSerializer):
+    lines = PickListLineSerializer(many=True, read_only=True)
+
+    class Meta(PickListSerializer.Meta):
+        fields = PickListSerializer.Meta.fields + ["lines"]
+        read_only_fields = fields
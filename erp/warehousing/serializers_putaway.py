@@ -16,6 +16,7 @@ class PutawayActionSerializer(serializers.Serializer):
     source_bin = serializers.IntegerField()
     qty = serializers.DecimalField(max_digits=12, decimal_places=3)
     target_location = serializers.IntegerField(required=False, allow_null=True)
+    serials = serializers.ListField(child=serializers.CharField(max_length=100), required=False, max_length=20000)
 
     def validate(self, attrs):
         if attrs.get('type') == 'PUTAWAY' and not attrs.get('target_location'):
@@ -25,3 +26,11 @@ class PutawayActionSerializer(serializers.Serializer):
 class PutawayBatchSerializer(serializers.Serializer):
     actions = PutawayActionSerializer(many=True)
     idempotency_key = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
+class PutawaySuggestLineSerializer(serializers.Serializer):
+    item = serializers.IntegerField()
+    qty = serializers.DecimalField(max_digits=12, decimal_places=3, min_value=0)
+    source_bin = serializers.IntegerField(required=False, allow_null=True)
+
+class PutawaySuggestRequestSerializer(serializers.Serializer):
+    lines = PutawaySuggestLineSerializer(many=True, allow_empty=False, max_length=2000)
@@ -0,0 +1,48 @@
+from rest_framework import serializers
+
+from .models import Alert, ReorderSetting
+
+
+class ReorderSettingSerializer(serializers.ModelSerializer):
+    item_sku = serializers.CharField(source="item.sku", read_only=True)
+    updated_by = serializers.CharField(source="updated_by.username", read_only=True, default=None)
+
+    class Meta:
+        model = ReorderSetting
+        fields = ["id", "warehouse", "item", "item_sku", "reorder_point", "max_qty", "active", "updated_at", "updated_by"]
+        read_only_fields = ["updated_at", "updated_by"]
+
+    def validate(self, attrs):
+        point = attrs.get("reorder_point", getattr(self.instance, "reorder_point", None))
+        max_qty = attrs.get("max_qty", getattr(self.instance, "max_qty", None))
+        if point is not None and point < 0:
+            raise serializers.ValidationError({"reorder_point": "Reorder point cannot be negative"})
+        if max_qty is not None and point is not None and max_qty < point:
+            raise serializers.ValidationError({"max_qty": "Max must not be below the reorder point"})
+        return attrs
+
+
+class AlertSerializer(serializers.ModelSerializer):
+    item_sku = serializers.CharField(source="item.sku", read_only=True)
+    item_name = serializers.CharField(source="item.name", read_only=True)
+    warehouse_code = serializers.CharField(source="warehouse.code", read_only=True)
+
+    class Meta:
+        model = Alert
+        fields = [
+            "id",
+            "warehouse",
+            "warehouse_code",
+            "item",
+            "item_sku",
+            "item_name",
+            "kind",
+            "status",
+            "available",
+            "reorder_point",
+            "suggested_qty",
+            "opened_at",
+            "updated_at",
+            "resolved_at",
+        ]
+        read_only_fields = fields
@@ -0,0 +1,61 @@
+from rest_framework import serializers
+
+from .models import StockReservation
+
+MAX_LINES = 1000
+
+
+class ReservationLineSerializer(serializers.Serializer):
+    warehouse = serializers.IntegerField()
+    item = serializers.IntegerField(required=False)
+    sku = serializers.CharField(required=False)
+    location = serializers.IntegerField(required=False, allow_null=True)
+    qty = serializers.DecimalField(max_digits=12, decimal_places=3, required=False, default=0)
+
+    def validate(self, attrs):
+        if not attrs.get("item") and not attrs.get("sku"):
+            raise serializers.ValidationError("item or sku is required")
+        if attrs["qty"] < 0:
+            raise serializers.ValidationError({"qty": "Quantity must be >= 0"})
+        return attrs
+
+
+class AtpPayloadSerializer(serializers.Serializer):
+    lines = ReservationLineSerializer(many=True, allow_empty=False, max_length=MAX_LINES)
+
+
+class ReservePayloadSerializer(AtpPayloadSerializer):
+    ref_model = serializers.CharField(max_length=50, required=False, allow_blank=True, default="")
+    ref_id = serializers.CharField(max_length=50, required=False, allow_blank=True, default="")
+    expires_at = serializers.DateTimeField(required=False, allow_null=True)
+    ttl_minutes = serializers.IntegerField(required=False, min_value=1)
+    allow_short = serializers.BooleanField(required=False, default=False)
+
+    def validate_lines(self, lines):
+        if any(ln["qty"] <= 0 for ln in lines):
+            raise serializers.ValidationError("Every line needs qty > 0")
+        return lines
+
+
+class StockReservationSerializer(serializers.ModelSerializer):
+    item_sku = serializers.CharField(source="item.sku", read_only=True)
+    created_by = serializers.CharField(source="created_by.username", read_only=True, default=None)
+
+    class Meta:
+        model = StockReservation
+        fields = [
+            "id",
+            "warehouse",
+            "item",
+            "item_sku",
+            "location",
+            "qty",
+            "status",
+            "expires_at",
+            "ref_model",
+            "ref_id",
+            "created_by",
+            "created_at",
+            "closed_at",
+        ]
+        read_only_fields = fields
@@ -0,0 +1,52 @@
+from rest_framework import serializers
+
+from .models import SerialMovement, SerialUnit
+from .services_serials import MAX_SERIALS
+
+
+class SerialMovePayloadSerializer(serializers.Serializer):
+    # Serials are resolved and checked as a set by move_serials(), not one field per scan
+    to_location = serializers.IntegerField()
+    serials = serializers.ListField(child=serializers.CharField(allow_blank=True, trim_whitespace=True), allow_empty=False, max_length=MAX_SERIALS)
+    item = serializers.IntegerField(required=False, allow_null=True, default=None)
+    ref_id = serializers.CharField(max_length=50, required=False, allow_blank=True, default="")
+    memo = serializers.CharField(required=False, allow_blank=True, default="")
+
+
+class SerialUnitSerializer(serializers.ModelSerializer):
+    item_sku = serializers.CharField(source="item.sku", read_only=True)
+    warehouse_code = serializers.CharField(source="warehouse.code", read_only=True)
+    location_code = serializers.CharField(source="location.code", read_only=True)
+    location_subtype = serializers.CharField(source="location.subtype", read_only=True)
+    lot_number = serializers.CharField(source="lot.lot_number", read_only=True, default=None)
+
+    class Meta:
+        model = SerialUnit
+        fields = [
+            "id",
+            "serial",
+            "item",
+            "item_sku",
+            "warehouse",
+            "warehouse_code",
+            "location",
+            "location_code",
+            "location_subtype",
+            "status",
+            "lot",
+            "lot_number",
+            "created_at",
+            "updated_at",
+        ]
+        read_only_fields = fields
+
+
+class SerialMovementSerializer(serializers.ModelSerializer):
+    from_code = serializers.CharField(source="from_location.code", read_only=True, default=None)
+    to_code = serializers.CharField(source="to_location.code", read_only=True)
+    user = serializers.CharField(source="user.username", read_only=True, default=None)
+
+    class Meta:
+        model = SerialMovement
+        fields = ["id", "ts", "movement_type", "from_location", "from_code", "to_location", "to_code", "ref_model", "ref_id", "batch", "user"]
+        read_only_fields = fields
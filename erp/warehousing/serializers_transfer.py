@@ -0,0 +1,77 @@
+from rest_framework import serializers
+
+from .models import TransferOrder, TransferOrderLine, TransferReceipt
+from .services_grn import MAX_LINES
+
+
+class TransferDispatchSerializer(serializers.Serializer):
+    # Lines ({item | sku, qty}) are checked in bulk by dispatch_transfer()
+    source_warehouse = serializers.IntegerField()
+    dest_warehouse = serializers.IntegerField()
+    from_location = serializers.IntegerField(required=False, allow_null=True, default=None)
+    reference = serializers.CharField(max_length=100, required=False, allow_blank=True, default="")
+    memo = serializers.CharField(required=False, allow_blank=True, default="")
+    idempotency_key = serializers.CharField(max_length=64, required=False, allow_blank=True, default="")
+    lines = serializers.ListField(child=serializers.DictField(), allow_empty=False, max_length=MAX_LINES)
+
+
+class TransferReceiveSerializer(serializers.Serializer):
+    # No lines: receive everything still outstanding
+    idempotency_key = serializers.CharField(max_length=64, required=False, allow_blank=True, default="")
+    lines = serializers.ListField(child=serializers.DictField(), required=False, default=list, max_length=MAX_LINES)
+
+
+class TransferOrderLineSerializer(serializers.ModelSerializer):
+    item_sku = serializers.CharField(source="item.sku", read_only=True)
+    item_name = serializers.CharField(source="item.name", read_only=True)
+
+    class Meta:
+        model = TransferOrderLine
+        fields = ["line_no", "item", "item_sku", "item_name", "qty_shipped", "qty_received"]
+        read_only_fields = fields
+
+
+class TransferReceiptSerializer(serializers.ModelSerializer):
+    created_by = serializers.CharField(source="created_by.username", read_only=True, default=None)
+
+    class Meta:
+        model = TransferReceipt
+        fields = ["id", "idempotency_key", "line_count", "total_qty", "created_by", "created_at"]
+        read_only_fields = fields
+
+
+class TransferOrderSerializer(serializers.ModelSerializer):
+    source_code = serializers.CharField(source="source_warehouse.code", read_only=True)
+    dest_code = serializers.CharField(source="dest_warehouse.code", read_only=True)
+    created_by = serializers.CharField(source="created_by.username", read_only=True, default=None)
+
+    class Meta:
+        model = TransferOrder
+        fields = [
+            "id",
+            "number",
+            "source_warehouse",
+            "source_code",
+            "dest_warehouse",
+            "dest_code",
+            "from_location",
+            "status",
+            "reference",
+            "memo",
+            "idempotency_key",
+            "line_count",
+            "total_qty",
+            "created_by",
+            "created_at",
+            "received_at",
+        ]
+        read_only_fields = fields
+
+
+class TransferOrderDetailSerializer(TransferOrderSerializer):
+    lines = TransferOrderLineSerializer(many=True, read_only=True)
+    receipts = TransferReceiptSerializer(many=True, read_only=True)
+
+    class Meta(TransferOrderSerializer.Meta):
+        fields = TransferOrderSerializer.Meta.fields + ["lines", "receipts"]
+        read_only_fields = fields
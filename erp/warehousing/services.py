@@ -1,18 +1,29 @@
+from datetime import datetime, time, timedelta
 from decimal import Decimal
-from django.db import transaction
-from django.db.models import Sum
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import BooleanField, Sum, Value
+from django.db.models.expressions import RawSQL
 from django.core.exceptions import ValidationError
+from django.dispatch import Signal
+from django.utils import timezone
 from .models import (
     Location,
     LocationType,
     VirtualSubtype,
     WarehouseStatus,
     StockLedger,
+    PostingBatch,
     MovementType,
     AdjustmentRequest,
     AdjustmentStatus,
     AdjustmentType,  # added
+    SerialStatus,
+    SerialUnit,
+    StockBalance,
 )
+from .fields import interned
+from .services_lots import assign_lots
 
 
 def ensure_location_empty(location_id: int) -> bool:
@@ -29,6 +40,14 @@ def ensure_location_empty(location_id: int) -> bool:
     return (total or Decimal("0")) == 0
 
 
+def local_day_bounds(day) -> tuple[datetime, datetime]:
+    """Return the aware [start, end) datetimes of a local calendar day.
+    Filter ts with these instead of ts__date so the ts index and monthly partition pruning apply.
+    """
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
 def get_virtual(warehouse, subtype_slug: str) -> Location:
     try:
         return Location.objects.get(
@@ -56,6 +75,109 @@ def on_hand_qty(warehouse_id: int, location_id: int, item_id: int) -> Decimal:
     return agg.get("total") or Decimal("0")
 
 
+# Sent after every batch of ledger rows is written, inside the posting transaction:
+#   ledger_posted.send(sender=StockLedger, rows=[StockLedger, ...])
+# Single rows saved directly through StockLedger.objects.create() get the same lot and serial
+# checks from a pre_save receiver and are forwarded by a post_save receiver (signals.py), so
+# receivers see every posting either way.
+ledger_posted = Signal()
+
+# True for rows committed by a transaction at or after the oldest one still in progress. The
+# 32-bit xmin is widened to an xid8 against the statement's snapshot; rows of the reading
+# transaction itself (its own postings, savepoints included) are not held back.
+_SNAPSHOT_XMAX = "pg_snapshot_xmax(pg_current_snapshot())::text::bigint"
+_ROW_XID = f"({_SNAPSHOT_XMAX} - mod({_SNAPSHOT_XMAX} - warehousing_stockledger.xmin::text::bigint, 4294967296))"
+LEDGER_ROW_IN_FLIGHT = RawSQL(
+    f"CASE WHEN {_ROW_XID} >= pg_snapshot_xmin(pg_current_snapshot())::text::bigint"
+    f" THEN pg_xact_status({_ROW_XID}::text::xid8) <> 'in progress' ELSE false END",
+    [],
+    output_field=BooleanField(),
+)
+
+
+def settled_ledger_rows(qs, fields: list[str], limit: int) -> tuple[list[dict], int]:
+    """Up to ``limit`` rows of ``qs`` in id order for an id cursor (the change feed, the
+    reorder cursor), cut before the first row that may still have lower ids in flight. Ids are
+    taken at insert but become visible at commit, so a row committed by a transaction newer
+    than the oldest one still running is held back until that one ends, however long it runs.
+    Rows younger than LEDGER_FEED_SETTLE_SECONDS are held back too: a transaction that took
+    its xid before a still-running one can commit ids above that one's. Returns the rows and
+    the number fetched before the cut."""
+    settle = timedelta(seconds=getattr(settings, "LEDGER_FEED_SETTLE_SECONDS", 5))
+    in_flight = LEDGER_ROW_IN_FLIGHT if connection.vendor == "postgresql" else Value(False)
+    rows = list(qs.annotate(in_flight=in_flight).order_by("id").values(*fields, "ts", "in_flight")[:limit])
+    horizon = timezone.now() - settle
+    for i, r in enumerate(rows):
+        if r["in_flight"] or r["ts"] > horizon:
+            return rows[:i], len(rows)
+    return rows, len(rows)
+
+
+def check_serialized_stock(entries: list[StockLedger]):
+    """Refuse outgoing rows that would leave fewer units on hand at a location than it has
+    IN_STOCK serials of the item: serialized stock moves by serial (services_serials), which
+    relocates the units before posting. One query on the serial index; StockBalance is read
+    only for the keys that hold serials."""
+    net: dict[tuple, Decimal] = {}
+    outgoing = set()
+    for e in entries:
+        key = (e.warehouse_id, e.location_id, e.item_id)
+        net[key] = net.get(key, Decimal("0")) + e.qty_delta
+        if e.qty_delta < 0:
+            outgoing.add(key)
+    if not outgoing:
+        return
+    units: dict[tuple, int] = {}
+    for key in (
+        SerialUnit.objects.filter(
+            warehouse_id__in={k[0] for k in outgoing},
+            location_id__in={k[1] for k in outgoing},
+            item_id__in={k[2] for k in outgoing},
+            status=SerialStatus.IN_STOCK,
+        ).values_list("warehouse_id", "location_id", "item_id")
+    ):
+        if key in outgoing:
+            units[key] = units.get(key, 0) + 1
+    if not units:
+        return
+    on_hand = {
+        (loc_id, item_id): qty
+        for loc_id, item_id, qty in StockBalance.objects.select_for_update()
+        .filter(location_id__in={k[1] for k in units}, item_id__in={k[2] for k in units})
+        .order_by("location_id", "item_id")
+        .values_list("location_id", "item_id", "qty")
+    }
+    short = [
+        f"item {i} at location {loc_id}: {n} serialized unit(s) in stock, move them by serial"
+        for (wh_id, loc_id, i), n in units.items()
+        if on_hand.get((loc_id, i), Decimal("0")) + net[(wh_id, loc_id, i)] < n
+    ]
+    if short:
+        raise ValidationError(short)
+
+
+@transaction.atomic
+def post_entries(entries: list[StockLedger]) -> list[StockLedger]:
+    """Write ledger rows with one bulk INSERT under a single PostingBatch and notify
+    ledger_posted receivers. Paired rows of one logical movement should be posted in the
+    same call so read models that net movements per batch (e.g. stock aging) see both sides
+    together. Unlotted outgoing rows of lot-tracked stock are split per lot first (assign_lots),
+    and rows that would take serialized units by quantity are refused (check_serialized_stock).
+    """
+    if not entries:
+        return []
+    check_serialized_stock(entries)
+    entries = assign_lots(entries)
+    first = entries[0]
+    batch = PostingBatch.open(user=first.user, rows=len(entries), ref_model=first.ref_model, ref_id=first.ref_id)
+    for e in entries:
+        e.batch = batch
+    with interned(entries, StockLedger):
+        rows = StockLedger.objects.bulk_create(entries, batch_size=1000)
+    ledger_posted.send(sender=StockLedger, rows=rows)
+    return rows
+
+
 @transaction.atomic
 def post_ledger(
     *,
@@ -75,8 +197,9 @@ def post_ledger(
     if from_location is None and to_location is None:
         raise ValidationError("Either from_location or to_location is required")
 
+    entries = []
     if from_location is not None:
-        StockLedger.objects.create(
+        entries.append(StockLedger(
             warehouse=warehouse,
             location=from_location,
             item=item,
@@ -86,10 +209,10 @@ def post_ledger(
             ref_id=str(ref_id or ""),
             memo=memo,
             user=user,
-        )
+        ))
 
     if to_location is not None:
-        StockLedger.objects.create(
+        entries.append(StockLedger(
             warehouse=warehouse,
             location=to_location,
             item=item,
@@ -99,7 +222,8 @@ def post_ledger(
             ref_id=str(ref_id or ""),
             memo=memo,
             user=user,
-        )
+        ))
+    post_entries(entries)
 
 
 @transaction.atomic
@@ -344,6 +468,7 @@ def create_standard_virtual_bins(warehouse):
         VirtualSubtype.LOST_PENDING,
         VirtualSubtype.EXCESS_PENDING,
         VirtualSubtype.DAMAGE_PENDING,
+        VirtualSubtype.IN_TRANSIT,
     ]
     created = 0
     for st in subtypes:
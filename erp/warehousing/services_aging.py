@@ -0,0 +1,179 @@
+"""FIFO stock-aging layers (StockAgingLayer) maintained at posting time.
+
+apply_aging() runs for every ledger_posted batch. Per (warehouse, item) it nets the batch's
+rows over counted locations (everything except LOST / EXCESS_PENDING, like the warehouse KPI
+total): a net inflow opens a layer dated at the posting, a net outflow consumes the oldest
+layers. Relocations inside the warehouse (putaway, internal moves) net to zero and leave the
+layers untouched, so stock keeps its original receipt date. The aging report only reads
+the layers; rebuild_aging() seeds them from the ledger for pre-existing stock, netting the
+rows the same way.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Case, DecimalField, F, Min, Q, Sum, When
+from django.utils import timezone
+
+from .models import Location, StockAgingLayer, StockLedger, VirtualSubtype
+from .services import local_day_bounds
+
+ZERO = Decimal("0")
+AGING_EXCLUDED_SUBTYPES = [VirtualSubtype.EXCESS_PENDING, VirtualSubtype.LOST]
+# (label, min age in days, max age in days or None)
+AGING_BUCKETS = [("0_30", 0, 30), ("31_60", 31, 60), ("61_90", 61, 90), ("90_plus", 91, None)]
+
+
+def _lock(warehouse_id: int, item_id: int):
+    # Serialises layer maintenance per (warehouse, item) for the rest of the transaction.
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cur:
+            cur.execute("SELECT pg_advisory_xact_lock(%s, %s)", [warehouse_id, item_id])
+
+
+def _receive(warehouse_id: int, item_id: int, qty: Decimal, ts, ledger_id):
+    for layer in StockAgingLayer.objects.select_for_update().filter(warehouse_id=warehouse_id, item_id=item_id, qty_remaining__lt=0).order_by("received_at", "id"):
+        fill = min(qty, -layer.qty_remaining)
+        layer.qty_remaining += fill
+        qty -= fill
+        if layer.qty_remaining == 0:
+            layer.delete()
+        else:
+            layer.save(update_fields=["qty_remaining"])
+        if qty == 0:
+            return
+    StockAgingLayer.objects.create(warehouse_id=warehouse_id, item_id=item_id, received_at=ts, qty_received=qty, qty_remaining=qty, source_ledger_id=ledger_id)
+
+
+def _consume(warehouse_id: int, item_id: int, qty: Decimal, ts):
+    for layer in StockAgingLayer.objects.select_for_update().filter(warehouse_id=warehouse_id, item_id=item_id, qty_remaining__gt=0).order_by("received_at", "id"):
+        take = min(qty, layer.qty_remaining)
+        layer.qty_remaining -= take
+        qty -= take
+        if layer.qty_remaining == 0:
+            layer.delete()
+        else:
+            layer.save(update_fields=["qty_remaining"])
+        if qty == 0:
+            return
+    StockAgingLayer.objects.create(warehouse_id=warehouse_id, item_id=item_id, received_at=ts, qty_received=ZERO, qty_remaining=-qty)
+
+
+def apply_aging(rows: list[StockLedger]):
+    """Update FIFO layers for one posted batch of ledger rows."""
+    if not rows:
+        return
+    subtypes = dict(Location.objects.filter(id__in={r.location_id for r in rows}).values_list("id", "subtype"))
+    net: dict[tuple, Decimal] = defaultdict(lambda: ZERO)
+    first_in: dict[tuple, tuple] = {}
+    for r in rows:
+        if subtypes.get(r.location_id) in AGING_EXCLUDED_SUBTYPES:
+            continue
+        key = (r.warehouse_id, r.item_id)
+        qty = Decimal(r.qty_delta)
+        net[key] += qty
+        if qty > 0 and key not in first_in:
+            first_in[key] = (r.ts, r.pk)
+    now = timezone.now()
+    for key in sorted(net):
+        qty = net[key]
+        if qty == 0:
+            continue
+        _lock(*key)
+        if qty > 0:
+            ts, ledger_id = first_in.get(key, (None, None))
+            _receive(*key, qty, ts or now, ledger_id)
+        else:
+            _consume(*key, -qty, now)
+
+
+def _bucket_filters(today: date) -> list[tuple[str, Q]]:
+    out = []
+    for label, lo_days, hi_days in AGING_BUCKETS:
+        q = Q(received_at__lt=local_day_bounds(today - timedelta(days=lo_days))[1])
+        if hi_days is not None:
+            q &= Q(received_at__gte=local_day_bounds(today - timedelta(days=hi_days))[0])
+        out.append((label, q))
+    return out
+
+
+def aging_report(warehouse_id: int, *, by_item: bool = False, limit: int = 100, today: date | None = None) -> dict:
+    """Quantity per age bucket for the warehouse, optionally with the items holding the oldest stock."""
+    today = today or timezone.localdate()
+    dec = DecimalField(max_digits=16, decimal_places=3)
+    aggs = {f"b_{label}": Sum(Case(When(q, then="qty_remaining"), default=ZERO, output_field=dec)) for label, q in _bucket_filters(today)}
+    base = StockAgingLayer.objects.filter(warehouse_id=warehouse_id, qty_remaining__gt=0)
+    totals = base.aggregate(**aggs)
+    result = {
+        "warehouse": warehouse_id,
+        "as_of": today.isoformat(),
+        "buckets": {label: float(totals.get(f"b_{label}") or 0) for label, _, _ in AGING_BUCKETS},
+        "unallocated_outflow": float(
+            -(StockAgingLayer.objects.filter(warehouse_id=warehouse_id, qty_remaining__lt=0).aggregate(s=Sum("qty_remaining"))["s"] or 0)
+        ),
+    }
+    if by_item:
+        rows = (
+            base.values("item_id", "item__sku", "item__name")
+            .annotate(**aggs)
+            .order_by(f"-b_{AGING_BUCKETS[-1][0]}", "item_id")[: max(limit, 1)]
+        )
+        result["items"] = [
+            {
+                "item": r["item_id"],
+                "sku": r["item__sku"],
+                "name": r["item__name"],
+                **{label: float(r.get(f"b_{label}") or 0) for label, _, _ in AGING_BUCKETS},
+            }
+            for r in rows
+        ]
+    return result
+
+
+@transaction.atomic
+def rebuild_aging(warehouse_id: int) -> dict:
+    """Replace the warehouse's layers with ones derived from the ledger: each item's current
+    counted on-hand is attributed to its most recent inflows (newest first). An inflow is a
+    posting batch whose counted rows net positive for the item, as in apply_aging(), so moves
+    inside the warehouse (putaway, picks, adjustment requests) are not receipts; rows written
+    before batches existed are netted per document reference. Stock without enough recorded
+    inflows is dated at the oldest inflow found."""
+    StockAgingLayer.objects.filter(warehouse_id=warehouse_id).delete()
+    counted = StockLedger.objects.filter(warehouse_id=warehouse_id).exclude(location__subtype__in=AGING_EXCLUDED_SUBTYPES)
+    on_hand = {item_id: q for item_id, q in counted.values_list("item_id").annotate(q=Sum("qty_delta")).order_by() if q}
+    now = timezone.now()
+    layers: list[StockAgingLayer] = []
+    for item_id, q in on_hand.items():
+        if q < 0:
+            layers.append(StockAgingLayer(warehouse_id=warehouse_id, item_id=item_id, received_at=now, qty_received=ZERO, qty_remaining=q))
+    unbatched = Q(batch__isnull=True)
+    positive = Q(qty_delta__gt=0)
+    inflows = (
+        counted.annotate(
+            g_ref_model=Case(When(unbatched, then=F("ref_model"))),
+            g_ref_id=Case(When(unbatched, then=F("ref_id"))),
+            g_row=Case(When(unbatched & Q(ref_id=""), then=F("id"))),
+        )
+        .values("item_id", "batch_id", "g_ref_model", "g_ref_id", "g_row")
+        .annotate(net=Sum("qty_delta"), first_ts=Min("ts", filter=positive), first_id=Min("id", filter=positive))
+        .filter(net__gt=0)
+        .order_by("item_id", "-first_ts", "-first_id")
+        .values_list("item_id", "first_ts", "first_id", "net")
+    )
+    need: dict[int, Decimal] = {i: q for i, q in on_hand.items() if q > 0}
+    oldest: dict[int, tuple] = {}
+    for item_id, ts, ledger_id, qty in inflows.iterator(chunk_size=5000):
+        left = need.get(item_id, ZERO)
+        oldest[item_id] = (ts, ledger_id)
+        if left <= 0:
+            continue
+        take = min(left, qty)
+        need[item_id] = left - take
+        layers.append(StockAgingLayer(warehouse_id=warehouse_id, item_id=item_id, received_at=ts, qty_received=take, qty_remaining=take, source_ledger_id=ledger_id))
+    for item_id, left in need.items():
+        if left > 0:
+            ts, ledger_id = oldest.get(item_id, (now, None))
+            layers.append(StockAgingLayer(warehouse_id=warehouse_id, item_id=item_id, received_at=ts, qty_received=left, qty_remaining=left, source_ledger_id=ledger_id))
+    StockAgingLayer.objects.bulk_create(layers, batch_size=2000)
+    return {"warehouse": warehouse_id, "items": len(on_hand), "layers": len(layers)}
@@ -0,0 +1,237 @@
+"""Move old StockLedger rows to compressed files and carry their net effect forward.
+
+archive_ledger(before=...) streams every ledger row with ts < before into Parquet
+(pyarrow) or gzip NDJSON, then - in one ledger_maintenance() transaction - inserts
+one OPENING_BALANCE row per (warehouse, location, item, lot) at ts = before and deletes the
+archived rows. Per-key sums are computed by the same statement that inserts them, so
+on-hand stays exact; the movements grid projection (LedgerView) drops the archived rows and
+gains the opening ones. import_archive() loads an archive back into StockLedgerArchive
+for ad hoc queries without touching balances. archived_before() tells read models rebuilt
+from the ledger (the daily rollup) which days it no longer holds.
+"""
+import gzip
+import json
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .ledger_audit import ledger_maintenance
+from .models import LedgerView, MovementType, PostingBatch, StockLedger, StockLedgerArchive
+from .services import local_day_bounds
+from .services_ledger_view import project_ledger_rows
+
+logger = logging.getLogger(__name__)
+
+try:  # optional: columnar output when pyarrow is installed
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - gzip NDJSON fallback
+    pa = None
+    pq = None
+
+ARCHIVE_REF_MODEL = "LEDGER_ARCHIVE"
+ARCHIVE_ID_PREFIX = "ledger-"
+LEDGER_FIELDS = ["id", "ts", "warehouse_id", "location_id", "item_id", "qty_delta", "movement_type", "ref_model", "ref_id", "memo", "user_id", "batch_id", "lot_id"]
+CHUNK = 5000
+
+
+def default_archive_dir() -> Path:
+    return Path(getattr(settings, "LEDGER_ARCHIVE_DIR", Path(settings.BASE_DIR) / "archive" / "ledger"))
+
+
+def _arrow_schema(fields: list[str]):
+    types = {
+        "ts": pa.timestamp("us", tz="UTC"),
+        "qty_delta": pa.decimal128(12, 3),
+        "movement_type": pa.string(),
+        "ref_model": pa.string(),
+        "ref_id": pa.string(),
+        "memo": pa.string(),
+    }
+    return pa.schema([(f, types.get(f, pa.int64())) for f in fields])
+
+
+class RowsWriter:
+    """Chunked writer for one archive file; Parquet when available, else gzip NDJSON."""
+
+    def __init__(self, base: Path, fields: list[str], fmt: str):
+        self.fields = fields
+        self.fmt = fmt
+        self.count = 0
+        if fmt == "parquet":
+            self.path = base.with_suffix(".parquet")
+            self._schema = _arrow_schema(fields)
+            self._writer = pq.ParquetWriter(self.path, self._schema, compression="zstd")
+        else:
+            self.path = base.with_suffix(".ndjson.gz")
+            self._fh = gzip.open(self.path, "wt", encoding="utf-8")
+
+    def write(self, rows: list[dict]):
+        if not rows:
+            return
+        if self.fmt == "parquet":
+            self._writer.write_table(pa.Table.from_pylist(rows, schema=self._schema))
+        else:
+            for r in rows:
+                self._fh.write(json.dumps(r, default=str, separators=(",", ":")))
+                self._fh.write("\n")
+        self.count += len(rows)
+
+    def close(self):
+        if self.fmt == "parquet":
+            self._writer.close()
+        else:
+            self._fh.close()
+
+
+def iter_archive_rows(path: Path):
+    """Yield dict rows back from a Parquet or gzip NDJSON archive file."""
+    path = Path(path)
+    if path.suffix == ".parquet":
+        if pq is None:
+            raise RuntimeError("pyarrow is required to read Parquet archives")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=CHUNK):
+            yield from batch.to_pylist()
+    else:
+        with gzip.open(path, "rt", encoding="utf-8") as fh:
+            for line in fh:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _stream(qs, fields, writer: RowsWriter):
+    buf = []
+    for row in qs.values(*fields).order_by().iterator(chunk_size=CHUNK):
+        buf.append(row)
+        if len(buf) >= CHUNK:
+            writer.write(buf)
+            buf = []
+    writer.write(buf)
+
+
+def archive_ledger(*, before, out_dir: Path | None = None, fmt: str = "auto", dry_run: bool = False) -> dict:
+    """Archive every StockLedger row with ts before the local start of ``before`` (a date)."""
+    if before > timezone.localdate():
+        raise ValueError("--before cannot be in the future")
+    if fmt == "auto":
+        fmt = "parquet" if pq is not None else "ndjson"
+    if fmt == "parquet" and pq is None:
+        raise ValueError("pyarrow is not installed; use --format ndjson")
+    cutoff = local_day_bounds(before)[0]
+    ledger_qs = StockLedger.objects.filter(ts__lt=cutoff)
+    row_count = ledger_qs.count()
+    archive_id = f"{ARCHIVE_ID_PREFIX}{before.isoformat()}-{datetime.now():%Y%m%dT%H%M%S}"
+    summary = {"archive": archive_id, "cutoff": cutoff.isoformat(), "rows": row_count, "format": fmt}
+    if dry_run or row_count == 0:
+        return summary
+
+    target = Path(out_dir or default_archive_dir()) / archive_id
+    target.mkdir(parents=True, exist_ok=True)
+    ledger_writer = RowsWriter(target / "stockledger", LEDGER_FIELDS, fmt)
+    try:
+        _stream(ledger_qs, LEDGER_FIELDS, ledger_writer)
+    finally:
+        ledger_writer.close()
+
+    table = StockLedger._meta.db_table
+    # qty_delta is summed in its stored milli-units; the string columns take their stored ids.
+    encoded = [
+        StockLedger._meta.get_field(name).get_db_prep_save(value, connection)
+        for name, value in (
+            ("movement_type", MovementType.OPENING_BALANCE),
+            ("ref_model", ARCHIVE_REF_MODEL),
+            ("memo", f"opening balance as of {before.isoformat()}"),
+        )
+    ]
+    with ledger_maintenance(), connection.cursor() as cur:
+        batch = PostingBatch.open(ref_model=ARCHIVE_REF_MODEL, ref_id=archive_id)
+        cur.execute(
+            f"""
+            INSERT INTO {table} (ts, warehouse_id, location_id, item_id, lot_id, qty_delta, movement_type, ref_model, ref_id, memo, user_id, batch_id)
+            SELECT %s, warehouse_id, location_id, item_id, lot_id, SUM(qty_delta), %s, %s, %s, %s, NULL, %s
+            FROM {table}
+            WHERE ts < %s
+            GROUP BY warehouse_id, location_id, item_id, lot_id
+            HAVING SUM(qty_delta) <> 0
+            """,
+            [cutoff, encoded[0], encoded[1], archive_id[:50], encoded[2], batch.id, cutoff],
+        )
+        opening_rows = cur.rowcount
+        PostingBatch.objects.filter(id=batch.id).update(rows=opening_rows)
+        cur.execute(f"DELETE FROM {table} WHERE ts < %s", [cutoff])
+        deleted = cur.rowcount
+        if deleted != ledger_writer.count:
+            raise RuntimeError(f"Archive mismatch: wrote {ledger_writer.count} rows but would delete {deleted}; nothing changed")
+        # The opening rows start each (location, item) history, so later projected rows keep their totals
+        LedgerView.objects.filter(ts__lt=cutoff).delete()
+        project_ledger_rows("l.batch_id = %s", [batch.id])
+
+    summary.update({
+        "path": str(target),
+        "ledger_file": str(ledger_writer.path),
+        "opening_rows": opening_rows,
+    })
+    (target / "manifest.json").write_text(json.dumps(summary, indent=2, default=str))
+    logger.info("archive_ledger archive=%s rows=%s opening_rows=%s", archive_id, deleted, opening_rows)
+    return summary
+
+
+def archived_before() -> date | None:
+    """The ``before`` day of the latest archive_ledger run (read back from its PostingBatch
+    ref_id): local days before it are gone from StockLedger, None when nothing was archived."""
+    latest = None
+    for archive_id in PostingBatch.objects.filter(ref_model=ARCHIVE_REF_MODEL).values_list("ref_id", flat=True):
+        try:
+            day = date.fromisoformat(archive_id[len(ARCHIVE_ID_PREFIX):][:10])
+        except ValueError:
+            continue
+        latest = day if latest is None else max(latest, day)
+    return latest
+
+
+def import_archive(path: Path, *, replace: bool = False) -> dict:
+    """Load an archive directory (or its stockledger file) into StockLedgerArchive."""
+    path = Path(path)
+    if path.is_dir():
+        files = sorted(path.glob("stockledger.*"))
+        if not files:
+            raise FileNotFoundError(f"No stockledger archive file in {path}")
+        path = files[0]
+    archive_id = path.parent.name[:50]
+    existing = StockLedgerArchive.objects.filter(archive=archive_id)
+    if existing.exists():
+        if not replace:
+            return {"archive": archive_id, "imported": 0, "skipped": True}
+        existing.delete()
+    imported = 0
+    buf: list[StockLedgerArchive] = []
+    with transaction.atomic():
+        for r in iter_archive_rows(path):
+            buf.append(StockLedgerArchive(
+                archive=archive_id,
+                ledger_id=int(r["id"]),
+                ts=r["ts"],
+                warehouse_id=r["warehouse_id"],
+                location_id=r["location_id"],
+                item_id=r["item_id"],
+                qty_delta=Decimal(str(r["qty_delta"])),
+                movement_type=r["movement_type"] or "",
+                ref_model=r.get("ref_model") or "",
+                ref_id=r.get("ref_id") or "",
+                memo=r.get("memo") or "",
+                user_id=r.get("user_id"),
+                lot_id=r.get("lot_id"),
+            ))
+            if len(buf) >= CHUNK:
+                StockLedgerArchive.objects.bulk_create(buf)
+                imported += len(buf)
+                buf = []
+        if buf:
+            StockLedgerArchive.objects.bulk_create(buf)
+            imported += len(buf)
+    return {"archive": archive_id, "imported": imported, "skipped": False}
@@ -0,0 +1,141 @@
+"""ItemAvailability: per (item, warehouse) on-hand by location bucket.
+
+apply_availability() folds each ledger_posted batch into the rollup with one
+INSERT .. ON CONFLICT DO UPDATE (keys sorted, like services_balance). rebuild_availability()
+recomputes rows from the ledger (migration 0021 backfills with the same query).
+item_availability() answers "how many of these items do we have, and where" for one or
+many items with a single indexed query.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from catalog.models import Item
+
+from .models import ItemAvailability, Location, LocationType, StockLedger, VirtualSubtype
+from .services_balance import UPSERT_CHUNK
+from .services_reservation import recount_reserved
+
+ZERO = Decimal("0")
+BUCKETS = ("physical", "pending", "damage", "lost", "other")
+PENDING_SUBTYPES = (VirtualSubtype.LOST_PENDING, VirtualSubtype.EXCESS_PENDING, VirtualSubtype.DAMAGE_PENDING)
+
+
+def bucket_for(location_type: str, subtype: str | None) -> str:
+    if location_type == LocationType.PHYSICAL:
+        return "physical"
+    if subtype in PENDING_SUBTYPES:
+        return "pending"
+    if subtype == VirtualSubtype.DAMAGE:
+        return "damage"
+    if subtype == VirtualSubtype.LOST:
+        return "lost"
+    return "other"
+
+
+def apply_availability(rows: list[StockLedger]):
+    if not rows:
+        return
+    buckets = {
+        loc_id: bucket_for(typ, sub)
+        for loc_id, typ, sub in Location.objects.filter(id__in={r.location_id for r in rows}).values_list("id", "type", "subtype")
+    }
+    delta: dict[tuple, dict[str, Decimal]] = defaultdict(lambda: dict.fromkeys(BUCKETS, ZERO))
+    for r in rows:
+        delta[(r.item_id, r.warehouse_id)][buckets[r.location_id]] += Decimal(r.qty_delta)
+    keys = sorted(delta)
+    now = timezone.now()
+    table = ItemAvailability._meta.db_table
+    columns = ", ".join(BUCKETS)
+    updates = ",\n                    ".join(f"{b} = {table}.{b} + EXCLUDED.{b}" for b in BUCKETS)
+    placeholders = "(" + ", ".join(["%s"] * (len(BUCKETS) + 3)) + ")"
+    with connection.cursor() as cur:
+        for start in range(0, len(keys), UPSERT_CHUNK):
+            chunk = keys[start:start + UPSERT_CHUNK]
+            params = []
+            for item_id, wh_id in chunk:
+                params.extend([item_id, wh_id, *(delta[(item_id, wh_id)][b] for b in BUCKETS), now])
+            cur.execute(
+                f"""
+                INSERT INTO {table} (item_id, warehouse_id, {columns}, updated_at)
+                VALUES {", ".join([placeholders] * len(chunk))}
+                ON CONFLICT (item_id, warehouse_id) DO UPDATE SET
+                    {updates},
+                    updated_at = EXCLUDED.updated_at
+                """,
+                params,
+            )
+
+def _location_buckets_sql() -> str:
+    """SELECT id, bucket FROM locations, mirroring bucket_for()."""
+    pending = ", ".join(f"'{s}'" for s in PENDING_SUBTYPES)
+    return f"""
+        SELECT id, CASE
+            WHEN type = '{LocationType.PHYSICAL}' THEN 'physical'
+            WHEN subtype IN ({pending}) THEN 'pending'
+            WHEN subtype = '{VirtualSubtype.DAMAGE}' THEN 'damage'
+            WHEN subtype = '{VirtualSubtype.LOST}' THEN 'lost'
+            ELSE 'other'
+        END AS bucket
+        FROM {Location._meta.db_table}
+    """
+
+
+@transaction.atomic
+def rebuild_availability(warehouse_id: int | None = None) -> int:
+    """Recompute the rollup from the ledger for a warehouse (or all). Returns rows written."""
+    table = ItemAvailability._meta.db_table
+    where, params = "", []
+    if warehouse_id is not None:
+        where, params = " WHERE l.warehouse_id = %s", [warehouse_id]
+    sums = ", ".join(f"SUM(CASE WHEN b.bucket = '{b}' THEN l.qty_delta ELSE 0 END) / 1000.0" for b in BUCKETS)
+    with connection.cursor() as cur:
+        cur.execute(f"DELETE FROM {table}" + (" WHERE warehouse_id = %s" if params else ""), params)
+        cur.execute(
+            f"""
+            INSERT INTO {table} (item_id, warehouse_id, {", ".join(BUCKETS)}, updated_at)
+            SELECT l.item_id, l.warehouse_id, {sums}, %s
+            FROM {StockLedger._meta.db_table} l
+            JOIN ({_location_buckets_sql()}) b ON b.id = l.location_id{where}
+            GROUP BY l.item_id, l.warehouse_id
+            """,
+            [timezone.now(), *params],
+        )
+        written = cur.rowcount
+    recount_reserved(warehouse_id)
+    return written
+
+
+def item_availability(items: list[Item]) -> list[dict]:
+    """Availability of each item: totals across warehouses plus one entry per warehouse
+    holding anything. Results follow the order of ``items``."""
+    per_item: dict[int, list[dict]] = defaultdict(list)
+    totals: dict[int, dict[str, Decimal]] = defaultdict(lambda: dict.fromkeys(BUCKETS, ZERO))
+    rows = (
+        ItemAvailability.objects.filter(item_id__in=[i.id for i in items])
+        .values("item_id", "warehouse_id", "warehouse__code", "warehouse__name", *BUCKETS)
+        .order_by("item_id", "warehouse__code")
+    )
+    for r in rows:
+        if not any(r[b] for b in BUCKETS):
+            continue
+        for b in BUCKETS:
+            totals[r["item_id"]][b] += r[b]
+        per_item[r["item_id"]].append({
+            "warehouse": r["warehouse_id"],
+            "code": r["warehouse__code"],
+            "name": r["warehouse__name"],
+            **{b: float(r[b]) for b in BUCKETS},
+        })
+    return [
+        {
+            "item": item.id,
+            "sku": item.sku,
+            "name": item.name,
+            "totals": {b: float(totals[item.id][b]) for b in BUCKETS},
+            "warehouses": per_item.get(item.id, []),
+        }
+        for item in items
+    ]
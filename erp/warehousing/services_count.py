@@ -0,0 +1,272 @@
+"""Cycle counts (stock takes).
+
+start_count() snapshots the expected on-hand of the chosen PHYSICAL locations from
+StockBalance into CycleCountLines with one read and one bulk insert. record_counts() takes
+scans in bulk: they are resolved (one Location and one Item query per call), summed per
+(location, item) in memory and written with one bulk update plus one bulk insert for items
+found where none were expected. Handheld uploads are read row by row (iter_count_rows()) and
+applied in chunks, so a large file is never held in memory at once.
+
+The first scan of a location re-snapshots that location's expected stock (one StockBalance
+read for all locations first scanned in a call) and marks it counted, so picks and moves made
+between start_count() and the count of the bin are already in the expectation instead of
+being posted again as variances. Count a bin in one go once its first scan is in.
+
+post_count() computes the variances of the counted locations only (counted - expected, lines
+never scanned there counting as zero; locations nobody scanned are left alone) and posts them
+with one post_entries() call: a shortage moves stock from the location to the LOST bin, an
+overage comes onto the location from nowhere, like an EXCESS request does.
+"""
+import csv
+import io
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from catalog.models import Item
+
+from .models import (
+    CycleCount,
+    CycleCountLine,
+    CycleCountStatus,
+    Location,
+    LocationType,
+    MovementType,
+    StockBalance,
+    StockLedger,
+    VirtualSubtype,
+    WarehouseStatus,
+)
+from .services import post_entries
+
+ZERO = Decimal("0")
+COUNT_REF_MODEL = "CYCLE_COUNT"
+CHUNK = 5000
+MAX_ERRORS = 50
+
+
+@transaction.atomic
+def start_count(warehouse, *, location_ids: list[int] | None = None, user=None, memo: str = "") -> CycleCount:
+    """Open a count over ``location_ids`` (default: every active PHYSICAL location)."""
+    locations = Location.objects.filter(warehouse=warehouse, type=LocationType.PHYSICAL, status=WarehouseStatus.ACTIVE)
+    if location_ids is not None:
+        locations = locations.filter(id__in=location_ids)
+    scope = list(locations.values_list("id", flat=True))
+    if location_ids is not None and len(scope) != len(set(location_ids)):
+        raise ValidationError("Every location must be an active PHYSICAL location of this warehouse")
+    if not scope:
+        raise ValidationError("No locations to count")
+    count = CycleCount.objects.create(warehouse=warehouse, memo=memo or "", created_by=user)
+    count.locations.set(scope)
+    CycleCountLine.objects.bulk_create(
+        [
+            CycleCountLine(count=count, location_id=loc_id, item_id=item_id, expected=qty)
+            for loc_id, item_id, qty in StockBalance.objects.filter(warehouse=warehouse, location_id__in=scope)
+            .exclude(qty=0)
+            .values_list("location_id", "item_id", "qty")
+        ],
+        batch_size=2000,
+    )
+    return count
+
+
+def iter_count_rows(fh):
+    """Scan rows from a CSV upload (header: location, item or sku, optional qty defaulting
+    to 1 per scan), read incrementally from a binary or text file object."""
+    text = io.TextIOWrapper(fh, encoding="utf-8-sig", newline="") if isinstance(fh.read(0), bytes) else fh
+    reader = csv.DictReader(text)
+    fields = {(f or "").strip().lower() for f in reader.fieldnames or []}
+    if "location" not in fields or not fields & {"item", "sku"}:
+        raise ValidationError("CSV needs a header with location and item or sku columns")
+    for row in reader:
+        row = {(k or "").strip().lower(): (v or "").strip() for k, v in row.items()}
+        if not any(row.values()):
+            continue
+        yield {"location": row.get("location"), "item": row.get("item") or None, "sku": row.get("sku") or None, "qty": row.get("qty") or "1"}
+
+
+def _lock_open(count) -> CycleCount:
+    cc = CycleCount.objects.select_for_update().get(pk=count.pk)
+    if cc.status != CycleCountStatus.OPEN:
+        raise ValidationError(f"Cycle count {cc.number} is {cc.status.lower()}")
+    return cc
+
+
+def _resolve(cc: CycleCount, scans: list[dict], first_row: int = 1) -> dict[tuple, Decimal]:
+    """Sum scans per (location_id, item_id). Locations may be given by id or code, items by id
+    or SKU; anything outside the count's scope is an error."""
+    loc_refs = {str(s.get("location") or "").strip() for s in scans}
+    rows = list(
+        cc.locations.filter(Q(code__in=loc_refs) | Q(id__in=[int(r) for r in loc_refs if r.isdigit()])).values_list("id", "code")
+    )
+    # Codes win over ids when a code looks like a number
+    by_ref = {str(loc_id): loc_id for loc_id, _code in rows}
+    by_ref.update({code: loc_id for loc_id, code in rows if code})
+    ids = {int(s["item"]) for s in scans if str(s.get("item") or "").isdigit()}
+    skus = {str(s["sku"]).strip() for s in scans if not s.get("item") and s.get("sku")}
+    known_ids, by_sku = set(), {}
+    if ids or skus:
+        for item_id, sku in Item.objects.filter(Q(id__in=ids) | Q(sku__in=skus)).values_list("id", "sku"):
+            known_ids.add(item_id)
+            by_sku[sku] = item_id
+    totals: dict[tuple, Decimal] = defaultdict(lambda: ZERO)
+    errors = []
+    for n, s in enumerate(scans, first_row):
+        loc_id = by_ref.get(str(s.get("location") or "").strip())
+        if loc_id is None:
+            errors.append(f"row {n}: location {s.get('location')!r} is not part of this count")
+            continue
+        item = str(s.get("item") or "").strip()
+        item_id = (int(item) if item.isdigit() and int(item) in known_ids else None) if item else by_sku.get(str(s.get("sku") or "").strip())
+        if item_id is None:
+            errors.append(f"row {n}: unknown item {s.get('item') or s.get('sku')!r}")
+            continue
+        try:
+            qty = Decimal(str(s.get("qty", 1)))
+        except (InvalidOperation, ValueError):
+            errors.append(f"row {n}: invalid qty {s.get('qty')!r}")
+            continue
+        if not qty.is_finite() or qty < 0:
+            errors.append(f"row {n}: qty must be >= 0")
+            continue
+        totals[(loc_id, item_id)] += qty
+    if errors:
+        more = len(errors) - MAX_ERRORS
+        raise ValidationError(errors[:MAX_ERRORS] + ([f"... and {more} more"] if more > 0 else []))
+    return totals
+
+
+def _snapshot_first_scans(cc: CycleCount, loc_ids: set[int]):
+    """Re-snapshot the expected stock of the locations in ``loc_ids`` not counted yet and mark
+    them counted."""
+    first = loc_ids - set(cc.counted_locations.filter(id__in=loc_ids).values_list("id", flat=True))
+    if not first:
+        return
+    now = {
+        (loc_id, item_id): qty
+        for loc_id, item_id, qty in StockBalance.objects.filter(location_id__in=first).exclude(qty=0).values_list("location_id", "item_id", "qty")
+    }
+    lines = list(CycleCountLine.objects.filter(count=cc, location_id__in=first))
+    for ln in lines:
+        ln.expected = now.pop((ln.location_id, ln.item_id), ZERO)
+    CycleCountLine.objects.bulk_update(lines, ["expected"], batch_size=1000)
+    CycleCountLine.objects.bulk_create(
+        [CycleCountLine(count=cc, location_id=loc_id, item_id=item_id, expected=qty) for (loc_id, item_id), qty in now.items()],
+        batch_size=2000,
+    )
+    cc.counted_locations.add(*first)
+
+
+@transaction.atomic
+def record_counts(count, scans: list[dict], *, replace: bool = False, replaced: set | None = None, first_row: int = 1) -> int:
+    """Apply scans ({"location", "item" or "sku", "qty"}) to the count. Scans add to what was
+    counted before; with ``replace`` the summed quantity becomes the count of its
+    (location, item) instead. ``replaced`` carries the keys already replaced by earlier chunks
+    of the same upload, which are added to. Returns the number of lines touched."""
+    cc = _lock_open(count)
+    totals = _resolve(cc, scans, first_row)
+    replaced = set() if replaced is None else replaced
+    if not totals:
+        return 0
+    _snapshot_first_scans(cc, {k[0] for k in totals})
+    existing = {
+        (ln.location_id, ln.item_id): ln
+        for ln in CycleCountLine.objects.filter(
+            count=cc, location_id__in={k[0] for k in totals}, item_id__in={k[1] for k in totals}
+        )
+    }
+    changed, new = [], []
+    for key, qty in totals.items():
+        ln = existing.get(key)
+        if ln is None:
+            new.append(CycleCountLine(count=cc, location_id=key[0], item_id=key[1], expected=ZERO, counted=qty))
+            continue
+        ln.counted = qty if (replace and key not in replaced) or ln.counted is None else ln.counted + qty
+        changed.append(ln)
+    if replace:
+        replaced.update(totals)
+    CycleCountLine.objects.bulk_update(changed, ["counted"], batch_size=1000)
+    CycleCountLine.objects.bulk_create(new, batch_size=2000)
+    return len(changed) + len(new)
+
+
+@transaction.atomic
+def record_count_stream(count, rows, *, replace: bool = False) -> int:
+    """record_counts() over an iterable of scan rows, CHUNK rows at a time in one
+    transaction: memory stays bounded and a bad row rejects the whole upload."""
+    rows = iter(rows)
+    touched, offset, replaced = 0, 1, set()
+    while chunk := list(islice(rows, CHUNK)):
+        touched += record_counts(count, chunk, replace=replace, replaced=replaced, first_row=offset)
+        offset += len(chunk)
+    return touched
+
+
+def _counted_lines(count):
+    return CycleCountLine.objects.filter(count=count, location__in=count.counted_locations.all())
+
+
+def variances(count) -> list[dict]:
+    """Lines of counted locations whose count differs from the snapshot, computed in memory."""
+    out = []
+    for line_id, loc_id, item_id, expected, counted in _counted_lines(count).values_list(
+        "id", "location_id", "item_id", "expected", "counted"
+    ).order_by("location_id", "item_id"):
+        diff = (counted or ZERO) - expected
+        if diff:
+            out.append({"line": line_id, "location": loc_id, "item": item_id, "expected": expected, "counted": counted or ZERO, "variance": diff})
+    return out
+
+
+@transaction.atomic
+def post_count(count, *, user=None) -> dict:
+    """Post the variances of the counted locations of an OPEN count in one ledger write and
+    close the count."""
+    cc = _lock_open(count)
+    lost = Location.objects.filter(warehouse_id=cc.warehouse_id, type=LocationType.VIRTUAL, subtype=VirtualSubtype.LOST).first()
+    if lost is None:
+        raise ValidationError("Warehouse has no LOST bin")
+    lines = list(_counted_lines(cc))
+    entries, to_lost = [], defaultdict(lambda: ZERO)
+    for ln in lines:
+        ln.variance = (ln.counted or ZERO) - ln.expected
+        if not ln.variance:
+            continue
+        entries.append(StockLedger(
+            warehouse_id=cc.warehouse_id, location_id=ln.location_id, item_id=ln.item_id, qty_delta=ln.variance,
+            movement_type=MovementType.CYCLE_COUNT, ref_model=COUNT_REF_MODEL, ref_id=cc.number, user=user,
+        ))
+        if ln.variance < 0:
+            to_lost[ln.item_id] -= ln.variance
+    entries += [
+        StockLedger(
+            warehouse_id=cc.warehouse_id, location=lost, item_id=item_id, qty_delta=qty,
+            movement_type=MovementType.CYCLE_COUNT, ref_model=COUNT_REF_MODEL, ref_id=cc.number, user=user,
+        )
+        for item_id, qty in to_lost.items()
+    ]
+    post_entries(entries)
+    CycleCountLine.objects.bulk_update(lines, ["variance"], batch_size=1000)
+    cc.status, cc.posted_by, cc.posted_at = CycleCountStatus.POSTED, user, timezone.now()
+    cc.save(update_fields=["status", "posted_by", "posted_at"])
+    return {
+        "lines": len(lines),
+        "uncounted_locations": cc.locations.exclude(id__in=cc.counted_locations.all()).count(),
+        "variances": sum(1 for ln in lines if ln.variance),
+        "ledger_rows": len(entries),
+        "shortage": sum((-ln.variance for ln in lines if ln.variance < 0), ZERO),
+        "overage": sum((ln.variance for ln in lines if ln.variance > 0), ZERO),
+    }
+
+
+@transaction.atomic
+def cancel_count(count) -> CycleCount:
+    cc = _lock_open(count)
+    cc.status = CycleCountStatus.CANCELLED
+    cc.save(update_fields=["status"])
+    return cc
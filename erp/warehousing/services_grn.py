@@ -0,0 +1,201 @@
+"""Goods receipts (GRN) into the warehouse's RECEIVE bin.
+
+receive_goods() resolves and validates every line with one Item query, claims the document's
+idempotency key by inserting the GoodsReceipt first (a repeated or concurrent submission hits
+the unique constraint and gets the existing receipt back, with nothing posted), bulk-inserts
+the lines and posts one RECEIPT ledger row per item (and lot) through a single post_entries()
+call. Lines may name a lot and its expiry date; lots are created on first receipt
+(services_lots.resolve_lots). Lines of serialized items may list their serials, one per unit;
+the SerialUnits are registered at the RECEIVE bin (services_serials). Stock then moves on from
+RECEIVE with the putaway flow.
+"""
+import csv
+import io
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from catalog.models import Item
+
+from .models import GoodsReceipt, GoodsReceiptLine, Location, LocationType, MovementType, StockLedger, VirtualSubtype
+from .services import post_entries
+from .services_lots import LOT_NUMBER_MAX_LENGTH, parse_expiry, resolve_lots
+from .services_serials import check_receipt_serials, register_serials
+
+GRN_REF_MODEL = "GRN"
+MAX_LINES = 10000
+MAX_ERRORS = 50
+MAX_QTY = Decimal("1000000000")
+
+
+def parse_receipt_csv(data: bytes | str) -> list[dict]:
+    """Lines from a CSV with a header row: ``qty`` plus ``item`` (id) or ``sku``, and
+    optionally ``lot``, ``expiry`` and ``serial`` (one unit per row)."""
+    text = data.decode("utf-8-sig") if isinstance(data, bytes) else data
+    reader = csv.DictReader(io.StringIO(text))
+    fields = {(f or "").strip().lower() for f in reader.fieldnames or []}
+    if "qty" not in fields or not fields & {"item", "sku"}:
+        raise ValidationError("CSV needs a header with qty and item or sku columns")
+    lines = []
+    for row in reader:
+        row = {(k or "").strip().lower(): (v or "").strip() for k, v in row.items()}
+        if not any(row.values()):
+            continue
+        lines.append({
+            "item": row.get("item") or None,
+            "sku": row.get("sku") or None,
+            "qty": row.get("qty"),
+            "lot": row.get("lot") or None,
+            "expiry": row.get("expiry") or None,
+            "serial": row.get("serial") or None,
+        })
+    return lines
+
+
+def resolve_lines(lines: list[dict]) -> list[tuple[int, Decimal]]:
+    """(item_id, qty) for lines of {"item" or "sku", "qty"}, checked with one Item query.
+    Raises ValidationError listing the bad lines (first MAX_ERRORS)."""
+    ids, skus = set(), set()
+    for ln in lines:
+        if ln.get("item") not in (None, ""):
+            try:
+                ids.add(int(ln["item"]))
+            except (TypeError, ValueError):
+                pass
+        elif ln.get("sku"):
+            skus.add(str(ln["sku"]).strip())
+    known_ids, by_sku = set(), {}
+    if ids or skus:
+        for item_id, sku in Item.objects.filter(Q(id__in=ids) | Q(sku__in=skus)).values_list("id", "sku"):
+            known_ids.add(item_id)
+            by_sku[sku] = item_id
+    out, errors = [], []
+    for n, ln in enumerate(lines, 1):
+        try:
+            qty = Decimal(str(ln.get("qty")))
+        except (InvalidOperation, ValueError):
+            errors.append(f"line {n}: invalid qty {ln.get('qty')!r}")
+            continue
+        if not qty.is_finite() or qty <= 0:
+            errors.append(f"line {n}: qty must be > 0")
+            continue
+        if qty >= MAX_QTY:
+            errors.append(f"line {n}: qty too large")
+            continue
+        if qty != qty.quantize(Decimal("0.001")):
+            errors.append(f"line {n}: qty has more than 3 decimal places")
+            continue
+        if ln.get("item") not in (None, ""):
+            try:
+                item_id = int(ln["item"])
+            except (TypeError, ValueError):
+                item_id = None
+            if item_id not in known_ids:
+                errors.append(f"line {n}: unknown item {ln['item']!r}")
+                continue
+        elif ln.get("sku"):
+            item_id = by_sku.get(str(ln["sku"]).strip())
+            if item_id is None:
+                errors.append(f"line {n}: unknown sku {ln['sku']!r}")
+                continue
+        else:
+            errors.append(f"line {n}: item or sku is required")
+            continue
+        out.append((item_id, qty))
+    if errors:
+        more = len(errors) - MAX_ERRORS
+        raise ValidationError(errors[:MAX_ERRORS] + ([f"... and {more} more"] if more > 0 else []))
+    return out
+
+
+def line_lots(lines: list[dict], resolved: list[tuple[int, Decimal]]) -> list[int | None]:
+    """StockLot id (or None) per line from its optional ``lot`` and ``expiry`` (YYYY-MM-DD),
+    ``resolved`` being resolve_lines(lines)."""
+    wanted, errors = [], []
+    for n, (ln, (item_id, _qty)) in enumerate(zip(lines, resolved), 1):
+        number = str(ln.get("lot") or "").strip()
+        try:
+            expiry = parse_expiry(ln.get("expiry"))
+        except ValueError:
+            errors.append(f"line {n}: invalid expiry {ln.get('expiry')!r}")
+            continue
+        if expiry and not number:
+            errors.append(f"line {n}: expiry needs a lot")
+        elif len(number) > LOT_NUMBER_MAX_LENGTH:
+            errors.append(f"line {n}: lot longer than {LOT_NUMBER_MAX_LENGTH} characters")
+        wanted.append((item_id, number, expiry) if number else None)
+    if errors:
+        more = len(errors) - MAX_ERRORS
+        raise ValidationError(errors[:MAX_ERRORS] + ([f"... and {more} more"] if more > 0 else []))
+    ids = resolve_lots([w for w in wanted if w])
+    return [ids[(w[0], w[1])] if w else None for w in wanted]
+
+
+@transaction.atomic
+def receive_goods(warehouse, lines: list[dict], *, user=None, reference: str = "", memo: str = "", idempotency_key: str = "") -> tuple[GoodsReceipt, bool]:
+    """Receive ``lines`` ({"item" or "sku", "qty", "lot"?, "expiry"?, "serials"?}) into the
+    RECEIVE bin.
+    Returns (receipt, duplicate); duplicate is True when the key was already used."""
+    if not lines:
+        raise ValidationError("At least one line is required")
+    if len(lines) > MAX_LINES:
+        raise ValidationError(f"At most {MAX_LINES} lines per receipt")
+    key = (idempotency_key or "").strip()[:64]
+    if key:
+        existing = GoodsReceipt.objects.filter(warehouse=warehouse, idempotency_key=key).first()
+        if existing is not None:
+            return existing, True
+    resolved = resolve_lines(lines)
+    lots = line_lots(lines, resolved)
+    serials = check_receipt_serials(lines, resolved, lots)
+    receive_bin = Location.objects.filter(warehouse=warehouse, type=LocationType.VIRTUAL, subtype=VirtualSubtype.RECEIVE).first()
+    if receive_bin is None:
+        raise ValidationError("Warehouse has no RECEIVE bin")
+    try:
+        with transaction.atomic():
+            receipt = GoodsReceipt.objects.create(
+                warehouse=warehouse,
+                reference=(reference or "")[:100],
+                memo=memo or "",
+                idempotency_key=key,
+                line_count=len(resolved),
+                total_qty=sum((q for _i, q in resolved), Decimal("0")),
+                created_by=user,
+            )
+    except IntegrityError:
+        existing = GoodsReceipt.objects.filter(warehouse=warehouse, idempotency_key=key).first() if key else None
+        if existing is None:
+            raise
+        return existing, True
+    GoodsReceiptLine.objects.bulk_create(
+        [
+            GoodsReceiptLine(receipt=receipt, line_no=n, item_id=item_id, lot_id=lot_id, qty=qty)
+            for n, ((item_id, qty), lot_id) in enumerate(zip(resolved, lots), 1)
+        ],
+        batch_size=2000,
+    )
+    per_item: dict[tuple, Decimal] = {}
+    for (item_id, qty), lot_id in zip(resolved, lots):
+        per_item[(item_id, lot_id)] = per_item.get((item_id, lot_id), Decimal("0")) + qty
+    rows = post_entries([
+        StockLedger(
+            warehouse=warehouse,
+            location=receive_bin,
+            item_id=item_id,
+            lot_id=lot_id,
+            qty_delta=qty,
+            movement_type=MovementType.RECEIPT,
+            ref_model=GRN_REF_MODEL,
+            ref_id=receipt.number,
+            memo=receipt.reference,
+            user=user,
+        )
+        for (item_id, lot_id), qty in per_item.items()
+    ])
+    register_serials(
+        warehouse, receive_bin, serials, movement_type=MovementType.RECEIPT, ref_model=GRN_REF_MODEL,
+        ref_id=receipt.number, batch_id=rows[0].batch_id, user=user,
+    )
+    return receipt, False
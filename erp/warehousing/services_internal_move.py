@@ -4,7 +4,8 @@ from typing import Iterable, List, Tuple
 from django.db import transaction
 from django.core.exceptions import ValidationError
 from .models import StockLedger, MovementType, Location, LocationType, Warehouse, WarehouseStatus
-from .services import on_hand_qty
+from .services import on_hand_qty, post_entries
+from .services_serials import line_serials, relocate_serials, save_history
 
 
 @dataclass(frozen=True)
@@ -13,6 +14,7 @@ class InternalMoveLine:
     source_location_id: int
     target_location_id: int
     qty: Decimal
+    serials: Tuple[str, ...] = ()
 
 
 def _ensure_same_wh(loc_ids: Iterable[int]) -> int:
@@ -34,14 +36,16 @@ def _ensure_same_wh(loc_ids: Iterable[int]) -> int:
 
 def merge_lines(lines: List[InternalMoveLine]) -> List[InternalMoveLine]:
     bucket = {}
+    serials = {}
     for ln in lines:
         key = (ln.item_id, ln.source_location_id, ln.target_location_id)
         bucket[key] = bucket.get(key, Decimal("0")) + Decimal(ln.qty)
+        serials[key] = serials.get(key, ()) + tuple(ln.serials)
     merged: List[InternalMoveLine] = []
     for (item, src, dst), q in bucket.items():
         if q <= 0:
             continue
-        merged.append(InternalMoveLine(item_id=item, source_location_id=src, target_location_id=dst, qty=q))
+        merged.append(InternalMoveLine(item_id=item, source_location_id=src, target_location_id=dst, qty=q, serials=serials[(item, src, dst)]))
     return merged
 
 
@@ -88,8 +92,9 @@ def post_internal_move(user, lines: List[InternalMoveLine], *, batch_ref_id: str
 
     # Post entries
     posted = 0
+    entries = []
     for ln in merged:
-        StockLedger.objects.create(
+        entries.append(StockLedger(
             warehouse=warehouse,
             location_id=ln.source_location_id,
             item_id=ln.item_id,
@@ -99,8 +104,8 @@ def post_internal_move(user, lines: List[InternalMoveLine], *, batch_ref_id: str
             ref_id=str(batch_ref_id or ""),
             memo="internal move",
             user=user,
-        )
-        StockLedger.objects.create(
+        ))
+        entries.append(StockLedger(
             warehouse=warehouse,
             location_id=ln.target_location_id,
             item_id=ln.item_id,
@@ -110,21 +115,28 @@ def post_internal_move(user, lines: List[InternalMoveLine], *, batch_ref_id: str
             ref_id=str(batch_ref_id or ""),
             memo="internal move",
             user=user,
-        )
+        ))
         posted += 2
+    # Serialized units move with their rows; post_entries() refuses them by quantity alone
+    history = relocate_serials(
+        [(ln.item_id, ln.source_location_id, ln.target_location_id, Decimal(ln.qty), list(ln.serials)) for ln in merged],
+        ref_model="INTERNAL_MOVE", ref_id=str(batch_ref_id or ""), user=user,
+    )
+    save_history(history, post_entries(entries))
 
     return {"posted": posted, "batch_ref_id": batch_ref_id or ""}
 
 
 @transaction.atomic
 def post_internal_move_rows(warehouse: Warehouse, from_id: int, to_id: int, lines: list[dict], user, memo: str | None = None):
-    """lines = [{ 'item': <int>, 'qty': <decimal/str> }, ...]
+    """lines = [{ 'item': <int>, 'qty': <decimal/str>, 'serials': [<str>, ...] (optional) }, ...]
     Merge per item, validate against current on-hand at FROM, then post all as one atomic batch.
     Returns {'ok': True, 'moved_lines': N, 'total_qty': Decimal} or {'ok': False, 'errors': {item_id: 'available=X, requested=Y'}}.
     """
     f, t = _validate_locations(warehouse, from_id, to_id)
     # merge & sanitize
     merged: dict[int, Decimal] = {}
+    serials: dict[int, list] = {}
     for ln in lines or []:
         item_id = int(ln.get('item'))
         try:
@@ -134,6 +146,7 @@ def post_internal_move_rows(warehouse: Warehouse, from_id: int, to_id: int, line
         if qty <= 0:
             continue
         merged[item_id] = merged.get(item_id, Decimal('0')) + qty
+        serials.setdefault(item_id, []).extend(line_serials(ln))
     if not merged:
         return {'ok': False, 'errors': {'_form': 'No quantities entered'}}
     # availability check
@@ -146,8 +159,11 @@ def post_internal_move_rows(warehouse: Warehouse, from_id: int, to_id: int, line
         return {'ok': False, 'errors': errs}
     # post
     total = Decimal('0')
+    entries = []
     for item_id, qty in merged.items():
-        StockLedger.objects.create(warehouse=warehouse, location=f, item_id=item_id, qty_delta=-qty, movement_type=MovementType.INTERNAL_TRANSFER, ref_model='INTERNAL_MOVE', memo=memo or 'internal transfer', user=user)
-        StockLedger.objects.create(warehouse=warehouse, location=t, item_id=item_id, qty_delta=+qty, movement_type=MovementType.INTERNAL_TRANSFER, ref_model='INTERNAL_MOVE', memo=memo or 'internal transfer', user=user)
+        entries.append(StockLedger(warehouse=warehouse, location=f, item_id=item_id, qty_delta=-qty, movement_type=MovementType.INTERNAL_TRANSFER, ref_model='INTERNAL_MOVE', memo=memo or 'internal transfer', user=user))
+        entries.append(StockLedger(warehouse=warehouse, location=t, item_id=item_id, qty_delta=+qty, movement_type=MovementType.INTERNAL_TRANSFER, ref_model='INTERNAL_MOVE', memo=memo or 'internal transfer', user=user))
         total += qty
+    history = relocate_serials([(item_id, f.id, t.id, qty, serials[item_id]) for item_id, qty in merged.items()], ref_model='INTERNAL_MOVE', ref_id='', user=user)
+    save_history(history, post_entries(entries))
     return {'ok': True, 'moved_lines': len(merged), 'total_qty': str(total)}
@@ -0,0 +1,141 @@
+"""LedgerView maintenance: the denormalized read model behind the movements grid.
+
+apply_ledger_view() projects every ledger_posted batch. It runs after update_stock_balance,
+so StockBalance already includes the batch and the on-hand before each row is the balance
+minus the batch's own deltas for that (location, item). rebuild_ledger_view() recomputes the
+projection from the ledger with one INSERT .. SELECT (running totals by window function) and
+is what the migration backfill, archive_ledger and the rebuild_ledger_view command use.
+Renaming an item, location or user rewrites the copied attributes in place.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+
+from catalog.models import Item
+
+from .models import LedgerCode, LedgerMemo, LedgerView, Location, StockBalance, StockLedger
+
+ZERO = Decimal("0")
+
+
+def apply_ledger_view(rows: list[StockLedger]):
+    if not rows:
+        return
+    rows = sorted(rows, key=lambda r: (r.ts, r.pk))
+    loc_ids = {r.location_id for r in rows}
+    item_ids = {r.item_id for r in rows}
+    user_ids = {r.user_id for r in rows if r.user_id}
+    locations = {
+        loc["id"]: loc for loc in Location.objects.filter(id__in=loc_ids).values("id", "code", "display_name", "subtype")
+    }
+    items = {i["id"]: i for i in Item.objects.filter(id__in=item_ids).values("id", "sku", "name", "image")}
+    usernames = dict(get_user_model().objects.filter(id__in=user_ids).values_list("id", "username")) if user_ids else {}
+    balance = {
+        (loc, item): qty
+        for loc, item, qty in StockBalance.objects.filter(location_id__in=loc_ids, item_id__in=item_ids).values_list("location_id", "item_id", "qty")
+    }
+    on_hand: dict[tuple, Decimal] = defaultdict(lambda: ZERO)
+    for key, qty in balance.items():
+        on_hand[key] = qty
+    for r in rows:
+        on_hand[(r.location_id, r.item_id)] -= Decimal(r.qty_delta)
+
+    out = []
+    for r in rows:
+        key = (r.location_id, r.item_id)
+        before = on_hand[key]
+        on_hand[key] = before + Decimal(r.qty_delta)
+        loc, item = locations[r.location_id], items[r.item_id]
+        out.append(LedgerView(
+            ledger_id=r.pk,
+            ts=r.ts,
+            warehouse_id=r.warehouse_id,
+            location_id=r.location_id,
+            item_id=r.item_id,
+            user_id=r.user_id,
+            qty_delta=r.qty_delta,
+            qty_before=before,
+            qty_after=on_hand[key],
+            movement_type=r.movement_type,
+            ref_model=r.ref_model or "",
+            ref_id=r.ref_id or "",
+            memo=r.memo or "",
+            location_code=loc["code"] or "",
+            location_name=loc["display_name"] or "",
+            location_subtype=loc["subtype"] or "",
+            item_sku=item["sku"] or "",
+            item_name=item["name"] or "",
+            item_image=item["image"] or "",
+            username=usernames.get(r.user_id, ""),
+        ))
+    LedgerView.objects.bulk_create(out, batch_size=1000)
+
+
+def project_ledger_rows(where: str, params: list) -> int:
+    """INSERT the projection of the ledger rows matching ``where`` (a condition on the ledger
+    alias ``l``). Running totals are taken over the matching rows only, so ``where`` must
+    select whole (location, item) histories - a warehouse, or rows that open a history."""
+    user_table = get_user_model()._meta.db_table
+    with connection.cursor() as cur:
+        cur.execute(
+            f"""
+            INSERT INTO {LedgerView._meta.db_table} (
+                ledger_id, ts, warehouse_id, location_id, item_id, user_id,
+                qty_delta, qty_before, qty_after, movement_type, ref_model, ref_id, memo,
+                location_code, location_name, location_subtype, item_sku, item_name, item_image, username
+            )
+            SELECT l.id, l.ts, l.warehouse_id, l.location_id, l.item_id, l.user_id,
+                   l.qty_delta / 1000.0,
+                   (SUM(l.qty_delta) OVER w - l.qty_delta) / 1000.0,
+                   SUM(l.qty_delta) OVER w / 1000.0,
+                   COALESCE(mt.value, ''), COALESCE(rm.value, ''), l.ref_id, COALESCE(m.text, ''),
+                   loc.code, loc.display_name, COALESCE(loc.subtype, ''),
+                   i.sku, i.name, COALESCE(i.image, ''), COALESCE(u.username, '')
+            FROM {StockLedger._meta.db_table} l
+            JOIN {Location._meta.db_table} loc ON loc.id = l.location_id
+            JOIN {Item._meta.db_table} i ON i.id = l.item_id
+            LEFT JOIN {user_table} u ON u.id = l.user_id
+            LEFT JOIN {LedgerCode._meta.db_table} mt ON mt.id = l.movement_type
+            LEFT JOIN {LedgerCode._meta.db_table} rm ON rm.id = l.ref_model
+            LEFT JOIN {LedgerMemo._meta.db_table} m ON m.id = l.memo
+            WHERE {where}
+            WINDOW w AS (PARTITION BY l.location_id, l.item_id ORDER BY l.ts, l.id ROWS UNBOUNDED PRECEDING)
+            """,
+            params,
+        )
+        return cur.rowcount
+
+
+@transaction.atomic
+def rebuild_ledger_view(warehouse_id: int | None = None) -> int:
+    """Recompute the projection for a warehouse (or all). Returns the number of rows written."""
+    qs = LedgerView.objects.all()
+    if warehouse_id is None:
+        qs.delete()
+        return project_ledger_rows("1 = 1", [])
+    qs.filter(warehouse_id=warehouse_id).delete()
+    return project_ledger_rows("l.warehouse_id = %s", [warehouse_id])
+
+
+def refresh_item(item) -> int:
+    image = item.image.name if item.image else ""
+    return (
+        LedgerView.objects.filter(item_id=item.pk)
+        .exclude(item_sku=item.sku, item_name=item.name, item_image=image)
+        .update(item_sku=item.sku, item_name=item.name, item_image=image)
+    )
+
+
+def refresh_location(location: Location) -> int:
+    code, name, subtype = location.code or "", location.display_name or "", location.subtype or ""
+    return (
+        LedgerView.objects.filter(location_id=location.pk)
+        .exclude(location_code=code, location_name=name, location_subtype=subtype)
+        .update(location_code=code, location_name=name, location_subtype=subtype)
+    )
+
+
+def refresh_user(user) -> int:
+    return LedgerView.objects.filter(user_id=user.pk).exclude(username=user.username).update(username=user.username)
@@ -0,0 +1,116 @@
+"""Bulk creation of PHYSICAL locations from a code pattern.
+
+expand_pattern("A{01-20}-R{01-10}-B{01-05}") yields every code of the grid in walking order
+(last group fastest). Groups are numeric ranges (zero padding follows the start value), letter
+ranges ({A-D}) or lists ({1,3,7}). generate_locations() checks the codes against
+uq_location_code_per_wh with one query and writes the locations and their history rows with
+simple_history's bulk_create_with_history instead of a clean()/save() per bin.
+"""
+import itertools
+import re
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from simple_history.utils import bulk_create_with_history
+
+from .models import Location, LocationType, PhysicalSubtype, WarehouseStatus
+from .services_pick import SEQUENCE_STEP
+
+MAX_LOCATIONS = 20000
+CODE_MAX_LENGTH = Location._meta.get_field("code").max_length
+GROUP = re.compile(r"\{([^{}]*)\}")
+
+
+def _expand_group(spec: str) -> list[str]:
+    spec = spec.strip()
+    if "," in spec:
+        values = [v.strip() for v in spec.split(",")]
+        if not all(values):
+            raise ValidationError(f"Empty value in {{{spec}}}")
+        return values
+    m = re.fullmatch(r"(\d+)\s*-\s*(\d+)", spec)
+    if m:
+        lo, hi = int(m.group(1)), int(m.group(2))
+        if hi < lo:
+            raise ValidationError(f"Range {{{spec}}} runs backwards")
+        width = len(m.group(1)) if m.group(1).startswith("0") else 0
+        return [str(n).zfill(width) for n in range(lo, hi + 1)]
+    m = re.fullmatch(r"([A-Za-z])\s*-\s*([A-Za-z])", spec)
+    if m:
+        lo, hi = ord(m.group(1)), ord(m.group(2))
+        if hi < lo or m.group(1).isupper() != m.group(2).isupper():
+            raise ValidationError(f"Range {{{spec}}} is not a valid letter range")
+        return [chr(c) for c in range(lo, hi + 1)]
+    if spec:
+        return [spec]
+    raise ValidationError("Empty {} group in pattern")
+
+
+def expand_pattern(pattern: str) -> list[str]:
+    """All codes described by ``pattern``, in order. Raises ValidationError when the pattern
+    is malformed or describes more than MAX_LOCATIONS codes."""
+    pattern = (pattern or "").strip()
+    if not pattern:
+        raise ValidationError("Pattern is required")
+    literals = GROUP.split(pattern)[::2]
+    if any("{" in lit or "}" in lit for lit in literals):
+        raise ValidationError("Unbalanced braces in pattern")
+    groups = [_expand_group(g) for g in GROUP.findall(pattern)]
+    total = 1
+    for g in groups:
+        total *= len(g)
+    if total > MAX_LOCATIONS:
+        raise ValidationError(f"Pattern describes {total} locations; at most {MAX_LOCATIONS} per run")
+    codes = []
+    for combo in itertools.product(*groups):
+        parts = [literals[0]]
+        for value, lit in zip(combo, literals[1:]):
+            parts += [value, lit]
+        codes.append("".join(parts))
+    too_long = [c for c in codes if len(c) > CODE_MAX_LENGTH]
+    if too_long:
+        raise ValidationError(f"Codes longer than {CODE_MAX_LENGTH} characters, e.g. {too_long[0]}")
+    return codes
+
+
+@transaction.atomic
+def generate_locations(warehouse, pattern: str, *, user=None, capacity=None, sequence: bool = False,
+                       skip_existing: bool = False, dry_run: bool = False) -> dict:
+    """Create the PHYSICAL locations of ``pattern`` in ``warehouse``. Existing codes are an
+    error unless ``skip_existing``. With ``sequence`` the new locations get pick_sequence values
+    in pattern order, after any already sequenced location."""
+    codes = expand_pattern(pattern)
+    if len(set(codes)) != len(codes):
+        raise ValidationError("Pattern produces the same code more than once")
+    existing = set(
+        Location.objects.filter(warehouse=warehouse, type=LocationType.PHYSICAL, code__in=codes).values_list("code", flat=True)
+    )
+    if existing and not skip_existing:
+        shown = sorted(existing)[:20]
+        raise ValidationError(f"{len(existing)} code(s) already exist: {', '.join(shown)}{' ...' if len(existing) > len(shown) else ''}")
+    new_codes = [c for c in codes if c not in existing]
+    result = {"requested": len(codes), "existing": len(existing), "created": 0, "first": new_codes[0] if new_codes else None, "last": new_codes[-1] if new_codes else None}
+    if dry_run or not new_codes:
+        return result
+    start = 0
+    if sequence:
+        last = Location.objects.filter(warehouse=warehouse, pick_sequence__isnull=False).order_by("-pick_sequence").values_list("pick_sequence", flat=True).first()
+        start = last or 0
+    objs = [
+        Location(
+            warehouse=warehouse,
+            type=LocationType.PHYSICAL,
+            subtype=PhysicalSubtype.STORAGE,
+            code=code,
+            display_name=code,
+            status=WarehouseStatus.ACTIVE,
+            capacity=capacity,
+            pick_sequence=start + n * SEQUENCE_STEP if sequence else None,
+            created_by=user,
+            updated_by=user,
+        )
+        for n, code in enumerate(new_codes, 1)
+    ]
+    bulk_create_with_history(objs, Location, batch_size=1000, default_user=user, default_change_reason="bulk generate")
+    result["created"] = len(objs)
+    return result
@@ -0,0 +1,286 @@
+"""Lot and expiry tracking.
+
+Ledger rows may carry a StockLot. Receipts name the lot explicitly; every other flow
+(putaway, internal moves, counts, transfers) posts without one and assign_lots(), called by
+post_entries() before the insert, splits each outgoing row of lot-tracked stock over the
+location's lots in FEFO order (earliest expiry first, undated lots last, then unlotted stock),
+and hands the same lots to the incoming rows of that item in the same batch. Quantities that
+OPEN pick lists allocated to a lot are taken last, after every free lot and the location's
+unlotted stock, so moves and transfers do not consume stock a picker is about to take. The ledger thus records the lot of every
+movement of lot-tracked stock and LotBalance can be rebuilt from it. Single rows saved with
+StockLedger.objects.create() get their lot the same way (signals.assign_single_row_lot).
+
+apply_lot_balance() folds each ledger_posted batch into LotBalance with one
+INSERT .. ON CONFLICT DO UPDATE, like services_balance. fefo_lots() and near_expiry() read
+LotBalance through its partial (warehouse, item, expiry_date) and (warehouse, expiry_date)
+indexes; neither touches the ledger.
+"""
+from collections import defaultdict, deque
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import LocationType, LotBalance, PickListLine, PickListStatus, StockBalance, StockLedger, StockLot, WarehouseStatus
+from .services_balance import UPSERT_CHUNK
+
+ZERO = Decimal("0")
+# services_pick.PICK_REF_MODEL; not imported, services_pick imports this module
+PICK_REF_MODEL = "PICK"
+LOT_NUMBER_MAX_LENGTH = StockLot._meta.get_field("lot_number").max_length
+
+
+def fefo_key(expiry_date: date | None) -> tuple:
+    """Sort key putting the earliest expiry first and undated lots last."""
+    return (expiry_date is None, expiry_date or date.max)
+
+
+def parse_expiry(value) -> date | None:
+    if value in (None, ""):
+        return None
+    if isinstance(value, date):
+        return value
+    parsed = parse_date(str(value).strip())
+    if parsed is None:
+        raise ValueError(value)
+    return parsed
+
+
+def resolve_lots(pairs: list[tuple[int, str, date | None]]) -> dict[tuple[int, str], int]:
+    """StockLot ids for (item_id, lot_number, expiry) triples, creating missing lots in bulk.
+    A lot's expiry is fixed by its first receipt: a different date for an existing lot is an
+    error, an empty one means "as recorded"."""
+    wanted: dict[tuple[int, str], date | None] = {}
+    for item_id, number, expiry in pairs:
+        key = (item_id, number)
+        if wanted.get(key) is None:
+            wanted[key] = expiry
+        elif expiry is not None and expiry != wanted[key]:
+            raise ValidationError(f"Lot {number}: conflicting expiry dates {wanted[key]} and {expiry}")
+    if not wanted:
+        return {}
+    item_ids = {k[0] for k in wanted}
+    numbers = {k[1] for k in wanted}
+    StockLot.objects.bulk_create(
+        [StockLot(item_id=i, lot_number=n, expiry_date=e) for (i, n), e in sorted(wanted.items())],
+        ignore_conflicts=True,
+        batch_size=1000,
+    )
+    ids, errors = {}, []
+    for lot_id, item_id, number, expiry in StockLot.objects.filter(item_id__in=item_ids, lot_number__in=numbers).values_list(
+        "id", "item_id", "lot_number", "expiry_date"
+    ):
+        if (item_id, number) not in wanted:
+            continue
+        given = wanted[(item_id, number)]
+        if given is not None and given != expiry:
+            errors.append(f"lot {number} of item {item_id} expires {expiry or 'never'}, not {given}")
+        ids[(item_id, number)] = lot_id
+    if errors:
+        raise ValidationError(errors[:50])
+    return ids
+
+
+def _split(entry: StockLedger, parts: list[tuple[int | None, Decimal]]) -> list[StockLedger]:
+    fields = [f.attname for f in StockLedger._meta.concrete_fields if not f.primary_key]
+    out = []
+    for lot_id, qty in parts:
+        row = StockLedger(**{name: getattr(entry, name) for name in fields})
+        row.qty_delta, row.lot_id = qty, lot_id
+        out.append(row)
+    return out
+
+
+def assign_lots(entries: list[StockLedger]) -> list[StockLedger]:
+    """Give lots to unlotted rows of lot-tracked stock (see module docstring). Returns the
+    entries to insert; rows of stock without lots come back unchanged. The LotBalance rows
+    read are locked, so concurrent postings cannot hand out the same units."""
+    outgoing = [e for e in entries if Decimal(e.qty_delta) < 0]
+    if not outgoing:
+        return entries
+    locations, items = {e.location_id for e in outgoing}, {e.item_id for e in outgoing}
+    # Each slot is [lot_id, free, held]: held is what OPEN pick lists allocated to the lot there
+    available: dict[tuple, list[list]] = defaultdict(list)
+    for loc_id, item_id, lot_id, qty in (
+        LotBalance.objects.select_for_update()
+        .filter(location_id__in=locations, item_id__in=items, qty__gt=0)
+        .order_by("location_id", "item_id", F("expiry_date").asc(nulls_last=True), "lot_id")
+        .values_list("location_id", "item_id", "lot_id", "qty")
+    ):
+        available[(loc_id, item_id)].append([lot_id, qty, ZERO])
+    if not available:
+        return entries
+    # A pick list being confirmed posts its own lots; its lines are not held against it
+    confirming = {e.ref_id for e in entries if e.ref_model == PICK_REF_MODEL}
+    held = {
+        (r["location_id"], r["item_id"], r["lot_id"]): r["total"]
+        for r in PickListLine.objects.filter(
+            pick_list__status=PickListStatus.OPEN, location_id__in=locations, item_id__in=items, lot__isnull=False
+        ).exclude(pick_list__number__in=confirming).values("location_id", "item_id", "lot_id").annotate(total=Sum("qty"))
+    }
+    for (loc_id, item_id), lots in available.items():
+        for slot in lots:
+            slot[2] = min(slot[1], held.get((loc_id, item_id, slot[0]), ZERO))
+            slot[1] -= slot[2]
+    # Unlotted stock of a lot-tracked item at a location: on hand less its lots
+    loose = {
+        (loc_id, item_id): qty - sum(slot[1] + slot[2] for slot in available[(loc_id, item_id)])
+        for loc_id, item_id, qty in StockBalance.objects.filter(
+            location_id__in={k[0] for k in available}, item_id__in={k[1] for k in available}
+        ).values_list("location_id", "item_id", "qty")
+        if (loc_id, item_id) in available
+    }
+    replaced: dict[int, list[StockLedger]] = {}
+    handed: dict[int, deque] = defaultdict(deque)
+    for n, e in enumerate(entries):
+        qty = Decimal(e.qty_delta)
+        lots = available.get((e.location_id, e.item_id))
+        if qty >= 0 or not lots:
+            continue
+        if e.lot_id is not None:
+            # Explicit lot: only keep the remaining quantities right for later rows
+            for slot in lots:
+                if slot[0] == e.lot_id:
+                    take = min(slot[1], -qty)
+                    slot[1] -= take
+                    slot[2] -= min(slot[2], -qty - take)
+            continue
+        key = (e.location_id, e.item_id)
+        need, taken = -qty, defaultdict(lambda: ZERO)
+        # Free lots in FEFO order, then unlotted stock, then what pick lists hold
+        for part in (1, 2):
+            for slot in lots:
+                if need <= 0:
+                    break
+                take = min(slot[part], need)
+                if take > 0:
+                    taken[slot[0]] += take
+                    slot[part] -= take
+                    need -= take
+            if part == 1 and need > 0 and loose.get(key, ZERO) > 0:
+                take = min(loose[key], need)
+                taken[None] += take
+                loose[key] -= take
+                need -= take
+        if need > 0:
+            taken[None] += need
+        if not any(taken):
+            continue
+        parts = list(taken.items())
+        for lot_id, take in parts:
+            if lot_id is not None:
+                handed[e.item_id].append([lot_id, take])
+        replaced[n] = _split(e, [(lot_id, -take) for lot_id, take in parts])
+    if not replaced:
+        return entries
+    for n, e in enumerate(entries):
+        qty = Decimal(e.qty_delta)
+        queue = handed.get(e.item_id)
+        if qty <= 0 or e.lot_id is not None or not queue:
+            continue
+        left, parts = qty, []
+        while left > 0 and queue:
+            slot = queue[0]
+            take = min(slot[1], left)
+            parts.append((slot[0], take))
+            slot[1] -= take
+            left -= take
+            if slot[1] <= 0:
+                queue.popleft()
+        if left > 0:
+            parts.append((None, left))
+        replaced[n] = _split(e, parts)
+    out = []
+    for n, e in enumerate(entries):
+        out.extend(replaced.get(n, [e]))
+    return out
+
+
+def apply_lot_balance(rows: list[StockLedger]):
+    delta: dict[tuple, Decimal] = defaultdict(lambda: ZERO)
+    for r in rows:
+        if r.lot_id is not None:
+            delta[(r.location_id, r.item_id, r.lot_id, r.warehouse_id)] += Decimal(r.qty_delta)
+    if not delta:
+        return
+    expiry = dict(StockLot.objects.filter(id__in={k[2] for k in delta}).values_list("id", "expiry_date"))
+    keys = sorted(delta)
+    now = timezone.now()
+    table = LotBalance._meta.db_table
+    with connection.cursor() as cur:
+        for start in range(0, len(keys), UPSERT_CHUNK):
+            chunk = keys[start:start + UPSERT_CHUNK]
+            params = []
+            for loc_id, item_id, lot_id, wh_id in chunk:
+                params.extend([wh_id, loc_id, item_id, lot_id, expiry[lot_id], delta[(loc_id, item_id, lot_id, wh_id)], now])
+            cur.execute(
+                f"""
+                INSERT INTO {table} (warehouse_id, location_id, item_id, lot_id, expiry_date, qty, updated_at)
+                VALUES {", ".join(["(%s, %s, %s, %s, %s, %s, %s)"] * len(chunk))}
+                ON CONFLICT (location_id, item_id, lot_id) DO UPDATE SET
+                    qty = {table}.qty + EXCLUDED.qty,
+                    updated_at = EXCLUDED.updated_at
+                """,
+                params,
+            )
+
+
+@transaction.atomic
+def rebuild_lot_balance(warehouse_id: int | None = None) -> int:
+    """Recompute LotBalance from the ledger for a warehouse (or all). Returns rows written."""
+    table = LotBalance._meta.db_table
+    ledger = StockLedger._meta.db_table
+    lots = StockLot._meta.db_table
+    where, params = ["l.lot_id IS NOT NULL"], []
+    if warehouse_id is not None:
+        where.append("l.warehouse_id = %s")
+        params.append(warehouse_id)
+    with connection.cursor() as cur:
+        cur.execute(f"DELETE FROM {table}" + (" WHERE warehouse_id = %s" if warehouse_id is not None else ""), params)
+        cur.execute(
+            f"""
+            INSERT INTO {table} (warehouse_id, location_id, item_id, lot_id, expiry_date, qty, updated_at)
+            SELECT l.warehouse_id, l.location_id, l.item_id, l.lot_id, s.expiry_date, SUM(l.qty_delta) / 1000.0, %s
+            FROM {ledger} l JOIN {lots} s ON s.id = l.lot_id
+            WHERE {" AND ".join(where)}
+            GROUP BY l.warehouse_id, l.location_id, l.item_id, l.lot_id, s.expiry_date
+            """,
+            [timezone.now(), *params],
+        )
+        return cur.rowcount
+
+
+def fefo_lots(warehouse_id: int, item_ids, *, physical_only: bool = True) -> list[dict]:
+    """Lots on hand for ``item_ids`` in FEFO order per item: {"item", "lot", "lot_number",
+    "expiry_date", "location", "location_code", "qty"}."""
+    qs = LotBalance.objects.filter(warehouse_id=warehouse_id, item_id__in=item_ids, qty__gt=0)
+    if physical_only:
+        qs = qs.filter(location__type=LocationType.PHYSICAL, location__status=WarehouseStatus.ACTIVE)
+    return [
+        {"item": item_id, "lot": lot_id, "lot_number": number, "expiry_date": expiry, "location": loc_id, "location_code": code, "qty": qty}
+        for item_id, lot_id, number, expiry, loc_id, code, qty in qs.order_by(
+            "item_id", F("expiry_date").asc(nulls_last=True), "lot_id", "location_id"
+        ).values_list("item_id", "lot_id", "lot__lot_number", "expiry_date", "location_id", "location__code", "qty")
+    ]
+
+
+def near_expiry(warehouse_id: int, *, days: int = 30, today: date | None = None, limit: int = 500) -> list[dict]:
+    """Stock expiring within ``days`` (already expired included), earliest first, per
+    (location, item, lot)."""
+    today = today or timezone.localdate()
+    rows = (
+        LotBalance.objects.filter(warehouse_id=warehouse_id, qty__gt=0, expiry_date__lte=today + timedelta(days=days))
+        .order_by("expiry_date", "item_id", "location_id")
+        .values_list("expiry_date", "item_id", "item__sku", "lot_id", "lot__lot_number", "location_id", "location__code", "qty")[:limit]
+    )
+    return [
+        {
+            "expiry_date": expiry, "days_left": (expiry - today).days, "item": item_id, "sku": sku,
+            "lot": lot_id, "lot_number": number, "location": loc_id, "location_code": code, "qty": qty,
+        }
+        for expiry, item_id, sku, lot_id, number, loc_id, code, qty in rows
+    ]
@@ -0,0 +1,292 @@
+"""Outbound pick lists.
+
+generate_pick_list() locks the demanded items' ItemAvailability rows and their PHYSICAL
+StockBalance rows (one query each, in reserve()'s lock order), allocates every line in memory
+and holds the allocation with StockReservations, so concurrent pick lists and orders cannot
+take the same units. Per item, the first location on the walk that covers the whole demand is
+preferred; otherwise locations are drained in walking order. Lot-tracked items (any LotBalance
+on hand) are allocated FEFO instead (allocate_fefo()): earliest expiry first, read from
+LotBalance's (warehouse, item, expiry_date) index, with lots already on open pick lists
+deducted. Stops follow Location.pick_sequence, then the location code in natural order
+(A-2 before A-10).
+
+confirm_pick_list() posts location -> DISPATCH pairs for the picked quantities with one
+post_entries() call and consumes the holds; cancel_pick_list() releases them.
+"""
+import re
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import (
+    ItemAvailability,
+    Location,
+    LocationType,
+    LotBalance,
+    MovementType,
+    PickList,
+    PickListLine,
+    PickListStatus,
+    ReservationStatus,
+    StockBalance,
+    StockLedger,
+    StockReservation,
+    VirtualSubtype,
+    WarehouseStatus,
+)
+from .services import post_entries
+from .services_grn import resolve_lines
+from .services_lots import fefo_key
+from .services_reservation import close_reservations, hold
+
+ZERO = Decimal("0")
+PICK_REF_MODEL = "PICK"
+SEQUENCE_STEP = 10
+
+
+def route_key(pick_sequence: int | None, code: str) -> tuple:
+    """Walking-order key: sequenced locations first, then codes with their digit runs
+    compared as numbers."""
+    natural = tuple(int(p) if p.isdigit() else p.lower() for p in re.split(r"(\d+)", code or ""))
+    return (pick_sequence is None, pick_sequence or 0, natural)
+
+
+def allocate(demand: dict[int, Decimal], available: dict[int, Decimal], stock: list[tuple]) -> tuple[list[tuple], list[dict]]:
+    """Split ``demand`` (item -> qty) over ``stock`` rows of (route key, location_id, item_id,
+    free qty), never beyond ``available`` per item. Returns (allocations in walking order as
+    (route key, location_id, item_id, qty), short lines)."""
+    by_item: dict[int, list[tuple]] = defaultdict(list)
+    for key, loc_id, item_id, free in stock:
+        if free > 0:
+            by_item[item_id].append((key, loc_id, free))
+    picks, short = [], []
+    for item_id, want in demand.items():
+        rows = sorted(by_item.get(item_id, ()))
+        cap = min(want, max(available.get(item_id, ZERO), ZERO))
+        left = cap
+        whole = next((r for r in rows if r[2] >= left), None)
+        for key, loc_id, free in [whole] if whole else rows:
+            if left <= 0:
+                break
+            take = min(free, left)
+            picks.append((key, loc_id, item_id, take))
+            left -= take
+        got = cap - left
+        if got < want:
+            short.append({"item": item_id, "qty": float(want), "allocated": float(got)})
+    picks.sort()
+    return picks, short
+
+
+def allocate_fefo(demand: dict[int, Decimal], available: dict[int, Decimal], rows: list[tuple], loc_free: dict[tuple, Decimal]) -> tuple[list[tuple], list[dict]]:
+    """Split ``demand`` over lot ``rows`` of (FEFO key, route key, location_id, item_id,
+    lot_id or None for unlotted stock, free qty), earliest expiry first, never beyond
+    ``available`` per item nor ``loc_free`` per (location_id, item_id). Returns (allocations as
+    (route key, location_id, item_id, lot_id, qty), short lines)."""
+    by_item: dict[int, list[tuple]] = defaultdict(list)
+    for row in rows:
+        if row[5] > 0:
+            by_item[row[3]].append(row)
+    picks, short = [], []
+    for item_id, want in demand.items():
+        cap = min(want, max(available.get(item_id, ZERO), ZERO))
+        left = cap
+        for _fkey, key, loc_id, _item, lot_id, free in sorted(by_item.get(item_id, ()), key=lambda r: (r[0], r[1], r[4] or 0)):
+            if left <= 0:
+                break
+            take = min(free, left, loc_free.get((loc_id, item_id), ZERO))
+            if take <= 0:
+                continue
+            picks.append((key, loc_id, item_id, lot_id, take))
+            loc_free[(loc_id, item_id)] -= take
+            left -= take
+        got = cap - left
+        if got < want:
+            short.append({"item": item_id, "qty": float(want), "allocated": float(got)})
+    return picks, short
+
+
+def _lot_rows(warehouse, demand: dict[int, Decimal], stock: list[tuple]) -> tuple[list[tuple], dict[tuple, Decimal]]:
+    """FEFO rows for the lot-tracked items of ``demand`` at the locations in ``stock``, plus
+    the free quantity per (location, item) shared by a location's lots."""
+    route = {(loc_id, item_id): key for key, loc_id, item_id, _free in stock}
+    loc_free = {(loc_id, item_id): free for _key, loc_id, item_id, free in stock}
+    lots = list(
+        LotBalance.objects.filter(warehouse=warehouse, item_id__in=demand, qty__gt=0, location__type=LocationType.PHYSICAL)
+        .order_by("item_id", F("expiry_date").asc(nulls_last=True), "lot_id")
+        .values_list("location_id", "item_id", "lot_id", "expiry_date", "qty")
+    )
+    if not lots:
+        return [], loc_free
+    held = {
+        (r["location_id"], r["item_id"], r["lot_id"]): r["total"]
+        for r in PickListLine.objects.filter(
+            pick_list__warehouse=warehouse, pick_list__status=PickListStatus.OPEN, item_id__in=demand, lot__isnull=False
+        ).values("location_id", "item_id", "lot_id").annotate(total=Sum("qty"))
+    }
+    rows, lotted = [], defaultdict(lambda: ZERO)
+    for loc_id, item_id, lot_id, expiry, qty in lots:
+        lotted[(loc_id, item_id)] += qty
+        if (loc_id, item_id) in route:
+            rows.append(((*fefo_key(expiry), 0), route[(loc_id, item_id)], loc_id, item_id, lot_id, qty - held.get((loc_id, item_id, lot_id), ZERO)))
+    # Unlotted stock of a lot-tracked item goes after every lot
+    tracked = {item_id for _loc_id, item_id in lotted}
+    keys = [k for k in route if k[1] in tracked]
+    for loc_id, item_id, qty in StockBalance.objects.filter(
+        location_id__in={k[0] for k in keys}, item_id__in=tracked
+    ).values_list("location_id", "item_id", "qty"):
+        rest = qty - lotted.get((loc_id, item_id), ZERO)
+        if rest > 0 and (loc_id, item_id) in route:
+            rows.append(((True, date.max, 1), route[(loc_id, item_id)], loc_id, item_id, None, rest))
+    return rows, loc_free
+
+
+@transaction.atomic
+def generate_pick_list(warehouse, lines: list[dict], *, user=None, ref_model: str = "", ref_id: str = "", allow_partial: bool = False) -> PickList:
+    """Allocate ``lines`` ({"item" or "sku", "qty"}) to PHYSICAL locations and hold them.
+    Lines for the same item are merged. Raises ValidationError when stock is short, unless
+    allow_partial (the shortfall is then recorded on PickList.short). Holds of the source
+    document placed without a location (ref_model/ref_id) are released first: the pick list
+    takes them over."""
+    demand: dict[int, Decimal] = {}
+    for item_id, qty in resolve_lines(lines):
+        demand[item_id] = demand.get(item_id, ZERO) + qty
+    ref_model, ref_id = (ref_model or "")[:50], (ref_id or "")[:50]
+    if ref_id:
+        close_reservations(
+            StockReservation.objects.filter(warehouse=warehouse, ref_model=ref_model, ref_id=ref_id, location__isnull=True),
+            ReservationStatus.RELEASED,
+        )
+    available = {
+        item_id: physical - reserved
+        for item_id, physical, reserved in ItemAvailability.objects.select_for_update()
+        .filter(warehouse=warehouse, item_id__in=demand)
+        .order_by("item_id")
+        .values_list("item_id", "physical", "reserved")
+    }
+    stock = [
+        (route_key(seq, code), loc_id, item_id, qty - reserved)
+        for loc_id, item_id, qty, reserved, seq, code in StockBalance.objects.select_for_update(of=("self",))
+        .filter(
+            warehouse=warehouse,
+            item_id__in=demand,
+            location__type=LocationType.PHYSICAL,
+            location__status=WarehouseStatus.ACTIVE,
+            qty__gt=F("reserved"),
+        )
+        .order_by("location_id", "item_id")
+        .values_list("location_id", "item_id", "qty", "reserved", "location__pick_sequence", "location__code")
+    ]
+    lot_rows, loc_free = _lot_rows(warehouse, demand, stock)
+    lotted = {row[3] for row in lot_rows}
+    picks, short = allocate({i: q for i, q in demand.items() if i not in lotted}, available, [s for s in stock if s[2] not in lotted])
+    picks = [(key, loc_id, item_id, None, qty) for key, loc_id, item_id, qty in picks]
+    if lotted:
+        fefo_picks, fefo_short = allocate_fefo({i: demand[i] for i in lotted}, available, lot_rows, loc_free)
+        picks = sorted(picks + fefo_picks, key=lambda p: (p[0], p[1], p[2], p[3] or 0))
+        short += fefo_short
+    if short and not allow_partial:
+        raise ValidationError(["Insufficient stock"] + [f"item {s['item']}: requested {s['qty']}, available {s['allocated']}" for s in short])
+    if not picks:
+        raise ValidationError("Nothing to pick")
+    pick_list = PickList.objects.create(warehouse=warehouse, ref_model=ref_model, ref_id=ref_id, short=short, created_by=user)
+    PickListLine.objects.bulk_create(
+        [
+            PickListLine(pick_list=pick_list, seq=n, location_id=loc_id, item_id=item_id, lot_id=lot_id, qty=qty)
+            for n, (_key, loc_id, item_id, lot_id, qty) in enumerate(picks, 1)
+        ],
+        batch_size=2000,
+    )
+    hold([
+        StockReservation(
+            warehouse=warehouse, item_id=item_id, location_id=loc_id, qty=qty,
+            ref_model=PICK_REF_MODEL, ref_id=pick_list.number, created_by=user,
+        )
+        for _key, loc_id, item_id, _lot_id, qty in picks
+    ])
+    return pick_list
+
+
+def _lock_open(pick_list) -> PickList:
+    pl = PickList.objects.select_for_update().get(pk=pick_list.pk)
+    if pl.status != PickListStatus.OPEN:
+        raise ValidationError(f"Pick list {pl.number} is {pl.status.lower()}")
+    return pl
+
+
+def _holds(pl: PickList):
+    return StockReservation.objects.filter(ref_model=PICK_REF_MODEL, ref_id=pl.number)
+
+
+@transaction.atomic
+def confirm_pick_list(pick_list, *, user=None, picked: dict[int, Decimal] | None = None) -> PickList:
+    """Move picked stock to the DISPATCH bin. ``picked`` maps line ids to the quantity actually
+    picked (0..qty); lines not in it were picked in full. Every hold of the list is closed, so
+    whatever was not picked becomes available again."""
+    pl = _lock_open(pick_list)
+    dispatch = Location.objects.filter(warehouse_id=pl.warehouse_id, type=LocationType.VIRTUAL, subtype=VirtualSubtype.DISPATCH).first()
+    if dispatch is None:
+        raise ValidationError("Warehouse has no DISPATCH bin")
+    lines = list(pl.lines.order_by("seq"))
+    picked = picked or {}
+    unknown = set(picked) - {ln.id for ln in lines}
+    if unknown:
+        raise ValidationError(f"Unknown pick list line(s): {sorted(unknown)}")
+    entries, to_dispatch = [], defaultdict(lambda: ZERO)
+    for ln in lines:
+        qty = Decimal(picked.get(ln.id, ln.qty))
+        if qty < 0 or qty > ln.qty:
+            raise ValidationError(f"Line {ln.seq}: picked qty must be between 0 and {ln.qty}")
+        ln.picked_qty = qty
+        if qty:
+            entries.append(StockLedger(
+                warehouse_id=pl.warehouse_id, location_id=ln.location_id, item_id=ln.item_id, lot_id=ln.lot_id, qty_delta=-qty,
+                movement_type=MovementType.PICK, ref_model=PICK_REF_MODEL, ref_id=pl.number, user=user,
+            ))
+            to_dispatch[(ln.item_id, ln.lot_id)] += qty
+    entries += [
+        StockLedger(
+            warehouse_id=pl.warehouse_id, location=dispatch, item_id=item_id, lot_id=lot_id, qty_delta=qty,
+            movement_type=MovementType.PICK, ref_model=PICK_REF_MODEL, ref_id=pl.number, user=user,
+        )
+        for (item_id, lot_id), qty in to_dispatch.items()
+    ]
+    close_reservations(_holds(pl), ReservationStatus.CONSUMED)
+    post_entries(entries)
+    PickListLine.objects.bulk_update(lines, ["picked_qty"], batch_size=1000)
+    pl.status, pl.confirmed_by, pl.confirmed_at = PickListStatus.CONFIRMED, user, timezone.now()
+    pl.save(update_fields=["status", "confirmed_by", "confirmed_at"])
+    return pl
+
+
+@transaction.atomic
+def cancel_pick_list(pick_list) -> PickList:
+    pl = _lock_open(pick_list)
+    close_reservations(_holds(pl), ReservationStatus.RELEASED)
+    pl.status = PickListStatus.CANCELLED
+    pl.save(update_fields=["status"])
+    return pl
+
+
+@transaction.atomic
+def set_pick_sequence(warehouse, codes: list[str]) -> int:
+    """Make ``codes`` the walking order of the warehouse's PHYSICAL locations (steps of
+    SEQUENCE_STEP, so a bin can be slotted in later); unlisted locations lose their sequence
+    and follow by code. Returns the number of locations sequenced."""
+    by_code = {loc.code: loc for loc in Location.objects.filter(warehouse=warehouse, type=LocationType.PHYSICAL)}
+    missing = [c for c in codes if c not in by_code]
+    if missing:
+        raise ValidationError(f"Unknown location code(s): {', '.join(missing[:20])}")
+    if len(set(codes)) != len(codes):
+        raise ValidationError("Location codes must not repeat")
+    Location.objects.filter(warehouse=warehouse, type=LocationType.PHYSICAL).exclude(code__in=codes).update(pick_sequence=None)
+    ordered = [by_code[c] for c in codes]
+    for n, loc in enumerate(ordered, 1):
+        loc.pick_sequence = n * SEQUENCE_STEP
+    Location.objects.bulk_update(ordered, ["pick_sequence"], batch_size=1000)
+    return len(ordered)
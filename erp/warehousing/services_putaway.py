@@ -2,6 +2,9 @@ from decimal import Decimal
 from django.db import transaction, models, IntegrityError
 from django.utils import timezone
 from .models import Warehouse, Location, StockLedger, MovementType, LocationType, VirtualSubtype, PutawayBatch
+from .services import post_entries
+from .services_serials import line_serials, relocate_serials, save_history
+from .outbox import emit
 import uuid
 import hashlib
 import json
@@ -65,9 +68,11 @@ def post_actions(warehouse: Warehouse, actions: list, user, reason_map: dict | N
     
     # Canonical merge - ensure deterministic ordering
     temp_merged: dict[tuple, Decimal] = {}
+    serials: dict[tuple, list] = {}
     for a in actions:
         key = (a['type'], a['item'], a['source_bin'], a.get('target_location'))
         temp_merged[key] = temp_merged.get(key, Decimal('0')) + Decimal(str(a['qty']))
+        serials.setdefault(key, []).extend(line_serials(a))
     
     # Remove zero-quantity actions after merging
     merged = {k: v for k, v in temp_merged.items() if v > 0}
@@ -76,7 +81,7 @@ def post_actions(warehouse: Warehouse, actions: list, user, reason_map: dict | N
     
     # Generate fingerprint for deduplication
     fingerprint_list = [
-        {'type': k[0], 'item': k[1], 'src': k[2], 'tgt': k[3], 'qty': str(qty)}
+        {'type': k[0], 'item': k[1], 'src': k[2], 'tgt': k[3], 'qty': str(qty), **({'serials': sorted(serials[k])} if serials[k] else {})}
         for k, qty in merged.items()
     ]
     fingerprint_list.sort(key=lambda d: (d['type'], d['item'], d['src'], d['tgt']))
@@ -137,19 +142,26 @@ def post_actions(warehouse: Warehouse, actions: list, user, reason_map: dict | N
             raise ValueError(f"Insufficient qty in bin; requested={total_qty} available={available}")
     for (atype, item_id, src_id, tgt_id), qty in merged.items():
         validate_action(warehouse, {'type': atype, 'item': item_id, 'source_bin': src_id, 'qty': qty, 'target_location': tgt_id})
-    # Post ledger rows
+    # Post ledger rows (single bulk write for the whole batch)
     posted_groups = 0
+    entries = []
+    serial_lines = []
+    lost_bin = None
     for (atype, item_id, src_id, tgt_id), qty in merged.items():
         src = Location.objects.get(id=src_id)
         if atype == 'PUTAWAY':
-            tgt = Location.objects.get(id=tgt_id)
             memo = (reason_map or {}).get(str(src.subtype), 'putaway')
-            StockLedger.objects.create(warehouse=warehouse, location=src, item_id=item_id, qty_delta=-qty, movement_type=MovementType.PUTAWAY, ref_model='PUTAWAY', ref_id=batch_ref_id, user=user, memo=memo)
-            StockLedger.objects.create(warehouse=warehouse, location=tgt, item_id=item_id, qty_delta=+qty, movement_type=MovementType.PUTAWAY, ref_model='PUTAWAY', ref_id=batch_ref_id, user=user, memo=memo)
+            entries.append(StockLedger(warehouse=warehouse, location_id=src_id, item_id=item_id, qty_delta=-qty, movement_type=MovementType.PUTAWAY, ref_model='PUTAWAY', ref_id=batch_ref_id, user=user, memo=memo))
+            entries.append(StockLedger(warehouse=warehouse, location_id=tgt_id, item_id=item_id, qty_delta=+qty, movement_type=MovementType.PUTAWAY, ref_model='PUTAWAY', ref_id=batch_ref_id, user=user, memo=memo))
         else:
-            lost_bin = get_virtual(warehouse, VirtualSubtype.LOST)
-            StockLedger.objects.create(warehouse=warehouse, location=src, item_id=item_id, qty_delta=-qty, movement_type=MovementType.PUTAWAY_LOST, ref_model='PUTAWAY', ref_id=batch_ref_id, user=user, memo='lost via putaway')
-            StockLedger.objects.create(warehouse=warehouse, location=lost_bin, item_id=item_id, qty_delta=+qty, movement_type=MovementType.PUTAWAY_LOST, ref_model='PUTAWAY', ref_id=batch_ref_id, user=user, memo='lost via putaway')
+            lost_bin = lost_bin or get_virtual(warehouse, VirtualSubtype.LOST)
+            entries.append(StockLedger(warehouse=warehouse, location_id=src_id, item_id=item_id, qty_delta=-qty, movement_type=MovementType.PUTAWAY_LOST, ref_model='PUTAWAY', ref_id=batch_ref_id, user=user, memo='lost via putaway'))
+            entries.append(StockLedger(warehouse=warehouse, location=lost_bin, item_id=item_id, qty_delta=+qty, movement_type=MovementType.PUTAWAY_LOST, ref_model='PUTAWAY', ref_id=batch_ref_id, user=user, memo='lost via putaway'))
+        serial_lines.append((item_id, src_id, tgt_id if atype == 'PUTAWAY' else lost_bin.id, qty, serials[(atype, item_id, src_id, tgt_id)]))
         posted_groups += 1
+    # Serialized units move with their rows; post_entries() refuses them by quantity alone
+    history = relocate_serials(serial_lines, ref_model='PUTAWAY', ref_id=batch_ref_id, user=user)
+    save_history(history, post_entries(entries))
+    emit('putaway.batch_posted', {'ref_id': batch_ref_id, 'groups': posted_groups, 'rows': len(entries)}, warehouse_id=warehouse.id, aggregate_type='PUTAWAY', aggregate_id=batch_ref_id)
     logger.info("putaway.post_actions posted_count=%s batch_ref_id=%s", posted_groups, batch_ref_id)
     return {'posted_count': posted_groups, 'batch_ref_id': batch_ref_id, 'duplicate': False}
@@ -0,0 +1,120 @@
+"""Putaway target suggestions.
+
+suggest_putaway() answers a whole worklist from three indexed reads: the warehouse's PHYSICAL
+locations, their current load (StockBalance summed per location) and the locations already
+holding each item (StockBalance's in-stock index, kept current by the posting receivers).
+Placement is decided in memory, line by line, with the quantities already suggested counted
+against capacity so two lines are never sent to the same last free space:
+
+1. locations already holding the item, in walking order, up to their free capacity;
+2. then empty locations, nearest on the walk to where the item already lives (or the start of
+   the walk for a new item);
+3. whatever still does not fit is reported as unplaced.
+
+Locations without a capacity take any quantity. Walking order is services_pick.route_key().
+"""
+from bisect import bisect_left
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import Sum
+
+from .models import Location, LocationType, StockBalance, VirtualSubtype, WarehouseStatus
+from .services_pick import route_key
+
+ZERO = Decimal("0")
+MAX_TARGETS = 5
+PUTAWAY_SOURCES = (VirtualSubtype.RETURN, VirtualSubtype.RECEIVE)
+
+
+def putaway_worklist(warehouse, *, bin_id: int | None = None, subtype: str | None = None) -> list[dict]:
+    """What is waiting in the RETURN/RECEIVE bins: {"item", "qty", "source_bin"} per
+    (bin, item) with stock, read from StockBalance."""
+    qs = StockBalance.objects.filter(
+        warehouse=warehouse, location__type=LocationType.VIRTUAL, location__subtype__in=PUTAWAY_SOURCES, qty__gt=0
+    )
+    if bin_id:
+        qs = qs.filter(location_id=bin_id)
+    if subtype:
+        qs = qs.filter(location__subtype=subtype)
+    return [
+        {"item": item_id, "qty": qty, "source_bin": loc_id}
+        for loc_id, item_id, qty in qs.order_by("location_id", "item__sku").values_list("location_id", "item_id", "qty")
+    ]
+
+
+def suggest_putaway(warehouse, lines: list[dict]) -> list[dict]:
+    """Target PHYSICAL locations for lines of {"item", "qty", "source_bin"?}, in line order.
+    Each result carries up to MAX_TARGETS targets ({"location", "code", "qty", "reason"}) and
+    the quantity left unplaced."""
+    locations = sorted(
+        Location.objects.filter(warehouse=warehouse, type=LocationType.PHYSICAL, status=WarehouseStatus.ACTIVE)
+        .values_list("id", "code", "pick_sequence", "capacity"),
+        key=lambda r: route_key(r[2], r[1]),
+    )
+    index = {loc_id: n for n, (loc_id, *_rest) in enumerate(locations)}
+    code = {loc_id: c for loc_id, c, _seq, _cap in locations}
+    capacity = {loc_id: cap for loc_id, _c, _seq, cap in locations}
+    load: dict[int, Decimal] = defaultdict(lambda: ZERO)
+    for loc_id, total in (
+        StockBalance.objects.filter(warehouse=warehouse, location_id__in=index, qty__gt=0)
+        .values("location_id").annotate(total=Sum("qty")).values_list("location_id", "total")
+    ):
+        load[loc_id] = total
+    holding: dict[int, list[int]] = defaultdict(list)
+    for item_id, loc_id in (
+        StockBalance.objects.filter(warehouse=warehouse, item_id__in={ln["item"] for ln in lines}, location_id__in=index, qty__gt=0)
+        .values_list("item_id", "location_id")
+    ):
+        holding[item_id].append(index[loc_id])
+    # Walk positions of empty locations, kept sorted; a location leaves once something is planned into it
+    empty = [n for n, (loc_id, *_rest) in enumerate(locations) if not load[loc_id]]
+
+    def free(loc_id):
+        cap = capacity[loc_id]
+        return None if cap is None else cap - load[loc_id]
+
+    def place(loc_id, left, reason, targets):
+        room = free(loc_id)
+        take = left if room is None else min(left, room)
+        if take <= 0:
+            return left
+        if not load[loc_id]:
+            pos = bisect_left(empty, index[loc_id])
+            if pos < len(empty) and empty[pos] == index[loc_id]:
+                empty.pop(pos)
+        load[loc_id] += take
+        targets.append({"location": loc_id, "code": code[loc_id], "qty": take, "reason": reason})
+        return left - take
+
+    results = []
+    for ln in lines:
+        item_id, left = ln["item"], Decimal(ln["qty"])
+        targets: list[dict] = []
+        held = sorted(set(holding[item_id]))
+        for pos in held:
+            if left <= 0 or len(targets) >= MAX_TARGETS:
+                break
+            left = place(locations[pos][0], left, "same_item", targets)
+        anchor = held[0] if held else 0
+        while left > 0 and empty and len(targets) < MAX_TARGETS:
+            at = bisect_left(empty, anchor)
+            # nearest empty slot on either side of the anchor
+            candidates = [empty[i] for i in (at - 1, at) if 0 <= i < len(empty)]
+            pos = min(candidates, key=lambda p: (abs(p - anchor), p))
+            loc_id = locations[pos][0]
+            before = left
+            left = place(loc_id, left, "empty", targets)
+            if left == before:
+                # zero capacity: drop it so the loop moves on
+                empty.remove(pos)
+            else:
+                holding[item_id].append(pos)
+        results.append({
+            "item": item_id,
+            "qty": Decimal(ln["qty"]),
+            "source_bin": ln.get("source_bin"),
+            "targets": targets,
+            "unplaced": max(left, ZERO),
+        })
+    return results
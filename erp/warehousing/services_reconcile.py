@@ -0,0 +1,173 @@
+"""Stock invariants checked per warehouse by reconcile_stock.
+
+check_warehouse() runs four checks with grouped queries (no per-item loops) and returns
+a JSON-serialisable dict of discrepancies:
+  balance_mismatch        StockBalance.qty differs from the ledger sum for (location, item)
+  negative_physical       ledger on-hand below zero at a PHYSICAL location
+  pending_mismatch        a *_PENDING bin differs from the open (REQUESTED) adjustment quantity
+  putaway_unpaired        PUTAWAY ref groups whose out/in rows do not pair up exactly
+run_reconcile() fans warehouses out over a process pool; each worker uses its own connection.
+"""
+import multiprocessing
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+
+from django.db import connections
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .models import (
+    AdjustmentRequest,
+    AdjustmentStatus,
+    AdjustmentType,
+    Location,
+    LocationType,
+    StockBalance,
+    StockLedger,
+    VirtualSubtype,
+    Warehouse,
+)
+
+ZERO = Decimal("0")
+PENDING_BIN_FOR_TYPE = {
+    AdjustmentType.DAMAGE: VirtualSubtype.DAMAGE_PENDING,
+    AdjustmentType.LOST: VirtualSubtype.LOST_PENDING,
+    AdjustmentType.EXCESS: VirtualSubtype.EXCESS_PENDING,
+}
+CHECKS = ("balance_mismatch", "negative_physical", "pending_mismatch", "putaway_unpaired")
+
+
+def _num(v) -> str:
+    return str((v or ZERO).normalize()) if isinstance(v, Decimal) else str(v or 0)
+
+
+def check_balances(warehouse_id: int) -> list[dict]:
+    ledger = {
+        (loc, item): q
+        for loc, item, q in StockLedger.objects.filter(warehouse_id=warehouse_id)
+        .values_list("location_id", "item_id").annotate(q=Sum("qty_delta")).order_by()
+    }
+    balance = {
+        (loc, item): q
+        for loc, item, q in StockBalance.objects.filter(warehouse_id=warehouse_id).values_list("location_id", "item_id", "qty")
+    }
+    out = []
+    for key in sorted(set(ledger) | set(balance)):
+        lq, bq = ledger.get(key) or ZERO, balance.get(key)
+        if bq is None and lq == 0:
+            continue
+        if bq is None or bq != lq:
+            out.append({"location": key[0], "item": key[1], "ledger_qty": _num(lq), "balance_qty": None if bq is None else _num(bq)})
+    return out
+
+
+def check_negative_physical(warehouse_id: int) -> list[dict]:
+    rows = (
+        StockLedger.objects.filter(warehouse_id=warehouse_id, location__type=LocationType.PHYSICAL)
+        .values_list("location_id", "location__code", "item_id")
+        .annotate(q=Sum("qty_delta"))
+        .filter(q__lt=0)
+        .order_by("location_id", "item_id")
+    )
+    return [{"location": loc, "location_code": code, "item": item, "qty": _num(q)} for loc, code, item, q in rows]
+
+
+def check_pending(warehouse_id: int) -> list[dict]:
+    bins = dict(
+        Location.objects.filter(warehouse_id=warehouse_id, type=LocationType.VIRTUAL, subtype__in=PENDING_BIN_FOR_TYPE.values())
+        .values_list("subtype", "id")
+    )
+    ledger = {
+        (sub, item): q
+        for sub, item, q in StockLedger.objects.filter(location_id__in=bins.values())
+        .values_list("location__subtype", "item_id").annotate(q=Sum("qty_delta")).order_by()
+    }
+    expected: dict[tuple, Decimal] = defaultdict(lambda: ZERO)
+    for typ, item, q in (
+        AdjustmentRequest.objects.filter(warehouse_id=warehouse_id, status=AdjustmentStatus.REQUESTED)
+        .values_list("type", "item_id").annotate(q=Sum("qty")).order_by()
+    ):
+        expected[(PENDING_BIN_FOR_TYPE[typ], item)] += q or ZERO
+    out = []
+    for key in sorted(set(ledger) | set(expected)):
+        lq, eq = ledger.get(key) or ZERO, expected.get(key, ZERO)
+        if lq != eq:
+            out.append({"bin": key[0], "location": bins.get(key[0]), "item": key[1], "ledger_qty": _num(lq), "open_request_qty": _num(eq)})
+    return out
+
+
+def check_putaway_pairs(warehouse_id: int) -> list[dict]:
+    """Every PUTAWAY / PUTAWAY_LOST group (ref_id, item, movement_type) must consist of pairs:
+    as many out rows as in rows and a zero net quantity."""
+    rows = (
+        StockLedger.objects.filter(warehouse_id=warehouse_id, ref_model="PUTAWAY")
+        .values_list("ref_id", "item_id", "movement_type")
+        .annotate(
+            outs=Count("id", filter=Q(qty_delta__lt=0)),
+            ins=Count("id", filter=Q(qty_delta__gt=0)),
+            net=Sum("qty_delta"),
+        )
+        .filter(~Q(outs=F("ins")) | ~Q(net=0))
+        .order_by("ref_id", "item_id")
+    )
+    return [
+        {"ref_id": ref, "item": item, "movement_type": mt, "out_rows": outs, "in_rows": ins, "net_qty": _num(net)}
+        for ref, item, mt, outs, ins, net in rows
+    ]
+
+
+def check_warehouse(warehouse_id: int) -> dict:
+    """Run all checks for one warehouse (safe to call inside a worker process)."""
+    started = timezone.now()
+    try:
+        wh = Warehouse.objects.only("code").get(id=warehouse_id)
+        result = {
+            "warehouse": warehouse_id,
+            "code": wh.code,
+            "balance_mismatch": check_balances(warehouse_id),
+            "negative_physical": check_negative_physical(warehouse_id),
+            "pending_mismatch": check_pending(warehouse_id),
+            "putaway_unpaired": check_putaway_pairs(warehouse_id),
+        }
+        result["ok"] = not any(result[c] for c in CHECKS)
+    except Exception as e:  # report, don't abort the other warehouses
+        result = {"warehouse": warehouse_id, "ok": False, "error": f"{type(e).__name__}: {e}"}
+    result["seconds"] = round((timezone.now() - started).total_seconds(), 3)
+    return result
+
+
+def _check_in_worker(warehouse_id: int) -> dict:
+    try:
+        return check_warehouse(warehouse_id)
+    finally:
+        connections.close_all()
+
+
+def _init_worker():
+    import django
+    from django.apps import apps
+    if not apps.ready:  # spawn-based platforms start from a fresh interpreter
+        django.setup()
+
+
+def run_reconcile(warehouse_ids: list[int], workers: int = 4) -> list[dict]:
+    """Check warehouses concurrently. Connections are closed before the pool forks so no
+    child inherits (and later tears down) the parent's database socket."""
+    if workers <= 1 or len(warehouse_ids) <= 1:
+        return [check_warehouse(w) for w in warehouse_ids]
+    connections.close_all()
+    method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+    with ProcessPoolExecutor(max_workers=min(workers, len(warehouse_ids)), mp_context=multiprocessing.get_context(method), initializer=_init_worker) as pool:
+        return list(pool.map(_check_in_worker, warehouse_ids))
+
+
+def summarize(results: list[dict]) -> dict:
+    counts = {c: sum(len(r.get(c) or []) for r in results) for c in CHECKS}
+    return {
+        "generated_at": timezone.now().isoformat(),
+        "warehouses": len(results),
+        "warehouses_with_issues": sum(1 for r in results if not r.get("ok")),
+        "counts": counts,
+        "results": results,
+    }
@@ -0,0 +1,128 @@
+"""Reorder-point alerts, evaluated incrementally from the ledger.
+
+evaluate_reorder() reads StockLedger rows after the "reorder" LedgerCursor in id order and
+re-checks only the (warehouse, item) pairs those rows touched: available stock
+(ItemAvailability.physical - reserved) against the pair's ReorderSetting. Breaches open or
+refresh the pair's Alert, recoveries resolve it. Rows that may still have lower ids in flight
+are left for the next run, like the change feed (services.settled_ledger_rows), so ids that
+commit out of order are not skipped. The cursor moves in the same transaction as the alerts it produced.
+
+A new cursor starts at the current end of the ledger with one evaluate_all() pass; changing a
+setting re-evaluates its pair straight away (evaluate_keys), and so does placing, closing or
+expiring a reservation (services_reservation.reserved_changed), which posts no ledger row.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Alert, AlertKind, AlertStatus, ItemAvailability, LedgerCursor, ReorderSetting, StockLedger
+from .services import settled_ledger_rows
+
+ZERO = Decimal("0")
+CURSOR_NAME = "reorder"
+BATCH_SIZE = 5000
+
+
+def _by_warehouse(keys) -> dict[int, set[int]]:
+    grouped: dict[int, set[int]] = defaultdict(set)
+    for wh_id, item_id in keys:
+        grouped[wh_id].add(item_id)
+    return grouped
+
+
+def _per_key(qs, keys, *fields):
+    """Rows of ``qs`` for the given (warehouse, item) keys, one query per warehouse."""
+    out = {}
+    for wh_id, items in _by_warehouse(keys).items():
+        for row in qs.filter(warehouse_id=wh_id, item_id__in=items).values_list("warehouse_id", "item_id", *fields):
+            out[(row[0], row[1])] = row[2:] if len(fields) > 1 else row[2]
+    return out
+
+
+@transaction.atomic
+def evaluate_keys(keys, *, ledger_id: int | None = None) -> dict:
+    """Open, refresh or resolve the alerts of the given (warehouse, item) pairs."""
+    keys = set(keys)
+    result = {"checked": len(keys), "opened": 0, "updated": 0, "resolved": 0}
+    if not keys:
+        return result
+    rules = {
+        (s.warehouse_id, s.item_id): s
+        for wh_id, items in _by_warehouse(keys).items()
+        for s in ReorderSetting.objects.filter(warehouse_id=wh_id, item_id__in=items, active=True)
+    }
+    alerts = {
+        (a.warehouse_id, a.item_id): a
+        for wh_id, items in _by_warehouse(keys).items()
+        for a in Alert.objects.select_for_update().filter(warehouse_id=wh_id, item_id__in=items, status=AlertStatus.OPEN)
+    }
+    available = {k: physical - reserved for k, (physical, reserved) in _per_key(ItemAvailability.objects.all(), keys, "physical", "reserved").items()}
+    now = timezone.now()
+    new, changed, resolved = [], [], []
+    for key in sorted(keys):
+        rule, alert = rules.get(key), alerts.get(key)
+        qty = available.get(key, ZERO)
+        if rule is None or qty > rule.reorder_point:
+            if alert is not None:
+                alert.status, alert.resolved_at, alert.updated_at, alert.available = AlertStatus.RESOLVED, now, now, qty
+                resolved.append(alert)
+            continue
+        kind = AlertKind.OUT_OF_STOCK if qty <= 0 else AlertKind.LOW_STOCK
+        target = rule.max_qty if rule.max_qty is not None else rule.reorder_point
+        suggested = target - qty if target > qty else None
+        if alert is None:
+            new.append(Alert(
+                warehouse_id=key[0], item_id=key[1], kind=kind, available=qty, reorder_point=rule.reorder_point,
+                suggested_qty=suggested, ledger_id=ledger_id, opened_at=now, updated_at=now,
+            ))
+        elif (alert.kind, alert.available, alert.reorder_point, alert.suggested_qty) != (kind, qty, rule.reorder_point, suggested):
+            alert.kind, alert.available, alert.reorder_point, alert.suggested_qty = kind, qty, rule.reorder_point, suggested
+            alert.ledger_id = ledger_id or alert.ledger_id
+            alert.updated_at = now
+            changed.append(alert)
+    Alert.objects.bulk_create(new, batch_size=1000)
+    Alert.objects.bulk_update(changed, ["kind", "available", "reorder_point", "suggested_qty", "ledger_id", "updated_at"], batch_size=1000)
+    Alert.objects.bulk_update(resolved, ["status", "resolved_at", "updated_at", "available"], batch_size=1000)
+    result.update(opened=len(new), updated=len(changed), resolved=len(resolved))
+    return result
+
+
+def evaluate_all() -> dict:
+    """Check every active setting and every open alert (first run, or after bulk changes)."""
+    keys = set(ReorderSetting.objects.filter(active=True).values_list("warehouse_id", "item_id"))
+    keys |= set(Alert.objects.filter(status=AlertStatus.OPEN).values_list("warehouse_id", "item_id"))
+    return evaluate_keys(keys)
+
+
+def _merge(total: dict, part: dict):
+    for k, v in part.items():
+        total[k] = total.get(k, 0) + v
+
+
+def evaluate_reorder(*, batch_size: int = BATCH_SIZE) -> dict:
+    """Advance the reorder cursor over new ledger rows, re-checking only the pairs they touched."""
+    total = {"rows": 0, "checked": 0, "opened": 0, "updated": 0, "resolved": 0}
+    cursor, created = LedgerCursor.objects.get_or_create(
+        name=CURSOR_NAME, defaults={"last_id": StockLedger.objects.aggregate(m=Max("id"))["m"] or 0}
+    )
+    if created:
+        _merge(total, evaluate_all())
+    while True:
+        with transaction.atomic():
+            cursor = LedgerCursor.objects.select_for_update().get(pk=cursor.pk)
+            rows, fetched = settled_ledger_rows(
+                StockLedger.objects.filter(id__gt=cursor.last_id), ["id", "warehouse_id", "item_id"], batch_size
+            )
+            if not rows:
+                break
+            _merge(total, evaluate_keys({(r["warehouse_id"], r["item_id"]) for r in rows}, ledger_id=rows[-1]["id"]))
+            total["rows"] += len(rows)
+            cursor.last_id = rows[-1]["id"]
+            cursor.save(update_fields=["last_id", "updated_at"])
+        if fetched < batch_size or len(rows) < fetched:
+            break
+    total["cursor"] = cursor.last_id
+    return total
@@ -0,0 +1,267 @@
+"""Stock reservations and available-to-promise (ATP).
+
+Reserved totals are kept next to the on-hand they are checked against: ItemAvailability.reserved
+per (item, warehouse) and StockBalance.reserved per (location, item) for holds on a location.
+atp() answers any number of lines with two indexed reads of those rollups - it never sums the
+ledger or the reservations. reserve() locks the same rows (SELECT .. FOR UPDATE, keys sorted so
+concurrent orders lock in the same order) before checking and creating holds, so two orders
+cannot both take the last unit. expire_reservations() closes overdue holds in batches claimed
+with SKIP LOCKED; recount_reserved() recomputes the totals from the ACTIVE holds.
+
+Holds write no ledger rows, so every change of the reserved totals is announced with
+reserved_changed (receivers in signals.py, e.g. the reorder alerts) in the same transaction.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import DecimalField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.dispatch import Signal
+from django.utils import timezone
+
+from catalog.models import Item
+
+from .models import ItemAvailability, Location, LocationType, ReservationStatus, StockBalance, StockReservation, Warehouse
+
+ZERO = Decimal("0")
+MAX_ERRORS = 50
+
+# Sent after reserved totals change, inside the same transaction:
+#   reserved_changed.send(sender=StockReservation, keys={(warehouse_id, item_id), ...})
+reserved_changed = Signal()
+
+
+def _wh_keys(lines) -> set[tuple]:
+    return {(ln["item"], ln["warehouse"]) for ln in lines}
+
+
+def _loc_keys(lines) -> set[tuple]:
+    return {(ln["location"], ln["item"]) for ln in lines if ln.get("location")}
+
+
+def _key_filter(keys, a: str, b: str) -> Q:
+    q = Q(pk__in=[])
+    for x, y in keys:
+        q |= Q(**{a: x, b: y})
+    return q
+
+
+def _read_totals(lines, *, lock: bool = False):
+    wh_qs = ItemAvailability.objects.filter(_key_filter(_wh_keys(lines), "item_id", "warehouse_id"))
+    loc_qs = StockBalance.objects.filter(_key_filter(_loc_keys(lines), "location_id", "item_id"))
+    if lock:
+        wh_qs = wh_qs.select_for_update().order_by("item_id", "warehouse_id")
+        loc_qs = loc_qs.select_for_update().order_by("location_id", "item_id")
+    by_wh = {(i, w): (p, r) for i, w, p, r in wh_qs.values_list("item_id", "warehouse_id", "physical", "reserved")}
+    by_loc = {(loc, i): (q, r) for loc, i, q, r in loc_qs.values_list("location_id", "item_id", "qty", "reserved")} if _loc_keys(lines) else {}
+    return by_wh, by_loc
+
+
+def _evaluate(lines, by_wh, by_loc) -> list[dict]:
+    """ATP per line. Lines for the same key are checked cumulatively, in order, so an order
+    with the same SKU on two lines cannot promise the same unit twice."""
+    taken_wh: dict[tuple, Decimal] = defaultdict(lambda: ZERO)
+    taken_loc: dict[tuple, Decimal] = defaultdict(lambda: ZERO)
+    out = []
+    for ln in lines:
+        wh_key = (ln["item"], ln["warehouse"])
+        on_hand, reserved = by_wh.get(wh_key, (ZERO, ZERO))
+        available = on_hand - reserved - taken_wh[wh_key]
+        loc_key = (ln["location"], ln["item"]) if ln.get("location") else None
+        if loc_key:
+            on_hand, reserved = by_loc.get(loc_key, (ZERO, ZERO))
+            available = min(available, on_hand - reserved - taken_loc[loc_key])
+        qty = ln.get("qty") or ZERO
+        ok = qty <= available
+        if ok:
+            taken_wh[wh_key] += qty
+            if loc_key:
+                taken_loc[loc_key] += qty
+        out.append({
+            "warehouse": ln["warehouse"],
+            "item": ln["item"],
+            "location": ln.get("location"),
+            "on_hand": on_hand,
+            "reserved": reserved,
+            "atp": max(available, ZERO),
+            "qty": qty,
+            "ok": ok,
+        })
+    return out
+
+
+def atp(lines: list[dict]) -> list[dict]:
+    """Available-to-promise for lines of {"warehouse", "item", "location"?, "qty"?} (ids and
+    Decimal). on_hand/reserved are those of the location when one is given, else of the
+    warehouse's physical locations; atp is what can still be promised for the line."""
+    if not lines:
+        return []
+    by_wh, by_loc = _read_totals(lines)
+    return _evaluate(lines, by_wh, by_loc)
+
+
+def _adjust_reserved(reservations, sign: int):
+    per_wh: dict[tuple, Decimal] = defaultdict(lambda: ZERO)
+    per_loc: dict[tuple, Decimal] = defaultdict(lambda: ZERO)
+    for r in reservations:
+        per_wh[(r.item_id, r.warehouse_id)] += r.qty * sign
+        if r.location_id:
+            per_loc[(r.location_id, r.item_id)] += r.qty * sign
+    now = timezone.now()
+    # Lock the touched rows and rewrite them with one bulk UPDATE per table: a pick list holds
+    # stock on thousands of (location, item) keys, too many for an UPDATE each.
+    for model, delta, (a, b) in (
+        (ItemAvailability, per_wh, ("item_id", "warehouse_id")),
+        (StockBalance, per_loc, ("location_id", "item_id")),
+    ):
+        if not delta:
+            continue
+        qs = model.objects.select_for_update().filter(**{f"{a}__in": {k[0] for k in delta}, f"{b}__in": {k[1] for k in delta}})
+        rows = [r for r in qs.order_by(a, b) if (getattr(r, a), getattr(r, b)) in delta]
+        for r in rows:
+            r.reserved += delta[(getattr(r, a), getattr(r, b))]
+            r.updated_at = now
+        model.objects.bulk_update(rows, ["reserved", "updated_at"], batch_size=1000)
+    if per_wh:
+        reserved_changed.send(sender=StockReservation, keys={(wh_id, item_id) for item_id, wh_id in per_wh})
+
+
+@transaction.atomic
+def hold(reservations: list[StockReservation]) -> list[StockReservation]:
+    """Insert holds whose stock the caller has already checked under the row locks and add
+    them to the reserved totals (reserve(), services_pick)."""
+    objs = StockReservation.objects.bulk_create(reservations, batch_size=1000)
+    _adjust_reserved(objs, +1)
+    return objs
+
+
+def check_lines(lines):
+    """Reject lines naming an unknown warehouse or item, or a location that is not a PHYSICAL
+    location of the line's warehouse (one query per table). _ensure_rows() would otherwise
+    create rollup rows under the wrong warehouse, or fail on the foreign keys at commit."""
+    item_ids = {ln["item"] for ln in lines}
+    wh_ids = {ln["warehouse"] for ln in lines}
+    loc_ids = {ln["location"] for ln in lines if ln.get("location")}
+    items = set(Item.objects.filter(id__in=item_ids).values_list("id", flat=True))
+    warehouses = set(Warehouse.objects.filter(id__in=wh_ids).values_list("id", flat=True))
+    locations = {
+        loc_id: wh_id
+        for loc_id, wh_id in Location.objects.filter(id__in=loc_ids, type=LocationType.PHYSICAL).values_list("id", "warehouse_id")
+    } if loc_ids else {}
+    errors = []
+    for n, ln in enumerate(lines, 1):
+        if ln["warehouse"] not in warehouses:
+            errors.append(f"line {n}: unknown warehouse {ln['warehouse']}")
+        if ln["item"] not in items:
+            errors.append(f"line {n}: unknown item {ln['item']}")
+        if ln.get("location") and locations.get(ln["location"]) != ln["warehouse"]:
+            errors.append(f"line {n}: location {ln['location']} is not a PHYSICAL location of warehouse {ln['warehouse']}")
+    if errors:
+        more = len(errors) - MAX_ERRORS
+        raise ValidationError(errors[:MAX_ERRORS] + ([f"... and {more} more"] if more > 0 else []))
+
+
+def _ensure_rows(lines):
+    # Holds may be placed before any stock arrives; their totals need rows to live on.
+    ItemAvailability.objects.bulk_create(
+        [ItemAvailability(item_id=i, warehouse_id=w) for i, w in sorted(_wh_keys(lines))], ignore_conflicts=True
+    )
+    wh_of_loc = {(ln["location"], ln["item"]): ln["warehouse"] for ln in lines if ln.get("location")}
+    if wh_of_loc:
+        StockBalance.objects.bulk_create(
+            [StockBalance(location_id=loc, item_id=i, warehouse_id=wh_of_loc[(loc, i)]) for loc, i in sorted(wh_of_loc)],
+            ignore_conflicts=True,
+        )
+
+
+@transaction.atomic
+def reserve(lines: list[dict], *, user=None, ref_model: str = "", ref_id: str = "", expires_at=None, allow_short: bool = False) -> list[StockReservation]:
+    """Hold stock for every line, all or nothing. Raises ValidationError listing the short
+    lines unless allow_short (then holds are placed regardless and ATP may go negative)."""
+    if not lines:
+        return []
+    for ln in lines:
+        if not ln.get("qty") or ln["qty"] <= 0:
+            raise ValidationError("qty must be > 0")
+    check_lines(lines)
+    _ensure_rows(lines)
+    by_wh, by_loc = _read_totals(lines, lock=True)
+    short = [r for r in _evaluate(lines, by_wh, by_loc) if not r["ok"]]
+    if short and not allow_short:
+        raise ValidationError(
+            "Insufficient stock: " + "; ".join(f"item {r['item']} @ warehouse {r['warehouse']}: requested {r['qty']}, available {r['atp']}" for r in short)
+        )
+    return hold([
+        StockReservation(
+            warehouse_id=ln["warehouse"],
+            item_id=ln["item"],
+            location_id=ln.get("location"),
+            qty=ln["qty"],
+            expires_at=expires_at,
+            ref_model=(ref_model or "")[:50],
+            ref_id=(ref_id or "")[:50],
+            created_by=user,
+        )
+        for ln in lines
+    ])
+
+
+@transaction.atomic
+def close_reservations(qs, status: str, *, skip_locked: bool = False) -> int:
+    """Move the ACTIVE reservations of ``qs`` to ``status`` (CONSUMED / RELEASED / EXPIRED)
+    and take them off the reserved totals. Returns how many were closed."""
+    if status == ReservationStatus.ACTIVE:
+        raise ValueError("close_reservations() cannot re-activate reservations")
+    rows = list(qs.filter(status=ReservationStatus.ACTIVE).select_for_update(skip_locked=skip_locked).order_by("id"))
+    if not rows:
+        return 0
+    StockReservation.objects.filter(id__in=[r.id for r in rows]).update(status=status, closed_at=timezone.now())
+    _adjust_reserved(rows, -1)
+    return len(rows)
+
+
+def expire_reservations(*, now=None, batch_size: int = 1000) -> int:
+    """Expire every ACTIVE reservation past its expires_at, one transaction per batch."""
+    now = now or timezone.now()
+    total = 0
+    while True:
+        with transaction.atomic():
+            ids = list(
+                StockReservation.objects.select_for_update(skip_locked=True)
+                .filter(status=ReservationStatus.ACTIVE, expires_at__lte=now)
+                .order_by("expires_at", "id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                return total
+            total += close_reservations(StockReservation.objects.filter(id__in=ids), ReservationStatus.EXPIRED)
+        if len(ids) < batch_size:
+            return total
+
+
+@transaction.atomic
+def recount_reserved(warehouse_id: int | None = None):
+    """Recompute ItemAvailability.reserved and StockBalance.reserved from ACTIVE reservations."""
+    active = StockReservation.objects.filter(status=ReservationStatus.ACTIVE)
+    if warehouse_id is not None:
+        active = active.filter(warehouse_id=warehouse_id)
+    _ensure_rows([
+        {"warehouse": w, "item": i, "location": loc}
+        for w, i, loc in active.values_list("warehouse_id", "item_id", "location_id").distinct()
+    ])
+    dec = DecimalField(max_digits=16, decimal_places=3)
+
+    def total(**outer):
+        sub = (
+            active.filter(**{k: OuterRef(v) for k, v in outer.items()})
+            .order_by().values(*outer).annotate(s=Sum("qty")).values("s")
+        )
+        return Coalesce(Subquery(sub, output_field=dec), Value(ZERO), output_field=dec)
+
+    wh_rows, loc_rows = ItemAvailability.objects.all(), StockBalance.objects.all()
+    if warehouse_id is not None:
+        wh_rows, loc_rows = wh_rows.filter(warehouse_id=warehouse_id), loc_rows.filter(warehouse_id=warehouse_id)
+    wh_rows.update(reserved=total(item_id="item_id", warehouse_id="warehouse_id"))
+    loc_rows.update(reserved=total(location_id="location_id", item_id="item_id"))
@@ -0,0 +1,137 @@
+"""Daily movement rollup (LedgerDailyRollup) for dashboards and trend charts.
+
+apply_daily_rollup() runs for every ledger_posted batch inside the posting transaction and
+adds the batch's counts/quantities with one INSERT .. ON CONFLICT DO UPDATE, so the rollup
+commits or rolls back together with the ledger rows. rebuild_daily_rollup() recomputes a
+day range from StockLedger (delete + re-aggregate) and is safe to run any number of times:
+days before the latest archive_ledger cutoff keep their rows, since the ledger no longer
+holds their movements. OPENING_BALANCE rows carried forward by the archive are not
+movements and stay out of the rollup and the trends.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Case, Count, F, Sum, Value, When
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import LedgerDailyRollup, Location, MovementType, StockLedger
+from .services import local_day_bounds
+from .services_archive import archived_before
+
+ZERO = Decimal("0")
+# Balances carried forward by archive_ledger, not movements
+ROLLUP_EXCLUDED_MOVEMENTS = [MovementType.OPENING_BALANCE]
+
+
+def rollup_key(warehouse_id: int, day: date, movement_type: str, subtype: str | None):
+    return (warehouse_id, day, movement_type, subtype or "")
+
+
+def apply_daily_rollup(rows: list[StockLedger]):
+    """Increment the rollup for freshly posted ledger rows."""
+    rows = [r for r in rows if r.movement_type not in ROLLUP_EXCLUDED_MOVEMENTS]
+    if not rows:
+        return
+    subtypes = dict(Location.objects.filter(id__in={r.location_id for r in rows}).values_list("id", "subtype"))
+    agg: dict[tuple, list] = defaultdict(lambda: [0, ZERO, ZERO])
+    for r in rows:
+        ts = r.ts or timezone.now()
+        acc = agg[rollup_key(r.warehouse_id, timezone.localdate(ts), r.movement_type, subtypes.get(r.location_id))]
+        qty = Decimal(r.qty_delta)
+        acc[0] += 1
+        if qty > 0:
+            acc[1] += qty
+        else:
+            acc[2] -= qty
+    table = LedgerDailyRollup._meta.db_table
+    # Sorted keys: concurrent postings touching the same rollup rows lock them in the same order.
+    keys = sorted(agg)
+    values_sql = ", ".join(["(%s, %s, %s, %s, %s, %s, %s)"] * len(keys))
+    params = []
+    for k in keys:
+        params.extend([*k, *agg[k]])
+    with connection.cursor() as cur:
+        cur.execute(
+            f"""
+            INSERT INTO {table} (warehouse_id, day, movement_type, location_subtype, entries, qty_in, qty_out)
+            VALUES {values_sql}
+            ON CONFLICT (warehouse_id, day, movement_type, location_subtype) DO UPDATE SET
+                entries = {table}.entries + EXCLUDED.entries,
+                qty_in = {table}.qty_in + EXCLUDED.qty_in,
+                qty_out = {table}.qty_out + EXCLUDED.qty_out
+            """,
+            params,
+        )
+
+
+@transaction.atomic
+def rebuild_daily_rollup(*, date_from: date, date_to: date, warehouse_ids: list[int] | None = None) -> dict:
+    """Recompute rollup rows for local days date_from..date_to (inclusive) from the ledger.
+    Days before the latest archive cutoff are left as they are (reported as ``kept_before``)."""
+    kept_before = archived_before()
+    if kept_before is not None and date_from < kept_before:
+        date_from = kept_before
+    else:
+        kept_before = None
+    if date_from > date_to:
+        return {"deleted": 0, "created": 0, "kept_before": kept_before}
+    lo, hi = local_day_bounds(date_from)[0], local_day_bounds(date_to)[1]
+    existing = LedgerDailyRollup.objects.filter(day__gte=date_from, day__lte=date_to)
+    ledger = StockLedger.objects.filter(ts__gte=lo, ts__lt=hi).exclude(movement_type__in=ROLLUP_EXCLUDED_MOVEMENTS)
+    if warehouse_ids:
+        existing = existing.filter(warehouse_id__in=warehouse_ids)
+        ledger = ledger.filter(warehouse_id__in=warehouse_ids)
+    deleted, _ = existing.delete()
+    qty = StockLedger._meta.get_field("qty_delta")  # sums stay in milli-units until converted back
+    agg = (
+        ledger.annotate(day=TruncDate("ts"), sub=Coalesce("location__subtype", Value("")))
+        .values("warehouse_id", "day", "movement_type", "sub")
+        .annotate(
+            n=Count("id"),
+            qin=Coalesce(Sum(Case(When(qty_delta__gt=0, then=F("qty_delta")), output_field=qty)), Value(0), output_field=qty),
+            qout=Coalesce(Sum(Case(When(qty_delta__lt=0, then=-F("qty_delta")), output_field=qty)), Value(0), output_field=qty),
+        )
+        .order_by()
+    )
+    objs = [
+        LedgerDailyRollup(
+            warehouse_id=r["warehouse_id"], day=r["day"], movement_type=r["movement_type"], location_subtype=r["sub"],
+            entries=r["n"], qty_in=r["qin"], qty_out=r["qout"],
+        )
+        for r in agg.iterator()
+    ]
+    LedgerDailyRollup.objects.bulk_create(objs, batch_size=1000)
+    return {"deleted": deleted, "created": len(objs), "kept_before": kept_before}
+
+
+def movement_trends(warehouse_id: int, date_from: date, date_to: date, group_by: str | None = None) -> list[dict]:
+    """Zero-filled per-day series from the rollup. group_by: None, 'movement_type' or 'location_subtype'."""
+    qs = LedgerDailyRollup.objects.filter(warehouse_id=warehouse_id, day__gte=date_from, day__lte=date_to).exclude(
+        movement_type__in=ROLLUP_EXCLUDED_MOVEMENTS
+    )
+    fields = ["day"] + ([group_by] if group_by else [])
+    rows = qs.values(*fields).annotate(entries_sum=Sum("entries"), qin=Sum("qty_in"), qout=Sum("qty_out")).order_by(*fields)
+    by_day: dict[date, list] = defaultdict(list)
+    for r in rows:
+        by_day[r["day"]].append(r)
+    out = []
+    d = date_from
+    while d <= date_to:
+        day_rows = by_day.get(d, [])
+        point = {
+            "day": d.isoformat(),
+            "movements": sum(r["entries_sum"] or 0 for r in day_rows),
+            "qty_in": float(sum((r["qin"] or ZERO) for r in day_rows)),
+            "qty_out": float(sum((r["qout"] or ZERO) for r in day_rows)),
+        }
+        if group_by:
+            point["groups"] = [
+                {"key": r[group_by], "movements": r["entries_sum"] or 0, "qty_in": float(r["qin"] or 0), "qty_out": float(r["qout"] or 0)}
+                for r in day_rows
+            ]
+        out.append(point)
+        d += timedelta(days=1)
+    return out
@@ -0,0 +1,329 @@
+"""Serial number tracking.
+
+A SerialUnit records where one serialized unit is now (warehouse, location, status and lot);
+its SerialMovement rows are its history. Units are created by goods receipts whose lines list
+their serials (check_receipt_serials() before the receipt is claimed, register_serials() after
+its ledger rows are posted) and move with move_serials(): putaway out of RECEIVE/RETURN,
+moves between PHYSICAL locations and into the virtual bins. Quantity flows that carry serials
+on their lines (putaway, internal moves) relocate them with relocate_serials() before posting;
+post_entries() refuses to take serialized units by quantity alone (check_serialized_stock).
+
+move_serials() takes a whole scan payload at once. It resolves every serial with one locked
+query on the serial index, validates the set in memory (unknown, ambiguous, other warehouse)
+and checks the moved counts against StockBalance (one locked read), then posts one ledger row
+pair per (source location, item, lot) with a single post_entries() call and writes the units
+and their movements with one bulk update and one bulk insert. A location or history lookup is
+an index read on (item, serial) or serial, and on (unit, ts).
+"""
+from collections import Counter, defaultdict
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from .models import (
+    Location,
+    LocationType,
+    MovementType,
+    SerialMovement,
+    SerialStatus,
+    SerialUnit,
+    StockBalance,
+    StockLedger,
+    VirtualSubtype,
+    WarehouseStatus,
+)
+from .services import post_entries
+
+ZERO = Decimal("0")
+SERIAL_REF_MODEL = "SERIAL_MOVE"
+SERIAL_MAX_LENGTH = SerialUnit._meta.get_field("serial").max_length
+MAX_SERIALS = 20000
+MAX_ERRORS = 50
+# services_putaway_suggest.PUTAWAY_SOURCES; not imported, services_grn imports this module
+PUTAWAY_SOURCES = (VirtualSubtype.RETURN, VirtualSubtype.RECEIVE)
+# Units whose serial may not be received again
+ON_HAND = (SerialStatus.IN_STOCK, SerialStatus.IN_TRANSIT)
+VIRTUAL_STATUS = {
+    VirtualSubtype.DISPATCH: SerialStatus.DISPATCHED,
+    VirtualSubtype.IN_TRANSIT: SerialStatus.IN_TRANSIT,
+    VirtualSubtype.DAMAGE: SerialStatus.DAMAGED,
+    VirtualSubtype.DAMAGE_PENDING: SerialStatus.DAMAGED,
+    VirtualSubtype.LOST: SerialStatus.LOST,
+    VirtualSubtype.LOST_PENDING: SerialStatus.LOST,
+}
+
+
+def _raise(errors: list[str]):
+    more = len(errors) - MAX_ERRORS
+    raise ValidationError(errors[:MAX_ERRORS] + ([f"... and {more} more"] if more > 0 else []))
+
+
+def status_for(loc_type: str, subtype: str) -> str:
+    """Status of a unit held at a location of ``loc_type``/``subtype``."""
+    if loc_type == LocationType.VIRTUAL:
+        return VIRTUAL_STATUS.get(subtype, SerialStatus.IN_STOCK)
+    return SerialStatus.IN_STOCK
+
+
+def movement_for(src_type: str, src_subtype: str, dst_type: str, dst_subtype: str) -> str:
+    if src_type == LocationType.VIRTUAL and src_subtype in PUTAWAY_SOURCES:
+        if dst_type == LocationType.PHYSICAL:
+            return MovementType.PUTAWAY
+        if dst_subtype == VirtualSubtype.LOST:
+            return MovementType.PUTAWAY_LOST
+    if src_type == dst_type == LocationType.PHYSICAL:
+        return MovementType.INTERNAL_TRANSFER
+    return MovementType.TRANSFER
+
+
+def line_serials(ln: dict) -> list[str]:
+    """Serials of a receipt line: a ``serials`` list or a single ``serial``."""
+    raw = ln.get("serials")
+    if raw in (None, "") and ln.get("serial") not in (None, ""):
+        raw = [ln["serial"]]
+    if isinstance(raw, str):
+        raw = raw.split(",")
+    return [str(s).strip() for s in raw or []]
+
+
+def check_receipt_serials(lines: list[dict], resolved: list[tuple[int, Decimal]], lots: list[int | None]) -> list[tuple[int, str, int | None]]:
+    """(item_id, serial, lot_id) for every serial named on the lines of a receipt, checked as a
+    set: each serialized line lists exactly qty distinct serials, and none of them is already in
+    stock (one query). Serials that left stock (dispatched, lost, damaged) may come back."""
+    units, errors = [], []
+    for n, (ln, (item_id, qty), lot_id) in enumerate(zip(lines, resolved, lots), 1):
+        serials = line_serials(ln)
+        if not serials:
+            continue
+        if qty != int(qty) or len(serials) != qty:
+            errors.append(f"line {n}: {len(serials)} serial(s) for qty {qty}")
+            continue
+        bad = [s for s in serials if not s or len(s) > SERIAL_MAX_LENGTH]
+        if bad:
+            errors.append(f"line {n}: serials must be 1 to {SERIAL_MAX_LENGTH} characters")
+            continue
+        units.extend((item_id, s, lot_id) for s in serials)
+    repeated = [k for k, c in Counter((i, s) for i, s, _lot in units).items() if c > 1]
+    errors += [f"serial {s} of item {i} appears more than once" for i, s in repeated]
+    if errors:
+        _raise(errors)
+    if not units:
+        return []
+    wanted = {(i, s) for i, s, _lot in units}
+    errors = [
+        f"serial {serial} of item {item_id} is already {status.lower().replace('_', ' ')}"
+        for item_id, serial, status in SerialUnit.objects.filter(
+            serial__in={s for _i, s in wanted}, item_id__in={i for i, _s in wanted}, status__in=ON_HAND
+        ).values_list("item_id", "serial", "status")
+        if (item_id, serial) in wanted
+    ]
+    if errors:
+        _raise(errors)
+    return units
+
+
+def register_serials(warehouse, location, units: list[tuple[int, str, int | None]], *, movement_type: str, ref_model: str,
+                     ref_id: str, batch_id: int | None = None, user=None) -> int:
+    """Put ``units`` ((item_id, serial, lot_id), from check_receipt_serials()) at ``location``:
+    new serials are inserted, returning ones are moved back, each with a movement row."""
+    if not units:
+        return 0
+    status = status_for(location.type, location.subtype)
+    now = timezone.now()
+    lot_of = {(i, s): lot for i, s, lot in units}
+    existing = {
+        (u.item_id, u.serial): u
+        for u in SerialUnit.objects.select_for_update().filter(
+            serial__in={s for _i, s in lot_of}, item_id__in={i for i, _s in lot_of}
+        )
+        if (u.item_id, u.serial) in lot_of
+    }
+    came_from = {}
+    for key, u in existing.items():
+        came_from[u.id] = u.location_id
+        u.warehouse, u.location, u.status, u.lot_id, u.updated_at = warehouse, location, status, lot_of[key], now
+    SerialUnit.objects.bulk_update(list(existing.values()), ["warehouse", "location", "status", "lot", "updated_at"], batch_size=1000)
+    SerialUnit.objects.bulk_create(
+        [
+            SerialUnit(item_id=i, serial=s, warehouse=warehouse, location=location, status=status, lot_id=lot)
+            for (i, s), lot in lot_of.items() if (i, s) not in existing
+        ],
+        batch_size=2000,
+    )
+    ids = SerialUnit.objects.filter(serial__in={s for _i, s in lot_of}, item_id__in={i for i, _s in lot_of}).values_list("id", "item_id", "serial")
+    SerialMovement.objects.bulk_create(
+        [
+            SerialMovement(
+                unit_id=unit_id, ts=now, from_location_id=came_from.get(unit_id), to_location=location,
+                movement_type=movement_type, ref_model=ref_model, ref_id=ref_id, batch_id=batch_id, user=user,
+            )
+            for unit_id, item_id, serial in ids if (item_id, serial) in lot_of
+        ],
+        batch_size=2000,
+    )
+    return len(lot_of)
+
+
+@transaction.atomic
+def move_serials(warehouse, serials: list[str], to_location_id: int, *, item_id: int | None = None, user=None,
+                 ref_id: str = "", memo: str = "") -> dict:
+    """Move the scanned ``serials`` of ``warehouse`` to ``to_location_id``. ``item_id``
+    narrows the lookup when the same serial exists for several items. A repeated ``ref_id``
+    returns {"duplicate": True} with nothing posted. Serials scanned twice count once; units
+    already at the target are left alone and reported as unchanged."""
+    scans = [str(s).strip() for s in serials or []]
+    if not scans:
+        raise ValidationError("At least one serial is required")
+    if len(scans) > MAX_SERIALS:
+        raise ValidationError(f"At most {MAX_SERIALS} serials per move")
+    if not all(scans):
+        raise ValidationError("Serials must not be blank")
+    target = Location.objects.filter(id=to_location_id, warehouse=warehouse).first()
+    if target is None or target.status != WarehouseStatus.ACTIVE:
+        raise ValidationError("to_location must be an active location of this warehouse")
+    ref = (ref_id or "").strip()[:50]
+    if ref and StockLedger.objects.filter(warehouse=warehouse, ref_model=SERIAL_REF_MODEL, ref_id=ref).exists():
+        return {"moved": 0, "unchanged": 0, "ledger_rows": 0, "ref_id": ref, "duplicate": True}
+    wanted = set(scans)
+    qs = SerialUnit.objects.select_for_update().filter(serial__in=wanted)
+    if item_id:
+        qs = qs.filter(item_id=item_id)
+    found = defaultdict(list)
+    for u in qs.order_by("id"):
+        found[u.serial].append(u)
+    errors = []
+    for serial in sorted(wanted):
+        matches = found.get(serial)
+        if not matches:
+            errors.append(f"serial {serial}: unknown")
+        elif len(matches) > 1:
+            errors.append(f"serial {serial}: matches {len(matches)} items, give the item")
+        elif matches[0].warehouse_id != warehouse.pk:
+            errors.append(f"serial {serial}: not in this warehouse")
+    if errors:
+        _raise(errors)
+    units = [found[s][0] for s in sorted(wanted)]
+    moving = [u for u in units if u.location_id != target.id]
+    result = {"moved": len(moving), "unchanged": len(units) - len(moving), "ledger_rows": 0, "ref_id": ref, "duplicate": False}
+    if not moving:
+        return result
+    counts: dict[tuple, int] = Counter((u.location_id, u.item_id, u.lot_id) for u in moving)
+    per_loc_item: dict[tuple, int] = Counter((u.location_id, u.item_id) for u in moving)
+    on_hand = {
+        (loc_id, i): qty
+        for loc_id, i, qty in StockBalance.objects.select_for_update()
+        .filter(location_id__in={k[0] for k in per_loc_item}, item_id__in={k[1] for k in per_loc_item})
+        .order_by("location_id", "item_id")
+        .values_list("location_id", "item_id", "qty")
+    }
+    short = [
+        f"item {i} at location {loc_id}: {n} serial(s) scanned, {on_hand.get((loc_id, i), ZERO)} on hand"
+        for (loc_id, i), n in per_loc_item.items() if on_hand.get((loc_id, i), ZERO) < n
+    ]
+    if short:
+        _raise(["Serials do not match the stock on hand"] + short)
+    sources = {
+        loc_id: (loc_type, subtype)
+        for loc_id, loc_type, subtype in Location.objects.filter(id__in={k[0] for k in counts}).values_list("id", "type", "subtype")
+    }
+    kind = {loc_id: movement_for(*sources[loc_id], target.type, target.subtype) for loc_id in sources}
+    entries = []
+    for (loc_id, i, lot_id), n in counts.items():
+        for loc, delta in ((loc_id, -n), (target.id, n)):
+            entries.append(StockLedger(
+                warehouse=warehouse, location_id=loc, item_id=i, lot_id=lot_id, qty_delta=Decimal(delta),
+                movement_type=kind[loc_id], ref_model=SERIAL_REF_MODEL, ref_id=ref, memo=memo or "", user=user,
+            ))
+    # Units move first: post_entries() checks the serials left at each source
+    now = timezone.now()
+    status = status_for(target.type, target.subtype)
+    history = []
+    for u in moving:
+        history.append(SerialMovement(
+            unit=u, ts=now, from_location_id=u.location_id, to_location=target, movement_type=kind[u.location_id],
+            ref_model=SERIAL_REF_MODEL, ref_id=ref, user=user,
+        ))
+        u.location, u.status, u.updated_at = target, status, now
+    SerialUnit.objects.bulk_update(moving, ["location", "status", "updated_at"], batch_size=1000)
+    save_history(history, post_entries(entries))
+    result["ledger_rows"] = len(entries)
+    return result
+
+
+def relocate_serials(lines: list[tuple[int, int, int, Decimal, list[str]]], *, ref_model: str, ref_id: str,
+                     user=None) -> list[SerialMovement]:
+    """Move the units named on quantity lines ((item_id, source_id, target_id, qty, serials))
+    ahead of their ledger rows. Every serial must be an IN_STOCK unit of the item at the line's
+    source (one locked query) and a line names at most qty of them; the rest of its qty moves
+    unserialized. Returns the unsaved movements for save_history() once the rows are posted."""
+    lines = [ln for ln in lines if ln[4]]
+    if not lines:
+        return []
+    errors = []
+    for item_id, _src, _dst, qty, serials in lines:
+        if len(serials) > qty:
+            errors.append(f"item {item_id}: {len(serials)} serial(s) for qty {qty}")
+    repeated = [k for k, c in Counter((ln[0], s) for ln in lines for s in ln[4]).items() if c > 1]
+    errors += [f"serial {s} of item {i} appears more than once" for i, s in repeated]
+    if errors:
+        _raise(errors)
+    units = {
+        (u.item_id, u.location_id, u.serial): u
+        for u in SerialUnit.objects.select_for_update()
+        .filter(
+            serial__in={s for ln in lines for s in ln[4]},
+            item_id__in={ln[0] for ln in lines},
+            location_id__in={ln[1] for ln in lines},
+            status=SerialStatus.IN_STOCK,
+        )
+        .order_by("id")
+    }
+    errors = [
+        f"serial {s} of item {item_id}: not in stock at location {src}"
+        for item_id, src, _dst, _qty, serials in lines for s in serials if (item_id, src, s) not in units
+    ]
+    if errors:
+        _raise(errors)
+    locations = {
+        loc.id: loc for loc in Location.objects.filter(id__in={ln[1] for ln in lines} | {ln[2] for ln in lines})
+    }
+    now = timezone.now()
+    moving, history = [], []
+    for item_id, src, dst, _qty, serials in lines:
+        source, target = locations[src], locations[dst]
+        kind = movement_for(source.type, source.subtype, target.type, target.subtype)
+        status = status_for(target.type, target.subtype)
+        for s in serials:
+            u = units[(item_id, src, s)]
+            history.append(SerialMovement(
+                unit=u, ts=now, from_location_id=src, to_location=target, movement_type=kind,
+                ref_model=ref_model, ref_id=ref_id, user=user,
+            ))
+            u.location, u.status, u.updated_at = target, status, now
+            moving.append(u)
+    SerialUnit.objects.bulk_update(moving, ["location", "status", "updated_at"], batch_size=1000)
+    return history
+
+
+def save_history(history: list[SerialMovement], rows: list[StockLedger]):
+    """Insert the movements of relocated units, linked to the batch of their ledger rows."""
+    if not history:
+        return
+    batch_id = rows[0].batch_id if rows else None
+    for m in history:
+        m.batch_id = batch_id
+    SerialMovement.objects.bulk_create(history, batch_size=2000)
+
+
+def serial_history(unit_id: int) -> list[dict]:
+    """Movements of one unit, newest first, read through (unit, ts)."""
+    return list(
+        SerialMovement.objects.filter(unit_id=unit_id)
+        .order_by("-ts", "-id")
+        .values(
+            "ts", "movement_type", "from_location", "from_location__code", "to_location", "to_location__code",
+            "ref_model", "ref_id", "batch", "user__username",
+        )
+    )
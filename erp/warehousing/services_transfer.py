@@ -0,0 +1,238 @@
+"""Inter-warehouse transfers.
+
+dispatch_transfer() resolves every line with one Item query, checks them against the source
+location's StockBalance rows (locked, one query) and, for a PHYSICAL source, against the
+warehouse's ItemAvailability.physical - reserved like generate_pick_list(), so holds placed
+without a location stay covered; then it posts the outbound leg with one
+post_entries() call: source location -> the source warehouse's IN_TRANSIT bin. The stock stays
+on the source's books, outside its physical bucket, until it is received.
+receive_transfer() posts the inbound leg the same way, IN_TRANSIT -> the destination's RECEIVE
+bin (putaway takes it on from there); partial receipts are allowed.
+
+Both legs take an idempotency key: a repeated dispatch returns the existing TransferOrder, a
+repeated receipt the existing TransferReceipt, with nothing posted. InTransitBalance is
+updated in the same transaction as each leg, so in_transit() answers "what is on the road
+between these warehouses" from one indexed table instead of summing ledger or order lines.
+"""
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .models import (
+    InTransitBalance,
+    ItemAvailability,
+    Location,
+    LocationType,
+    MovementType,
+    StockBalance,
+    StockLedger,
+    TransferOrder,
+    TransferOrderLine,
+    TransferReceipt,
+    TransferStatus,
+    VirtualSubtype,
+    WarehouseStatus,
+)
+from .services import get_virtual, post_entries
+from .services_grn import MAX_LINES, resolve_lines
+
+ZERO = Decimal("0")
+TRANSFER_REF_MODEL = "TRANSFER"
+
+
+def _merge(resolved) -> dict[int, Decimal]:
+    per_item: dict[int, Decimal] = {}
+    for item_id, qty in resolved:
+        per_item[item_id] = per_item.get(item_id, ZERO) + qty
+    return per_item
+
+
+def _adjust_in_transit(source_id: int, dest_id: int, delta: dict[int, Decimal]):
+    # Rows are created on first use, then locked and rewritten with one bulk UPDATE
+    InTransitBalance.objects.bulk_create(
+        [InTransitBalance(source_warehouse_id=source_id, dest_warehouse_id=dest_id, item_id=i) for i in sorted(delta)],
+        ignore_conflicts=True,
+    )
+    rows = list(
+        InTransitBalance.objects.select_for_update()
+        .filter(source_warehouse_id=source_id, dest_warehouse_id=dest_id, item_id__in=delta)
+        .order_by("item_id")
+    )
+    now = timezone.now()
+    for r in rows:
+        r.qty += delta[r.item_id]
+        r.updated_at = now
+    InTransitBalance.objects.bulk_update(rows, ["qty", "updated_at"], batch_size=1000)
+
+
+def _source_location(source, from_location_id: int | None) -> Location:
+    if from_location_id is None:
+        return get_virtual(source, VirtualSubtype.DISPATCH)
+    loc = Location.objects.filter(id=from_location_id, warehouse=source).first()
+    if loc is None:
+        raise ValidationError("from_location must be a location of the source warehouse")
+    if loc.status != WarehouseStatus.ACTIVE or (loc.type != LocationType.PHYSICAL and loc.subtype != VirtualSubtype.DISPATCH):
+        raise ValidationError("from_location must be an active PHYSICAL location or the DISPATCH bin")
+    return loc
+
+
+@transaction.atomic
+def dispatch_transfer(source, dest, lines: list[dict], *, from_location_id: int | None = None, user=None,
+                      reference: str = "", memo: str = "", idempotency_key: str = "") -> tuple[TransferOrder, bool]:
+    """Send ``lines`` ({"item" or "sku", "qty"}) from ``source`` to ``dest``, taking the stock
+    from ``from_location_id`` (default: the source's DISPATCH bin, where pick lists leave it).
+    Returns (transfer, duplicate); duplicate is True when the key was already used."""
+    if source.pk == dest.pk:
+        raise ValidationError("Source and destination warehouses must differ")
+    if dest.status != WarehouseStatus.ACTIVE:
+        raise ValidationError("Destination warehouse is not active")
+    if not lines:
+        raise ValidationError("At least one line is required")
+    if len(lines) > MAX_LINES:
+        raise ValidationError(f"At most {MAX_LINES} lines per transfer")
+    key = (idempotency_key or "").strip()[:64]
+    if key:
+        existing = TransferOrder.objects.filter(source_warehouse=source, idempotency_key=key).first()
+        if existing is not None:
+            return existing, True
+    per_item = _merge(resolve_lines(lines))
+    src = _source_location(source, from_location_id)
+    transit = get_virtual(source, VirtualSubtype.IN_TRANSIT)
+    short = []
+    if src.type == LocationType.PHYSICAL:
+        # Same lock order as generate_pick_list(): ItemAvailability, then StockBalance
+        atp = {
+            item_id: physical - reserved
+            for item_id, physical, reserved in ItemAvailability.objects.select_for_update()
+            .filter(warehouse=source, item_id__in=per_item)
+            .order_by("item_id")
+            .values_list("item_id", "physical", "reserved")
+        }
+        short = [f"item {i}: requested {q}, available in the warehouse {atp.get(i, ZERO)}" for i, q in per_item.items() if atp.get(i, ZERO) < q]
+    free = {
+        item_id: qty - reserved
+        for item_id, qty, reserved in StockBalance.objects.select_for_update()
+        .filter(location=src, item_id__in=per_item)
+        .order_by("item_id")
+        .values_list("item_id", "qty", "reserved")
+    }
+    short += [f"item {i}: requested {q}, available {free.get(i, ZERO)}" for i, q in per_item.items() if free.get(i, ZERO) < q]
+    if short:
+        raise ValidationError([f"Insufficient stock at {src.code or src.subtype}"] + short[:50])
+    try:
+        with transaction.atomic():
+            order = TransferOrder.objects.create(
+                source_warehouse=source,
+                dest_warehouse=dest,
+                from_location=src,
+                reference=(reference or "")[:100],
+                memo=memo or "",
+                idempotency_key=key,
+                line_count=len(per_item),
+                total_qty=sum(per_item.values(), ZERO),
+                created_by=user,
+            )
+    except IntegrityError:
+        existing = TransferOrder.objects.filter(source_warehouse=source, idempotency_key=key).first() if key else None
+        if existing is None:
+            raise
+        return existing, True
+    TransferOrderLine.objects.bulk_create(
+        [TransferOrderLine(transfer=order, line_no=n, item_id=item_id, qty_shipped=qty) for n, (item_id, qty) in enumerate(per_item.items(), 1)],
+        batch_size=2000,
+    )
+    entries = []
+    for item_id, qty in per_item.items():
+        for loc, delta in ((src, -qty), (transit, qty)):
+            entries.append(StockLedger(
+                warehouse=source, location=loc, item_id=item_id, qty_delta=delta,
+                movement_type=MovementType.TRANSFER_OUT, ref_model=TRANSFER_REF_MODEL, ref_id=order.number,
+                memo=order.reference, user=user,
+            ))
+    post_entries(entries)
+    _adjust_in_transit(source.pk, dest.pk, per_item)
+    return order, False
+
+
+@transaction.atomic
+def receive_transfer(transfer, lines: list[dict] | None = None, *, user=None, idempotency_key: str = "") -> tuple[TransferReceipt, bool]:
+    """Receive ``lines`` ({"item" or "sku", "qty"}) of an in-transit order into the
+    destination's RECEIVE bin; without lines, everything still outstanding. Returns
+    (receipt, duplicate); duplicate is True when the key was already used on this order."""
+    order = TransferOrder.objects.select_for_update().get(pk=transfer.pk)
+    key = (idempotency_key or "").strip()[:64]
+    if key:
+        existing = TransferReceipt.objects.filter(transfer=order, idempotency_key=key).first()
+        if existing is not None:
+            return existing, True
+    if order.status != TransferStatus.IN_TRANSIT:
+        raise ValidationError(f"Transfer {order.number} is {order.get_status_display().lower()}")
+    if lines and len(lines) > MAX_LINES:
+        raise ValidationError(f"At most {MAX_LINES} lines per receipt")
+    order_lines = {ln.item_id: ln for ln in order.lines.all()}
+    outstanding = {i: ln.qty_shipped - ln.qty_received for i, ln in order_lines.items()}
+    if lines:
+        per_item = _merge(resolve_lines(lines))
+        errors = [
+            f"item {i}: receiving {q}, outstanding {outstanding.get(i, ZERO)}"
+            for i, q in per_item.items() if q > outstanding.get(i, ZERO)
+        ]
+        if errors:
+            raise ValidationError(["Received quantity exceeds what was shipped"] + errors[:50])
+    else:
+        per_item = {i: q for i, q in outstanding.items() if q > 0}
+    if not per_item:
+        raise ValidationError("Nothing to receive")
+    transit = get_virtual(order.source_warehouse, VirtualSubtype.IN_TRANSIT)
+    receive_bin = get_virtual(order.dest_warehouse, VirtualSubtype.RECEIVE)
+    receipt = TransferReceipt.objects.create(
+        transfer=order, idempotency_key=key, line_count=len(per_item), total_qty=sum(per_item.values(), ZERO), created_by=user,
+    )
+    entries = []
+    for item_id, qty in per_item.items():
+        entries.append(StockLedger(
+            warehouse_id=order.source_warehouse_id, location=transit, item_id=item_id, qty_delta=-qty,
+            movement_type=MovementType.TRANSFER_IN, ref_model=TRANSFER_REF_MODEL, ref_id=order.number, user=user,
+        ))
+        entries.append(StockLedger(
+            warehouse_id=order.dest_warehouse_id, location=receive_bin, item_id=item_id, qty_delta=qty,
+            movement_type=MovementType.TRANSFER_IN, ref_model=TRANSFER_REF_MODEL, ref_id=order.number, user=user,
+        ))
+        order_lines[item_id].qty_received += qty
+    post_entries(entries)
+    TransferOrderLine.objects.bulk_update([order_lines[i] for i in per_item], ["qty_received"], batch_size=1000)
+    _adjust_in_transit(order.source_warehouse_id, order.dest_warehouse_id, {i: -q for i, q in per_item.items()})
+    if all(ln.qty_received >= ln.qty_shipped for ln in order_lines.values()):
+        order.status, order.received_at = TransferStatus.RECEIVED, timezone.now()
+        order.save(update_fields=["status", "received_at"])
+    return receipt, False
+
+
+def in_transit(*, source_id: int | None = None, dest_id: int | None = None, item_ids=None) -> list[dict]:
+    """Open in-transit quantities, {"source_warehouse", "dest_warehouse", "item", "qty"},
+    read from InTransitBalance."""
+    qs = InTransitBalance.objects.filter(qty__gt=0)
+    if source_id:
+        qs = qs.filter(source_warehouse_id=source_id)
+    if dest_id:
+        qs = qs.filter(dest_warehouse_id=dest_id)
+    if item_ids:
+        qs = qs.filter(item_id__in=item_ids)
+    return list(
+        qs.order_by("source_warehouse_id", "dest_warehouse_id", "item_id").values("source_warehouse", "dest_warehouse", "item", "qty")
+    )
+
+
+def in_transit_totals(*, warehouse_id: int | None = None) -> list[dict]:
+    """Open in-transit quantity per warehouse pair, optionally only pairs touching ``warehouse_id``."""
+    qs = InTransitBalance.objects.filter(qty__gt=0)
+    if warehouse_id:
+        qs = qs.filter(Q(source_warehouse_id=warehouse_id) | Q(dest_warehouse_id=warehouse_id))
+    return list(
+        qs.values("source_warehouse", "dest_warehouse")
+        .annotate(items=Count("id"), qty=Sum("qty"))
+        .order_by("source_warehouse", "dest_warehouse")
+    )
@@ -0,0 +1,158 @@
+"""SKU velocity and ABC/XYZ classification per warehouse (ItemVelocity).
+
+Outbound demand for the window is fetched with one grouped values_list query
+(item, local day) -> (qty, lines) and everything after that is NumPy: per-item
+totals/variance via bincount, ABC from the cumulative quantity share, XYZ from the
+coefficient of variation of daily demand, and days of cover against PHYSICAL on-hand
+(StockBalance).
+Results replace the warehouse's ItemVelocity rows in one transaction.
+"""
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import ItemVelocity, LocationType, MovementType, StockBalance, StockLedger
+from .services import local_day_bounds
+
+try:  # optional dependency
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+# Stock leaving PHYSICAL locations for these reasons is demand: picks to DISPATCH and shipments
+# to another warehouse. Everything else (putaway, internal moves, adjustments, counts, bins
+# cleared to RETURN, serials moved to DAMAGE/LOST) only relocates or writes off stock.
+DEMAND_MOVEMENTS = [
+    MovementType.PICK,
+    MovementType.TRANSFER_OUT,
+]
+DEFAULT_DAYS = 90
+A_SHARE = 0.80
+B_SHARE = 0.95
+X_CV = 0.5
+Y_CV = 1.0
+
+
+def require_numpy():
+    if np is None:
+        raise RuntimeError("numpy is required for velocity classification (pip install numpy)")
+
+
+def outbound_queryset(warehouse_id: int, date_from: date, date_to: date):
+    return (
+        StockLedger.objects.filter(
+            warehouse_id=warehouse_id,
+            ts__gte=local_day_bounds(date_from)[0],
+            ts__lt=local_day_bounds(date_to)[1],
+            location__type=LocationType.PHYSICAL,
+            qty_delta__lt=0,
+            movement_type__in=DEMAND_MOVEMENTS,
+        )
+    )
+
+
+def classify_abc(totals, a_share: float = A_SHARE, b_share: float = B_SHARE):
+    """Return (classes, ranks) for per-item totals. An item is A while the cumulative share of
+    the items ranked above it is below a_share, B below b_share, otherwise C; no demand is C."""
+    order = np.argsort(-totals, kind="stable")
+    ranks = np.empty(len(totals), dtype=np.int64)
+    ranks[order] = np.arange(1, len(totals) + 1)
+    grand = totals.sum()
+    classes = np.full(len(totals), "C", dtype="<U1")
+    if grand > 0:
+        sorted_totals = totals[order]
+        before = (np.cumsum(sorted_totals) - sorted_totals) / grand
+        cls_sorted = np.where(before < a_share, "A", np.where(before < b_share, "B", "C"))
+        cls_sorted[sorted_totals <= 0] = "C"
+        classes[order] = cls_sorted
+    return classes, ranks
+
+
+def classify_xyz(cv, x_cv: float = X_CV, y_cv: float = Y_CV):
+    """X/Y/Z by coefficient of variation; NaN (no demand) is Z."""
+    safe = np.where(np.isnan(cv), np.inf, cv)
+    return np.where(safe <= x_cv, "X", np.where(safe <= y_cv, "Y", "Z"))
+
+
+@transaction.atomic
+def compute_item_velocity(warehouse_id: int, *, days: int = DEFAULT_DAYS, end: date | None = None) -> dict:
+    """Recompute ItemVelocity for one warehouse over the ``days`` local days ending at ``end``."""
+    require_numpy()
+    days = max(int(days), 1)
+    end = end or timezone.localdate()
+    start = end - timedelta(days=days - 1)
+
+    demand = list(
+        outbound_queryset(warehouse_id, start, end)
+        .annotate(day=TruncDate("ts"))
+        .values_list("item_id", "day")
+        .annotate(q=Sum("qty_delta"), n=Count("id"))
+        .order_by()
+    )
+    stock = list(
+        StockBalance.objects.filter(warehouse_id=warehouse_id, location__type=LocationType.PHYSICAL)
+        .values_list("item_id")
+        .annotate(q=Sum("qty"))
+        .order_by()
+    )
+
+    n = len(demand)
+    d_items = np.fromiter((r[0] for r in demand), dtype=np.int64, count=n)
+    d_qty = -np.fromiter((float(r[2]) for r in demand), dtype=np.float64, count=n)
+    d_lines = np.fromiter((r[3] for r in demand), dtype=np.int64, count=n)
+    s_items = np.fromiter((r[0] for r in stock), dtype=np.int64, count=len(stock))
+    s_qty = np.fromiter((float(r[1] or 0) for r in stock), dtype=np.float64, count=len(stock))
+
+    # Items with demand or stock; ids are sorted so searchsorted maps rows to positions.
+    items = np.union1d(d_items, s_items[s_qty != 0])
+    m = len(items)
+    d_idx = np.searchsorted(items, d_items)
+    totals = np.bincount(d_idx, weights=d_qty, minlength=m)
+    sq_totals = np.bincount(d_idx, weights=d_qty * d_qty, minlength=m)
+    lines = np.bincount(d_idx, weights=d_lines, minlength=m).astype(np.int64)
+    active = np.bincount(d_idx, minlength=m)
+    on_hand = np.zeros(m)
+    keep = np.isin(s_items, items)
+    on_hand[np.searchsorted(items, s_items[keep])] = s_qty[keep]
+
+    # Days without movement count as zero demand.
+    mean = totals / days
+    std = np.sqrt(np.maximum(sq_totals / days - mean * mean, 0.0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cv = np.where(mean > 0, std / mean, np.nan)
+        cover = np.where(mean > 0, np.maximum(on_hand, 0) / mean, np.nan)
+    abc, ranks = classify_abc(totals)
+    xyz = classify_xyz(cv)
+
+    def opt(v):
+        return None if np.isnan(v) else round(float(v), 4)
+
+    objs = [
+        ItemVelocity(
+            warehouse_id=warehouse_id,
+            item_id=int(items[i]),
+            period_start=start,
+            period_end=end,
+            outbound_qty=round(float(totals[i]), 3),
+            outbound_lines=int(lines[i]),
+            active_days=int(active[i]),
+            avg_daily_qty=round(float(mean[i]), 4),
+            std_daily_qty=round(float(std[i]), 4),
+            cv=opt(cv[i]),
+            abc_class=str(abc[i]),
+            xyz_class=str(xyz[i]),
+            rank=int(ranks[i]),
+            on_hand=round(float(on_hand[i]), 3),
+            days_of_cover=opt(cover[i]),
+        )
+        for i in range(m)
+    ]
+    ItemVelocity.objects.filter(warehouse_id=warehouse_id).delete()
+    ItemVelocity.objects.bulk_create(objs, batch_size=2000)
+    classes = {}
+    for a, x in zip(abc.tolist(), xyz.tolist()):
+        classes[a + x] = classes.get(a + x, 0) + 1
+    return {"warehouse": warehouse_id, "period_start": start, "period_end": end, "items": m, "classes": dict(sorted(classes.items()))}
@@ -1,10 +1,130 @@
-from django.db.models.signals import post_save
+from django.conf import settings
+from decimal import Decimal
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
-from .models import Warehouse
-from .services import create_standard_virtual_bins
+from catalog.models import Item
+from .models import Warehouse, Location, StockLedger, AdjustmentRequest
+from .outbox import emit, emit_ledger_posted
+from .services import check_serialized_stock, create_standard_virtual_bins, ledger_posted
+from .services_rollup import apply_daily_rollup
+from .services_aging import apply_aging
+from .services_balance import apply_stock_balance
+from .services_availability import apply_availability
+from .services_lots import apply_lot_balance, assign_lots
+from .services_ledger_view import apply_ledger_view, refresh_item, refresh_location, refresh_user
+from .services_reorder import evaluate_keys
+from .services_reservation import reserved_changed
 
 
 @receiver(post_save, sender=Warehouse)
 def create_bins_on_warehouse_create(sender, instance: Warehouse, created, **kwargs):
     if created:
         create_standard_virtual_bins(instance)
+
+
+@receiver(pre_save, sender=StockLedger)
+def assign_single_row_lot(sender, instance: StockLedger, raw=False, **kwargs):
+    # The checks post_entries() applies to a batch; a row spanning several lots cannot be split here
+    if raw or not instance._state.adding or Decimal(instance.qty_delta) >= 0:
+        return
+    with transaction.atomic():
+        check_serialized_stock([instance])
+        rows = assign_lots([instance])
+    if len(rows) > 1:
+        raise ValidationError(f"Item {instance.item_id} at location {instance.location_id} spans several lots; post it with post_entries()")
+    instance.lot_id = rows[0].lot_id
+
+
+@receiver(post_save, sender=StockLedger)
+def forward_single_ledger_row(sender, instance: StockLedger, created, raw=False, **kwargs):
+    # Rows saved one by one (management commands, tests) reach the same receivers as post_entries()
+    if created and not raw:
+        ledger_posted.send(sender=StockLedger, rows=[instance])
+
+
+@receiver(ledger_posted, sender=StockLedger)
+def update_stock_balance(sender, rows, **kwargs):
+    apply_stock_balance(rows)
+
+
+@receiver(ledger_posted, sender=StockLedger)
+def update_lot_balance(sender, rows, **kwargs):
+    apply_lot_balance(rows)
+
+
+@receiver(ledger_posted, sender=StockLedger)
+def update_ledger_view(sender, rows, **kwargs):
+    # Must stay after update_stock_balance: the on-hand columns are derived from StockBalance
+    apply_ledger_view(rows)
+
+
+@receiver(ledger_posted, sender=StockLedger)
+def update_item_availability(sender, rows, **kwargs):
+    apply_availability(rows)
+
+
+@receiver(ledger_posted, sender=StockLedger)
+def update_daily_rollup(sender, rows, **kwargs):
+    apply_daily_rollup(rows)
+
+
+@receiver(ledger_posted, sender=StockLedger)
+def update_stock_aging(sender, rows, **kwargs):
+    apply_aging(rows)
+
+
+@receiver(ledger_posted, sender=StockLedger)
+def ledger_outbox_event(sender, rows, **kwargs):
+    emit_ledger_posted(rows)
+
+
+@receiver(reserved_changed)
+def reorder_alerts_on_reservation(sender, keys, **kwargs):
+    # Reserve, release, consume and expiry change availability without a ledger row
+    evaluate_keys(keys)
+
+
+@receiver(post_save, sender=Item)
+def ledger_view_item_renamed(sender, instance: Item, created, raw=False, **kwargs):
+    if not created and not raw:
+        refresh_item(instance)
+
+
+@receiver(post_save, sender=Location)
+def ledger_view_location_renamed(sender, instance: Location, created, raw=False, **kwargs):
+    if not created and not raw:
+        refresh_location(instance)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def ledger_view_user_renamed(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    # Logins save last_login only; skip those
+    if not created and not raw and (update_fields is None or "username" in update_fields):
+        refresh_user(instance)
+
+
+def _adjustment_payload(adj: AdjustmentRequest) -> dict:
+    return {
+        "number": adj.number,
+        "type": adj.type,
+        "status": adj.status,
+        "item": adj.item_id,
+        "source_location": adj.source_location_id,
+        "qty": adj.qty,
+    }
+
+
+@receiver(post_save, sender=AdjustmentRequest)
+def adjustment_outbox_event(sender, instance: AdjustmentRequest, created, raw=False, update_fields=None, **kwargs):
+    # Status only changes through approve/decline, which save with update_fields
+    if raw or not (created or (update_fields and "status" in update_fields)):
+        return
+    topic = "adjustment.requested" if created else f"adjustment.{str(instance.status).lower()}"
+    emit(topic, _adjustment_payload(instance), warehouse_id=instance.warehouse_id, aggregate_type="warehousing.AdjustmentRequest", aggregate_id=instance.id)
+
+
+@receiver(post_delete, sender=AdjustmentRequest)
+def adjustment_deleted_outbox_event(sender, instance: AdjustmentRequest, **kwargs):
+    emit("adjustment.deleted", _adjustment_payload(instance), warehouse_id=instance.warehouse_id, aggregate_type="warehousing.AdjustmentRequest", aggregate_id=instance.id)
@@ -0,0 +1,187 @@
+"""Slow-query capture for the ledger-heavy endpoints.
+
+A connection.execute_wrapper times every statement; anything slower than
+settings.SLOW_QUERY_THRESHOLD_MS is recorded in SlowQuery keyed by a fingerprint of
+the normalized SQL. The first sighting of a fingerprint also stores an
+EXPLAIN (ANALYZE, BUFFERS) plan obtained by replaying the statement inside a
+savepoint that is always rolled back.
+"""
+import hashlib
+import json
+import logging
+import re
+import sys
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)")
+_WS_RE = re.compile(r"\s+")
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+_SKIP_TABLES = ("warehousing_slowquery",)
+
+
+def threshold_ms() -> float:
+    return float(getattr(settings, "SLOW_QUERY_THRESHOLD_MS", 0) or 0)
+
+
+def normalize_sql(sql: str) -> str:
+    """Strip literals and collapse IN-lists so equivalent statements share one fingerprint."""
+    s = _STRING_RE.sub("?", sql)
+    s = _NUMBER_RE.sub("?", s)
+    s = _IN_LIST_RE.sub("(...)", s)
+    return _WS_RE.sub(" ", s).strip()
+
+
+def fingerprint(sql: str) -> str:
+    return hashlib.sha1(normalize_sql(sql).encode()).hexdigest()
+
+
+def _find_caller() -> str:
+    """Return 'module.function' of the innermost frame that belongs to the project (not Django/DRF)."""
+    base = str(getattr(settings, "BASE_DIR", ""))
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        module = frame.f_globals.get("__name__", "")
+        if (
+            base
+            and filename.startswith(base)
+            and "site-packages" not in filename
+            and module != __name__
+        ):
+            code = frame.f_code
+            return f"{module}.{getattr(code, 'co_qualname', code.co_name)}"[:255]
+        frame = frame.f_back
+    return ""
+
+
+def _explain(connection, sql: str, params) -> str:
+    """Replay the statement under EXPLAIN inside a savepoint that is rolled back.
+    Falls back to a plain EXPLAIN when ANALYZE fails (e.g. the replayed INSERT hits a unique key)."""
+    if connection.vendor != "postgresql":
+        return ""
+    for prefix in ("EXPLAIN (ANALYZE, BUFFERS, FORMAT TEXT) ", "EXPLAIN (FORMAT TEXT) "):
+        try:
+            with transaction.atomic(using=connection.alias):
+                with connection.cursor() as cur:
+                    cur.execute(prefix + sql, params)
+                    plan = "\n".join(str(r[0]) for r in cur.fetchall())
+                transaction.set_rollback(True, using=connection.alias)
+            return plan
+        except Exception as e:  # noqa: BLE001 - instrumentation must never break the caller
+            logger.debug("slow_queries.explain failed prefix=%s err=%s", prefix.strip(), e)
+    return ""
+
+
+def record(connection, sql: str, params, duration_ms: float, *, many: bool = False):
+    fp = fingerprint(sql)
+    now = timezone.now()
+    context = getattr(_local, "context", "") or ""
+    try:
+        params_text = json.dumps(params if not many else list(params or [])[:1], default=str)[:4000]
+    except Exception:
+        params_text = ""
+    with transaction.atomic(using=connection.alias):
+        from .models import SlowQuery
+
+        updated = SlowQuery.objects.using(connection.alias).filter(fingerprint=fp).update(
+            calls=F("calls") + 1,
+            last_ms=duration_ms,
+            total_ms=F("total_ms") + duration_ms,
+            last_seen=now,
+            sample_sql=sql,
+            sample_params=params_text,
+            context=context[:255],
+        )
+        if updated:
+            SlowQuery.objects.using(connection.alias).filter(fingerprint=fp, max_ms__lt=duration_ms).update(max_ms=duration_ms)
+            return
+    plan = ""
+    if not many and sql.lstrip().upper().startswith(_EXPLAINABLE):
+        plan = _explain(connection, sql, params)
+    with transaction.atomic(using=connection.alias):
+        from .models import SlowQuery
+
+        obj, created = SlowQuery.objects.using(connection.alias).get_or_create(
+            fingerprint=fp,
+            defaults={
+                "normalized_sql": normalize_sql(sql),
+                "sample_sql": sql,
+                "sample_params": params_text,
+                "caller": _find_caller(),
+                "context": context[:255],
+                "last_ms": duration_ms,
+                "max_ms": duration_ms,
+                "total_ms": duration_ms,
+                "explain_plan": plan,
+                "last_seen": now,
+            },
+        )
+        if not created:
+            SlowQuery.objects.using(connection.alias).filter(pk=obj.pk).update(
+                calls=F("calls") + 1, total_ms=F("total_ms") + duration_ms, last_ms=duration_ms, last_seen=now
+            )
+
+
+class SlowQueryRecorder:
+    """execute_wrapper callable; see https://docs.djangoproject.com/en/5.0/topics/db/instrumentation/"""
+
+    def __init__(self, connection, threshold: float | None = None):
+        self.connection = connection
+        self.threshold = threshold_ms() if threshold is None else threshold
+
+    def __call__(self, execute, sql, params, many, context):
+        if getattr(_local, "busy", False) or self.threshold <= 0:
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration_ms = (time.perf_counter() - start) * 1000.0
+        if duration_ms >= self.threshold and not any(t in sql for t in _SKIP_TABLES):
+            _local.busy = True
+            try:
+                record(self.connection, sql, params, duration_ms, many=many)
+            except Exception as e:  # noqa: BLE001
+                logger.warning("slow_queries.record failed: %s", e)
+            finally:
+                _local.busy = False
+        return result
+
+
+@contextmanager
+def capture_slow_queries(context: str = "", threshold: float | None = None):
+    """Install the recorder on every configured connection for the duration of the block.
+    Use from management commands / shell; HTTP requests are covered by SlowQueryMiddleware."""
+    previous = getattr(_local, "context", "")
+    _local.context = context
+    try:
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(SlowQueryRecorder(conn, threshold)))
+            yield
+    finally:
+        _local.context = previous
+
+
+class SlowQueryMiddleware:
+    """Capture slow statements issued while serving a request (no-op when the threshold is 0)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if threshold_ms() <= 0:
+            return self.get_response(request)
+        with capture_slow_queries(context=f"{request.method} {request.path}"):
+            return self.get_response(request)
@@ -242,3 +242,1003 @@ class PutawayConcurrencyTests(TransactionTestCase):
         # Verify only one set of ledger entries exists
         lost_rows = StockLedger.objects.filter(warehouse=self.wh, ref_model='PUTAWAY', ref_id=client_key, movement_type=MovementType.PUTAWAY_LOST)
         self.assertEqual(lost_rows.count(), 2)
+
+
+class SlowQueryFingerprintTests(TestCase):
+    def test_literals_and_in_lists_share_fingerprint(self):
+        from .slow_queries import fingerprint, normalize_sql
+        a = "SELECT * FROM t WHERE id IN (%s, %s, %s) AND code = 'A1' LIMIT 25"
+        b = "SELECT *  FROM t WHERE id IN (%s, %s) AND code = 'B7'\n LIMIT 10"
+        self.assertEqual(fingerprint(a), fingerprint(b))
+        self.assertEqual(normalize_sql(a), "SELECT * FROM t WHERE id IN (...) AND code = ? LIMIT ?")
+
+    def test_recorder_deduplicates_by_fingerprint(self):
+        from django.db import connection
+        from .models import SlowQuery
+        from .slow_queries import record
+        record(connection, "SELECT %s", [1], 12.5)
+        record(connection, "SELECT %s", [2], 40.0)
+        sq = SlowQuery.objects.get()
+        self.assertEqual(sq.calls, 2)
+        self.assertEqual(sq.max_ms, 40.0)
+        # First sighting replays the statement under EXPLAIN inside a rolled-back savepoint
+        self.assertIn("Result", sq.explain_plan)
+
+
+class LedgerArchiveTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create(username='archiver', is_staff=True)
+        self.brand = Brand.objects.create(name='B')
+        self.root_cat = Category.objects.create(name='Root')
+        self.child_cat = Category.objects.create(name='Child', parent=self.root_cat)
+        self.uom = UoM.objects.create(code='EA', name='Each', ratio_to_base=1, base=True)
+        self.tax = TaxRate.objects.create(name='GST0', percent=0)
+        self.item = Item.objects.create(
+            name='Arch Item', product_type='GOODS', brand=self.brand, category=self.child_cat,
+            uom=self.uom, tax_rate=self.tax, status='ACTIVE'
+        )
+        self.wh = Warehouse.objects.create(
+            code='W9', name='WH9', status='ACTIVE', gstin='27ABCDE1234F1Z9',
+            address_line1='', address_line2='', city='X', state='Y', pincode='123456', country='India',
+            latitude=0, longitude=0
+        )
+        self.loc = Location.objects.create(warehouse=self.wh, type=LocationType.PHYSICAL, code='A1', display_name='A1')
+        for qty in ('10', '-3', '5'):
+            StockLedger.objects.create(warehouse=self.wh, location=self.loc, item=self.item, qty_delta=Decimal(qty), movement_type=MovementType.TRANSFER, ref_model='SEED')
+
+    def test_archive_keeps_balance_and_reimports(self):
+        import tempfile
+        from datetime import date, datetime, timezone as dt_timezone
+        from django.db.models import Sum
+        from .models import StockLedgerArchive
+        from .services_archive import archive_ledger, import_archive
+        old = datetime(2020, 6, 1, tzinfo=dt_timezone.utc)
+        from .ledger_audit import ledger_maintenance
+        with ledger_maintenance():
+            StockLedger.objects.filter(warehouse=self.wh).update(ts=old)
+        with tempfile.TemporaryDirectory() as tmp:
+            res = archive_ledger(before=date(2021, 1, 1), out_dir=tmp, fmt='ndjson')
+            self.assertEqual(res['rows'], 3)
+            self.assertEqual(res['opening_rows'], 1)
+            rows = StockLedger.objects.filter(warehouse=self.wh)
+            self.assertEqual(rows.count(), 1)
+            self.assertEqual(rows.get().movement_type, MovementType.OPENING_BALANCE)
+            self.assertEqual(rows.aggregate(s=Sum('qty_delta'))['s'], Decimal('12'))
+            imp = import_archive(res['path'])
+            self.assertEqual(imp['imported'], 3)
+            self.assertEqual(StockLedgerArchive.objects.filter(archive=res['archive']).aggregate(s=Sum('qty_delta'))['s'], Decimal('12'))
+
+
+class LedgerFixtureMixin:
+    """One warehouse, one item and two PHYSICAL locations with 10 units seeded at A1."""
+
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create(username='roller', is_staff=True)
+        self.brand = Brand.objects.create(name='B')
+        self.root_cat = Category.objects.create(name='Root')
+        self.child_cat = Category.objects.create(name='Child', parent=self.root_cat)
+        self.uom = UoM.objects.create(code='EA', name='Each', ratio_to_base=1, base=True)
+        self.tax = TaxRate.objects.create(name='GST0', percent=0)
+        self.item = Item.objects.create(
+            name='Roll Item', product_type='GOODS', brand=self.brand, category=self.child_cat,
+            uom=self.uom, tax_rate=self.tax, status='ACTIVE'
+        )
+        self.wh = Warehouse.objects.create(
+            code='W8', name='WH8', status='ACTIVE', gstin='27ABCDE1234F1Z8',
+            address_line1='', address_line2='', city='X', state='Y', pincode='123456', country='India',
+            latitude=0, longitude=0
+        )
+        self.a = Location.objects.create(warehouse=self.wh, type=LocationType.PHYSICAL, code='A1', display_name='A1')
+        self.b = Location.objects.create(warehouse=self.wh, type=LocationType.PHYSICAL, code='B1', display_name='B1')
+        StockLedger.objects.create(warehouse=self.wh, location=self.a, item=self.item, qty_delta=Decimal('10'), movement_type=MovementType.TRANSFER, ref_model='SEED')
+
+
+class LedgerDailyRollupTests(LedgerFixtureMixin, TestCase):
+    def _rollup(self):
+        from .models import LedgerDailyRollup
+        return {
+            (r.movement_type, r.location_subtype): (r.entries, r.qty_in, r.qty_out)
+            for r in LedgerDailyRollup.objects.filter(warehouse=self.wh)
+        }
+
+    def test_postings_increment_and_rebuild_matches(self):
+        from django.utils import timezone
+        from .services_rollup import rebuild_daily_rollup
+        post_internal_move(self.user, [InternalMoveLine(item_id=self.item.id, source_location_id=self.a.id, target_location_id=self.b.id, qty=Decimal('4'))], batch_ref_id='roll-1')
+        live = self._rollup()
+        self.assertEqual(live[(MovementType.TRANSFER, 'STORAGE')], (1, Decimal('10'), Decimal('0')))
+        self.assertEqual(live[(MovementType.INTERNAL_TRANSFER, 'STORAGE')], (2, Decimal('4'), Decimal('4')))
+        today = timezone.localdate()
+        rebuild_daily_rollup(date_from=today, date_to=today, warehouse_ids=[self.wh.id])
+        rebuild_daily_rollup(date_from=today, date_to=today, warehouse_ids=[self.wh.id])
+        self.assertEqual(self._rollup(), live)
+
+    def test_rollup_rebuild_keeps_archived_days(self):
+        import tempfile
+        from datetime import date, datetime, timezone as dt_timezone
+        from .ledger_audit import ledger_maintenance
+        from .models import LedgerDailyRollup
+        from .services_archive import archive_ledger
+        from .services_rollup import rebuild_daily_rollup
+        with ledger_maintenance():
+            StockLedger.objects.filter(warehouse=self.wh).update(ts=datetime(2020, 6, 1, 12, tzinfo=dt_timezone.utc))
+        rebuild_daily_rollup(date_from=date(2020, 6, 1), date_to=date(2020, 6, 1), warehouse_ids=[self.wh.id])
+        before = list(LedgerDailyRollup.objects.filter(warehouse=self.wh, day__lt=date(2021, 1, 1)).values_list('day', 'entries', 'qty_in', 'qty_out'))
+        self.assertEqual(before, [(date(2020, 6, 1), 1, Decimal('10'), Decimal('0'))])
+        with tempfile.TemporaryDirectory() as tmp:
+            archive_ledger(before=date(2021, 1, 1), out_dir=tmp, fmt='ndjson')
+        res = rebuild_daily_rollup(date_from=date(2020, 1, 1), date_to=date(2021, 1, 31), warehouse_ids=[self.wh.id])
+        self.assertEqual((res['created'], res['kept_before']), (0, date(2021, 1, 1)))
+        self.assertEqual(list(LedgerDailyRollup.objects.filter(warehouse=self.wh, day__lt=date(2021, 1, 1)).values_list('day', 'entries', 'qty_in', 'qty_out')), before)
+        self.assertFalse(LedgerDailyRollup.objects.filter(movement_type=MovementType.OPENING_BALANCE).exists())
+
+
+class ItemVelocityTests(TestCase):
+    def test_abc_and_xyz_classification(self):
+        from .services_velocity import classify_abc, classify_xyz, np
+        if np is None:
+            self.skipTest("numpy not installed")
+        totals = np.array([10.0, 700.0, 0.0, 150.0, 140.0])
+        classes, ranks = classify_abc(totals)
+        self.assertEqual(classes.tolist(), ["C", "A", "C", "A", "B"])
+        self.assertEqual(ranks.tolist(), [4, 1, 5, 2, 3])
+        self.assertEqual(classify_xyz(np.array([0.2, 0.8, 3.0, np.nan])).tolist(), ["X", "Y", "Z", "Z"])
+
+
+
+class ItemVelocityDemandTests(LedgerFixtureMixin, TestCase):
+    def test_only_picks_and_shipments_are_demand(self):
+        from .models import ItemVelocity
+        from .services_pick import confirm_pick_list, generate_pick_list
+        from .services_velocity import compute_item_velocity, np
+        if np is None:
+            self.skipTest("numpy not installed")
+        return_bin = Location.objects.get(warehouse=self.wh, type=LocationType.VIRTUAL, subtype=VirtualSubtype.RETURN)
+        # Clearing a bin back to RETURN (zero_stock) is not demand
+        post_internal_move(self.user, [InternalMoveLine(item_id=self.item.id, source_location_id=self.a.id, target_location_id=self.b.id, qty=Decimal('4'))], batch_ref_id='vel-1')
+        StockLedger.objects.create(warehouse=self.wh, location=self.b, item=self.item, qty_delta=Decimal('-1'), movement_type=MovementType.TRANSFER, ref_model='LOCATION_ZERO')
+        StockLedger.objects.create(warehouse=self.wh, location=return_bin, item=self.item, qty_delta=Decimal('1'), movement_type=MovementType.TRANSFER, ref_model='LOCATION_ZERO')
+        confirm_pick_list(generate_pick_list(self.wh, [{'item': self.item.id, 'qty': 2}]), user=self.user)
+        compute_item_velocity(self.wh.id, days=7)
+        v = ItemVelocity.objects.get(warehouse=self.wh, item=self.item)
+        self.assertEqual((v.outbound_qty, v.outbound_lines, v.on_hand), (Decimal('2'), 1, Decimal('7')))
+
+class StockAgingTests(LedgerFixtureMixin, TestCase):
+    def _layers(self):
+        from .models import StockAgingLayer
+        return list(StockAgingLayer.objects.filter(warehouse=self.wh, item=self.item).order_by('received_at', 'id').values_list('qty_remaining', flat=True))
+
+    def test_fifo_layers_follow_postings(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from .models import StockAgingLayer
+        from .services_aging import aging_report
+        StockAgingLayer.objects.filter(warehouse=self.wh).update(received_at=timezone.now() - timedelta(days=45))
+        StockLedger.objects.create(warehouse=self.wh, location=self.b, item=self.item, qty_delta=Decimal('5'), movement_type=MovementType.TRANSFER, ref_model='SEED')
+        self.assertEqual(self._layers(), [Decimal('10'), Decimal('5')])
+        # Internal moves net to zero and keep the receipt dates
+        post_internal_move(self.user, [InternalMoveLine(item_id=self.item.id, source_location_id=self.a.id, target_location_id=self.b.id, qty=Decimal('4'))], batch_ref_id='age-1')
+        self.assertEqual(self._layers(), [Decimal('10'), Decimal('5')])
+        # Outflow consumes the oldest layer first
+        StockLedger.objects.create(warehouse=self.wh, location=self.b, item=self.item, qty_delta=Decimal('-12'), movement_type=MovementType.TRANSFER, ref_model='OUT')
+        self.assertEqual(self._layers(), [Decimal('3')])
+        report = aging_report(self.wh.id)
+        self.assertEqual(report['buckets'], {'0_30': 3.0, '31_60': 0.0, '61_90': 0.0, '90_plus': 0.0})
+
+
+    def test_rebuild_matches_incremental_layers(self):
+        from .models import AdjustmentRequest, AdjustmentType, StockAgingLayer
+        from .services import request_post_moves
+        from .services_aging import rebuild_aging
+        from .services_pick import confirm_pick_list, generate_pick_list
+        StockLedger.objects.create(warehouse=self.wh, location=self.b, item=self.item, qty_delta=Decimal('5'), movement_type=MovementType.TRANSFER, ref_model='SEED')
+        # Moves into counted virtual bins (DISPATCH, DAMAGE_PENDING) are not receipts
+        confirm_pick_list(generate_pick_list(self.wh, [{'item': self.item.id, 'qty': 3}]), user=self.user)
+        adjr = AdjustmentRequest.objects.create(warehouse=self.wh, type=AdjustmentType.DAMAGE, item=self.item, source_location=self.b, qty=Decimal('2'), requested_by=self.user)
+        request_post_moves(adjr, self.user)
+
+        def layers():
+            return list(StockAgingLayer.objects.filter(warehouse=self.wh).order_by('received_at', 'source_ledger_id').values_list('item_id', 'received_at', 'qty_remaining', 'source_ledger_id'))
+        incremental = layers()
+        self.assertEqual([q for _, _, q, _ in incremental], [Decimal('10'), Decimal('5')])
+        rebuild_aging(self.wh.id)
+        self.assertEqual(layers(), incremental)
+
+class ReconcileTests(LedgerFixtureMixin, TestCase):
+    def test_balance_tracks_postings_and_checks_flag_drift(self):
+        from .models import StockBalance
+        from .services_reconcile import check_warehouse
+        post_internal_move(self.user, [InternalMoveLine(item_id=self.item.id, source_location_id=self.a.id, target_location_id=self.b.id, qty=Decimal('4'))], batch_ref_id='rec-1')
+        self.assertEqual(StockBalance.objects.get(location=self.a, item=self.item).qty, Decimal('6'))
+        self.assertEqual(StockBalance.objects.get(location=self.b, item=self.item).qty, Decimal('4'))
+        self.assertTrue(check_warehouse(self.wh.id)['ok'])
+        StockBalance.objects.filter(location=self.b, item=self.item).update(qty=Decimal('5'))
+        StockLedger.objects.bulk_create([StockLedger(warehouse=self.wh, location=self.b, item=self.item, qty_delta=Decimal('-9'), movement_type=MovementType.TRANSFER, ref_model='RAW')])
+        res = check_warehouse(self.wh.id)
+        self.assertFalse(res['ok'])
+        self.assertEqual([(m['location'], m['balance_qty']) for m in res['balance_mismatch']], [(self.b.id, '5')])
+        self.assertEqual([n['location'] for n in res['negative_physical']], [self.b.id])
+
+
+class LedgerChangeFeedTests(LedgerFixtureMixin, TestCase):
+    def test_cursor_pages_through_rows_in_id_order(self):
+        from django.test import override_settings
+        from rest_framework.test import APIClient
+        self.user.is_superuser = True
+        self.user.save()
+        post_internal_move(self.user, [InternalMoveLine(item_id=self.item.id, source_location_id=self.a.id, target_location_id=self.b.id, qty=Decimal('4'))], batch_ref_id='feed-1')
+        client = APIClient()
+        client.force_authenticate(self.user)
+        ids = list(StockLedger.objects.order_by('id').values_list('id', flat=True))
+        with override_settings(LEDGER_FEED_SETTLE_SECONDS=0):
+            page1 = client.get('/api/warehousing/ledger/changes/', {'after': 0, 'limit': 2, 'warehouse': self.wh.id}).json()
+            page2 = client.get('/api/warehousing/ledger/changes/', {'after': page1['next_after'], 'limit': 2}).json()
+        self.assertEqual([r['id'] for r in page1['results']], ids[:2])
+        self.assertTrue(page1['has_more'])
+        self.assertEqual([r['id'] for r in page2['results']], ids[2:])
+        self.assertFalse(page2['has_more'])
+        with override_settings(LEDGER_FEED_SETTLE_SECONDS=3600):
+            held = client.get('/api/warehousing/ledger/changes/', {'after': 0}).json()
+        self.assertEqual((held['results'], held['next_after']), ([], 0))
+
+    def test_archive_opening_rows_are_flagged(self):
+        import tempfile
+        from datetime import date, datetime, timezone as dt_timezone
+        from django.test import override_settings
+        from rest_framework.test import APIClient
+        from .ledger_audit import ledger_maintenance
+        from .services_archive import archive_ledger
+        self.user.is_superuser = True
+        self.user.save()
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with override_settings(LEDGER_FEED_SETTLE_SECONDS=0):
+            seen = client.get('/api/warehousing/ledger/changes/', {'after': 0}).json()
+            self.assertEqual([(r['qty_delta'], r['opening_balance'], r['archive_cutoff']) for r in seen['results']], [(Decimal('10'), False, None)])
+            with ledger_maintenance():
+                StockLedger.objects.filter(warehouse=self.wh).update(ts=datetime(2020, 6, 1, tzinfo=dt_timezone.utc))
+            with tempfile.TemporaryDirectory() as tmp:
+                archive_ledger(before=date(2021, 1, 1), out_dir=tmp, fmt='ndjson')
+            page = client.get('/api/warehousing/ledger/changes/', {'after': seen['next_after']}).json()
+        opening = StockLedger.objects.get(warehouse=self.wh)
+        self.assertEqual([(r['id'], r['qty_delta'], r['opening_balance']) for r in page['results']], [(opening.id, Decimal('10'), True)])
+        self.assertEqual(page['results'][0]['archive_cutoff'], page['results'][0]['ts'])
+
+
+
+class LedgerFeedHorizonTests(LedgerFixtureMixin, TransactionTestCase):
+    def test_rows_behind_a_running_transaction_are_held_back(self):
+        import threading
+        from django.db import connection, transaction
+        from django.test import override_settings
+        from .services import settled_ledger_rows
+        self.enterContext(override_settings(LEDGER_FEED_SETTLE_SECONDS=0))
+        start = StockLedger.objects.order_by('-id').values_list('id', flat=True).first()
+        # Another item and movement type, so the two postings do not wait on each other's read-model rows
+        other = Item.objects.create(name='Other Item', product_type='GOODS', brand=self.brand, category=self.child_cat, uom=self.uom, tax_rate=self.tax, status='ACTIVE')
+        posted, release = threading.Event(), threading.Event()
+
+        def slow_posting():
+            with transaction.atomic():
+                StockLedger.objects.create(warehouse=self.wh, location=self.b, item=self.item, qty_delta=Decimal('1'), movement_type=MovementType.TRANSFER, ref_model='SLOW')
+                posted.set()
+                release.wait(10)
+            connection.close()
+
+        worker = threading.Thread(target=slow_posting)
+        worker.start()
+        posted.wait(10)
+        fast = StockLedger.objects.create(warehouse=self.wh, location=self.b, item=other, qty_delta=Decimal('1'), movement_type=MovementType.RECEIPT, ref_model='FAST')
+        try:
+            rows, fetched = settled_ledger_rows(StockLedger.objects.filter(id__gt=start), ['id'], 10)
+            self.assertEqual((rows, fetched), ([], 1))
+        finally:
+            release.set()
+            worker.join()
+        rows, _fetched = settled_ledger_rows(StockLedger.objects.filter(id__gt=start), ['id'], 10)
+        self.assertEqual([r['id'] for r in rows], [fast.id - 1, fast.id])
+
+class OutboxTests(LedgerFixtureMixin, TestCase):
+    def test_events_written_with_postings_and_dispatched_once(self):
+        from .models import OutboxEvent
+        from .outbox import dispatch_batch, _handlers, register_handler
+        seen = []
+        register_handler('ledger.*', lambda events: seen.extend(e.id for e in events))
+        try:
+            post_internal_move(self.user, [InternalMoveLine(item_id=self.item.id, source_location_id=self.a.id, target_location_id=self.b.id, qty=Decimal('4'))], batch_ref_id='ob-1')
+            ev = OutboxEvent.objects.filter(topic='ledger.posted').order_by('id').last()
+            self.assertEqual(ev.payload['count'], 2)
+            self.assertEqual(ev.payload['ref_id'], 'ob-1')
+            res = dispatch_batch(100)
+            self.assertEqual(res['failed'], 0)
+            self.assertIn(ev.id, seen)
+            self.assertFalse(OutboxEvent.objects.filter(delivered_at__isnull=True).exists())
+            self.assertEqual(dispatch_batch(100)['claimed'], 0)
+        finally:
+            _handlers.clear()
+
+    def test_database_error_in_handler_backs_off(self):
+        from django.db import connection
+        from .models import OutboxEvent
+        from .outbox import dispatch_batch, _handlers, register_handler
+
+        def broken(events):
+            with connection.cursor() as cur:
+                cur.execute('SELECT * FROM no_such_table')
+
+        register_handler('ledger.*', broken)
+        try:
+            post_internal_move(self.user, [InternalMoveLine(item_id=self.item.id, source_location_id=self.a.id, target_location_id=self.b.id, qty=Decimal('4'))], batch_ref_id='ob-2')
+            res = dispatch_batch(100)
+            self.assertEqual((res['delivered'], res['failed'] > 0), (0, True))
+            ev = OutboxEvent.objects.filter(topic='ledger.posted').order_by('id').last()
+            self.assertEqual(ev.attempts, 1)
+            self.assertIn('no_such_table', ev.last_error)
+            self.assertIsNone(ev.delivered_at)
+        finally:
+            _handlers.clear()
+
+
+class LedgerByRefTests(LedgerFixtureMixin, TestCase):
+    def test_lookup_by_ref_without_warehouse(self):
+        from rest_framework.test import APIClient
+        self.user.is_superuser = True
+        self.user.save()
+        post_internal_move(self.user, [InternalMoveLine(item_id=self.item.id, source_location_id=self.a.id, target_location_id=self.b.id, qty=Decimal('4'))], batch_ref_id='ref-42')
+        client = APIClient()
+        client.force_authenticate(self.user)
+        data = client.get('/api/warehousing/ledger/by-ref/', {'ref_id': 'ref-42'}).json()
+        self.assertEqual(data['count'], 2)
+        self.assertEqual(data['ref_models'], ['INTERNAL_MOVE'])
+        self.assertEqual(sorted(r['location_code'] for r in data['results']), ['A1', 'B1'])
+        self.assertEqual(client.get('/api/warehousing/ledger/by-ref/', {'ref_id': 'ref-42', 'ref_model': 'PUTAWAY'}).json()['count'], 0)
+
+
+class LedgerEncodingTests(LedgerFixtureMixin, TestCase):
+    def test_strings_and_quantities_round_trip(self):
+        from django.db import connection
+        from rest_framework.test import APIClient
+        self.user.is_superuser = True
+        self.user.save()
+        from .services_internal_move import post_internal_move_rows
+        post_internal_move_rows(self.wh, self.a.id, self.b.id, [{'item': self.item.id, 'qty': '1.25'}], self.user, memo='shelf swap')
+        with connection.cursor() as cur:
+            cur.execute("SELECT qty_delta, movement_type, ref_model, memo FROM warehousing_stockledger WHERE ref_model <> 0 AND memo <> 0 ORDER BY qty_delta")
+            raw = cur.fetchall()
+        self.assertEqual([r[0] for r in raw], [-1250, 1250])
+        self.assertTrue(all(isinstance(v, int) for r in raw for v in r[1:]))
+        rows = StockLedger.objects.filter(ref_model='INTERNAL_MOVE', movement_type=MovementType.INTERNAL_TRANSFER)
+        self.assertEqual(sorted(rows.values_list('qty_delta', flat=True)), [Decimal('-1.250'), Decimal('1.250')])
+        self.assertEqual(rows.filter(memo__icontains='SHELF').count(), 2)
+        self.assertFalse(StockLedger.objects.filter(ref_model='NO_SUCH_MODEL').exists())
+        client = APIClient()
+        client.force_authenticate(self.user)
+        data = client.get(f'/api/warehousing/warehouses/{self.wh.id}/movements/', {'search': 'shelf'}).json()
+        first = data['results'][0]
+        self.assertEqual((first['ref_model'], first['movement_type'], first['memo']), ('INTERNAL_MOVE', 'INTERNAL_TRANSFER', 'shelf swap'))
+        self.assertIn(first['qty_delta'], ('1.250', '-1.250'))
+
+
+class LedgerAppendOnlyTests(LedgerFixtureMixin, TestCase):
+    def test_rows_cannot_change_and_batches_record_postings(self):
+        from .ledger_audit import LedgerAppendOnlyError, ledger_maintenance
+        from .models import PostingBatch
+        from .services_internal_move import post_internal_move_rows
+        post_internal_move_rows(self.wh, self.a.id, self.b.id, [{'item': self.item.id, 'qty': '2'}], self.user)
+        rows = StockLedger.objects.filter(ref_model='INTERNAL_MOVE')
+        self.assertEqual(len({r.batch_id for r in rows}), 1)
+        batch = PostingBatch.objects.get(id=rows[0].batch_id)
+        self.assertEqual((batch.rows, batch.user_id, batch.ref_model), (2, self.user.id, 'INTERNAL_MOVE'))
+        row = rows[0]
+        with self.assertRaises(LedgerAppendOnlyError):
+            rows.update(memo='edited')
+        with self.assertRaises(LedgerAppendOnlyError):
+            row.save()
+        with self.assertRaises(LedgerAppendOnlyError):
+            row.delete()
+        with self.assertRaises(LedgerAppendOnlyError):
+            rows.delete()
+        with ledger_maintenance():
+            self.assertEqual(rows.update(memo='fixed'), 2)
+
+
+class LedgerViewTests(LedgerFixtureMixin, TestCase):
+    def test_projection_serves_grid_and_follows_renames(self):
+        from rest_framework.test import APIClient
+        from .models import LedgerView
+        from .services_internal_move import post_internal_move_rows
+        from .services_ledger_view import rebuild_ledger_view
+        self.user.is_superuser = True
+        self.user.save()
+        post_internal_move_rows(self.wh, self.a.id, self.b.id, [{'item': self.item.id, 'qty': '4'}], self.user, memo='first')
+        post_internal_move_rows(self.wh, self.a.id, self.b.id, [{'item': self.item.id, 'qty': '1.5'}], self.user, memo='second')
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = f'/api/warehousing/warehouses/{self.wh.id}/movements/'
+        data = client.get(url, {'from_location': self.a.id, 'ordering': 'ts'}).json()
+        self.assertEqual(
+            [(r['qty_delta'], r['location_qty_before'], r['location_qty_after']) for r in data['results']],
+            [('-4.000', '10.000', '6.000'), ('-1.500', '6.000', '4.500')],
+        )
+        first = data['results'][0]
+        self.assertEqual((first['location_code'], first['item_sku'], first['user'], first['memo']), ('A1', self.item.sku, 'roller', 'first'))
+        self.a.display_name = 'Aisle 1'
+        self.a.save()
+        recent = client.get(f'/api/warehousing/warehouses/{self.wh.id}/recent_activity/').json()['results']
+        self.assertEqual(len(recent), 5)
+        self.assertEqual({r['location_name'] for r in recent if r['location'] == self.a.id}, {'Aisle 1'})
+        before = sorted(LedgerView.objects.values_list('ledger_id', 'qty_before', 'qty_after', 'location_name'))
+        self.assertEqual(rebuild_ledger_view(self.wh.id), 5)
+        self.assertEqual(sorted(LedgerView.objects.values_list('ledger_id', 'qty_before', 'qty_after', 'location_name')), before)
+
+
+class ItemAvailabilityTests(LedgerFixtureMixin, TestCase):
+    def test_rollup_by_bucket_and_endpoints(self):
+        from rest_framework.test import APIClient
+        from .models import ItemAvailability
+        from .services import post_entries
+        from .services_availability import rebuild_availability
+        lost = Location.objects.get(warehouse=self.wh, type=LocationType.VIRTUAL, subtype='LOST')
+        post_entries([
+            StockLedger(warehouse=self.wh, location=self.a, item=self.item, qty_delta=Decimal('-2'), movement_type=MovementType.ADJ_APPROVE_LOST, ref_model='TEST'),
+            StockLedger(warehouse=self.wh, location=lost, item=self.item, qty_delta=Decimal('2'), movement_type=MovementType.ADJ_APPROVE_LOST, ref_model='TEST'),
+        ])
+        row = ItemAvailability.objects.get(item=self.item, warehouse=self.wh)
+        self.assertEqual((row.physical, row.lost, row.pending), (Decimal('8'), Decimal('2'), Decimal('0')))
+        client = APIClient()
+        client.force_authenticate(self.user)
+        data = client.get(f'/api/warehousing/items/{self.item.id}/availability/').json()
+        self.assertEqual((data['totals']['physical'], data['totals']['lost']), (8.0, 2.0))
+        self.assertEqual([w['code'] for w in data['warehouses']], ['W8'])
+        batch = client.get('/api/warehousing/items/availability/', {'skus': f'{self.item.sku},NOPE'}).json()
+        self.assertEqual([r['sku'] for r in batch['results']], [self.item.sku])
+        self.assertEqual(batch['missing'], ['NOPE'])
+        self.assertEqual(rebuild_availability(self.wh.id), 1)
+        self.assertEqual(ItemAvailability.objects.get(item=self.item).physical, Decimal('8'))
+
+
+class StockReservationTests(LedgerFixtureMixin, TestCase):
+    def test_reserve_atp_and_expiry(self):
+        from datetime import timedelta
+        from django.contrib.auth.models import Permission
+        from django.core.exceptions import ValidationError
+        from django.utils import timezone
+        from rest_framework.test import APIClient
+        from .models import ItemAvailability, ReservationStatus, StockBalance, StockReservation
+        from .services_reservation import atp, expire_reservations, recount_reserved, reserve
+        line = {'warehouse': self.wh.id, 'item': self.item.id}
+        reserve([{**line, 'qty': Decimal('3')}], ref_id='SO-1', expires_at=timezone.now() - timedelta(minutes=1))
+        reserve([{**line, 'location': self.a.id, 'qty': Decimal('5')}], ref_id='SO-2')
+        with self.assertRaises(ValidationError):
+            reserve([{**line, 'qty': Decimal('3')}], ref_id='SO-3')
+        self.assertEqual(atp([line])[0]['atp'], Decimal('2'))
+        self.assertEqual(StockBalance.objects.get(location=self.a, item=self.item).reserved, Decimal('5'))
+        client = APIClient()
+        client.force_authenticate(self.user)
+        data = client.post('/api/warehousing/atp/', {'lines': [
+            {'warehouse': self.wh.id, 'sku': self.item.sku, 'qty': '2'},
+            {'warehouse': self.wh.id, 'item': self.item.id, 'qty': '1'},
+        ]}, format='json').json()
+        self.assertEqual([r['ok'] for r in data['results']], [True, False])
+        other = Warehouse.objects.create(
+            code='W7', name='WH7', status='ACTIVE', gstin='27ABCDE1234F1Z7',
+            address_line1='', address_line2='', city='X', state='Y', pincode='123456', country='India',
+            latitude=0, longitude=0
+        )
+        self.user.user_permissions.add(*Permission.objects.filter(codename='add_stockreservation'))
+        self.user = type(self.user).objects.get(pk=self.user.pk)
+        client.force_authenticate(self.user)
+        for bad in ({'warehouse': other.id, 'item': self.item.id, 'location': self.a.id}, {'warehouse': self.wh.id, 'item': 999999}):
+            resp = client.post('/api/warehousing/reservations/', {'ref_id': 'SO-X', 'lines': [{**bad, 'qty': '1'}]}, format='json')
+            self.assertEqual(resp.status_code, 400)
+        self.assertFalse(StockBalance.objects.filter(warehouse=other).exists())
+        self.assertEqual(expire_reservations(), 1)
+        self.assertEqual(StockReservation.objects.get(ref_id='SO-1').status, ReservationStatus.EXPIRED)
+        self.assertEqual(ItemAvailability.objects.get(item=self.item, warehouse=self.wh).reserved, Decimal('5'))
+        ItemAvailability.objects.update(reserved=0)
+        recount_reserved(self.wh.id)
+        self.assertEqual(ItemAvailability.objects.get(item=self.item, warehouse=self.wh).reserved, Decimal('5'))
+
+
+class ReorderAlertTests(LedgerFixtureMixin, TestCase):
+    def test_cursor_evaluation_opens_and_resolves_alerts(self):
+        from django.test import override_settings
+        from rest_framework.test import APIClient
+        from .models import Alert, AlertKind, AlertStatus, LedgerCursor, ReorderSetting
+        from .services import post_entries
+        from .services_reorder import evaluate_reorder
+        self.enterContext(override_settings(LEDGER_FEED_SETTLE_SECONDS=0))
+        ReorderSetting.objects.create(warehouse=self.wh, item=self.item, reorder_point=Decimal('5'), max_qty=Decimal('20'))
+        self.assertEqual(evaluate_reorder()['opened'], 0)  # first run: cursor starts at the ledger end
+        dispatch = Location.objects.get(warehouse=self.wh, type=LocationType.VIRTUAL, subtype=VirtualSubtype.DISPATCH)
+
+        def move(qty):
+            post_entries([
+                StockLedger(warehouse=self.wh, location=self.a, item=self.item, qty_delta=-qty, movement_type=MovementType.TRANSFER),
+                StockLedger(warehouse=self.wh, location=dispatch, item=self.item, qty_delta=qty, movement_type=MovementType.TRANSFER),
+            ])
+
+        move(Decimal('7'))
+        res = evaluate_reorder()
+        self.assertEqual((res['rows'], res['checked'], res['opened']), (2, 1, 1))
+        alert = Alert.objects.get(status=AlertStatus.OPEN)
+        self.assertEqual((alert.kind, alert.available, alert.suggested_qty), (AlertKind.LOW_STOCK, Decimal('3'), Decimal('17')))
+        self.assertEqual(LedgerCursor.objects.get(name='reorder').last_id, StockLedger.objects.order_by('-id').first().id)
+        self.assertEqual(evaluate_reorder()['checked'], 0)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.assertEqual(client.get('/api/warehousing/alerts/', {'warehouse': self.wh.id}).json()['count'], 1)
+        move(Decimal('-4'))
+        self.assertEqual(evaluate_reorder()['resolved'], 1)
+        self.assertFalse(Alert.objects.filter(status=AlertStatus.OPEN).exists())
+
+    def test_reservations_open_and_resolve_alerts(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from .models import Alert, AlertStatus, ReorderSetting, ReservationStatus, StockReservation
+        from .services_reservation import close_reservations, expire_reservations, reserve
+        ReorderSetting.objects.create(warehouse=self.wh, item=self.item, reorder_point=Decimal('5'))
+        line = {'warehouse': self.wh.id, 'item': self.item.id, 'qty': Decimal('6')}
+        reserve([line], ref_id='SO-1')
+        self.assertEqual(Alert.objects.get(status=AlertStatus.OPEN).available, Decimal('4'))
+        close_reservations(StockReservation.objects.filter(ref_id='SO-1'), ReservationStatus.RELEASED)
+        self.assertFalse(Alert.objects.filter(status=AlertStatus.OPEN).exists())
+        reserve([line], ref_id='SO-2', expires_at=timezone.now() - timedelta(minutes=1))
+        self.assertTrue(Alert.objects.filter(status=AlertStatus.OPEN).exists())
+        self.assertEqual(expire_reservations(), 1)
+        self.assertFalse(Alert.objects.filter(status=AlertStatus.OPEN).exists())
+
+
+class GoodsReceiptTests(LedgerFixtureMixin, TestCase):
+    def test_bulk_receipt_is_posted_once(self):
+        from django.contrib.auth.models import Permission
+        from django.core.exceptions import ValidationError
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from rest_framework.test import APIClient
+        from .models import GoodsReceipt, GoodsReceiptLine, ItemAvailability, StockBalance
+        from .services_grn import receive_goods
+        receive_bin = Location.objects.get(warehouse=self.wh, type=LocationType.VIRTUAL, subtype=VirtualSubtype.RECEIVE)
+        lines = [{'sku': self.item.sku, 'qty': '1.5'}] * 300 + [{'item': self.item.id, 'qty': 5}]
+        receipt, dup = receive_goods(self.wh, lines, user=self.user, reference='PO-9', idempotency_key='k1')
+        self.assertFalse(dup)
+        self.assertEqual((receipt.line_count, receipt.total_qty), (301, Decimal('455')))
+        self.assertEqual(GoodsReceiptLine.objects.filter(receipt=receipt).count(), 301)
+        rows = StockLedger.objects.filter(ref_model='GRN', ref_id=receipt.number)
+        self.assertEqual([(r.location_id, r.qty_delta, r.movement_type) for r in rows], [(receive_bin.id, Decimal('455'), MovementType.RECEIPT)])
+        self.assertEqual(StockBalance.objects.get(location=receive_bin, item=self.item).qty, Decimal('455'))
+        self.assertEqual(ItemAvailability.objects.get(item=self.item, warehouse=self.wh).other, Decimal('455'))
+        again, dup = receive_goods(self.wh, lines, user=self.user, idempotency_key='k1')
+        self.assertEqual((again.id, dup), (receipt.id, True))
+        self.assertEqual(StockLedger.objects.filter(ref_model='GRN').count(), 1)
+        with self.assertRaises(ValidationError) as ctx:
+            receive_goods(self.wh, [{'sku': 'NOPE', 'qty': 1}, {'item': self.item.id, 'qty': 0}])
+        self.assertEqual(len(ctx.exception.messages), 2)
+
+        self.user.user_permissions.add(Permission.objects.get(codename='add_goodsreceipt'))
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = f'/api/warehousing/warehouses/{self.wh.id}/receipts/'
+        upload = SimpleUploadedFile('grn.csv', f'sku,qty\n{self.item.sku},2\n{self.item.sku},3\n'.encode())
+        resp = client.post(url, {'file': upload, 'reference': 'CSV-1'}, format='multipart')
+        self.assertEqual(resp.status_code, 201, resp.content)
+        self.assertEqual((resp.json()['line_count'], resp.json()['total_qty']), (2, '5.000'))
+        resp = client.post(url, {'lines': [{'sku': self.item.sku, 'qty': '1'}]}, format='json', HTTP_IDEMPOTENCY_KEY='k1')
+        self.assertEqual((resp.status_code, resp.json()['duplicate']), (200, True))
+        self.assertEqual(client.get(url).json()['count'], GoodsReceipt.objects.filter(warehouse=self.wh).count())
+
+
+    def test_receipt_number_taken_concurrently_is_retried(self):
+        from django.utils import timezone
+        from .models import GoodsReceipt
+        from .services_grn import receive_goods
+        prefix = f'GRN-{timezone.now().year}-'
+        # 0001 is already taken although the newest receipt says the next number is 0001.
+        GoodsReceipt.objects.create(warehouse=self.wh, number=f'{prefix}0001')
+        GoodsReceipt.objects.create(warehouse=self.wh, number=f'{prefix}0000')
+        receipt, dup = receive_goods(self.wh, [{'item': self.item.id, 'qty': 1}], user=self.user)
+        self.assertFalse(dup)
+        self.assertEqual(receipt.number, f'{prefix}0002')
+        self.assertEqual(StockLedger.objects.filter(ref_model='GRN', ref_id=receipt.number).count(), 1)
+
+class PickListTests(LedgerFixtureMixin, TestCase):
+    def test_allocation_follows_walk_and_confirms_to_dispatch(self):
+        from django.contrib.auth.models import Permission
+        from django.core.exceptions import ValidationError
+        from rest_framework.test import APIClient
+        from .models import ItemAvailability, PickListStatus, StockBalance
+        from .services import post_entries
+        from .services_pick import cancel_pick_list, confirm_pick_list, generate_pick_list, set_pick_sequence
+        c10 = Location.objects.create(warehouse=self.wh, type=LocationType.PHYSICAL, code='C-10', display_name='C-10')
+        c2 = Location.objects.create(warehouse=self.wh, type=LocationType.PHYSICAL, code='C-2', display_name='C-2')
+        post_entries([
+            StockLedger(warehouse=self.wh, location=loc, item=self.item, qty_delta=Decimal('5'), movement_type=MovementType.TRANSFER)
+            for loc in (c10, c2)
+        ])
+        small = generate_pick_list(self.wh, [{'item': self.item.id, 'qty': 4}])
+        self.assertEqual([(ln.location_id, ln.qty) for ln in small.lines.order_by('seq')], [(self.a.id, Decimal('4'))])
+        cancel_pick_list(small)
+
+        set_pick_sequence(self.wh, ['C-10', 'C-2', 'A1'])
+        pl = generate_pick_list(self.wh, [{'sku': self.item.sku, 'qty': 9}, {'item': self.item.id, 'qty': 5}], ref_id='SO-7')
+        lines = list(pl.lines.order_by('seq'))
+        self.assertEqual([(ln.location_id, ln.qty) for ln in lines], [(c10.id, Decimal('5')), (c2.id, Decimal('5')), (self.a.id, Decimal('4'))])
+        with self.assertRaises(ValidationError):
+            generate_pick_list(self.wh, [{'item': self.item.id, 'qty': 7}])
+        partial = generate_pick_list(self.wh, [{'item': self.item.id, 'qty': 7}], allow_partial=True)
+        self.assertEqual(partial.short, [{'item': self.item.id, 'qty': 7.0, 'allocated': 6.0}])
+
+        confirm_pick_list(pl, user=self.user, picked={lines[1].id: Decimal('3')})
+        dispatch = Location.objects.get(warehouse=self.wh, type=LocationType.VIRTUAL, subtype=VirtualSubtype.DISPATCH)
+        self.assertEqual(StockBalance.objects.get(location=dispatch, item=self.item).qty, Decimal('12'))
+        self.assertEqual(StockBalance.objects.get(location=c2, item=self.item).qty, Decimal('2'))
+        self.assertEqual(ItemAvailability.objects.get(item=self.item, warehouse=self.wh).reserved, Decimal('6'))
+
+        self.user.user_permissions.add(*Permission.objects.filter(codename='add_picklist'))
+        client = APIClient()
+        client.force_authenticate(self.user)
+        resp = client.post(f'/api/warehousing/pick-lists/{partial.id}/confirm/', {}, format='json')
+        self.assertEqual((resp.status_code, resp.json()['status']), (200, PickListStatus.CONFIRMED))
+        resp = client.post('/api/warehousing/pick-lists/', {'warehouse': self.wh.id, 'lines': [{'item': self.item.id, 'qty': 1}]}, format='json')
+        self.assertEqual((resp.status_code, resp.json()['lines'][0]['location']), (201, c2.id))
+
+
+class PutawaySuggestionTests(LedgerFixtureMixin, TestCase):
+    def test_same_item_first_then_nearest_empty_within_capacity(self):
+        from rest_framework.test import APIClient
+        from .services_grn import receive_goods
+        from .services_putaway_suggest import suggest_putaway
+        Location.objects.filter(pk=self.a.pk).update(capacity=Decimal('12'))
+        far = Location.objects.create(warehouse=self.wh, type=LocationType.PHYSICAL, code='Z9', display_name='Z9')
+        a2 = Location.objects.create(warehouse=self.wh, type=LocationType.PHYSICAL, code='A2', display_name='A2', capacity=Decimal('5'))
+        receive_goods(self.wh, [{'item': self.item.id, 'qty': 10}])
+        first, second = suggest_putaway(self.wh, [{'item': self.item.id, 'qty': Decimal('6')}, {'item': self.item.id, 'qty': Decimal('4')}])
+        self.assertEqual([(t['location'], t['qty'], t['reason']) for t in first['targets']], [
+            (self.a.id, Decimal('2'), 'same_item'), (a2.id, Decimal('4'), 'empty'),
+        ])
+        self.assertEqual([(t['location'], t['qty']) for t in second['targets']], [(a2.id, Decimal('1')), (self.b.id, Decimal('3'))])
+        self.assertNotIn(far.id, [t['location'] for t in second['targets']])
+        client = APIClient()
+        client.force_authenticate(self.user)
+        data = client.get(f'/api/warehousing/warehouses/{self.wh.id}/putaway/suggestions/').json()['results']
+        self.assertEqual((len(data), data[0]['qty'], data[0]['unplaced']), (1, 10.0, 0.0))
+
+
+class CycleCountTests(LedgerFixtureMixin, TestCase):
+    def test_scans_and_batched_variance_posting(self):
+        from django.contrib.auth.models import Permission
+        from django.core.exceptions import ValidationError
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from rest_framework.test import APIClient
+        from .models import CycleCountStatus, StockBalance
+        from .services_count import record_counts, start_count, variances
+        far = Location.objects.create(warehouse=self.wh, type=LocationType.PHYSICAL, code='Z9', display_name='Z9')
+        cc = start_count(self.wh, location_ids=[self.a.id, self.b.id], user=self.user)
+        self.assertEqual(list(cc.lines.values_list('location_id', 'expected', 'counted')), [(self.a.id, Decimal('10'), None)])
+        record_counts(cc, [{'location': 'A1', 'sku': self.item.sku, 'qty': 4}, {'location': self.a.id, 'item': self.item.id, 'qty': '3'}])
+        with self.assertRaises(ValidationError):
+            record_counts(cc, [{'location': far.code, 'item': self.item.id, 'qty': 1}])
+
+        self.user.user_permissions.add(Permission.objects.get(codename='add_cyclecount'))
+        client = APIClient()
+        client.force_authenticate(self.user)
+        upload = SimpleUploadedFile('scans.csv', f'location,sku\nB1,{self.item.sku}\nB1,{self.item.sku}\n'.encode())
+        resp = client.post(f'/api/warehousing/cycle-counts/{cc.id}/scans/', {'file': upload}, format='multipart')
+        self.assertEqual((resp.status_code, resp.json()['counted_lines']), (200, 2))
+        self.assertEqual(sorted(v['variance'] for v in variances(cc)), [Decimal('-3'), Decimal('2')])
+
+        resp = client.post(f'/api/warehousing/cycle-counts/{cc.id}/post/')
+        self.assertEqual((resp.status_code, resp.json()['status'], resp.json()['ledger_rows']), (200, CycleCountStatus.POSTED, 3))
+        lost = Location.objects.get(warehouse=self.wh, type=LocationType.VIRTUAL, subtype=VirtualSubtype.LOST)
+        qty = dict(StockBalance.objects.filter(item=self.item).values_list('location_id', 'qty'))
+        self.assertEqual((qty[self.a.id], qty[self.b.id], qty[lost.id]), (Decimal('7'), Decimal('2'), Decimal('3')))
+        self.assertEqual(StockLedger.objects.filter(ref_model='CYCLE_COUNT', ref_id=cc.number).count(), 3)
+        self.assertEqual(client.post(f'/api/warehousing/cycle-counts/{cc.id}/post/').status_code, 400)
+
+    def test_moves_during_count_and_unscanned_locations(self):
+        from .models import StockBalance
+        from .services import post_entries
+        from .services_count import post_count, record_counts, start_count
+        post_entries([
+            StockLedger(warehouse=self.wh, location=self.a, item=self.item, qty_delta=Decimal('-4'), movement_type=MovementType.INTERNAL_TRANSFER, ref_model='TEST'),
+            StockLedger(warehouse=self.wh, location=self.b, item=self.item, qty_delta=Decimal('4'), movement_type=MovementType.INTERNAL_TRANSFER, ref_model='TEST'),
+        ])
+        cc = start_count(self.wh, location_ids=[self.a.id, self.b.id], user=self.user)
+        # Picked from A1 after the snapshot, before A1 is counted: not a shortage
+        post_entries([
+            StockLedger(warehouse=self.wh, location=self.a, item=self.item, qty_delta=Decimal('-2'), movement_type=MovementType.INTERNAL_TRANSFER, ref_model='TEST'),
+            StockLedger(warehouse=self.wh, location=self.b, item=self.item, qty_delta=Decimal('2'), movement_type=MovementType.INTERNAL_TRANSFER, ref_model='TEST'),
+        ])
+        record_counts(cc, [{'location': 'A1', 'item': self.item.id, 'qty': 3}])
+        result = post_count(cc, user=self.user)
+        self.assertEqual((result['variances'], result['shortage'], result['uncounted_locations']), (1, Decimal('1'), 1))
+        qty = dict(StockBalance.objects.filter(item=self.item).values_list('location_id', 'qty'))
+        # B1 was never scanned, so its 6 units stay
+        self.assertEqual((qty[self.a.id], qty[self.b.id]), (Decimal('3'), Decimal('6')))
+
+
+class LocationGridTests(LedgerFixtureMixin, TestCase):
+    def test_pattern_expands_and_bulk_creates_with_history(self):
+        from django.contrib.auth.models import Permission
+        from django.core.exceptions import ValidationError
+        from rest_framework.test import APIClient
+        from .services_locations import expand_pattern, generate_locations
+        self.assertEqual(expand_pattern('A{08-10}-{A-B}'), ['A08-A', 'A08-B', 'A09-A', 'A09-B', 'A10-A', 'A10-B'])
+        self.assertEqual(expand_pattern('R{1,3}'), ['R1', 'R3'])
+        for bad in ('A{3-1}', 'A{01-20', 'A{}'):
+            with self.assertRaises(ValidationError):
+                expand_pattern(bad)
+
+        res = generate_locations(self.wh, 'G{1-3}-{01-02}', user=self.user, capacity=Decimal('50'), sequence=True)
+        self.assertEqual((res['requested'], res['created'], res['first'], res['last']), (6, 6, 'G1-01', 'G3-02'))
+        created = Location.objects.filter(warehouse=self.wh, code__startswith='G').order_by('pick_sequence')
+        self.assertEqual([loc.code for loc in created][:3], ['G1-01', 'G1-02', 'G2-01'])
+        self.assertEqual({loc.capacity for loc in created}, {Decimal('50')})
+        self.assertEqual(Location.history.filter(code__startswith='G', history_type='+').count(), 6)
+        with self.assertRaises(ValidationError):
+            generate_locations(self.wh, 'G{1-4}-{01-02}')
+
+        self.user.user_permissions.add(Permission.objects.get(codename='add_location'))
+        client = APIClient()
+        client.force_authenticate(self.user)
+        body = {'warehouse': self.wh.id, 'pattern': 'G{1-4}-{01-02}', 'skip_existing': True}
+        resp = client.post('/api/warehousing/locations/generate/', {**body, 'dry_run': True}, format='json')
+        self.assertEqual((resp.status_code, resp.json()['created'], resp.json()['existing']), (200, 0, 6))
+        resp = client.post('/api/warehousing/locations/generate/', body, format='json')
+        self.assertEqual((resp.status_code, resp.json()['created'], resp.json()['first']), (201, 2, 'G4-01'))
+        resp = client.post('/api/warehousing/locations/generate/', {**body, 'skip_existing': False}, format='json')
+        self.assertEqual(resp.status_code, 400)
+
+
+class TransferOrderTests(LedgerFixtureMixin, TestCase):
+    def test_dispatch_and_partial_receipts_through_in_transit(self):
+        from django.contrib.auth.models import Permission
+        from rest_framework.test import APIClient
+        from .models import InTransitBalance, ItemAvailability, StockBalance, TransferStatus
+        wh2 = Warehouse.objects.create(
+            code='W9', name='WH9', status='ACTIVE', gstin='27ABCDE1234F1Z9',
+            address_line1='', address_line2='', city='X', state='Y', pincode='123456', country='India',
+            latitude=0, longitude=0
+        )
+        transit = Location.objects.get(warehouse=self.wh, type=LocationType.VIRTUAL, subtype=VirtualSubtype.IN_TRANSIT)
+        receive = Location.objects.get(warehouse=wh2, type=LocationType.VIRTUAL, subtype=VirtualSubtype.RECEIVE)
+        self.user.user_permissions.add(Permission.objects.get(codename='add_transferorder'))
+        client = APIClient()
+        client.force_authenticate(self.user)
+        body = {
+            'source_warehouse': self.wh.id, 'dest_warehouse': wh2.id, 'from_location': self.a.id,
+            'lines': [{'item': self.item.id, 'qty': 4}, {'sku': self.item.sku, 'qty': '2'}],
+        }
+        resp = client.post('/api/warehousing/transfers/', body, format='json', HTTP_IDEMPOTENCY_KEY='t-1')
+        self.assertEqual((resp.status_code, resp.json()['lines'][0]['qty_shipped']), (201, '6.000'))
+        order_id = resp.json()['id']
+        again = client.post('/api/warehousing/transfers/', body, format='json', HTTP_IDEMPOTENCY_KEY='t-1')
+        self.assertEqual((again.status_code, again.json()['id'], again.json()['duplicate']), (200, order_id, True))
+        too_much = client.post('/api/warehousing/transfers/', {**body, 'lines': [{'item': self.item.id, 'qty': 5}]}, format='json')
+        self.assertEqual(too_much.status_code, 409)
+
+        qty = dict(StockBalance.objects.filter(item=self.item).values_list('location_id', 'qty'))
+        self.assertEqual((qty[self.a.id], qty[transit.id]), (Decimal('4'), Decimal('6')))
+        self.assertEqual(ItemAvailability.objects.get(item=self.item, warehouse=self.wh).physical, Decimal('4'))
+        pair = client.get(f'/api/warehousing/transfers/in-transit/?source={self.wh.id}&dest={wh2.id}').json()['results']
+        self.assertEqual([(r['item'], r['qty']) for r in pair], [(self.item.id, 6.0)])
+
+        url = f'/api/warehousing/transfers/{order_id}/receive/'
+        resp = client.post(url, {'lines': [{'item': self.item.id, 'qty': 2}], 'idempotency_key': 'r-1'}, format='json')
+        self.assertEqual((resp.status_code, resp.json()['status']), (201, TransferStatus.IN_TRANSIT))
+        resp = client.post(url, {'lines': [{'item': self.item.id, 'qty': 2}], 'idempotency_key': 'r-1'}, format='json')
+        self.assertEqual((resp.status_code, resp.json()['duplicate']), (200, True))
+        self.assertEqual(client.post(url, {'lines': [{'item': self.item.id, 'qty': 5}]}, format='json').status_code, 400)
+        resp = client.post(url, {}, format='json')
+        self.assertEqual((resp.status_code, resp.json()['status'], len(resp.json()['receipts'])), (201, TransferStatus.RECEIVED, 2))
+
+        qty = dict(StockBalance.objects.filter(item=self.item).values_list('location_id', 'qty'))
+        self.assertEqual((qty[transit.id], qty[receive.id]), (Decimal('0'), Decimal('6')))
+        self.assertEqual(InTransitBalance.objects.get(source_warehouse=self.wh, dest_warehouse=wh2, item=self.item).qty, Decimal('0'))
+        self.assertEqual(client.get('/api/warehousing/transfers/in-transit/').json()['results'], [])
+        self.assertEqual(StockLedger.objects.filter(ref_model='TRANSFER').count(), 6)
+
+        # Holds without a location count against the source's PHYSICAL stock; only PHYSICAL
+        # locations and the DISPATCH bin can ship
+        from .services_reservation import reserve
+        reserve([{'warehouse': self.wh.id, 'item': self.item.id, 'qty': Decimal('3')}], ref_id='SO-9')
+        held = client.post('/api/warehousing/transfers/', {**body, 'lines': [{'item': self.item.id, 'qty': 2}]}, format='json')
+        self.assertEqual(held.status_code, 409)
+        self.assertIn('available in the warehouse 1', str(held.json()['detail']))
+        lost = Location.objects.get(warehouse=self.wh, type=LocationType.VIRTUAL, subtype=VirtualSubtype.LOST)
+        resp = client.post('/api/warehousing/transfers/', {**body, 'from_location': lost.id, 'lines': [{'item': self.item.id, 'qty': 1}]}, format='json')
+        self.assertIn('PHYSICAL location or the DISPATCH bin', str(resp.json()['detail']))
+
+
+class LotTrackingTests(LedgerFixtureMixin, TestCase):
+    def test_lots_follow_moves_and_pick_fefo(self):
+        from datetime import timedelta
+        from django.core.exceptions import ValidationError
+        from django.utils import timezone
+        from rest_framework.test import APIClient
+        from .models import LotBalance, PickListLine
+        from .services import post_entries
+        from .services_grn import receive_goods
+        from .services_lots import fefo_lots, near_expiry, rebuild_lot_balance
+        from .services_pick import confirm_pick_list, generate_pick_list
+        today = timezone.localdate()
+        soon, late = today + timedelta(days=10), today + timedelta(days=200)
+        receipt, _dup = receive_goods(self.wh, [
+            {'item': self.item.id, 'qty': 3, 'lot': 'L-LATE', 'expiry': late.isoformat()},
+            {'item': self.item.id, 'qty': 4, 'lot': 'L-SOON', 'expiry': soon.isoformat()},
+        ], user=self.user)
+        self.assertEqual(receipt.lines.filter(lot__isnull=False).count(), 2)
+        with self.assertRaises(ValidationError):
+            receive_goods(self.wh, [{'item': self.item.id, 'qty': 1, 'lot': 'L-SOON', 'expiry': late.isoformat()}])
+
+        # An unlotted putaway takes the earliest-expiring lot first
+        receive = Location.objects.get(warehouse=self.wh, type=LocationType.VIRTUAL, subtype=VirtualSubtype.RECEIVE)
+        post_entries([
+            StockLedger(warehouse=self.wh, location=receive, item=self.item, qty_delta=Decimal('-5'), movement_type=MovementType.PUTAWAY, ref_model='TEST'),
+            StockLedger(warehouse=self.wh, location=self.b, item=self.item, qty_delta=Decimal('5'), movement_type=MovementType.PUTAWAY, ref_model='TEST'),
+        ])
+        at_b = {(lb.lot.lot_number, lb.qty) for lb in LotBalance.objects.filter(location=self.b)}
+        self.assertEqual(at_b, {('L-SOON', Decimal('4')), ('L-LATE', Decimal('1'))})
+        self.assertEqual(StockLedger.objects.filter(ref_model='TEST').count(), 4)
+        self.assertEqual([r['lot_number'] for r in fefo_lots(self.wh.id, [self.item.id])], ['L-SOON', 'L-LATE'])
+        self.assertEqual([(r['lot_number'], r['qty']) for r in near_expiry(self.wh.id, days=30)], [('L-SOON', Decimal('4'))])
+
+        # FEFO over walking order: both lots at B1 first, then unlotted stock at A1
+        pl = generate_pick_list(self.wh, [{'item': self.item.id, 'qty': 6}], user=self.user)
+        lines = [(ln.location_id, ln.lot.lot_number if ln.lot else None, ln.qty) for ln in PickListLine.objects.filter(pick_list=pl).order_by('seq')]
+        self.assertEqual(sorted(lines, key=str), sorted([
+            (self.b.id, 'L-SOON', Decimal('4')), (self.b.id, 'L-LATE', Decimal('1')), (self.a.id, None, Decimal('1')),
+        ], key=str))
+        confirm_pick_list(pl, user=self.user)
+        dispatch = Location.objects.get(warehouse=self.wh, type=LocationType.VIRTUAL, subtype=VirtualSubtype.DISPATCH)
+        self.assertEqual(LotBalance.objects.get(location=dispatch, lot__lot_number='L-SOON').qty, Decimal('4'))
+        before = set(LotBalance.objects.values_list('location_id', 'lot_id', 'qty'))
+        rebuild_lot_balance(self.wh.id)
+        self.assertEqual(set(LotBalance.objects.values_list('location_id', 'lot_id', 'qty')), before)
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        data = client.get(f'/api/warehousing/warehouses/{self.wh.id}/near-expiry/?days=365').json()['results']
+        self.assertEqual(sorted((r['lot_number'], r['qty']) for r in data), [('L-LATE', 1.0), ('L-LATE', 2.0), ('L-SOON', 4.0)])
+
+    def test_moves_skip_picked_lots_and_single_rows_get_lots(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from .models import LotBalance
+        from .services_grn import receive_goods
+        from .services_internal_move import post_internal_move_rows
+        from .services_pick import confirm_pick_list, generate_pick_list
+        today = timezone.localdate()
+        receive_goods(self.wh, [
+            {'item': self.item.id, 'qty': 3, 'lot': 'L-LATE', 'expiry': (today + timedelta(days=200)).isoformat()},
+            {'item': self.item.id, 'qty': 4, 'lot': 'L-SOON', 'expiry': (today + timedelta(days=10)).isoformat()},
+        ], user=self.user)
+        receive = Location.objects.get(warehouse=self.wh, type=LocationType.VIRTUAL, subtype=VirtualSubtype.RECEIVE)
+        # A single row saved on its own gets its lot like a post_entries() batch
+        out = StockLedger.objects.create(warehouse=self.wh, location=receive, item=self.item, qty_delta=Decimal('-4'), movement_type=MovementType.PUTAWAY, ref_model='TEST')
+        self.assertEqual(out.lot.lot_number, 'L-SOON')
+        StockLedger.objects.create(warehouse=self.wh, location=self.b, item=self.item, lot=out.lot, qty_delta=Decimal('4'), movement_type=MovementType.PUTAWAY, ref_model='TEST')
+        self.assertEqual(LotBalance.objects.get(location=receive, lot=out.lot).qty, Decimal('0'))
+        post_internal_move_rows(self.wh, self.a.id, self.b.id, [{'item': self.item.id, 'qty': '1'}], self.user)
+
+        # The pick list holds the SOON lot at B1: a move takes the free units around it
+        pl = generate_pick_list(self.wh, [{'item': self.item.id, 'qty': 3}], user=self.user)
+        post_internal_move_rows(self.wh, self.b.id, self.a.id, [{'item': self.item.id, 'qty': '2'}], self.user)
+        at_b = {lb.lot.lot_number: lb.qty for lb in LotBalance.objects.filter(location=self.b)}
+        self.assertEqual(at_b, {'L-SOON': Decimal('3')})
+        confirm_pick_list(pl, user=self.user)
+        self.assertEqual(LotBalance.objects.get(location=self.b).qty, Decimal('0'))
+
+
+class SerialTrackingTests(LedgerFixtureMixin, TestCase):
+    def test_receive_move_and_lookup_serials(self):
+        from django.contrib.auth.models import Permission
+        from django.core.exceptions import ValidationError
+        from rest_framework.test import APIClient
+        from .models import SerialMovement, SerialStatus, SerialUnit, StockBalance
+        from .services_grn import receive_goods
+        from .services_serials import move_serials
+        serials = [f'SN-{n:03d}' for n in range(5)]
+        receipt, _dup = receive_goods(self.wh, [{'item': self.item.id, 'qty': 5, 'serials': serials}], user=self.user)
+        receive = Location.objects.get(warehouse=self.wh, type=LocationType.VIRTUAL, subtype=VirtualSubtype.RECEIVE)
+        self.assertEqual(SerialUnit.objects.filter(location=receive, status=SerialStatus.IN_STOCK).count(), 5)
+        with self.assertRaises(ValidationError):
+            receive_goods(self.wh, [{'item': self.item.id, 'qty': 2, 'serials': ['SN-000', 'SN-NEW']}])
+        with self.assertRaises(ValidationError):
+            receive_goods(self.wh, [{'item': self.item.id, 'qty': 2, 'serials': ['SN-X']}])
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = f'/api/warehousing/warehouses/{self.wh.id}/serials/move/'
+        payload = {'to_location': self.b.id, 'serials': serials[:3] + ['SN-000'], 'ref_id': 'SCAN-1'}
+        self.assertEqual(client.post(url, payload, format='json').status_code, 403)
+        self.user.user_permissions.add(Permission.objects.get(codename='change_serialunit'))
+        self.user = type(self.user).objects.get(pk=self.user.pk)
+        client.force_authenticate(self.user)
+
+        # Unknown serials reject the whole payload
+        resp = client.post(url, {'to_location': self.b.id, 'serials': ['SN-000', 'NOPE']}, format='json')
+        self.assertEqual(resp.status_code, 409)
+        self.assertIn('serial NOPE: unknown', resp.json()['detail'])
+        self.assertFalse(SerialUnit.objects.filter(location=self.b).exists())
+
+        resp = client.post(url, payload, format='json')
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual((resp.json()['moved'], resp.json()['ledger_rows']), (3, 2))
+        self.assertTrue(client.post(url, payload, format='json').json()['duplicate'])
+        self.assertEqual(StockBalance.objects.get(location=self.b, item=self.item).qty, Decimal('3'))
+        self.assertEqual(StockBalance.objects.get(location=receive, item=self.item).qty, Decimal('2'))
+        self.assertEqual(set(StockLedger.objects.filter(ref_id='SCAN-1').values_list('movement_type', flat=True)), {MovementType.PUTAWAY})
+
+        # Internal move onward, then to DISPATCH
+        self.assertEqual(move_serials(self.wh, ['SN-001'], self.a.id, user=self.user)['moved'], 1)
+        dispatch = Location.objects.get(warehouse=self.wh, type=LocationType.VIRTUAL, subtype=VirtualSubtype.DISPATCH)
+        move_serials(self.wh, ['SN-001'], dispatch.id, user=self.user)
+        unit = SerialUnit.objects.get(serial='SN-001')
+        self.assertEqual((unit.location_id, unit.status), (dispatch.id, SerialStatus.DISPATCHED))
+        self.assertEqual(SerialMovement.objects.filter(unit=unit).count(), 4)
+
+        found = client.get('/api/warehousing/serials/?serial=SN-001').json()
+        found = found.get('results', found)
+        self.assertEqual([(u['id'], u['status']) for u in found], [(unit.id, SerialStatus.DISPATCHED)])
+        history = client.get(f'/api/warehousing/serials/{unit.id}/history/').json()
+        history = history.get('results', history)
+        self.assertEqual(
+            [h['movement_type'] for h in history],
+            [MovementType.TRANSFER, MovementType.INTERNAL_TRANSFER, MovementType.PUTAWAY, MovementType.RECEIPT],
+        )
+        self.assertEqual(history[-1]['ref_id'], receipt.number)
+
+    def test_quantity_flows_move_serials_or_refuse_them(self):
+        from django.core.exceptions import ValidationError
+        from .models import SerialMovement, SerialUnit, StockBalance
+        from .services_grn import receive_goods
+        from .services_putaway import post_actions
+        from .services_internal_move import post_internal_move_rows
+        receive_goods(self.wh, [{'item': self.item.id, 'qty': 3, 'serials': ['SN-A', 'SN-B', 'SN-C']}], user=self.user)
+        receive = Location.objects.get(warehouse=self.wh, type=LocationType.VIRTUAL, subtype=VirtualSubtype.RECEIVE)
+        put = {'type': 'PUTAWAY', 'item': self.item.id, 'source_bin': receive.id, 'target_location': self.b.id, 'qty': Decimal('2')}
+
+        # Quantity alone would leave three units behind two on hand
+        with self.assertRaises(ValidationError):
+            post_actions(self.wh, [put], user=self.user, batch_ref_id='client:sn-0')
+        with self.assertRaises(ValidationError):
+            post_actions(self.wh, [{**put, 'serials': ['SN-A', 'SN-Z']}], user=self.user, batch_ref_id='client:sn-0')
+        post_actions(self.wh, [{**put, 'serials': ['SN-A', 'SN-B']}], user=self.user, batch_ref_id='client:sn-1')
+        self.assertEqual(set(SerialUnit.objects.filter(location=self.b).values_list('serial', flat=True)), {'SN-A', 'SN-B'})
+        self.assertEqual(StockBalance.objects.get(location=self.b, item=self.item).qty, Decimal('2'))
+        moved = SerialMovement.objects.filter(ref_id='client:sn-1')
+        self.assertEqual((moved.count(), moved.filter(batch__isnull=False).count()), (2, 2))
+
+        # Unserialized stock at A1 still moves by quantity; B1's units only with their serials
+        post_internal_move_rows(self.wh, self.a.id, self.b.id, [{'item': self.item.id, 'qty': '4'}], self.user)
+        with self.assertRaises(ValidationError):
+            post_internal_move_rows(self.wh, self.b.id, self.a.id, [{'item': self.item.id, 'qty': '5'}], self.user)
+        post_internal_move_rows(self.wh, self.b.id, self.a.id, [{'item': self.item.id, 'qty': '5', 'serials': ['SN-B']}], self.user)
+        self.assertEqual(SerialUnit.objects.get(serial='SN-B').location_id, self.a.id)
+        self.assertEqual(StockBalance.objects.get(location=self.b, item=self.item).qty, Decimal('1'))
+
+
+class LedgerExportTests(LedgerFixtureMixin, TestCase):
+    def test_dataset_months_follow_local_time(self):
+        import tempfile
+        from datetime import date, datetime, timezone as dt_timezone
+        from django.test import override_settings
+        from .ledger_audit import ledger_maintenance
+        from .services_export import export_dataset, pa
+        if pa is None:
+            self.skipTest("pyarrow not installed")
+        self.enterContext(override_settings(TIME_ZONE='America/Chicago'))
+        for n, ts in enumerate((datetime(2026, 3, 1, 3, tzinfo=dt_timezone.utc), datetime(2026, 3, 1, 7, tzinfo=dt_timezone.utc))):
+            row = StockLedger.objects.create(
+                warehouse=self.wh, location=self.a, item=self.item, qty_delta=Decimal('1'), movement_type=MovementType.TRANSFER, ref_model='TEST', ref_id=str(n),
+            )
+            # ts is auto_now_add: backdate the row afterwards
+            with ledger_maintenance():
+                StockLedger.objects.filter(id=row.id).update(ts=ts)
+        with tempfile.TemporaryDirectory() as out:
+            written = export_dataset(out, warehouse_ids=[self.wh.id], date_from=date(2026, 2, 1), date_to=date(2026, 3, 31))
+        # 03:00 UTC on 1 March is still 28 February in Chicago
+        self.assertEqual([(w['month'], w['rows']) for w in written], [('2026-02', 1), ('2026-03', 1)])
+
@@ -7,12 +7,26 @@ from .views import (
     WarehouseLedgerView,
     warehouse_kpis,
     warehouse_recent_activity,
+    warehouse_movement_trends,
     stock_on_hand,
     adjustment_permissions,
     warehouse_active_stock_summary,
     warehouse_physical_stock_summary,
 )
-from .views_putaway import putaway_kpis, putaway_list, putaway_confirm
+from .views_putaway import putaway_kpis, putaway_list, putaway_confirm, putaway_suggestions
+from .views_export import warehouse_ledger_parquet
+from .views_velocity import WarehouseItemVelocityView
+from .views_aging import warehouse_stock_aging
+from .views_lots import warehouse_lots, warehouse_near_expiry
+from .views_feed import ledger_changes, ledger_by_ref
+from .views_availability import item_availability_detail, items_availability
+from .views_reservation import StockReservationViewSet, atp_check
+from .views_reorder import AlertListView, ReorderSettingViewSet
+from .views_grn import GoodsReceiptDetailView, WarehouseReceiptsView
+from .views_pick import PickListViewSet, warehouse_pick_sequence
+from .views_count import CycleCountLineList, CycleCountViewSet
+from .views_transfer import TransferOrderViewSet
+from .views_serials import SerialUnitViewSet, warehouse_serials_move
 from .views_internal_move import (
     internal_move_from_location_stock,
     internal_move_confirm,
@@ -25,19 +39,43 @@ router = DefaultRouter()
 router.register(r"warehouses", WarehouseViewSet, basename="warehouse")
 router.register(r"locations", LocationViewSet, basename="location")
 router.register(r"adjustment-requests", AdjustmentRequestViewSet, basename="adjustmentrequest")
+router.register(r"reservations", StockReservationViewSet, basename="stockreservation")
+router.register(r"reorder-settings", ReorderSettingViewSet, basename="reordersetting")
+router.register(r"pick-lists", PickListViewSet, basename="picklist")
+router.register(r"cycle-counts", CycleCountViewSet, basename="cyclecount")
+router.register(r"transfers", TransferOrderViewSet, basename="transferorder")
+router.register(r"serials", SerialUnitViewSet, basename="serialunit")
 
 urlpatterns = router.urls + [
     path("warehouses/<int:pk>/movements/", WarehouseLedgerView.as_view(), name="warehouse_movements"),
     path("warehouses/<int:pk>/kpis/", warehouse_kpis, name="warehouse_kpis"),
+    path("warehouses/<int:pk>/movement_trends/", warehouse_movement_trends, name="warehouse_movement_trends"),
     path("warehouses/<int:pk>/recent_activity/", warehouse_recent_activity, name="warehouse_recent_activity"),
     path("warehouses/<int:pk>/active_stock_summary/", warehouse_active_stock_summary, name="warehouse_active_stock_summary"),
     path("warehouses/<int:pk>/physical_stock_summary/", warehouse_physical_stock_summary, name="warehouse_physical_stock_summary"),
+    path("warehouses/<int:pk>/ledger_export.parquet", warehouse_ledger_parquet, name="warehouse_ledger_parquet"),
+    path("warehouses/<int:pk>/item_velocity/", WarehouseItemVelocityView.as_view(), name="warehouse_item_velocity"),
+    path("warehouses/<int:pk>/stock_aging/", warehouse_stock_aging, name="warehouse_stock_aging"),
+    path("warehouses/<int:pk>/lots/", warehouse_lots, name="warehouse_lots"),
+    path("warehouses/<int:pk>/near-expiry/", warehouse_near_expiry, name="warehouse_near_expiry"),
+    path("warehouses/<int:pk>/serials/move/", warehouse_serials_move, name="warehouse_serials_move"),
+    path("warehouses/<int:pk>/receipts/", WarehouseReceiptsView.as_view(), name="warehouse_receipts"),
+    path("receipts/<int:pk>/", GoodsReceiptDetailView.as_view(), name="goods_receipt_detail"),
+    path("warehouses/<int:pk>/pick-sequence/", warehouse_pick_sequence, name="warehouse_pick_sequence"),
+    path("cycle-counts/<int:pk>/lines/", CycleCountLineList.as_view(), name="cycle_count_lines"),
+    path("ledger/changes/", ledger_changes, name="ledger_changes"),
+    path("ledger/by-ref/", ledger_by_ref, name="ledger_by_ref"),
+    path("items/<int:pk>/availability/", item_availability_detail, name="item_availability"),
+    path("items/availability/", items_availability, name="items_availability"),
+    path("atp/", atp_check, name="atp_check"),
+    path("alerts/", AlertListView.as_view(), name="alerts"),
     path("stock_on_hand/", stock_on_hand, name="stock_on_hand"),
     path("adjustment-permissions/", adjustment_permissions, name="adjustment_permissions"),
     # Putaway APIs
     path("warehouses/<int:pk>/putaway/kpis/", putaway_kpis, name="putaway_kpis"),
     path("warehouses/<int:pk>/putaway/list/", putaway_list, name="putaway_list"),
     path("warehouses/<int:pk>/putaway/confirm/", putaway_confirm, name="putaway_confirm"),
+    path("warehouses/<int:pk>/putaway/suggestions/", putaway_suggestions, name="putaway_suggestions"),
     # Internal Move APIs
     path("warehouses/<int:pk>/internal-move/from-stock/", internal_move_from_location_stock, name="internal_move_from_stock"),
     path("warehouses/<int:pk>/internal-move/confirm/", internal_move_confirm, name="internal_move_confirm"),
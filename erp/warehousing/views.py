@@ -1,21 +1,28 @@
+from datetime import timedelta
 from django.shortcuts import render
 from rest_framework import viewsets, permissions, decorators, response, generics, filters, status
 from rest_framework.exceptions import ValidationError
 from rest_framework.decorators import action, api_view, permission_classes
 from django.db.models import Count, Q, Sum as DjangoSum
+from django.db import IntegrityError, transaction
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django.http import JsonResponse
-from .models import Warehouse, Location, LocationType, StockLedger, AdjustmentRequest, AdjustmentStatus, WarehouseStatus
+from .models import Warehouse, Location, LocationType, StockLedger, AdjustmentRequest, AdjustmentStatus, WarehouseStatus, LedgerDailyRollup, LedgerView
 from .serializers import (
     WarehouseSerializer,
     LocationSerializer,
     WarehouseHistorySerializer,
     LocationHistorySerializer,
-    StockLedgerListSerializer,
+    LocationGenerateSerializer,
     AdjustmentRequestSerializer,
+    LEDGER_VIEW_VALUES,
+    ledger_view_rows,
 )
 from .services import ensure_location_empty, request_post_moves, approve_post_moves, decline_post_moves, on_hand_qty
-from .services import delete_request_revert_moves
+from .services import delete_request_revert_moves, local_day_bounds, post_entries
+from .services_rollup import movement_trends
+from .services_locations import generate_locations
 # Add explicit imports for error translation
 from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework.exceptions import ValidationError as DRFValidationError
@@ -81,6 +88,7 @@ class WarehouseViewSet(viewsets.ModelViewSet):
         if not (return_bin and lost_bin):
             return response.Response({"detail": "RETURN and LOST bins required"}, status=status.HTTP_400_BAD_REQUEST)
         summary = {"return": [], "lost_pending": []}
+        entries = []
         with transaction.atomic():
             # RETURN bin processing
             if return_bin:
@@ -96,8 +104,8 @@ class WarehouseViewSet(viewsets.ModelViewSet):
                     item_id = r["item_id"]
                     if qty > 0:
                         # Move to LOST
-                        StockLedger.objects.create(warehouse=wh, location=return_bin, item_id=item_id, qty_delta=-qty, movement_type=MovementType.PUTAWAY_LOST, ref_model="ZERO_BINS", ref_id="RETURN->LOST", user=request.user, memo="zero return write-off")
-                        StockLedger.objects.create(warehouse=wh, location=lost_bin, item_id=item_id, qty_delta=+qty, movement_type=MovementType.PUTAWAY_LOST, ref_model="ZERO_BINS", ref_id="RETURN->LOST", user=request.user, memo="zero return write-off")
+                        entries.append(StockLedger(warehouse=wh, location=return_bin, item_id=item_id, qty_delta=-qty, movement_type=MovementType.PUTAWAY_LOST, ref_model="ZERO_BINS", ref_id="RETURN->LOST", user=request.user, memo="zero return write-off"))
+                        entries.append(StockLedger(warehouse=wh, location=lost_bin, item_id=item_id, qty_delta=+qty, movement_type=MovementType.PUTAWAY_LOST, ref_model="ZERO_BINS", ref_id="RETURN->LOST", user=request.user, memo="zero return write-off"))
                         summary["return"].append({"item": item_id, "moved_to_lost": float(qty)})
                     else:
                         # Negative qty: attempt to pull from LOST to zero
@@ -110,8 +118,8 @@ class WarehouseViewSet(viewsets.ModelViewSet):
                         )
                         take = min(need, lost_bal)
                         if take > 0:
-                            StockLedger.objects.create(warehouse=wh, location=lost_bin, item_id=item_id, qty_delta=-take, movement_type=MovementType.PUTAWAY_LOST, ref_model="ZERO_BINS", ref_id="LOST->RETURN", user=request.user, memo="offset negative return from lost")
-                            StockLedger.objects.create(warehouse=wh, location=return_bin, item_id=item_id, qty_delta=+take, movement_type=MovementType.PUTAWAY_LOST, ref_model="ZERO_BINS", ref_id="LOST->RETURN", user=request.user, memo="offset negative return from lost")
+                            entries.append(StockLedger(warehouse=wh, location=lost_bin, item_id=item_id, qty_delta=-take, movement_type=MovementType.PUTAWAY_LOST, ref_model="ZERO_BINS", ref_id="LOST->RETURN", user=request.user, memo="offset negative return from lost"))
+                            entries.append(StockLedger(warehouse=wh, location=return_bin, item_id=item_id, qty_delta=+take, movement_type=MovementType.PUTAWAY_LOST, ref_model="ZERO_BINS", ref_id="LOST->RETURN", user=request.user, memo="offset negative return from lost"))
                             need -= take
                         if need > 0:
                             # Cannot fully offset; leave remainder (avoid fabricating stock)
@@ -128,9 +136,14 @@ class WarehouseViewSet(viewsets.ModelViewSet):
                     if qty <= 0:
                         continue  # ignore zero/negative
                     item_id = r["item_id"]
-                    StockLedger.objects.create(warehouse=wh, location=lost_pending_bin, item_id=item_id, qty_delta=-qty, movement_type=MovementType.PUTAWAY_LOST, ref_model="ZERO_BINS", ref_id="LOST_PENDING->LOST", user=request.user, memo="finalize lost pending")
-                    StockLedger.objects.create(warehouse=wh, location=lost_bin, item_id=item_id, qty_delta=+qty, movement_type=MovementType.PUTAWAY_LOST, ref_model="ZERO_BINS", ref_id="LOST_PENDING->LOST", user=request.user, memo="finalize lost pending")
+                    entries.append(StockLedger(warehouse=wh, location=lost_pending_bin, item_id=item_id, qty_delta=-qty, movement_type=MovementType.PUTAWAY_LOST, ref_model="ZERO_BINS", ref_id="LOST_PENDING->LOST", user=request.user, memo="finalize lost pending"))
+                    entries.append(StockLedger(warehouse=wh, location=lost_bin, item_id=item_id, qty_delta=+qty, movement_type=MovementType.PUTAWAY_LOST, ref_model="ZERO_BINS", ref_id="LOST_PENDING->LOST", user=request.user, memo="finalize lost pending"))
                     summary["lost_pending"].append({"item": item_id, "finalized": float(qty)})
+            try:
+                post_entries(entries)
+            except DjangoValidationError as e:
+                # Serialized stock at the location: its units must be moved by serial first
+                return response.Response({"detail": e.messages}, status=status.HTTP_409_CONFLICT)
         return response.Response({"ok": True, "warehouse": wh.id, "summary": summary})
 
 
@@ -159,6 +172,23 @@ class LocationViewSet(viewsets.ModelViewSet):
                 raise ValidationError("Inventory exists; cannot deactivate location")
         serializer.save(updated_by=self.request.user)
 
+    @decorators.action(detail=False, methods=["post"], url_path="generate")
+    def generate(self, request):
+        """Create a grid of PHYSICAL locations from a code pattern, e.g. A{01-20}-R{01-10}."""
+        ser = LocationGenerateSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        data = ser.validated_data
+        try:
+            res = generate_locations(
+                data["warehouse"], data["pattern"], user=request.user, capacity=data.get("capacity"),
+                sequence=data["sequence"], skip_existing=data["skip_existing"], dry_run=data["dry_run"],
+            )
+        except DjangoValidationError as e:
+            return response.Response({"detail": e.messages}, status=status.HTTP_400_BAD_REQUEST)
+        except IntegrityError:
+            return response.Response({"detail": "Location codes were created concurrently; retry"}, status=status.HTTP_409_CONFLICT)
+        return response.Response(res, status=status.HTTP_200_OK if data["dry_run"] else status.HTTP_201_CREATED)
+
     @decorators.action(detail=True, methods=["get"], url_path="history")
     def history(self, request, pk=None):
         loc = self.get_object()
@@ -185,6 +215,7 @@ class LocationViewSet(viewsets.ModelViewSet):
         if not return_bin or not lost_bin:
             return response.Response({"detail": "Required virtual bins missing"}, status=status.HTTP_400_BAD_REQUEST)
         moved = []
+        entries = []
         from .services import on_hand_qty as svc_on_hand
         for r in rows:
             qty = r["total"] or Decimal("0")
@@ -193,22 +224,26 @@ class LocationViewSet(viewsets.ModelViewSet):
             item_id = r["item_id"]
             if qty > 0:
                 # move out qty to RETURN bin
-                StockLedger.objects.create(warehouse=loc.warehouse, location=loc, item_id=item_id, qty_delta=-qty, movement_type=MovementType.TRANSFER, ref_model="LOCATION_ZERO", ref_id=str(loc.id), user=request.user, memo="zero stock out")
-                StockLedger.objects.create(warehouse=loc.warehouse, location=return_bin, item_id=item_id, qty_delta=+qty, movement_type=MovementType.TRANSFER, ref_model="LOCATION_ZERO", ref_id=str(loc.id), user=request.user, memo="zero stock in RETURN")
+                entries.append(StockLedger(warehouse=loc.warehouse, location=loc, item_id=item_id, qty_delta=-qty, movement_type=MovementType.TRANSFER, ref_model="LOCATION_ZERO", ref_id=str(loc.id), user=request.user, memo="zero stock out"))
+                entries.append(StockLedger(warehouse=loc.warehouse, location=return_bin, item_id=item_id, qty_delta=+qty, movement_type=MovementType.TRANSFER, ref_model="LOCATION_ZERO", ref_id=str(loc.id), user=request.user, memo="zero stock in RETURN"))
                 moved.append({"item": item_id, "delta": float(qty)})
             else:
                 need = -qty
                 available_return = svc_on_hand(loc.warehouse.id, return_bin.id, item_id)
                 take = min(need, available_return)
                 if take > 0:
-                    StockLedger.objects.create(warehouse=loc.warehouse, location=return_bin, item_id=item_id, qty_delta=-take, movement_type=MovementType.TRANSFER, ref_model="LOCATION_ZERO", ref_id=str(loc.id), user=request.user, memo="offset negative via RETURN")
-                    StockLedger.objects.create(warehouse=loc.warehouse, location=loc, item_id=item_id, qty_delta=+take, movement_type=MovementType.TRANSFER, ref_model="LOCATION_ZERO", ref_id=str(loc.id), user=request.user, memo="offset negative at location")
+                    entries.append(StockLedger(warehouse=loc.warehouse, location=return_bin, item_id=item_id, qty_delta=-take, movement_type=MovementType.TRANSFER, ref_model="LOCATION_ZERO", ref_id=str(loc.id), user=request.user, memo="offset negative via RETURN"))
+                    entries.append(StockLedger(warehouse=loc.warehouse, location=loc, item_id=item_id, qty_delta=+take, movement_type=MovementType.TRANSFER, ref_model="LOCATION_ZERO", ref_id=str(loc.id), user=request.user, memo="offset negative at location"))
                     need -= take
                 if need > 0:
                     # residual negative: post into LOST to balance
-                    StockLedger.objects.create(warehouse=loc.warehouse, location=loc, item_id=item_id, qty_delta=+need, movement_type=MovementType.PUTAWAY_LOST, ref_model="LOCATION_ZERO", ref_id=str(loc.id), user=request.user, memo="cover negative with LOST")
-                    StockLedger.objects.create(warehouse=loc.warehouse, location=lost_bin, item_id=item_id, qty_delta=+need, movement_type=MovementType.PUTAWAY_LOST, ref_model="LOCATION_ZERO", ref_id=str(loc.id), user=request.user, memo="from zero negative")
+                    entries.append(StockLedger(warehouse=loc.warehouse, location=loc, item_id=item_id, qty_delta=+need, movement_type=MovementType.PUTAWAY_LOST, ref_model="LOCATION_ZERO", ref_id=str(loc.id), user=request.user, memo="cover negative with LOST"))
+                    entries.append(StockLedger(warehouse=loc.warehouse, location=lost_bin, item_id=item_id, qty_delta=+need, movement_type=MovementType.PUTAWAY_LOST, ref_model="LOCATION_ZERO", ref_id=str(loc.id), user=request.user, memo="from zero negative"))
                     moved.append({"item": item_id, "delta": float(qty)})
+        try:
+            post_entries(entries)
+        except DjangoValidationError as e:
+            return response.Response({"detail": e.messages}, status=status.HTTP_409_CONFLICT)
         return response.Response({"ok": True, "zeroed": len(moved), "details": moved})
 
     @decorators.action(detail=True, methods=["post"], url_path="zero_item")
@@ -253,26 +288,31 @@ class LocationViewSet(viewsets.ModelViewSet):
         if not return_bin or not lost_bin:
             return response.Response({"detail": "Required virtual bins missing"}, status=status.HTTP_400_BAD_REQUEST)
         ops = []
+        entries = []
         from .services import on_hand_qty as svc_on_hand  # reuse existing util
         with transaction.atomic():
             if qty > 0:
                 # Move out to RETURN
-                StockLedger.objects.create(warehouse=loc.warehouse, location=loc, item=item_obj, qty_delta=-qty, movement_type=MovementType.TRANSFER, ref_model="LOCATION_ZERO_ITEM", ref_id=f"{loc.id}:{item_obj.id}", user=request.user, memo="zero item out")
-                StockLedger.objects.create(warehouse=loc.warehouse, location=return_bin, item=item_obj, qty_delta=+qty, movement_type=MovementType.TRANSFER, ref_model="LOCATION_ZERO_ITEM", ref_id=f"{loc.id}:{item_obj.id}", user=request.user, memo="zero item to RETURN")
+                entries.append(StockLedger(warehouse=loc.warehouse, location=loc, item=item_obj, qty_delta=-qty, movement_type=MovementType.TRANSFER, ref_model="LOCATION_ZERO_ITEM", ref_id=f"{loc.id}:{item_obj.id}", user=request.user, memo="zero item out"))
+                entries.append(StockLedger(warehouse=loc.warehouse, location=return_bin, item=item_obj, qty_delta=+qty, movement_type=MovementType.TRANSFER, ref_model="LOCATION_ZERO_ITEM", ref_id=f"{loc.id}:{item_obj.id}", user=request.user, memo="zero item to RETURN"))
                 ops.append({"action": "MOVE_TO_RETURN", "qty": float(qty)})
             else:
                 need = -qty  # qty is negative
                 available_return = svc_on_hand(loc.warehouse.id, return_bin.id, item_obj.id)
                 take = min(need, available_return)
                 if take > 0:
-                    StockLedger.objects.create(warehouse=loc.warehouse, location=return_bin, item=item_obj, qty_delta=-take, movement_type=MovementType.TRANSFER, ref_model="LOCATION_ZERO_ITEM", ref_id=f"{loc.id}:{item_obj.id}", user=request.user, memo="offset neg via RETURN")
-                    StockLedger.objects.create(warehouse=loc.warehouse, location=loc, item=item_obj, qty_delta=+take, movement_type=MovementType.TRANSFER, ref_model="LOCATION_ZERO_ITEM", ref_id=f"{loc.id}:{item_obj.id}", user=request.user, memo="offset neg at location")
+                    entries.append(StockLedger(warehouse=loc.warehouse, location=return_bin, item=item_obj, qty_delta=-take, movement_type=MovementType.TRANSFER, ref_model="LOCATION_ZERO_ITEM", ref_id=f"{loc.id}:{item_obj.id}", user=request.user, memo="offset neg via RETURN"))
+                    entries.append(StockLedger(warehouse=loc.warehouse, location=loc, item=item_obj, qty_delta=+take, movement_type=MovementType.TRANSFER, ref_model="LOCATION_ZERO_ITEM", ref_id=f"{loc.id}:{item_obj.id}", user=request.user, memo="offset neg at location"))
                     ops.append({"action": "OFFSET_FROM_RETURN", "qty": float(take)})
                     need -= take
                 if need > 0:
-                    StockLedger.objects.create(warehouse=loc.warehouse, location=loc, item=item_obj, qty_delta=+need, movement_type=MovementType.PUTAWAY_LOST, ref_model="LOCATION_ZERO_ITEM", ref_id=f"{loc.id}:{item_obj.id}", user=request.user, memo="cover negative with LOST")
-                    StockLedger.objects.create(warehouse=loc.warehouse, location=lost_bin, item=item_obj, qty_delta=+need, movement_type=MovementType.PUTAWAY_LOST, ref_model="LOCATION_ZERO_ITEM", ref_id=f"{loc.id}:{item_obj.id}", user=request.user, memo="zero item negative to LOST")
+                    entries.append(StockLedger(warehouse=loc.warehouse, location=loc, item=item_obj, qty_delta=+need, movement_type=MovementType.PUTAWAY_LOST, ref_model="LOCATION_ZERO_ITEM", ref_id=f"{loc.id}:{item_obj.id}", user=request.user, memo="cover negative with LOST"))
+                    entries.append(StockLedger(warehouse=loc.warehouse, location=lost_bin, item=item_obj, qty_delta=+need, movement_type=MovementType.PUTAWAY_LOST, ref_model="LOCATION_ZERO_ITEM", ref_id=f"{loc.id}:{item_obj.id}", user=request.user, memo="zero item negative to LOST"))
                     ops.append({"action": "COVER_WITH_LOST", "qty": float(need)})
+            try:
+                post_entries(entries)
+            except DjangoValidationError as e:
+                    return response.Response({"detail": e.messages}, status=status.HTTP_409_CONFLICT)
         # After state
         new_qty = svc_on_hand(loc.warehouse.id, loc.id, item_obj.id)
         return response.Response({
@@ -296,18 +336,18 @@ class MovementsPagination(PageNumberPagination):
 
 
 class WarehouseLedgerView(generics.ListAPIView):
-    serializer_class = StockLedgerListSerializer
+    """Movements grid, read from the LedgerView projection as plain value dicts (no joins,
+    no window function, no model instances)."""
     permission_classes = [permissions.IsAuthenticated, permissions.DjangoModelPermissions]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ["item__sku", "item__name", "memo", "ref_id"]
+    search_fields = ["item_sku", "item_name", "memo", "ref_id"]
     ordering_fields = ["ts", "qty_delta", "movement_type"]
-    ordering = ["-ts"]
+    ordering = ["-ts", "-ledger_id"]
     pagination_class = MovementsPagination
 
     def get_queryset(self):
-        from django.db.models import Window, F, Sum as ORM_Sum
         wh_id = self.kwargs.get("pk")
-        qs = StockLedger.objects.select_related("item", "location").filter(warehouse_id=wh_id).order_by("-ts")
+        qs = LedgerView.objects.filter(warehouse_id=wh_id)
         # Additional filters via query params
         params = self.request.query_params
         from_loc = params.get("from_location")
@@ -317,27 +357,26 @@ class WarehouseLedgerView(generics.ListAPIView):
         date_to = params.get("date_to")
         if mtype:
             qs = qs.filter(movement_type=mtype)
-        if date_from:
-            qs = qs.filter(ts__date__gte=date_from)
-        if date_to:
-            qs = qs.filter(ts__date__lte=date_to)
+        d_from = parse_date(date_from) if date_from else None
+        d_to = parse_date(date_to) if date_to else None
+        if d_from:
+            qs = qs.filter(ts__gte=local_day_bounds(d_from)[0])
+        if d_to:
+            qs = qs.filter(ts__lt=local_day_bounds(d_to)[1])
         if from_loc:
             # Entries that reduce stock at a specific location (e.g., transfers out, adjustments out)
             qs = qs.filter(location_id=from_loc, qty_delta__lt=0)
         if to_loc:
             # Entries that increase stock at a specific location (e.g., transfers in, adjustments in)
             qs = qs.filter(location_id=to_loc, qty_delta__gt=0)
-        # Annotate per-location running total to compute before/after quantities
-        running_total = Window(
-            expression=ORM_Sum("qty_delta"),
-            partition_by=[F("warehouse_id"), F("location_id"), F("item_id")],
-            order_by=[F("ts").asc(), F("id").asc()],
-        )
-        qs = qs.annotate(
-            location_qty_after=running_total,
-            location_qty_before=running_total - F("qty_delta"),
-        )
-        return qs
+        return qs.values(*LEDGER_VIEW_VALUES)
+
+    def list(self, request, *args, **kwargs):
+        qs = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(qs)
+        if page is not None:
+            return self.get_paginated_response(ledger_view_rows(page, request))
+        return response.Response(ledger_view_rows(qs, request))
 
 
 class AdjustmentRequestPermissions(permissions.DjangoModelPermissions):
@@ -368,6 +407,7 @@ class AdjustmentRequestViewSet(viewsets.ModelViewSet):
     search_fields = ["number", "item__sku", "item__name"]
     ordering_fields = ["requested_at", "number"]
 
+    @transaction.atomic
     def perform_create(self, serializer):
         obj = serializer.save(requested_by=self.request.user)
         # Perform pending moves for the request
@@ -379,7 +419,13 @@ class AdjustmentRequestViewSet(viewsets.ModelViewSet):
         if obj.status != AdjustmentStatus.REQUESTED:
             return response.Response({"detail": "Not in REQUESTED status"}, status=status.HTTP_400_BAD_REQUEST)
         try:
-            approve_post_moves(obj, request.user)
+            # Postings, status change and their outbox events commit together
+            with transaction.atomic():
+                approve_post_moves(obj, request.user)
+                obj.status = AdjustmentStatus.APPROVED
+                obj.approved_by = request.user
+                obj.approved_at = timezone.now()
+                obj.save(update_fields=["status", "approved_by", "approved_at"])
         except (DjangoValidationError, DRFValidationError) as e:
             # Normalize validation messages
             detail = getattr(e, "message", None) or getattr(e, "detail", None) or str(e)
@@ -387,10 +433,6 @@ class AdjustmentRequestViewSet(viewsets.ModelViewSet):
         except Exception as e:
             # Surface unexpected errors to the UI (and keep 500 semantics)
             return response.Response({"detail": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        obj.status = AdjustmentStatus.APPROVED
-        obj.approved_by = request.user
-        obj.approved_at = timezone.now()
-        obj.save(update_fields=["status", "approved_by", "approved_at"])
         return response.Response(AdjustmentRequestSerializer(obj).data)
 
     @action(detail=True, methods=["post"])
@@ -399,18 +441,20 @@ class AdjustmentRequestViewSet(viewsets.ModelViewSet):
         if obj.status != AdjustmentStatus.REQUESTED:
             return response.Response({"detail": "Not in REQUESTED status"}, status=status.HTTP_400_BAD_REQUEST)
         try:
-            decline_post_moves(obj, request.user)
+            with transaction.atomic():
+                decline_post_moves(obj, request.user)
+                obj.status = AdjustmentStatus.DECLINED
+                obj.declined_by = request.user
+                obj.declined_at = timezone.now()
+                obj.save(update_fields=["status", "declined_by", "declined_at"])
         except (DjangoValidationError, DRFValidationError) as e:
             detail = getattr(e, "message", None) or getattr(e, "detail", None) or str(e)
             return response.Response({"detail": detail}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return response.Response({"detail": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        obj.status = AdjustmentStatus.DECLINED
-        obj.declined_by = request.user
-        obj.declined_at = timezone.now()
-        obj.save(update_fields=["status", "declined_by", "declined_at"])
         return response.Response(AdjustmentRequestSerializer(obj).data)
 
+    @transaction.atomic
     def perform_destroy(self, instance):
         if instance.status != AdjustmentStatus.REQUESTED:
             raise ValidationError("Only REQUESTED adjustments can be deleted")
@@ -446,9 +490,12 @@ def warehouse_kpis(request, pk: int):
         .annotate(q=DjangoSum("qty_delta"))
     )
     locations_with_stock = sum(1 for r in per_loc if (r.get("q") or 0) != 0)
-    # Movements today
-    today = timezone.now().date()
-    movements_today = StockLedger.objects.filter(warehouse_id=pk, ts__date=today).count()
+    # Movements today (from the daily rollup maintained at posting time)
+    movements_today = (
+        LedgerDailyRollup.objects.filter(warehouse_id=pk, day=timezone.localdate())
+        .aggregate(n=DjangoSum("entries")).get("n")
+        or 0
+    )
     # LOST bin qty as a separate KPI
     lost_qty = (
         base.filter(location__subtype=VirtualSubtype.LOST)
@@ -464,16 +511,43 @@ def warehouse_kpis(request, pk: int):
     })
 
 
+@api_view(["GET"])  # Daily movement trends from LedgerDailyRollup
+@permission_classes([permissions.IsAuthenticated])
+def warehouse_movement_trends(request, pk: int):
+    today = timezone.localdate()
+    df_raw, dt_raw = request.GET.get("date_from"), request.GET.get("date_to")
+    date_to = parse_date(dt_raw) if dt_raw else today
+    if df_raw:
+        date_from = parse_date(df_raw)
+    else:
+        try:
+            days = int(request.GET.get("days") or 30)
+        except ValueError:
+            return response.Response({"detail": "days must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        date_from = date_to - timedelta(days=max(days, 1) - 1) if date_to else None
+    if not date_from or not date_to:
+        return response.Response({"detail": "date_from/date_to must be YYYY-MM-DD"}, status=status.HTTP_400_BAD_REQUEST)
+    if date_from > date_to:
+        return response.Response({"detail": "date_from must not be after date_to"}, status=status.HTTP_400_BAD_REQUEST)
+    if (date_to - date_from).days > 366:
+        return response.Response({"detail": "Range is limited to 366 days"}, status=status.HTTP_400_BAD_REQUEST)
+    group_by = request.GET.get("group_by") or None
+    if group_by not in (None, "movement_type", "location_subtype"):
+        return response.Response({"detail": "group_by must be movement_type or location_subtype"}, status=status.HTTP_400_BAD_REQUEST)
+    series = movement_trends(pk, date_from, date_to, group_by)
+    return response.Response({
+        "date_from": date_from.isoformat(),
+        "date_to": date_to.isoformat(),
+        "group_by": group_by,
+        "results": series,
+    })
+
+
 @api_view(["GET"])  # Recent activity: last 10 movements
 @permission_classes([permissions.IsAuthenticated])
 def warehouse_recent_activity(request, pk: int):
-    qs = (
-        StockLedger.objects.select_related("item", "location")
-        .filter(warehouse_id=pk)
-        .order_by("-ts")[:10]
-    )
-    data = StockLedgerListSerializer(qs, many=True).data
-    return response.Response({"results": data})
+    qs = LedgerView.objects.filter(warehouse_id=pk).order_by("-ts", "-ledger_id").values(*LEDGER_VIEW_VALUES)[:10]
+    return response.Response({"results": ledger_view_rows(qs, request)})
 
 
 @api_view(["GET"])  # Simple on-hand endpoint
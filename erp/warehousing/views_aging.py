@@ -0,0 +1,18 @@
+from django.shortcuts import get_object_or_404
+from rest_framework import permissions, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from .models import Warehouse
+from .services_aging import aging_report
+
+
+@api_view(["GET"])  # FIFO stock aging buckets (0-30/31-60/61-90/90+ days)
+@permission_classes([permissions.IsAuthenticated])
+def warehouse_stock_aging(request, pk: int):
+    wh = get_object_or_404(Warehouse, pk=pk)
+    by_item = (request.GET.get("by_item") or "").lower() in ("1", "true", "yes")
+    try:
+        limit = min(int(request.GET.get("limit") or 100), 1000)
+    except ValueError:
+        return Response({"detail": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(aging_report(wh.id, by_item=by_item, limit=limit))
@@ -0,0 +1,37 @@
+from django.shortcuts import get_object_or_404
+from rest_framework import permissions, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+
+from catalog.models import Item
+from .services_availability import item_availability
+
+MAX_SKUS = 500
+
+
+@api_view(["GET"])  # Availability of one item across all warehouses
+@permission_classes([permissions.IsAuthenticated])
+def item_availability_detail(request, pk: int):
+    item = get_object_or_404(Item.objects.only("id", "sku", "name"), pk=pk)
+    return Response(item_availability([item])[0])
+
+
+@api_view(["GET", "POST"])  # Batched: ?sku=A&sku=B or ?skus=A,B, or POST {"skus": [...]}
+@permission_classes([permissions.IsAuthenticated])
+def items_availability(request):
+    if request.method == "POST":
+        raw = request.data.get("skus") if hasattr(request.data, "get") else None
+        if not isinstance(raw, list):
+            return Response({"detail": "skus must be a list"}, status=status.HTTP_400_BAD_REQUEST)
+    else:
+        raw = request.GET.getlist("sku") + [s for v in request.GET.getlist("skus") for s in v.split(",")]
+    skus = list(dict.fromkeys(str(s).strip() for s in raw if str(s).strip()))
+    if not skus:
+        return Response({"detail": "sku is required"}, status=status.HTTP_400_BAD_REQUEST)
+    if len(skus) > MAX_SKUS:
+        return Response({"detail": f"At most {MAX_SKUS} SKUs per request"}, status=status.HTTP_400_BAD_REQUEST)
+    by_sku = {i.sku: i for i in Item.objects.filter(sku__in=skus).only("id", "sku", "name")}
+    return Response({
+        "results": item_availability([by_sku[s] for s in skus if s in by_sku]),
+        "missing": [s for s in skus if s not in by_sku],
+    })
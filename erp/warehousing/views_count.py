@@ -0,0 +1,93 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Count, Q
+from django.shortcuts import get_object_or_404
+from rest_framework import generics, mixins, permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
+from rest_framework.response import Response
+
+from .models import CycleCount, CycleCountLine, Warehouse
+from .serializers_count import CountScansSerializer, CycleCountCreateSerializer, CycleCountLineSerializer, CycleCountSerializer
+from .services_count import cancel_count, iter_count_rows, post_count, record_count_stream, record_counts, start_count, variances
+
+
+class CycleCountViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    queryset = CycleCount.objects.select_related("created_by", "posted_by").annotate(
+        line_count=Count("lines"), counted_lines=Count("lines", filter=Q(lines__counted__isnull=False))
+    ).order_by("-id")
+    serializer_class = CycleCountSerializer
+    permission_classes = [permissions.IsAuthenticated, permissions.DjangoModelPermissions]
+    parser_classes = [JSONParser, MultiPartParser, FormParser]
+    filterset_fields = ["warehouse", "status"]
+    search_fields = ["number", "memo"]
+    ordering_fields = ["created_at", "posted_at"]
+
+    def _summary(self, cc, code=status.HTTP_200_OK, **extra):
+        return Response({**CycleCountSerializer(self.get_queryset().get(pk=cc.pk)).data, **extra}, status=code)
+
+    def create(self, request, *args, **kwargs):
+        """Start a count: snapshot expected stock of the given locations (default: all)."""
+        payload = CycleCountCreateSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+        data = payload.validated_data
+        wh = get_object_or_404(Warehouse, pk=data["warehouse"])
+        try:
+            cc = start_count(wh, location_ids=data.get("locations"), user=request.user, memo=data["memo"])
+        except DjangoValidationError as e:
+            return Response({"detail": e.messages}, status=status.HTTP_400_BAD_REQUEST)
+        return self._summary(cc, status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=["post"])
+    def scans(self, request, pk=None):
+        """Record scans: JSON {"scans": [{location, item | sku, qty}], "replace"} or a multipart
+        CSV ``file`` (location, item or sku, optional qty) streamed from a handheld."""
+        cc = self.get_object()
+        upload = request.FILES.get("file")
+        try:
+            if upload:
+                replace = str(request.data.get("replace", "")).lower() in ("1", "true", "yes")
+                touched = record_count_stream(cc, iter_count_rows(upload.file), replace=replace)
+            else:
+                payload = CountScansSerializer(data=request.data)
+                payload.is_valid(raise_exception=True)
+                touched = record_counts(cc, payload.validated_data["scans"], replace=payload.validated_data["replace"])
+        except (DjangoValidationError, UnicodeDecodeError) as e:
+            return Response({"detail": getattr(e, "messages", [str(e)])}, status=status.HTTP_400_BAD_REQUEST)
+        return self._summary(cc, touched=touched)
+
+    @action(detail=True, methods=["get"], url_path="variances")
+    def variance_list(self, request, pk=None):
+        rows = variances(self.get_object())
+        return Response({"results": [
+            {**r, **{k: float(r[k]) for k in ("expected", "counted", "variance")}} for r in rows
+        ]})
+
+    # Not named post(): a ViewSet method of that name would also answer plain POSTs
+    @action(detail=True, methods=["post"], url_path="post")
+    def post_variances(self, request, pk=None):
+        """Post every variance as CYCLE_COUNT ledger entries and close the count."""
+        try:
+            result = post_count(self.get_object(), user=request.user)
+        except DjangoValidationError as e:
+            return Response({"detail": e.messages}, status=status.HTTP_400_BAD_REQUEST)
+        return self._summary(self.get_object(), **{k: float(v) if k in ("shortage", "overage") else v for k, v in result.items()})
+
+    @action(detail=True, methods=["post"])
+    def cancel(self, request, pk=None):
+        try:
+            cc = cancel_count(self.get_object())
+        except DjangoValidationError as e:
+            return Response({"detail": e.messages}, status=status.HTTP_400_BAD_REQUEST)
+        return self._summary(cc)
+
+
+class CycleCountLineList(generics.ListAPIView):
+    """Lines of a count (?variance=1 for the ones that differ once posted)."""
+    serializer_class = CycleCountLineSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        qs = CycleCountLine.objects.filter(count_id=self.kwargs["pk"]).select_related("location", "item").order_by("location__code", "item__sku")
+        if self.request.query_params.get("variance"):
+            qs = qs.exclude(variance=0).exclude(variance__isnull=True)
+        return qs
@@ -0,0 +1,29 @@
+import tempfile
+from django.http import FileResponse
+from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_date
+from rest_framework import permissions, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from .models import Warehouse
+from .services_export import export_queryset, write_parquet, pa
+
+
+@api_view(["GET"])  # Parquet download of a warehouse's ledger (joined, dictionary-encoded)
+@permission_classes([permissions.IsAuthenticated])
+def warehouse_ledger_parquet(request, pk: int):
+    if not request.user.has_perm("warehousing.view_stockledger"):
+        return Response({"detail": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
+    if pa is None:
+        return Response({"detail": "Parquet export unavailable: pyarrow is not installed"}, status=status.HTTP_501_NOT_IMPLEMENTED)
+    wh = get_object_or_404(Warehouse, pk=pk)
+    date_from = parse_date(request.GET.get("date_from") or "") if request.GET.get("date_from") else None
+    date_to = parse_date(request.GET.get("date_to") or "") if request.GET.get("date_to") else None
+    if (request.GET.get("date_from") and not date_from) or (request.GET.get("date_to") and not date_to):
+        return Response({"detail": "date_from/date_to must be YYYY-MM-DD"}, status=status.HTTP_400_BAD_REQUEST)
+    # Spill to a temp file: the Parquet footer is only known after the last batch
+    fh = tempfile.TemporaryFile()
+    write_parquet(export_queryset(wh.id, date_from, date_to), fh)
+    fh.seek(0)
+    suffix = f"_{date_from or ''}_{date_to or ''}" if (date_from or date_to) else ""
+    return FileResponse(fh, as_attachment=True, filename=f"ledger_{wh.code}{suffix}.parquet", content_type="application/vnd.apache.parquet")
@@ -0,0 +1,148 @@
+from rest_framework import permissions, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from .models import MovementType, StockLedger
+from .services import settled_ledger_rows
+from .services_archive import ARCHIVE_REF_MODEL
+
+FEED_FIELDS = [
+    "id", "ts", "warehouse_id", "warehouse__code", "location_id", "location__code", "location__subtype",
+    "item_id", "item__sku", "qty_delta", "movement_type", "ref_model", "ref_id", "memo", "user_id",
+]
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+
+
+def _is_opening(row: dict) -> bool:
+    # Carried-forward balance written by archive_ledger, not a movement
+    return row["movement_type"] == MovementType.OPENING_BALANCE and row["ref_model"] == ARCHIVE_REF_MODEL
+
+
+@api_view(["GET"])  # Change feed: ledger rows strictly after an id cursor
+@permission_classes([permissions.IsAuthenticated])
+def ledger_changes(request):
+    """GET ledger/changes/?after=<id>&limit=N[&warehouse=<pk>]
+
+    Rows come back in id order from a range scan on the primary key (no COUNT, no OFFSET).
+    Consumers store ``next_after`` and pass it back as ``after``. The page stops before the
+    first row that may still have lower ids uncommitted (settled_ledger_rows: written after
+    the oldest running transaction, or younger than LEDGER_FEED_SETTLE_SECONDS) so ids that
+    commit out of order are not skipped; they appear on a later poll instead.
+
+    archive_ledger deletes the rows before its cutoff and inserts one OPENING_BALANCE row per
+    (warehouse, location, item, lot) carrying their net, with new ids above every cursor. These
+    come back with ``opening_balance: true`` and ``archive_cutoff`` (their ts): they restate
+    rows dated before the cutoff rather than move stock. A consumer that has applied any row
+    dated before archive_cutoff skips them; one starting from scratch applies them as its
+    starting balance and gets the same totals."""
+    if not request.user.has_perm("warehousing.view_stockledger"):
+        return Response({"detail": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
+    try:
+        after = int(request.GET.get("after") or 0)
+        limit = int(request.GET.get("limit") or DEFAULT_LIMIT)
+        warehouse_id = int(request.GET["warehouse"]) if request.GET.get("warehouse") else None
+    except ValueError:
+        return Response({"detail": "after, limit and warehouse must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+    limit = max(1, min(limit, MAX_LIMIT))
+    qs = StockLedger.objects.filter(id__gt=after)
+    if warehouse_id is not None:
+        qs = qs.filter(warehouse_id=warehouse_id)
+    rows, fetched = settled_ledger_rows(qs, FEED_FIELDS, limit)
+    results = [
+        {
+            "id": r["id"],
+            "ts": r["ts"],
+            "warehouse": r["warehouse_id"],
+            "warehouse_code": r["warehouse__code"],
+            "location": r["location_id"],
+            "location_code": r["location__code"],
+            "location_subtype": r["location__subtype"],
+            "item": r["item_id"],
+            "item_sku": r["item__sku"],
+            "qty_delta": r["qty_delta"],
+            "movement_type": r["movement_type"],
+            "ref_model": r["ref_model"],
+            "ref_id": r["ref_id"],
+            "memo": r["memo"],
+            "user": r["user_id"],
+            "opening_balance": _is_opening(r),
+            "archive_cutoff": r["ts"] if _is_opening(r) else None,
+        }
+        for r in rows
+    ]
+    return Response({
+        "after": after,
+        "next_after": results[-1]["id"] if results else after,
+        # More rows are ready now only if the page was full and nothing was held back
+        "has_more": fetched == limit and len(results) == fetched,
+        "results": results,
+    })
+
+
+BY_REF_LIMIT = 5000
+
+
+@api_view(["GET"])  # Every ledger row of one document, across warehouses
+@permission_classes([permissions.IsAuthenticated])
+def ledger_by_ref(request):
+    """GET ledger/by-ref/?ref_id=<id>[&ref_model=<model>]
+
+    Served by the (ref_id, ref_model) index, so support can look a document up without
+    knowing its warehouse. Rows are returned in posting order with item and location details
+    and a per (warehouse, location, item) net summary."""
+    if not request.user.has_perm("warehousing.view_stockledger"):
+        return Response({"detail": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
+    ref_id = (request.GET.get("ref_id") or "").strip()
+    ref_model = (request.GET.get("ref_model") or "").strip()
+    if not ref_id:
+        return Response({"detail": "ref_id is required"}, status=status.HTTP_400_BAD_REQUEST)
+    qs = StockLedger.objects.filter(ref_id=ref_id)
+    if ref_model:
+        qs = qs.filter(ref_model=ref_model)
+    rows = list(
+        qs.order_by("id").values(
+            "id", "ts", "warehouse_id", "warehouse__code", "location_id", "location__code", "location__display_name",
+            "location__type", "location__subtype", "item_id", "item__sku", "item__name", "qty_delta", "movement_type",
+            "ref_model", "ref_id", "memo", "user__username",
+        )[: BY_REF_LIMIT + 1]
+    )
+    truncated = len(rows) > BY_REF_LIMIT
+    rows = rows[:BY_REF_LIMIT]
+    net = {}
+    for r in rows:
+        key = (r["warehouse_id"], r["location_id"], r["item_id"])
+        if key not in net:
+            net[key] = {"warehouse": r["warehouse_id"], "location": r["location_id"], "location_code": r["location__code"] or r["location__subtype"], "item": r["item_id"], "item_sku": r["item__sku"], "qty": 0}
+        net[key]["qty"] += r["qty_delta"]
+    return Response({
+        "ref_id": ref_id,
+        "ref_model": ref_model or None,
+        "count": len(rows),
+        "truncated": truncated,
+        "ref_models": sorted({r["ref_model"] for r in rows}),
+        "warehouses": sorted({r["warehouse__code"] for r in rows}),
+        "results": [
+            {
+                "id": r["id"],
+                "ts": r["ts"],
+                "warehouse": r["warehouse_id"],
+                "warehouse_code": r["warehouse__code"],
+                "location": r["location_id"],
+                "location_code": r["location__code"],
+                "location_name": r["location__display_name"],
+                "location_type": r["location__type"],
+                "location_subtype": r["location__subtype"],
+                "item": r["item_id"],
+                "item_sku": r["item__sku"],
+                "item_name": r["item__name"],
+                "qty_delta": r["qty_delta"],
+                "movement_type": r["movement_type"],
+                "ref_model": r["ref_model"],
+                "ref_id": r["ref_id"],
+                "memo": r["memo"],
+                "user": r["user__username"],
+            }
+            for r in rows
+        ],
+        "net": [v for v in net.values() if v["qty"] != 0],
+    })
@@ -0,0 +1,57 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.shortcuts import get_object_or_404
+from rest_framework import filters, generics, permissions, status
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
+from rest_framework.response import Response
+
+from .models import GoodsReceipt, Warehouse
+from .serializers_grn import GoodsReceiptDetailSerializer, GoodsReceiptPayloadSerializer, GoodsReceiptSerializer
+from .services_grn import parse_receipt_csv, receive_goods
+
+
+class WarehouseReceiptsView(generics.ListCreateAPIView):
+    """Goods receipts of a warehouse. POST a JSON document ({reference, memo, idempotency_key,
+    lines: [{item | sku, qty, lot?, expiry?}]}) or a multipart ``file`` CSV (columns item or
+    sku, qty, optional lot and expiry; the other fields as form fields). The idempotency key may also come as an Idempotency-Key
+    header; a repeated key returns the original receipt with 200 instead of posting again."""
+    serializer_class = GoodsReceiptSerializer
+    permission_classes = [permissions.IsAuthenticated, permissions.DjangoModelPermissions]
+    parser_classes = [JSONParser, MultiPartParser, FormParser]
+    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    search_fields = ["number", "reference"]
+    ordering_fields = ["created_at", "total_qty", "line_count"]
+    ordering = ["-created_at", "-id"]
+
+    def get_queryset(self):
+        return GoodsReceipt.objects.select_related("warehouse", "created_by").filter(warehouse_id=self.kwargs["pk"])
+
+    def create(self, request, *args, **kwargs):
+        wh = get_object_or_404(Warehouse, pk=kwargs["pk"])
+        upload = request.FILES.get("file")
+        data = {k: request.data.get(k) for k in ("reference", "memo", "idempotency_key") if request.data.get(k) is not None}
+        try:
+            data["lines"] = parse_receipt_csv(upload.read()) if upload else request.data.get("lines")
+        except (DjangoValidationError, UnicodeDecodeError) as e:
+            return Response({"detail": getattr(e, "messages", [str(e)])}, status=status.HTTP_400_BAD_REQUEST)
+        payload = GoodsReceiptPayloadSerializer(data=data)
+        payload.is_valid(raise_exception=True)
+        v = payload.validated_data
+        try:
+            receipt, duplicate = receive_goods(
+                wh,
+                v["lines"],
+                user=request.user,
+                reference=v["reference"],
+                memo=v["memo"],
+                idempotency_key=v["idempotency_key"] or request.headers.get("Idempotency-Key", ""),
+            )
+        except DjangoValidationError as e:
+            return Response({"detail": e.messages}, status=status.HTTP_400_BAD_REQUEST)
+        body = {**GoodsReceiptSerializer(receipt).data, "duplicate": duplicate}
+        return Response(body, status=status.HTTP_200_OK if duplicate else status.HTTP_201_CREATED)
+
+
+class GoodsReceiptDetailView(generics.RetrieveAPIView):
+    queryset = GoodsReceipt.objects.select_related("warehouse", "created_by").prefetch_related("lines__item", "lines__lot")
+    serializer_class = GoodsReceiptDetailSerializer
+    permission_classes = [permissions.IsAuthenticated]
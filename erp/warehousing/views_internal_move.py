@@ -1,3 +1,4 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db.models import Sum, Q
 from django.shortcuts import get_object_or_404
 from rest_framework.decorators import api_view, permission_classes
@@ -56,6 +57,7 @@ def internal_move_confirm(request, pk: int):
             source_location_id=int(ln["source_location"]),
             target_location_id=int(ln["target_location"]),
             qty=ln["qty"],
+            serials=tuple(ln.get("serials") or ()),
         ))
     idem = ser.validated_data.get("idempotency_key") or None
     try:
@@ -136,14 +138,17 @@ class ConfirmRowMove(APIView):
         if not ser.is_valid():
             return Response(ser.errors, status=status.HTTP_400_BAD_REQUEST)
         wh = get_object_or_404(Warehouse, pk=pk)
-        res = post_internal_move_rows(
-            warehouse=wh,
-            from_id=ser.validated_data['from_location'],
-            to_id=ser.validated_data['to_location'],
-            lines=ser.validated_data['lines'],
-            user=request.user,
-            memo=ser.validated_data.get('memo') or None,
-        )
+        try:
+            res = post_internal_move_rows(
+                warehouse=wh,
+                from_id=ser.validated_data['from_location'],
+                to_id=ser.validated_data['to_location'],
+                lines=ser.validated_data['lines'],
+                user=request.user,
+                memo=ser.validated_data.get('memo') or None,
+            )
+        except DjangoValidationError as e:
+            return Response({'errors': {'_form': e.messages}}, status=status.HTTP_400_BAD_REQUEST)
         if not res.get('ok'):
             return Response({'errors': res.get('errors')}, status=status.HTTP_400_BAD_REQUEST)
         return Response({'moved_lines': res['moved_lines'], 'total_qty': res['total_qty']})
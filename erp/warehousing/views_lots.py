@@ -0,0 +1,36 @@
+from django.shortcuts import get_object_or_404
+from rest_framework import permissions, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from .models import Warehouse
+from .services_lots import fefo_lots, near_expiry
+
+
+def _float_qty(rows):
+    return [{**r, "qty": float(r["qty"])} for r in rows]
+
+
+@api_view(["GET"])  # Lots on hand in FEFO order; ?item=<id>[,<id>...], ?all=1 to include virtual bins
+@permission_classes([permissions.IsAuthenticated])
+def warehouse_lots(request, pk: int):
+    wh = get_object_or_404(Warehouse, pk=pk)
+    try:
+        item_ids = [int(v) for v in (request.GET.get("item") or "").split(",") if v.strip()]
+    except ValueError:
+        return Response({"detail": "item must be a comma-separated list of ids"}, status=status.HTTP_400_BAD_REQUEST)
+    if not item_ids:
+        return Response({"detail": "item is required"}, status=status.HTTP_400_BAD_REQUEST)
+    physical_only = (request.GET.get("all") or "").lower() not in ("1", "true", "yes")
+    return Response({"warehouse": wh.id, "results": _float_qty(fefo_lots(wh.id, item_ids, physical_only=physical_only))})
+
+
+@api_view(["GET"])  # Lots expiring within ?days= (default 30), expired ones included
+@permission_classes([permissions.IsAuthenticated])
+def warehouse_near_expiry(request, pk: int):
+    wh = get_object_or_404(Warehouse, pk=pk)
+    try:
+        days = int(request.GET.get("days") or 30)
+        limit = min(int(request.GET.get("limit") or 500), 5000)
+    except ValueError:
+        return Response({"detail": "days and limit must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({"warehouse": wh.id, "days": days, "results": _float_qty(near_expiry(wh.id, days=days, limit=limit))})
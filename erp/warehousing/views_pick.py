@@ -0,0 +1,92 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import F
+from django.shortcuts import get_object_or_404
+from rest_framework import mixins, permissions, status, viewsets
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.response import Response
+
+from .models import Location, LocationType, PickList, Warehouse
+from .serializers_pick import PickConfirmSerializer, PickListDetailSerializer, PickListPayloadSerializer, PickListSerializer
+from .services_pick import cancel_pick_list, confirm_pick_list, generate_pick_list, set_pick_sequence
+
+
+class PickListViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    queryset = PickList.objects.select_related("created_by", "confirmed_by").all().order_by("-id")
+    serializer_class = PickListSerializer
+    permission_classes = [permissions.IsAuthenticated, permissions.DjangoModelPermissions]
+    filterset_fields = ["warehouse", "status", "ref_model", "ref_id"]
+    search_fields = ["number", "ref_id"]
+    ordering_fields = ["created_at", "confirmed_at"]
+
+    def get_serializer_class(self):
+        return PickListDetailSerializer if self.action == "retrieve" else PickListSerializer
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        if self.action == "retrieve":
+            qs = qs.prefetch_related("lines__location", "lines__item", "lines__lot")
+        return qs
+
+    def _detail(self, pl, code=status.HTTP_200_OK):
+        pl = self.get_queryset().prefetch_related("lines__location", "lines__item", "lines__lot").get(pk=pl.pk)
+        return Response(PickListDetailSerializer(pl).data, status=code)
+
+    def create(self, request, *args, **kwargs):
+        """Allocate an order's lines to locations and return the list in walking order."""
+        payload = PickListPayloadSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+        data = payload.validated_data
+        wh = get_object_or_404(Warehouse, pk=data["warehouse"])
+        try:
+            pl = generate_pick_list(
+                wh,
+                data["lines"],
+                user=request.user,
+                ref_model=data["ref_model"],
+                ref_id=data["ref_id"],
+                allow_partial=data["allow_partial"],
+            )
+        except DjangoValidationError as e:
+            return Response({"detail": e.messages}, status=status.HTTP_409_CONFLICT)
+        return self._detail(pl, status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=["post"])
+    def confirm(self, request, pk=None):
+        payload = PickConfirmSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+        picked = {p["line"]: p["qty"] for p in payload.validated_data["picked"]}
+        try:
+            pl = confirm_pick_list(self.get_object(), user=request.user, picked=picked)
+        except DjangoValidationError as e:
+            return Response({"detail": e.messages}, status=status.HTTP_400_BAD_REQUEST)
+        return self._detail(pl)
+
+    @action(detail=True, methods=["post"])
+    def cancel(self, request, pk=None):
+        try:
+            pl = cancel_pick_list(self.get_object())
+        except DjangoValidationError as e:
+            return Response({"detail": e.messages}, status=status.HTTP_400_BAD_REQUEST)
+        return self._detail(pl)
+
+
+@api_view(["GET", "POST"])  # Walking order of the PHYSICAL locations used by pick lists
+@permission_classes([permissions.IsAuthenticated])
+def warehouse_pick_sequence(request, pk: int):
+    wh = get_object_or_404(Warehouse, pk=pk)
+    if request.method == "POST":
+        if not request.user.has_perm("warehousing.change_location"):
+            return Response({"detail": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
+        codes = request.data.get("codes")
+        if not isinstance(codes, list) or not all(isinstance(c, str) for c in codes):
+            return Response({"detail": "codes must be a list of location codes"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            set_pick_sequence(wh, codes)
+        except DjangoValidationError as e:
+            return Response({"detail": e.messages}, status=status.HTTP_400_BAD_REQUEST)
+    rows = (
+        Location.objects.filter(warehouse=wh, type=LocationType.PHYSICAL)
+        .order_by(F("pick_sequence").asc(nulls_last=True), "code")
+        .values("id", "code", "display_name", "pick_sequence")
+    )
+    return Response({"warehouse": wh.id, "results": list(rows)})
@@ -7,8 +7,10 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework import permissions, status
 from rest_framework.response import Response
 from .models import Warehouse, Location, LocationType, VirtualSubtype, StockLedger
-from .serializers_putaway import PutawayListRowSerializer, PutawayBatchSerializer
+from catalog.models import Item
+from .serializers_putaway import PutawayListRowSerializer, PutawayBatchSerializer, PutawaySuggestRequestSerializer
 from .services_putaway import post_actions
+from .services_putaway_suggest import putaway_worklist, suggest_putaway
 
 
 @api_view(["GET"])  # KPIs for Putaway (RETURN/RECEIVE bins)
@@ -149,13 +151,16 @@ def putaway_confirm(request, pk: int):
     idempotency_key = ser.validated_data.get("idempotency_key") or None
     # Defensive: collapse any duplicate identical actions client-side did not merge (extra safety)
     collapsed = {}
+    serials = {}
     for a in actions:
         key = (a['type'], a['item'], a['source_bin'], a.get('target_location'))
         collapsed[key] = collapsed.get(key, Decimal('0')) + a['qty']
+        serials.setdefault(key, []).extend(a.get('serials') or [])
     normalized_actions = []
     for (t,i,s,tgt), qty in collapsed.items():
         d = {'type':t,'item':i,'source_bin':s,'qty':qty}
         if t=='PUTAWAY': d['target_location']=tgt
+        if serials[(t,i,s,tgt)]: d['serials']=serials[(t,i,s,tgt)]
         normalized_actions.append(d)
     actions = normalized_actions
     try:
@@ -172,3 +177,34 @@ def putaway_confirm(request, pk: int):
     except Exception as e:
         return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
     return Response({"ok": True, **result})
+
+
+@api_view(["GET", "POST"])  # Suggested PHYSICAL targets for the putaway worklist
+@permission_classes([permissions.IsAuthenticated])
+def putaway_suggestions(request, pk: int):
+    """GET: suggestions for everything waiting in the RETURN/RECEIVE bins (?bin=, ?subtype=).
+    POST {"lines": [{"item", "qty", "source_bin"?}]}: suggestions for the given lines."""
+    wh = get_object_or_404(Warehouse, pk=pk)
+    if request.method == "POST":
+        ser = PutawaySuggestRequestSerializer(data=request.data)
+        if not ser.is_valid():
+            return Response(ser.errors, status=status.HTTP_400_BAD_REQUEST)
+        lines = ser.validated_data["lines"]
+    else:
+        try:
+            bin_id = int(request.GET["bin"]) if request.GET.get("bin") else None
+        except ValueError:
+            return Response({"detail": "bin must be an id"}, status=status.HTTP_400_BAD_REQUEST)
+        lines = putaway_worklist(wh, bin_id=bin_id, subtype=request.GET.get("subtype") or None)
+    results = suggest_putaway(wh, lines)
+    skus = dict(Item.objects.filter(id__in={r["item"] for r in results}).values_list("id", "sku"))
+    return Response({"results": [
+        {
+            **r,
+            "sku": skus.get(r["item"], ""),
+            "qty": float(r["qty"]),
+            "unplaced": float(r["unplaced"]),
+            "targets": [{**t, "qty": float(t["qty"])} for t in r["targets"]],
+        }
+        for r in results
+    ]})
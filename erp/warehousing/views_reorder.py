@@ -0,0 +1,50 @@
+from rest_framework import filters, generics, permissions, viewsets
+
+from .models import Alert, AlertStatus, ReorderSetting
+from .serializers_reorder import AlertSerializer, ReorderSettingSerializer
+from .services_reorder import evaluate_keys
+
+
+class ReorderSettingViewSet(viewsets.ModelViewSet):
+    queryset = ReorderSetting.objects.select_related("item", "updated_by").all().order_by("warehouse_id", "item__sku")
+    serializer_class = ReorderSettingSerializer
+    permission_classes = [permissions.IsAuthenticated, permissions.DjangoModelPermissions]
+    filterset_fields = ["warehouse", "item", "active"]
+    search_fields = ["item__sku", "item__name"]
+    ordering_fields = ["item__sku", "reorder_point", "updated_at"]
+
+    # A changed rule is checked right away instead of waiting for the next stock movement
+    def perform_create(self, serializer):
+        obj = serializer.save(updated_by=self.request.user)
+        evaluate_keys({(obj.warehouse_id, obj.item_id)})
+
+    def perform_update(self, serializer):
+        obj = serializer.save(updated_by=self.request.user)
+        evaluate_keys({(obj.warehouse_id, obj.item_id)})
+
+    def perform_destroy(self, instance):
+        key = (instance.warehouse_id, instance.item_id)
+        instance.delete()
+        evaluate_keys({key})
+
+
+class AlertListView(generics.ListAPIView):
+    """Stock alerts; open ones by default (?status=RESOLVED or ?status=ALL for the rest)."""
+    serializer_class = AlertSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    search_fields = ["item__sku", "item__name"]
+    ordering_fields = ["opened_at", "updated_at", "available"]
+    ordering = ["-opened_at"]
+
+    def get_queryset(self):
+        qs = Alert.objects.select_related("item", "warehouse")
+        params = self.request.query_params
+        status = (params.get("status") or AlertStatus.OPEN).upper()
+        if status != "ALL":
+            qs = qs.filter(status=status)
+        if params.get("warehouse"):
+            qs = qs.filter(warehouse_id=params["warehouse"])
+        if params.get("kind"):
+            qs = qs.filter(kind=params["kind"])
+        return qs
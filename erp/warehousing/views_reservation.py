@@ -0,0 +1,104 @@
+from datetime import timedelta
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.utils import timezone
+from rest_framework import mixins, permissions, status, viewsets
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.response import Response
+
+from catalog.models import Item
+from .models import ReservationStatus, StockReservation
+from .serializers_reservation import AtpPayloadSerializer, ReservePayloadSerializer, StockReservationSerializer
+from .services_reservation import atp, check_lines, close_reservations, reserve
+
+
+def _resolve_lines(lines: list[dict]) -> tuple[list[dict], list[str]]:
+    """Fill in item ids for lines given by SKU (one query). Returns (lines, unknown skus)."""
+    skus = {ln["sku"] for ln in lines if not ln.get("item")}
+    ids = dict(Item.objects.filter(sku__in=skus).values_list("sku", "id")) if skus else {}
+    missing = sorted(skus - ids.keys())
+    out = []
+    for ln in lines:
+        item = ln.get("item") or ids.get(ln["sku"])
+        if item:
+            out.append({"warehouse": ln["warehouse"], "item": item, "location": ln.get("location"), "qty": ln["qty"]})
+    return out, missing
+
+
+@api_view(["POST"])  # Batch available-to-promise for order capture
+@permission_classes([permissions.IsAuthenticated])
+def atp_check(request):
+    payload = AtpPayloadSerializer(data=request.data)
+    payload.is_valid(raise_exception=True)
+    lines, missing = _resolve_lines(payload.validated_data["lines"])
+    if missing:
+        return Response({"detail": "Unknown SKU(s)", "missing": missing}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        check_lines(lines)
+    except DjangoValidationError as e:
+        return Response({"detail": e.messages}, status=status.HTTP_400_BAD_REQUEST)
+    results = atp(lines)
+    return Response({
+        "ok": all(r["ok"] for r in results),
+        "results": [
+            {**r, **{k: float(r[k]) for k in ("on_hand", "reserved", "atp", "qty")}}
+            for r in results
+        ],
+    })
+
+
+class StockReservationViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    queryset = StockReservation.objects.select_related("item", "created_by").all().order_by("-id")
+    serializer_class = StockReservationSerializer
+    permission_classes = [permissions.IsAuthenticated, permissions.DjangoModelPermissions]
+    filterset_fields = ["warehouse", "item", "location", "status", "ref_model", "ref_id"]
+    search_fields = ["ref_id", "item__sku"]
+    ordering_fields = ["created_at", "expires_at"]
+
+    def create(self, request, *args, **kwargs):
+        """Reserve every line (all or nothing) for one reference, e.g. a sales order."""
+        payload = ReservePayloadSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+        data = payload.validated_data
+        lines, missing = _resolve_lines(data["lines"])
+        if missing:
+            return Response({"detail": "Unknown SKU(s)", "missing": missing}, status=status.HTTP_400_BAD_REQUEST)
+        expires_at = data.get("expires_at")
+        if expires_at is None and data.get("ttl_minutes"):
+            expires_at = timezone.now() + timedelta(minutes=data["ttl_minutes"])
+        try:
+            check_lines(lines)
+        except DjangoValidationError as e:
+            return Response({"detail": e.messages}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            objs = reserve(
+                lines,
+                user=request.user,
+                ref_model=data["ref_model"],
+                ref_id=data["ref_id"],
+                expires_at=expires_at,
+                allow_short=data["allow_short"],
+            )
+        except DjangoValidationError as e:
+            return Response({"detail": " ".join(e.messages)}, status=status.HTTP_409_CONFLICT)
+        qs = self.get_queryset().filter(id__in=[o.id for o in objs]).order_by("id")
+        return Response({"results": StockReservationSerializer(qs, many=True).data}, status=status.HTTP_201_CREATED)
+
+    def _close(self, qs, to_status):
+        closed = close_reservations(qs, to_status)
+        return Response({"closed": closed})
+
+    @action(detail=True, methods=["post"])
+    def release(self, request, pk=None):
+        return self._close(StockReservation.objects.filter(pk=self.get_object().pk), ReservationStatus.RELEASED)
+
+    @action(detail=True, methods=["post"])
+    def consume(self, request, pk=None):
+        return self._close(StockReservation.objects.filter(pk=self.get_object().pk), ReservationStatus.CONSUMED)
+
+    @action(detail=False, methods=["post"], url_path="release_by_ref")
+    def release_by_ref(self, request):
+        ref_model, ref_id = request.data.get("ref_model") or "", request.data.get("ref_id") or ""
+        if not ref_id:
+            return Response({"detail": "ref_id is required"}, status=status.HTTP_400_BAD_REQUEST)
+        return self._close(StockReservation.objects.filter(ref_model=ref_model, ref_id=ref_id), ReservationStatus.RELEASED)
@@ -0,0 +1,52 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.shortcuts import get_object_or_404
+from rest_framework import mixins, permissions, status, viewsets
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.response import Response
+
+from .models import SerialUnit, Warehouse
+from .serializers_serials import SerialMovementSerializer, SerialMovePayloadSerializer, SerialUnitSerializer
+from .services_serials import move_serials
+
+
+class SerialUnitViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """Serialized units and where they are. ?serial= finds a unit through the serial index;
+    history lists its movements, newest first."""
+    queryset = SerialUnit.objects.select_related("item", "warehouse", "location", "lot").all().order_by("-id")
+    serializer_class = SerialUnitSerializer
+    permission_classes = [permissions.IsAuthenticated, permissions.DjangoModelPermissions]
+    filterset_fields = ["serial", "item", "warehouse", "location", "status", "lot"]
+    ordering_fields = ["serial", "updated_at"]
+
+    @action(detail=True, methods=["get"])
+    def history(self, request, pk=None):
+        unit = self.get_object()
+        moves = unit.movements.select_related("from_location", "to_location", "user").order_by("-ts", "-id")
+        page = self.paginate_queryset(moves)
+        if page is not None:
+            return self.get_paginated_response(SerialMovementSerializer(page, many=True).data)
+        return Response(SerialMovementSerializer(moves, many=True).data)
+
+
+@api_view(["POST"])  # Move a scan payload of serials to one location (putaway or internal move)
+@permission_classes([permissions.IsAuthenticated])
+def warehouse_serials_move(request, pk: int):
+    wh = get_object_or_404(Warehouse, pk=pk)
+    if not request.user.has_perm("warehousing.change_serialunit"):
+        return Response({"detail": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
+    payload = SerialMovePayloadSerializer(data=request.data)
+    payload.is_valid(raise_exception=True)
+    data = payload.validated_data
+    try:
+        result = move_serials(
+            wh,
+            data["serials"],
+            data["to_location"],
+            item_id=data["item"],
+            user=request.user,
+            ref_id=data["ref_id"] or request.headers.get("Idempotency-Key", ""),
+            memo=data["memo"],
+        )
+    except DjangoValidationError as e:
+        return Response({"detail": e.messages}, status=status.HTTP_409_CONFLICT)
+    return Response(result, status=status.HTTP_200_OK if result["duplicate"] else status.HTTP_201_CREATED)
@@ -0,0 +1,102 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.shortcuts import get_object_or_404
+from rest_framework import mixins, permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from .models import TransferOrder, Warehouse
+from .serializers_transfer import (
+    TransferDispatchSerializer,
+    TransferOrderDetailSerializer,
+    TransferOrderSerializer,
+    TransferReceiptSerializer,
+    TransferReceiveSerializer,
+)
+from .services_transfer import dispatch_transfer, in_transit, in_transit_totals, receive_transfer
+
+
+class TransferOrderViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """Inter-warehouse transfers. POST dispatches ({source_warehouse, dest_warehouse,
+    from_location?, reference, memo, idempotency_key, lines: [{item | sku, qty}]}); receive
+    takes the inbound leg. Both accept the key as an Idempotency-Key header too; a repeated key
+    answers 200 with the original document instead of posting again."""
+    queryset = TransferOrder.objects.select_related("source_warehouse", "dest_warehouse", "created_by").all().order_by("-id")
+    serializer_class = TransferOrderSerializer
+    permission_classes = [permissions.IsAuthenticated, permissions.DjangoModelPermissions]
+    filterset_fields = ["source_warehouse", "dest_warehouse", "status"]
+    search_fields = ["number", "reference"]
+    ordering_fields = ["created_at", "received_at", "total_qty"]
+
+    def get_serializer_class(self):
+        return TransferOrderDetailSerializer if self.action == "retrieve" else TransferOrderSerializer
+
+    def _detail(self, order, code=status.HTTP_200_OK, **extra):
+        order = self.get_queryset().prefetch_related("lines__item", "receipts__created_by").get(pk=order.pk)
+        return Response({**TransferOrderDetailSerializer(order).data, **extra}, status=code)
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        if self.action == "retrieve":
+            qs = qs.prefetch_related("lines__item", "receipts__created_by")
+        return qs
+
+    def create(self, request, *args, **kwargs):
+        payload = TransferDispatchSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+        data = payload.validated_data
+        source = get_object_or_404(Warehouse, pk=data["source_warehouse"])
+        dest = get_object_or_404(Warehouse, pk=data["dest_warehouse"])
+        try:
+            order, duplicate = dispatch_transfer(
+                source,
+                dest,
+                data["lines"],
+                from_location_id=data["from_location"],
+                user=request.user,
+                reference=data["reference"],
+                memo=data["memo"],
+                idempotency_key=data["idempotency_key"] or request.headers.get("Idempotency-Key", ""),
+            )
+        except DjangoValidationError as e:
+            return Response({"detail": e.messages}, status=status.HTTP_409_CONFLICT)
+        return self._detail(order, status.HTTP_200_OK if duplicate else status.HTTP_201_CREATED, duplicate=duplicate)
+
+    @action(detail=True, methods=["post"])
+    def receive(self, request, pk=None):
+        payload = TransferReceiveSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+        data = payload.validated_data
+        order = self.get_object()
+        try:
+            receipt, duplicate = receive_transfer(
+                order,
+                data["lines"],
+                user=request.user,
+                idempotency_key=data["idempotency_key"] or request.headers.get("Idempotency-Key", ""),
+            )
+        except DjangoValidationError as e:
+            return Response({"detail": e.messages}, status=status.HTTP_400_BAD_REQUEST)
+        return self._detail(
+            order,
+            status.HTTP_200_OK if duplicate else status.HTTP_201_CREATED,
+            receipt=TransferReceiptSerializer(receipt).data,
+            duplicate=duplicate,
+        )
+
+    @action(detail=False, methods=["get"], url_path="in-transit")
+    def in_transit(self, request):
+        """Open quantities on the road: per item with ?source= and/or ?dest= (and ?item=),
+        otherwise totals per warehouse pair (?warehouse= limits them to pairs touching it)."""
+        params = {}
+        for name in ("source", "dest", "item", "warehouse"):
+            value = request.query_params.get(name)
+            if value:
+                try:
+                    params[name] = int(value)
+                except ValueError:
+                    return Response({"detail": f"{name} must be an id"}, status=status.HTTP_400_BAD_REQUEST)
+        if "source" in params or "dest" in params:
+            rows = in_transit(source_id=params.get("source"), dest_id=params.get("dest"), item_ids=[params["item"]] if "item" in params else None)
+        else:
+            rows = in_transit_totals(warehouse_id=params.get("warehouse"))
+        return Response({"results": [{**r, "qty": float(r["qty"])} for r in rows]})
@@ -0,0 +1,30 @@
+from rest_framework import filters, generics, permissions
+from rest_framework.pagination import PageNumberPagination
+from .models import ItemVelocity
+from .serializers import ItemVelocitySerializer
+
+
+class VelocityPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+
+class WarehouseItemVelocityView(generics.ListAPIView):
+    """ItemVelocity rows of one warehouse; filter with ?abc=A&xyz=X (comma-separated allowed)."""
+    serializer_class = ItemVelocitySerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    search_fields = ["item__sku", "item__name"]
+    ordering_fields = ["rank", "outbound_qty", "avg_daily_qty", "cv", "days_of_cover", "on_hand"]
+    ordering = ["rank"]
+    pagination_class = VelocityPagination
+
+    def get_queryset(self):
+        qs = ItemVelocity.objects.select_related("item").filter(warehouse_id=self.kwargs.get("pk"))
+        params = self.request.query_params
+        if params.get("abc"):
+            qs = qs.filter(abc_class__in=[c.strip().upper() for c in params["abc"].split(",") if c.strip()])
+        if params.get("xyz"):
+            qs = qs.filter(xyz_class__in=[c.strip().upper() for c in params["xyz"].split(",") if c.strip()])
+        return qs